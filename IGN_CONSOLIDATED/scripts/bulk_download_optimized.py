@@ -5,6 +5,7 @@ Based on official IGN documentation for efficient large dataset downloads
 """
 
 import requests
+import sys
 import time
 import os
 from pathlib import Path
@@ -12,6 +13,13 @@ import json
 from typing import List, Dict, Optional
 import logging
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Add project root to path for the shared backend helpers
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.backend.scrapers.adaptive_concurrency import get_controller
+from src.backend.utils.ranged_download import RangedDownloader, ChecksumMismatch, extract_archive
 
 # Configure logging
 logging.basicConfig(
@@ -20,6 +28,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+ARCHIVE_SUFFIXES = ('.zip', '.7z', '.7z.001')
+
 class IGNBulkDownloader:
     """Efficient bulk downloader using IGN Téléchargement service"""
     
@@ -28,9 +38,9 @@ class IGNBulkDownloader:
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         
-        # Rate limiting: Be conservative - 2 requests per second
-        self.min_request_interval = 0.5  # 500ms between requests
-        self.last_request_time = 0
+        # Adaptive concurrency shared with every other data.geopf.fr client:
+        # ramps up while the service is healthy, backs off on 429/5xx
+        self.concurrency = get_controller("data.geopf.fr")
         self.retry_count = 0
         self.max_retries = 3
         
@@ -40,18 +50,36 @@ class IGNBulkDownloader:
             'User-Agent': 'IGN-Bulk-Downloader/1.0'
         })
         
-    def _rate_limit(self):
-        """Ensure we don't exceed rate limits"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            time.sleep(self.min_request_interval - elapsed)
-        self.last_request_time = time.time()
+        # Large archives are fetched as parallel 16 MB ranges, resumable and
+        # written in place; every range goes through the shared controller
+        self.ranged = RangedDownloader(self.session, self.concurrency, chunk_size=16 * 1024 * 1024)
+        self.parallel_files = 4
+        
+    def _request(self, url: str, **kwargs) -> requests.Response:
+        """GET through the adaptive controller, retrying congestion responses
+
+        429s wait for the controller's Retry-After pause; 5xx back off exponentially.
+        """
+        response = None
+        for retry in range(self.max_retries):
+            response = self.concurrency.execute(self.session.get, url, **kwargs)
+            if response.status_code == 429:
+                self._handle_429(retry)
+                continue
+            if response.status_code >= 500:
+                logger.warning(f"Server error {response.status_code}, retry {retry + 1}/{self.max_retries}")
+                if retry < self.max_retries - 1:
+                    time.sleep(2**retry)
+                continue
+            return response
+        return response
     
     def _handle_429(self, retry_num: int):
-        """Handle rate limit errors with exponential backoff"""
-        wait_time = (2 ** retry_num) * 2  # 2, 4, 8 seconds
-        logger.warning(f"Rate limited (429). Waiting {wait_time} seconds...")
-        time.sleep(wait_time)
+        """Log rate limit errors; the controller pauses and shrinks concurrency"""
+        self.retry_count += 1
+        stats = self.concurrency.get_stats()
+        logger.warning(f"Rate limited (429), retry {retry_num + 1}/{self.max_retries}. "
+                       f"Concurrency now {stats['limit']}")
         
     def get_capabilities(self, zone: str = "FRA", format: str = None, 
                         polygon: str = None, limit: int = 50) -> Dict:
@@ -64,8 +92,6 @@ class IGNBulkDownloader:
             polygon: WKT polygon for spatial filtering
             limit: Results per page (max 50)
         """
-        self._rate_limit()
-        
         params = {
             'zone': zone,
             'limit': limit
@@ -79,7 +105,7 @@ class IGNBulkDownloader:
         url = f"{self.base_url}/capabilities"
         
         try:
-            response = self.session.get(url, params=params)
+            response = self._request(url, params=params)
             response.raise_for_status()
             
             # Parse XML response
@@ -117,8 +143,6 @@ class IGNBulkDownloader:
             page: Page number for pagination
             limit: Results per page
         """
-        self._rate_limit()
-        
         url = f"{self.base_url}/resource/{resource_name}"
         params = {
             'page': page,
@@ -126,7 +150,7 @@ class IGNBulkDownloader:
         }
         
         try:
-            response = self.session.get(url, params=params)
+            response = self._request(url, params=params)
             response.raise_for_status()
             
             # Parse XML response
@@ -165,112 +189,113 @@ class IGNBulkDownloader:
             resource_name: Main resource name
             sub_resource: Sub-resource/folder name
         """
-        self._rate_limit()
-        
         url = f"{self.base_url}/resource/{resource_name}/{sub_resource}"
         
-        for retry in range(self.max_retries):
-            try:
-                response = self.session.get(url)
+        try:
+            response = self._request(url)
+            response.raise_for_status()
+            
+            # Parse XML response
+            import xml.etree.ElementTree as ET
+            root = ET.fromstring(response.text)
+            
+            ns = {
+                'atom': 'http://www.w3.org/2005/Atom',
+                'gpf_dl': 'https://data.geopf.fr/annexes/ressources/xsd/gpf_dl.xsd'
+            }
+            
+            files = []
+            for entry in root.findall('atom:entry', ns):
+                title = entry.find('atom:title', ns)
+                link = entry.find('atom:link[@rel="alternate"]', ns)
+                size_elem = entry.find('atom:content[@type="text"]', ns)
                 
-                if response.status_code == 429:
-                    self._handle_429(retry)
-                    continue
+                if title is not None and link is not None:
+                    file_info = {
+                        'name': title.text,
+                        'url': link.get('href'),
+                        'size': 0
+                    }
                     
-                response.raise_for_status()
-                
-                # Parse XML response
-                import xml.etree.ElementTree as ET
-                root = ET.fromstring(response.text)
-                
-                ns = {
-                    'atom': 'http://www.w3.org/2005/Atom',
-                    'gpf_dl': 'https://data.geopf.fr/annexes/ressources/xsd/gpf_dl.xsd'
-                }
-                
-                files = []
-                for entry in root.findall('atom:entry', ns):
-                    title = entry.find('atom:title', ns)
-                    link = entry.find('atom:link[@rel="alternate"]', ns)
-                    size_elem = entry.find('atom:content[@type="text"]', ns)
+                    # Try to extract size from content
+                    if size_elem is not None and size_elem.text:
+                        try:
+                            # Parse size from text like "123456789 bytes"
+                            size_text = size_elem.text.strip()
+                            if 'bytes' in size_text:
+                                file_info['size'] = int(size_text.replace('bytes', '').strip())
+                        except:
+                            pass
                     
-                    if title is not None and link is not None:
-                        file_info = {
-                            'name': title.text,
-                            'url': link.get('href'),
-                            'size': 0
-                        }
-                        
-                        # Try to extract size from content
-                        if size_elem is not None and size_elem.text:
-                            try:
-                                # Parse size from text like "123456789 bytes"
-                                size_text = size_elem.text.strip()
-                                if 'bytes' in size_text:
-                                    file_info['size'] = int(size_text.replace('bytes', '').strip())
-                            except:
-                                pass
-                        
-                        files.append(file_info)
-                
-                return files
-            except Exception as e:
-                if retry < self.max_retries - 1:
-                    logger.warning(f"Retry {retry+1}/{self.max_retries} after error: {e}")
-                    time.sleep(2 ** retry)
-                    continue
-                else:
-                    logger.error(f"Failed to get files list: {e}")
-                    return []
+                    files.append(file_info)
+            
+            return files
+        except Exception as e:
+            # _request already retried 429/5xx with back-off
+            logger.error(f"Failed to get files list: {e}")
+            return []
             
     def download_file(self, resource_name: str, sub_resource: str, 
-                     file_name: str, output_path: Optional[Path] = None) -> bool:
+                     file_name: str, output_path: Optional[Path] = None,
+                     expected_md5: Optional[str] = None, extract: bool = False) -> bool:
         """
-        Download a specific file
+        Download a specific file with parallel ranged GETs, resuming any partial download
         
         Args:
             resource_name: Main resource name
             sub_resource: Sub-resource/folder name
             file_name: Name of the file to download
             output_path: Custom output path (optional)
+            expected_md5: Checksum to verify (e.g. from the companion .md5 file)
+            extract: Stream-extract zip/7z archives next to the download
         """
-        self._rate_limit()
-        
         url = f"{self.base_url}/download/{resource_name}/{sub_resource}/{file_name}"
         
         if not output_path:
             output_path = self.output_dir / resource_name / sub_resource / file_name
             
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        if output_path.exists() and not expected_md5:
+            logger.info(f"⏭️ Already downloaded: {file_name}")
+            return True
         
         try:
-            response = self.session.get(url, stream=True)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
+            result = self.ranged.download(url, output_path, expected_checksum=expected_md5)
+            resumed = f", resumed {result.resumed_bytes / (1024*1024):.1f} MB" if result.resumed_bytes else ""
+            logger.info(f"✅ Downloaded: {file_name} ({result.size / (1024*1024):.1f} MB "
+                        f"in {result.seconds:.1f}s, {result.chunks} chunks{resumed})")
             
-            with open(output_path, 'wb') as f:
-                downloaded = 0
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        if total_size > 0:
-                            progress = (downloaded / total_size) * 100
-                            if downloaded % (1024 * 1024 * 10) == 0:  # Log every 10MB
-                                logger.info(f"Downloading {file_name}: {progress:.1f}%")
-                                
-            logger.info(f"✅ Downloaded: {file_name} ({downloaded / (1024*1024):.1f} MB)")
+            if extract and file_name.lower().endswith(ARCHIVE_SUFFIXES):
+                extract_dir = output_path.parent / output_path.name.split('.')[0]
+                files = extract_archive(output_path, extract_dir)
+                logger.info(f"📂 Extracted {len(files)} files to {extract_dir}")
             return True
             
+        except ChecksumMismatch as e:
+            logger.error(f"Checksum mismatch, partial file discarded: {e}")
+            return False
         except Exception as e:
-            logger.error(f"Failed to download {file_name}: {e}")
+            logger.error(f"Failed to download {file_name} (partial data kept for resume): {e}")
             return False
+    
+    def get_expected_md5(self, resource_name: str, sub_resource: str, file_name: str,
+                         available: Optional[set] = None) -> Optional[str]:
+        """Fetch the companion .md5 published next to an archive, if any"""
+        md5_name = f"{file_name}.md5"
+        if available is not None and md5_name not in available:
+            return None
+        url = f"{self.base_url}/download/{resource_name}/{sub_resource}/{md5_name}"
+        try:
+            response = self._request(url, timeout=30)
+            if response.status_code == 200 and response.text.strip():
+                return response.text.split()[0].lower()
+        except Exception as e:
+            logger.debug(f"No checksum for {file_name}: {e}")
+        return None
             
     def bulk_download_dataset(self, resource_name: str, 
                             target_size_gb: float = 1.0,
-                            file_filter: Optional[str] = None) -> Dict:
+                            file_filter: Optional[str] = None,
+                            extract: bool = False) -> Dict:
         """
         Download entire dataset up to target size
         
@@ -278,6 +303,7 @@ class IGNBulkDownloader:
             resource_name: Resource to download
             target_size_gb: Target download size in GB
             file_filter: Optional filter for file extensions
+            extract: Stream-extract zip/7z archives after download
         """
         target_bytes = target_size_gb * 1024 * 1024 * 1024
         downloaded_bytes = 0
@@ -301,12 +327,16 @@ class IGNBulkDownloader:
                     
                 # Get files in this sub-resource
                 files = self.get_files_list(resource_name, sub_name)
+                available = {f.get('name') for f in files}
                 
+                # Plan the batch up to the target size, then fetch a few files at a time;
+                # each file is itself split into ranges gated by the shared controller
+                batch = []
+                planned_bytes = downloaded_bytes
                 for file_info in files:
                     file_name = file_info.get('name')
-                    file_size = file_info.get('size', 0)
                     
-                    if not file_name:
+                    if not file_name or file_name.endswith('.md5'):
                         continue
                         
                     # Apply filter if specified
@@ -314,18 +344,29 @@ class IGNBulkDownloader:
                         continue
                         
                     # Check if we've reached target
-                    if downloaded_bytes >= target_bytes:
-                        logger.info(f"📊 Reached target size: {downloaded_bytes / (1024*1024*1024):.2f} GB")
+                    if planned_bytes >= target_bytes:
                         break
                         
-                    # Download file
-                    if self.download_file(resource_name, sub_name, file_name):
-                        downloaded_files.append(file_name)
-                        downloaded_bytes += file_size
-                    else:
-                        failed_files.append(file_name)
+                    batch.append(file_info)
+                    planned_bytes += file_info.get('size', 0)
+                
+                def fetch(file_info: Dict) -> bool:
+                    md5 = self.get_expected_md5(resource_name, sub_name, file_info['name'], available)
+                    return self.download_file(resource_name, sub_name, file_info['name'],
+                                              expected_md5=md5, extract=extract)
+                
+                with ThreadPoolExecutor(max_workers=self.parallel_files) as executor:
+                    futures = {executor.submit(fetch, f): f for f in batch}
+                    for future in as_completed(futures):
+                        file_info = futures[future]
+                        if future.result():
+                            downloaded_files.append(file_info['name'])
+                            downloaded_bytes += file_info.get('size', 0)
+                        else:
+                            failed_files.append(file_info['name'])
                         
                 if downloaded_bytes >= target_bytes:
+                    logger.info(f"📊 Reached target size: {downloaded_bytes / (1024*1024*1024):.2f} GB")
                     break
                     
             page += 1
@@ -389,6 +430,7 @@ def download_occitanie_datasets():
             
     logger.info(f"\n{'='*60}")
     logger.info(f"🎯 TOTAL DOWNLOADED: {total_downloaded:.2f} GB")
+    logger.info(f"📈 Concurrency: {downloader.concurrency.get_stats()}")
     logger.info(f"{'='*60}")
 
 if __name__ == "__main__":
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Precompute slope, aspect, ruggedness, max slope and relief grids from local DEM rasters.
+One grid per DEM (e.g. the per-department RGE ALTI COGs written by
+preprocess_ign_packs.py); BasicGeoAI.calculate_difficulty_scores() then reads
+terrain for whole spot batches from them.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.backend.raster.terrain import DEFAULT_TERRAIN_DIR, build_terrain_grid
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build terrain derivative grids from DEM rasters')
+    parser.add_argument('dems', nargs='*', help='DEM GeoTIFF/COG files or directories')
+    parser.add_argument('--output', default=str(DEFAULT_TERRAIN_DIR))
+    parser.add_argument('--tile-size', type=int, default=256)
+    args = parser.parse_args()
+
+    sources = [Path(p) for p in args.dems] or [Path('/tmp/ign_data/processed/rgealti')]
+    dems = []
+    for source in sources:
+        dems.extend(sorted(source.glob('*.tif')) if source.is_dir() else [source])
+    if not dems:
+        print("❌ No DEM rasters found")
+        sys.exit(1)
+
+    for dem in dems:
+        start = time.time()
+        output = build_terrain_grid(dem, Path(args.output) / dem.stem, tile_size=args.tile_size)
+        print(f"✅ {dem.name} -> {output} ({time.time() - start:.1f}s)")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Render hillshade and slope-class overlays from the RGE ALTI DEM into MBTiles.
+Output goes to the offline derived-layers directory, where /api/ign-offline
+registers it automatically under the "overlay" category.
+"""
+
+import sys
+import time
+import argparse
+import logging
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.backend.api.ign_offline import DERIVED_DIR
+from src.backend.raster.hillshade_tiles import LAYERS, TerrainTileGenerator
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Render hillshade / slope MBTiles from DEM rasters')
+    parser.add_argument('dems', nargs='*', help='DEM GeoTIFF/COG files or directories')
+    parser.add_argument('--output', default=str(DERIVED_DIR))
+    parser.add_argument('--prefix', default='rgealti')
+    parser.add_argument('--minzoom', type=int, default=8)
+    parser.add_argument('--maxzoom', type=int, default=15)
+    parser.add_argument('--layers', default=','.join(LAYERS))
+    parser.add_argument('--metatile', type=int, default=8, help='Tiles per metatile side')
+    parser.add_argument('--z-factor', type=float, default=1.0, help='Vertical exaggeration')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    sources = [Path(p) for p in args.dems] or [Path('/tmp/ign_data/processed/rgealti')]
+    dems = []
+    for source in sources:
+        dems.extend(sorted(source.glob('*.tif')) if source.is_dir() else [source])
+    if not dems:
+        print("❌ No DEM rasters found")
+        sys.exit(1)
+
+    generator = TerrainTileGenerator(
+        dems,
+        min_zoom=args.minzoom,
+        max_zoom=args.maxzoom,
+        layers=args.layers.split(','),
+        metatile=args.metatile,
+        z_factor=args.z_factor,
+        workers=args.workers,
+    )
+    start = time.time()
+    stats = generator.generate(args.output, prefix=args.prefix)
+    print(f"✅ {stats['metatiles']} metatiles, tiles {stats['tiles']} in {time.time() - start:.1f}s")
+    for layer, path in stats['outputs'].items():
+        print(f"   {layer}: {path}")
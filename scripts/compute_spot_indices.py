@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Compute NDVI / NDWI / built-up indices of a SPOT scene headless, without QGIS.
+Blocks are processed in parallel and written to tiled, compressed COGs with overviews
+that QGIS can then open directly.
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.backend.raster.indices import BAND_PRESETS, INDICES, IndexCalculator
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compute spectral indices of a SPOT scene')
+    parser.add_argument('scene', help='Multispectral GeoTIFF')
+    parser.add_argument('--output', default='exports/indices')
+    parser.add_argument('--prefix', help='Output name prefix (default: scene name)')
+    parser.add_argument('--indices', default='ndvi,ndwi', help=f"Comma-separated, from {','.join(INDICES)}")
+    parser.add_argument('--preset', default='spot67', choices=sorted(BAND_PRESETS))
+    parser.add_argument('--bands', help='Band mapping overriding the preset, e.g. red=3,nir=4,green=2')
+    parser.add_argument('--block-size', type=int, default=1024)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    bands = None
+    if args.bands:
+        bands = {name: int(number) for name, number in (pair.split('=') for pair in args.bands.split(','))}
+
+    try:
+        calculator = IndexCalculator(
+            args.scene,
+            bands=bands,
+            preset=args.preset,
+            indices=args.indices.split(','),
+            block_size=args.block_size,
+            workers=args.workers,
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    stats = calculator.run(args.output, prefix=args.prefix)
+    print(f"✅ {stats['pixels'] / 1e6:.1f} Mpx in {stats['blocks']} blocks with {stats['workers']} workers")
+    print(f"   indices: {stats['compute_seconds']:.1f}s ({stats['compute_mpx_per_second']} Mpx/s), "
+          f"with COG + overviews: {stats['seconds']:.1f}s ({stats['mpx_per_second']} Mpx/s)")
+    for index, path in stats['outputs'].items():
+        print(f"   {index}: {path}")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Detect changes between two dates of SPOT imagery headless, without QGIS.
+The new scene is co-registered on the old one, the index difference is thresholded
+and vectorized, and with --districts a per-district summary (e.g. the Toulouse
+quartiers) is written next to the rasters and the change polygons.
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.backend.raster.change_detection import ChangeDetector, load_districts
+from src.backend.raster.indices import BAND_PRESETS, INDICES
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Detect changes between two SPOT scenes')
+    parser.add_argument('old', help='Earlier multispectral GeoTIFF (reference grid)')
+    parser.add_argument('new', help='Later multispectral GeoTIFF')
+    parser.add_argument('--output', default='exports/changes')
+    parser.add_argument('--prefix', default='change')
+    parser.add_argument('--index', default='ndvi', choices=INDICES)
+    parser.add_argument('--threshold', type=float, default=0.2, help='Minimum absolute index change')
+    parser.add_argument('--old-preset', default='spot67', choices=sorted(BAND_PRESETS))
+    parser.add_argument('--new-preset', choices=sorted(BAND_PRESETS), help='Default: same as --old-preset')
+    parser.add_argument('--min-area', type=float, default=500.0, help='Smallest polygon kept (m²)')
+    parser.add_argument('--no-coregister', action='store_true', help='Skip the shift estimation')
+    parser.add_argument('--districts', help='District polygons (GeoJSON or GeoPackage)')
+    parser.add_argument('--district-field', help='District name property')
+    parser.add_argument('--block-size', type=int, default=1024)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        detector = ChangeDetector(
+            args.old,
+            args.new,
+            index=args.index,
+            threshold=args.threshold,
+            old_preset=args.old_preset,
+            new_preset=args.new_preset,
+            coregister=not args.no_coregister,
+            min_area=args.min_area,
+            block_size=args.block_size,
+            workers=args.workers,
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    districts = load_districts(args.districts, args.district_field) if args.districts else None
+    summary = detector.run(args.output, prefix=args.prefix, districts=districts)
+    print(f"✅ {summary['polygons']} change polygons: -{summary['decrease_ha']} ha / +{summary['increase_ha']} ha "
+          f"(shift {summary['shift_pixels']} px, {summary['seconds']:.1f}s, {summary['mpx_per_second']} Mpx/s)")
+    for row in sorted(summary.get('districts', []), key=lambda r: -(r['changed_percent'] or 0))[:10]:
+        print(f"   {row['district']:<30} -{row['decrease_ha']:>8} ha  +{row['increase_ha']:>8} ha  "
+              f"{row['changed_percent']}%")
+    for name, path in summary['outputs'].items():
+        print(f"   {name}: {path}")
@@ -11,9 +11,31 @@ import math
 import sqlite3
 import requests
 from pathlib import Path
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Optional
+from urllib.parse import urlparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.backend.scrapers.adaptive_concurrency import get_controller
+
+
+def wmts_tile_url(wmts_base: str, layer: Dict, x: int, y: int, z: int) -> str:
+    """Build a WMTS GetTile URL for one of IGNWMTSDownloader.LAYERS."""
+    params = [
+        "SERVICE=WMTS",
+        "REQUEST=GetTile",
+        "VERSION=1.0.0",
+        f"LAYER={layer['layer']}",
+        f"TILEMATRIXSET={layer['tilematrixset']}",
+        f"TILEMATRIX={z}",
+        f"TILECOL={x}",
+        f"TILEROW={y}",
+        f"STYLE={layer['style']}",
+        f"FORMAT={layer['format']}"
+    ]
+    return f"{wmts_base}?{'&'.join(params)}"
+
+
 class IGNWMTSDownloader:
     """Download IGN tiles using official WMTS service."""
     
@@ -65,6 +87,10 @@ class IGNWMTSDownloader:
         
         # Statistics
         self.stats = {'downloaded': 0, 'failed': 0, 'cached': 0, 'size_mb': 0}
+        
+        # Shared with every other job hitting the Géoplateforme
+        self.session = requests.Session()
+        self.concurrency = get_controller(urlparse(self.WMTS_BASE).netloc)
     
     def _init_mbtiles(self, db_path: Path, layer_key: str) -> sqlite3.Connection:
         """Initialize MBTiles database."""
@@ -121,22 +147,7 @@ class IGNWMTSDownloader:
     
     def get_tile_url(self, layer_key: str, x: int, y: int, z: int) -> str:
         """Build WMTS GetTile URL."""
-        layer = self.LAYERS[layer_key]
-        
-        params = [
-            "SERVICE=WMTS",
-            "REQUEST=GetTile", 
-            "VERSION=1.0.0",
-            f"LAYER={layer['layer']}",
-            f"TILEMATRIXSET={layer['tilematrixset']}",
-            f"TILEMATRIX={z}",
-            f"TILECOL={x}",
-            f"TILEROW={y}",
-            f"STYLE={layer['style']}",
-            f"FORMAT={layer['format']}"
-        ]
-        
-        return f"{self.WMTS_BASE}?{'&'.join(params)}"
+        return wmts_tile_url(self.WMTS_BASE, self.LAYERS[layer_key], x, y, z)
     
     def download_tile(self, layer_key: str, x: int, y: int, z: int) -> bool:
         """Download a single tile."""
@@ -152,7 +163,17 @@ class IGNWMTSDownloader:
             self.stats['cached'] += 1
             return True
         
-        # Download the tile
+        data = self.fetch_tile(layer_key, x, y, z)
+        if data is None:
+            self.stats['failed'] += 1
+            return False
+        
+        self._store_tile(layer_key, z, x, tms_y, data)
+        self.dbs[layer_key].commit()
+        return True
+    
+    def fetch_tile(self, layer_key: str, x: int, y: int, z: int) -> Optional[bytes]:
+        """Fetch tile bytes through the shared adaptive controller (thread-safe, no DB access)."""
         url = self.get_tile_url(layer_key, x, y, z)
         
         try:
@@ -161,27 +182,25 @@ class IGNWMTSDownloader:
                 'Referer': 'https://www.geoportail.gouv.fr/'
             }
             
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.concurrency.execute(self.session.get, url, headers=headers, timeout=10)
             
             if response.status_code == 200 and len(response.content) > 100:
-                # Store in database
-                cursor.execute(
-                    "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)",
-                    (z, x, tms_y, response.content)
-                )
-                self.dbs[layer_key].commit()
-                self.stats['downloaded'] += 1
-                self.stats['size_mb'] += len(response.content) / (1024 * 1024)
-                return True
-            else:
-                self.stats['failed'] += 1
-                return False
+                return response.content
+            return None
                 
         except Exception as e:
-            self.stats['failed'] += 1
             if "Connection" not in str(e):
                 print(f"Error z{z}/{x}/{y}: {e}")
-            return False
+            return None
+    
+    def _store_tile(self, layer_key: str, z: int, x: int, tms_y: int, data: bytes):
+        """Insert a fetched tile (caller commits)."""
+        self.dbs[layer_key].execute(
+            "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)",
+            (z, x, tms_y, data)
+        )
+        self.stats['downloaded'] += 1
+        self.stats['size_mb'] += len(data) / (1024 * 1024)
     
     def download_area(self, layer_key: str, bbox: Tuple[float, float, float, float],
                      zoom_levels: List[int], max_tiles: int = 100) -> Dict:
@@ -210,18 +229,43 @@ class IGNWMTSDownloader:
         
         print(f"   Tiles to process: {len(tiles_to_download)}")
         
-        # Download with progress
-        for i, (z, x, y) in enumerate(tiles_to_download, 1):
-            self.download_tile(layer_key, x, y, z)
-            
-            if i % 10 == 0:
-                print(f"   Progress: {i}/{len(tiles_to_download)} "
-                      f"(↓ {self.stats['downloaded']} ✓ {self.stats['cached']} ✗ {self.stats['failed']})")
-            
-            # Rate limiting to be nice to IGN servers
-            if self.stats['downloaded'] % 5 == 4:
-                time.sleep(0.5)
+        # Skip tiles already in the MBTiles file
+        conn = self.dbs[layer_key]
+        pending = []
+        for z, x, y in tiles_to_download:
+            tms_y = (2 ** z - 1) - y
+            row = conn.execute(
+                "SELECT 1 FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                (z, x, tms_y)
+            ).fetchone()
+            if row:
+                self.stats['cached'] += 1
+            else:
+                pending.append((z, x, y))
+        
+        # Workers only fetch; the adaptive controller decides how many run at once
+        # and backs off on 429/5xx. SQLite writes stay on this thread.
+        with ThreadPoolExecutor(max_workers=self.concurrency.max_limit) as executor:
+            futures = {
+                executor.submit(self.fetch_tile, layer_key, x, y, z): (z, x, y)
+                for z, x, y in pending
+            }
+            for i, future in enumerate(as_completed(futures), 1):
+                z, x, y = futures[future]
+                data = future.result()
+                if data is None:
+                    self.stats['failed'] += 1
+                else:
+                    self._store_tile(layer_key, z, x, (2 ** z - 1) - y, data)
+                
+                if i % 50 == 0:
+                    conn.commit()
+                if i % 10 == 0:
+                    print(f"   Progress: {i}/{len(pending)} "
+                          f"(↓ {self.stats['downloaded']} ✓ {self.stats['cached']} ✗ {self.stats['failed']}, "
+                          f"concurrency {self.concurrency.current_limit})")
         
+        conn.commit()
         return self.stats
     
     def test_connectivity(self) -> bool:
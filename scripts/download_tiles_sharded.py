@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Sharded multi-process IGN WMTS tile download.
+The tile set is split by quadkey prefix (or z/x range), each shard is downloaded
+by its own process into its own MBTiles file, then the shards are merged.
+"""
+
+import os
+import sys
+import time
+import math
+import argparse
+import requests
+from pathlib import Path
+from typing import Tuple, List, Dict, Optional
+from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+sys.path.append(str(Path(__file__).resolve().parent))
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from download_ign_wmts import IGNWMTSDownloader, wmts_tile_url
+from src.backend.scrapers.adaptive_concurrency import HOST_PROFILES, AdaptiveConcurrencyController
+from src.backend.utils.mbtiles import init_mbtiles, merge_mbtiles
+
+Tile = Tuple[int, int, int]  # (z, x, y) in XYZ scheme
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+JPEG_SIGNATURE = b'\xff\xd8\xff'
+
+
+def deg2num(lat_deg: float, lon_deg: float, zoom: int) -> Tuple[int, int]:
+    """Convert lat/lon to tile numbers (Spherical Mercator)."""
+    lat_rad = math.radians(lat_deg)
+    n = 2.0 ** zoom
+    x = int((lon_deg + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return (x, y)
+
+
+def quadkey(x: int, y: int, z: int) -> str:
+    """Bing-style quadkey for an XYZ tile."""
+    digits = []
+    for i in range(z, 0, -1):
+        mask = 1 << (i - 1)
+        digit = 0
+        if x & mask:
+            digit += 1
+        if y & mask:
+            digit += 2
+        digits.append(str(digit))
+    return ''.join(digits)
+
+
+def plan_tiles(bbox: Tuple[float, float, float, float], zoom_levels: List[int],
+               max_tiles: Optional[int] = None) -> List[Tile]:
+    """List XYZ tiles covering a bbox (same traversal as IGNWMTSDownloader.download_area)."""
+    minlon, minlat, maxlon, maxlat = bbox
+    tiles = []
+    for z in zoom_levels:
+        x1, y1 = deg2num(maxlat, minlon, z)
+        x2, y2 = deg2num(minlat, maxlon, z)
+        for x in range(min(x1, x2), max(x1, x2) + 1):
+            for y in range(min(y1, y2), max(y1, y2) + 1):
+                tiles.append((z, x, y))
+                if max_tiles and len(tiles) >= max_tiles:
+                    return tiles
+    return tiles
+
+
+def shard_tiles(tiles: List[Tile], num_shards: int, strategy: str = 'quadkey') -> List[List[Tile]]:
+    """
+    Split tiles into shards.
+
+    'quadkey' groups tiles by quadkey prefix at the lowest requested zoom, so a
+    shard holds spatially coherent pyramids; prefix groups are packed greedily
+    onto the least-loaded shard. 'range' sorts by (z, x, y) and cuts contiguous
+    z/x ranges of equal size.
+    """
+    if not tiles:
+        return []
+    num_shards = max(1, min(num_shards, len(tiles)))
+
+    if strategy == 'range':
+        ordered = sorted(tiles)
+        size = -(-len(ordered) // num_shards)
+        return [ordered[i:i + size] for i in range(0, len(ordered), size)]
+
+    if strategy != 'quadkey':
+        raise ValueError(f"Unknown shard strategy: {strategy}")
+
+    prefix_zoom = min(z for z, _, _ in tiles)
+    groups: Dict[str, List[Tile]] = {}
+    for z, x, y in tiles:
+        prefix = quadkey(x, y, z)[:prefix_zoom]
+        groups.setdefault(prefix, []).append((z, x, y))
+
+    # A handful of prefixes can't feed many workers; go one level deeper if needed
+    while len(groups) < num_shards and prefix_zoom < max(z for z, _, _ in tiles):
+        prefix_zoom += 1
+        groups = {}
+        for z, x, y in tiles:
+            groups.setdefault(quadkey(x, y, z)[:prefix_zoom], []).append((z, x, y))
+
+    shards: List[List[Tile]] = [[] for _ in range(num_shards)]
+    for prefix in sorted(groups, key=lambda p: len(groups[p]), reverse=True):
+        min(shards, key=len).extend(groups[prefix])
+    return [s for s in shards if s]
+
+
+def is_valid_tile(data: bytes, image_format: str) -> bool:
+    """Reject error pages and empty images (the GIL-bound check we keep per process)."""
+    if len(data) <= 100:
+        return False
+    if image_format == 'image/png':
+        return data.startswith(PNG_SIGNATURE)
+    if image_format == 'image/jpeg':
+        return data.startswith(JPEG_SIGNATURE)
+    return True
+
+
+def host_max_limit(wmts_base: str) -> int:
+    """Highest concurrency the adaptive controller allows for this host."""
+    netloc = urlparse(wmts_base).netloc
+    return AdaptiveConcurrencyController(name=netloc, **HOST_PROFILES.get(netloc, {})).max_limit
+
+
+def download_shard(shard_id: int, tiles: List[Tile], layer_key: str, shard_path: str,
+                   wmts_base: str = IGNWMTSDownloader.WMTS_BASE, batch_size: int = 500,
+                   max_limit: Optional[int] = None) -> Dict:
+    """
+    Download one shard into its own MBTiles file. Runs in a worker process.
+
+    Network fetches use a thread pool gated by this process's adaptive
+    controller, capped at max_limit (this shard's share of the host limit);
+    only this process writes to its shard, so inserts never contend.
+    """
+    layer = IGNWMTSDownloader.LAYERS[layer_key]
+    conn = init_mbtiles(shard_path, fast_writes=True)
+    session = requests.Session()
+    netloc = urlparse(wmts_base).netloc
+    options = dict(HOST_PROFILES.get(netloc, {}))
+    if max_limit:
+        options['max_limit'] = max_limit
+        options['initial_limit'] = min(options.get('initial_limit', max_limit), max_limit)
+    controller = AdaptiveConcurrencyController(name=netloc, **options)
+    headers = {
+        'User-Agent': 'SPOTS-QGIS/1.0',
+        'Referer': 'https://www.geoportail.gouv.fr/'
+    }
+    stats = {'shard': shard_id, 'downloaded': 0, 'failed': 0, 'bytes': 0}
+
+    def fetch(tile: Tile) -> Optional[bytes]:
+        z, x, y = tile
+        url = wmts_tile_url(wmts_base, layer, x, y, z)
+        try:
+            response = controller.execute(session.get, url, headers=headers, timeout=10)
+        except requests.RequestException:
+            return None
+        if response.status_code == 200 and is_valid_tile(response.content, layer['format']):
+            return response.content
+        return None
+
+    pending = []
+    with ThreadPoolExecutor(max_workers=controller.max_limit) as executor:
+        futures = {executor.submit(fetch, tile): tile for tile in tiles}
+        for future in as_completed(futures):
+            z, x, y = futures[future]
+            data = future.result()
+            if data is None:
+                stats['failed'] += 1
+                continue
+            pending.append((z, x, (2 ** z - 1) - y, data))
+            stats['downloaded'] += 1
+            stats['bytes'] += len(data)
+            if len(pending) >= batch_size:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)",
+                    pending
+                )
+                conn.commit()
+                pending = []
+
+    if pending:
+        conn.executemany(
+            "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)",
+            pending
+        )
+    conn.commit()
+    conn.close()
+    return stats
+
+
+class ShardedTileDownloader:
+    """Download a tile set with one process and one MBTiles file per shard."""
+
+    def __init__(self, base_dir: str = "/home/miko/Development/projects/spots/offline_tiles",
+                 num_shards: Optional[int] = None, strategy: str = 'quadkey',
+                 wmts_base: str = IGNWMTSDownloader.WMTS_BASE):
+        """Initialize the downloader."""
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.num_shards = num_shards or os.cpu_count() or 4
+        self.strategy = strategy
+        self.wmts_base = wmts_base
+
+    def download_area(self, layer_key: str, bbox: Tuple[float, float, float, float],
+                      zoom_levels: List[int], max_tiles: Optional[int] = None,
+                      keep_shards: bool = False) -> Dict:
+        """Download tiles for an area into ign_<layer>.mbtiles."""
+        start = time.time()
+        tiles = plan_tiles(bbox, zoom_levels, max_tiles)
+        stats = {'downloaded': 0, 'failed': 0, 'bytes': 0}
+        if not tiles:
+            print(f"\n⚠️  No {layer_key.upper()} tiles to download for this area and zoom levels")
+            stats.update({'shards': 0, 'merged': 0, 'download_seconds': 0.0, 'merge_seconds': 0.0, 'size_mb': 0.0})
+            return stats
+
+        # Shards share the host's concurrency limit instead of each taking all of it
+        host_limit = host_max_limit(self.wmts_base)
+        shards = shard_tiles(tiles, min(self.num_shards, host_limit), self.strategy)
+        shard_limit = max(1, host_limit // len(shards))
+        shard_dir = self.base_dir / f".shards_{layer_key}"
+        shard_dir.mkdir(exist_ok=True)
+
+        print(f"\n📦 Downloading {layer_key.upper()} in {len(shards)} shards ({self.strategy})")
+        print(f"   Tiles to process: {len(tiles)}, up to {shard_limit} requests in flight per shard")
+
+        shard_paths = []
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            futures = []
+            for shard_id, shard in enumerate(shards):
+                shard_path = shard_dir / f"shard_{shard_id:03d}.mbtiles"
+                shard_paths.append(shard_path)
+                futures.append(executor.submit(
+                    download_shard, shard_id, shard, layer_key, str(shard_path), self.wmts_base,
+                    max_limit=shard_limit
+                ))
+            for future in as_completed(futures):
+                result = future.result()
+                for key in stats:
+                    stats[key] += result[key]
+                print(f"   Shard {result['shard']}: ↓ {result['downloaded']} ✗ {result['failed']}")
+
+        download_time = time.time() - start
+        target = self.base_dir / f"ign_{layer_key}.mbtiles"
+        init_mbtiles(target, self._metadata(layer_key)).close()
+        merge_stats = merge_mbtiles(target, shard_paths)
+
+        if not keep_shards:
+            for shard_path in shard_paths:
+                shard_path.unlink(missing_ok=True)
+            shard_dir.rmdir()
+
+        stats.update({
+            'shards': len(shards),
+            'merged': merge_stats['tiles'],
+            'download_seconds': round(download_time, 2),
+            'merge_seconds': round(time.time() - start - download_time, 2),
+            'size_mb': stats['bytes'] / (1024 * 1024)
+        })
+        print(f"   ✅ {stats['downloaded']} tiles in {download_time:.1f}s, merged in {stats['merge_seconds']:.1f}s")
+        print(f"   📁 {target}")
+        return stats
+
+    def _metadata(self, layer_key: str) -> Dict[str, str]:
+        layer = IGNWMTSDownloader.LAYERS[layer_key]
+        return {
+            'name': f'IGN {layer_key.upper()}',
+            'type': 'baselayer',
+            'version': '1.0.0',
+            'description': f'IGN {layer["layer"]} for Occitanie',
+            'format': layer['format'].split('/')[-1],
+            'bounds': '-0.5,42.0,4.5,45.0',  # Occitanie
+            'center': '2.0,43.5,10',
+            'minzoom': '8',
+            'maxzoom': str(layer['max_zoom']),
+            'attribution': '© IGN'
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Sharded multi-process IGN WMTS download')
+    parser.add_argument('--layer', default='plan', choices=list(IGNWMTSDownloader.LAYERS))
+    parser.add_argument('--bbox', default='1.35,43.55,1.50,43.65', help='minlon,minlat,maxlon,maxlat')
+    parser.add_argument('--zooms', default='12,13,14')
+    parser.add_argument('--shards', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--strategy', default='quadkey', choices=['quadkey', 'range'])
+    parser.add_argument('--max-tiles', type=int, default=None)
+    parser.add_argument('--output', default="/home/miko/Development/projects/spots/offline_tiles")
+    parser.add_argument('--keep-shards', action='store_true')
+    args = parser.parse_args()
+
+    downloader = ShardedTileDownloader(args.output, num_shards=args.shards, strategy=args.strategy)
+    downloader.download_area(
+        args.layer,
+        tuple(float(v) for v in args.bbox.split(',')),
+        [int(z) for z in args.zooms.split(',')],
+        max_tiles=args.max_tiles,
+        keep_shards=args.keep_shards
+    )
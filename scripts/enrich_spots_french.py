@@ -49,7 +49,15 @@ class FrenchSpotEnricher(OccitanieGeocoder):
         spots = cursor.fetchall()
         total = len(spots)
         logger.info(f"Found {total} spots to enrich with French geocoding data")
-        
+
+        # Resolve missing addresses (and their department lookups) in a few BAN CSV
+        # uploads; the per-spot calls below are then answered from the geocoding cache
+        missing = [(spot['latitude'], spot['longitude']) for spot in spots if spot['address'] is None]
+        if missing:
+            logger.info(f"Bulk reverse geocoding {len(missing)} spots via BAN CSV...")
+            addresses = self.reverse_many(missing)
+            self.geocode_many([address for address in addresses if address])
+
         for i, spot in enumerate(spots):
             spot_id = spot['id']
             lat = spot['latitude']
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Batch forest / land-use enrichment of the spot database.
+Overlays every spot buffer on the preprocessed BD Forêt and RPG GeoPackages
+(see preprocess_ign_packs.py) and stores the results in spot_environment,
+which /api/ign/spots/enriched reads instead of analysing spots one by one.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.backend.scrapers.ign_pretiled import PretiledStore
+from src.backend.services.landcover_overlay import DEFAULT_RADIUS, LandcoverOverlay
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Store forest / land-use overlay results for all spots')
+    parser.add_argument('--db', default=str(Path(__file__).resolve().parents[1] / 'data' / 'occitanie_spots.db'))
+    parser.add_argument('--cache-dir', default='/tmp/ign_data', help='IGNOpenDataService cache directory')
+    parser.add_argument('--radius', type=int, default=DEFAULT_RADIUS)
+    parser.add_argument('--departments', help='Comma-separated department codes (default: all processed)')
+    args = parser.parse_args()
+
+    overlay = LandcoverOverlay(PretiledStore(Path(args.cache_dir) / 'processed'))
+    departments = args.departments.split(',') if args.departments else None
+
+    start = time.time()
+    result = overlay.enrich_database(args.db, args.radius, departments)
+    print(f"✅ {result['enriched']}/{result['spots']} spots enriched in {time.time() - start:.1f}s")
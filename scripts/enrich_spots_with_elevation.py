@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-"""Enrich existing spots with elevation data using Ola Maps API"""
+"""Enrich existing spots with elevation data from local DEM tiles, falling back to Ola Maps API"""
 
 import sqlite3
 import os
@@ -46,22 +46,36 @@ class SpotEnricher(GeocodingMixin):
         enriched = 0
         errors = 0
         
+        # Sample every missing elevation from the local DEM in one vectorized pass
+        missing = [spot for spot in spots if spot['elevation'] is None]
+        dem_elevations = {}
+        if missing and self.dem.available:
+            values = self.dem.elevations([s['latitude'] for s in missing], [s['longitude'] for s in missing])
+            dem_elevations = {
+                spot['id']: round(float(value), 2) for spot, value in zip(missing, values) if value == value
+            }
+            logger.info(f"Local DEM covered {len(dem_elevations)}/{len(missing)} spots")
+        
         for i, spot in enumerate(spots):
             spot_id = spot['id']
             lat = spot['latitude']
             lon = spot['longitude']
             
             updates = {}
+            needs_api = spot['address'] is None
             
             # Get elevation if missing
             if spot['elevation'] is None:
-                elevation = self.get_elevation(lat, lon)
+                elevation = dem_elevations.get(spot_id)
+                if elevation is None and self.ola_api_key:
+                    elevation = self.get_elevation(lat, lon)
+                    needs_api = True
                 if elevation is not None:
                     updates['elevation'] = elevation
                     logger.info(f"[{i+1}/{total}] Added elevation {elevation}m for spot {spot_id}: {spot['name']}")
                     
             # Get address if missing
-            if spot['address'] is None:
+            if spot['address'] is None and self.ola_api_key:
                 address = self.reverse_geocode(lat, lon)
                 if address:
                     updates['address'] = address
@@ -88,11 +102,9 @@ class SpotEnricher(GeocodingMixin):
                     logger.error(f"Error updating spot {spot_id}: {e}")
                     errors += 1
                     
-            # Rate limiting
-            if self.ola_api_key:
+            # Rate limiting (DEM lookups are local and need none)
+            if self.ola_api_key and needs_api:
                 time.sleep(0.5)  # Be nice to the API
-            else:
-                break  # No API key, stop
                 
         # Final commit
         conn.commit()
@@ -179,10 +191,11 @@ if __name__ == "__main__":
     if args.stats:
         enricher.show_elevation_stats()
     else:
-        if not enricher.ola_api_key:
-            print("⚠️ Warning: OLA_MAPS_API_KEY not set!")
+        if not enricher.ola_api_key and not enricher.dem.available:
+            print("⚠️ Warning: OLA_MAPS_API_KEY not set and no DEM tiles found!")
             print("Set it with: export OLA_MAPS_API_KEY='your-key-here'")
             print("Or pass it with: --api-key YOUR_KEY")
+            print("Or drop RGE ALTI / SRTM tiles in data/dem (or set SPOTS_DEM_DIRS)")
             enricher.show_elevation_stats()
         else:
             enricher.enrich_all_spots()
\ No newline at end of file
@@ -12,6 +12,12 @@ import os
 import time
 from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.backend.scrapers.geocoding_cache import MISS, get_geocoding_cache
+from src.backend.scrapers.geocoding_france import OccitanieGeocoder
 
 class IGNEnricher:
     def __init__(self, db_path: str):
@@ -21,6 +27,8 @@ class IGNEnricher:
         self.db_path = db_path
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
+        self.geocode_cache = get_geocoding_cache()
+        self.ban_geocoder = OccitanieGeocoder()  # BAN bulk CSV fallback
         
         # IGN API configuration
         self.ign_api_key = os.getenv('IGN_API_KEY')
@@ -70,13 +78,14 @@ class IGNEnricher:
         spots_to_enrich = cursor.fetchall()
         print(f"📮 Processing {len(spots_to_enrich)} spots for IGN addresses...")
         
+        ban_pending = []
         async with aiohttp.ClientSession() as session:
             for spot in spots_to_enrich:
                 spot_id, lat, lng, name, spot_type = spot
                 
                 try:
                     # IGN Reverse Geocoding
-                    address = await self._get_ign_reverse_geocoding(session, lat, lng)
+                    address, called_api = await self._get_ign_reverse_geocoding(session, lat, lng)
                     
                     if address:
                         cursor.execute(
@@ -85,28 +94,37 @@ class IGNEnricher:
                         )
                         self.stats['enriched_addresses_ign'] += 1
                     else:
-                        # Fallback to BAN if IGN fails
-                        address = await self._get_ban_reverse_geocoding(session, lat, lng)
-                        if address:
-                            cursor.execute(
-                                "UPDATE spots SET address = ? WHERE id = ?",
-                                (address, spot_id)
-                            )
-                            self.stats['enriched_addresses_ban'] += 1
+                        # Fallback to BAN if IGN fails (resolved in bulk below)
+                        ban_pending.append((spot_id, lat, lng))
                     
-                    self.stats['total_api_calls'] += 1
-                    await asyncio.sleep(self.rate_limit_delay)
+                    if called_api:
+                        self.stats['total_api_calls'] += 1
+                        await asyncio.sleep(self.rate_limit_delay)
                     
                 except Exception as e:
                     print(f"❌ Error enriching address for spot {spot_id}: {e}")
                     self.stats['api_errors'] += 1
         
+        if ban_pending:
+            print(f"📮 BAN bulk fallback for {len(ban_pending)} spots...")
+            addresses = self.ban_geocoder.reverse_many([(lat, lng) for _, lat, lng in ban_pending])
+            for (spot_id, _, _), address in zip(ban_pending, addresses):
+                if address:
+                    cursor.execute(
+                        "UPDATE spots SET address = ? WHERE id = ?",
+                        (address, spot_id)
+                    )
+                    self.stats['enriched_addresses_ban'] += 1
+        
         self.conn.commit()
         print(f"✅ Enriched addresses: IGN={self.stats['enriched_addresses_ign']}, BAN={self.stats['enriched_addresses_ban']}")
 
     async def _get_ign_reverse_geocoding(self, session: aiohttp.ClientSession, 
-                                       lat: float, lng: float) -> Optional[str]:
-        """Get address from IGN reverse geocoding service"""
+                                       lat: float, lng: float) -> Tuple[Optional[str], bool]:
+        """Get address from IGN reverse geocoding service; returns (address, called_api)"""
+        cached = self.geocode_cache.get_reverse(lat, lng, kind='reverse_ign_ols')
+        if cached is not MISS:
+            return cached, False
         
         # IGN reverse geocoding XML request
         xml_request = f"""<?xml version="1.0" encoding="UTF-8"?>
@@ -136,35 +154,20 @@ class IGNEnricher:
                     content = await response.text()
                     # Parse XML response for address
                     # Simplified parsing - in production, use proper XML parser
+                    address = None
                     if 'freeFormAddress' in content:
                         # Extract address from XML (simplified)
                         import re
                         match = re.search(r'<Address.*?freeFormAddress="([^"]+)"', content)
                         if match:
-                            return match.group(1)
+                            address = match.group(1)
+                    self.geocode_cache.put_reverse(lat, lng, address, 'ign_ols', kind='reverse_ign_ols')
+                    return address, True
                     
         except Exception as e:
             print(f"IGN geocoding error: {e}")
         
-        return None
-
-    async def _get_ban_reverse_geocoding(self, session: aiohttp.ClientSession,
-                                       lat: float, lng: float) -> Optional[str]:
-        """Fallback to BAN (Base Adresse Nationale) for address"""
-        
-        try:
-            url = f"{self.fallback_endpoints['ban_geocoding']}?lat={lat}&lon={lng}"
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if 'features' in data and data['features']:
-                        feature = data['features'][0]
-                        if 'properties' in feature and 'label' in feature['properties']:
-                            return feature['properties']['label']
-        except Exception as e:
-            print(f"BAN geocoding error: {e}")
-        
-        return None
+        return None, True
 
     async def enrich_elevation_with_ign(self):
         """Enrich elevation using IGN precise elevation service"""
@@ -186,6 +189,15 @@ class IGNEnricher:
                 spot_id, lat, lng = spot
                 
                 try:
+                    cached = self.geocode_cache.get_elevation(lat, lng)
+                    if cached is not MISS:
+                        if cached is not None:
+                            cursor.execute(
+                                "UPDATE spots SET elevation = ? WHERE id = ?",
+                                (round(cached), spot_id)
+                            )
+                        continue
+                    
                     # Try IGN elevation service first
                     elevation = await self._get_ign_elevation(session, lat, lng)
                     
@@ -198,6 +210,7 @@ class IGNEnricher:
                         self.stats['enriched_elevation_ign'] += 1
                     
                     if elevation is not None:
+                        self.geocode_cache.put_elevation(lat, lng, elevation, 'ign')
                         cursor.execute(
                             "UPDATE spots SET elevation = ? WHERE id = ?",
                             (round(elevation), spot_id)
@@ -7,8 +7,14 @@ Enriches data using coordinate analysis, pattern recognition, and internal logic
 import sqlite3
 import math
 import re
+import sys
+from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.backend.raster.dem import get_dem_service
+
 class ImmediateEnricher:
     def __init__(self, db_path: str):
         self.db_path = db_path
@@ -83,7 +89,11 @@ class ImmediateEnricher:
             }
         }
         
+        # Local RGE ALTI / SRTM tiles; regional guesses only where they have no coverage
+        self.dem = get_dem_service()
+        
         self.stats = {
+            'measured_elevation': 0,
             'estimated_elevation': 0,
             'assigned_departments': 0,
             'enhanced_names': 0,
@@ -105,8 +115,21 @@ class ImmediateEnricher:
         spots_to_estimate = cursor.fetchall()
         print(f"📍 Estimating elevation for {len(spots_to_estimate)} spots...")
         
-        for spot in spots_to_estimate:
+        # Measure from the local DEM first, in one vectorized pass
+        measured = [float('nan')] * len(spots_to_estimate)
+        if spots_to_estimate and self.dem.available:
+            measured = self.dem.elevations([s[1] for s in spots_to_estimate], [s[2] for s in spots_to_estimate])
+        
+        for spot, dem_elevation in zip(spots_to_estimate, measured):
             spot_id, lat, lng, spot_type = spot
+            if dem_elevation == dem_elevation:
+                cursor.execute(
+                    "UPDATE spots SET elevation = ? WHERE id = ?",
+                    (round(float(dem_elevation), 1), spot_id)
+                )
+                self.stats['measured_elevation'] += 1
+                continue
+            
             estimated_elevation = self._estimate_elevation_by_region(lat, lng, spot_type)
             
             if estimated_elevation:
@@ -117,6 +140,7 @@ class ImmediateEnricher:
                 self.stats['estimated_elevation'] += 1
         
         self.conn.commit()
+        print(f"✅ Measured elevation from DEM for {self.stats['measured_elevation']} spots")
         print(f"✅ Estimated elevation for {self.stats['estimated_elevation']} spots")
 
     def _estimate_elevation_by_region(self, lat: float, lng: float, spot_type: str) -> Optional[int]:
@@ -465,6 +489,7 @@ class ImmediateEnricher:
         total, avg_conf, has_elev, has_dept, enhanced_desc = stats
         
         print(f"📈 ENRICHMENT STATISTICS:")
+        print(f"  Measured elevations (DEM): {self.stats['measured_elevation']}")
         print(f"  Estimated elevations: {self.stats['estimated_elevation']}")
         print(f"  Assigned departments: {self.stats['assigned_departments']}")
         print(f"  Enhanced names: {self.stats['enhanced_names']}")
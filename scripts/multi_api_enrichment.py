@@ -13,6 +13,11 @@ import time
 import json
 from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.backend.scrapers.geocoding_cache import MISS, get_geocoding_cache
 
 class MultiAPIEnricher:
     def __init__(self, db_path: str):
@@ -22,6 +27,7 @@ class MultiAPIEnricher:
         self.db_path = db_path
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
+        self.geocode_cache = get_geocoding_cache()
         
         # API Configuration
         self.api_keys = {
@@ -121,32 +127,37 @@ class MultiAPIEnricher:
                 
                 address = None
                 source = None
+                called_api = False
                 
                 try:
                     # Priority 1: IGN (most accurate for France)
                     if self.api_keys['ign']:
-                        address = await self._get_ign_address(session, lat, lng)
+                        address, called = await self._get_ign_address(session, lat, lng)
+                        called_api |= called
                         if address:
                             source = 'IGN'
                             self.stats['ign_addresses'] += 1
                     
                     # Priority 2: Google Maps (excellent global)
                     if not address and self.api_keys['google']:
-                        address = await self._get_google_address(session, lat, lng)
+                        address, called = await self._get_google_address(session, lat, lng)
+                        called_api |= called
                         if address:
                             source = 'Google'
                             self.stats['google_addresses'] += 1
                     
                     # Priority 3: BAN (French official, free)
                     if not address:
-                        address = await self._get_ban_address(session, lat, lng)
+                        address, called = await self._get_ban_address(session, lat, lng)
+                        called_api |= called
                         if address:
                             source = 'BAN'
                             self.stats['ban_addresses'] += 1
                     
                     # Priority 4: Nominatim (OSM, free backup)
                     if not address:
-                        address = await self._get_nominatim_address(session, lat, lng)
+                        address, called = await self._get_nominatim_address(session, lat, lng)
+                        called_api |= called
                         if address:
                             source = 'OSM'
                             self.stats['osm_addresses'] += 1
@@ -167,6 +178,10 @@ class MultiAPIEnricher:
                         if admin_data['commune'] or admin_data['postal_code']:
                             self._update_administrative_data(cursor, spot_id, admin_data)
                     
+                    # Fully served from the persistent cache: no request, no delay
+                    if not called_api:
+                        continue
+                    
                     self.stats['total_api_calls'] += 1
                     
                     # Adaptive rate limiting based on source
@@ -189,10 +204,13 @@ class MultiAPIEnricher:
         print(f"   BAN: {self.stats['ban_addresses']}, OSM: {self.stats['osm_addresses']}")
 
     async def _get_ign_address(self, session: aiohttp.ClientSession, 
-                              lat: float, lng: float) -> Optional[str]:
-        """Get address from IGN service"""
+                              lat: float, lng: float) -> Tuple[Optional[str], bool]:
+        """Get address from IGN service; returns (address, called_api)"""
         if not self.api_keys['ign']:
-            return None
+            return None, False
+        cached = self.geocode_cache.get_reverse(lat, lng)
+        if cached is not MISS:
+            return cached, False
             
         try:
             # Try modern IGN geocoding API
@@ -200,18 +218,22 @@ class MultiAPIEnricher:
             async with session.get(url) as response:
                 if response.status == 200:
                     data = await response.json()
-                    if 'features' in data and data['features']:
-                        return data['features'][0]['properties']['label']
+                    address = data['features'][0]['properties']['label'] if data.get('features') else None
+                    self.geocode_cache.put_reverse(lat, lng, address, 'ban')
+                    return address, True
         except Exception:
             pass
         
-        return None
+        return None, True
 
     async def _get_google_address(self, session: aiohttp.ClientSession,
-                                 lat: float, lng: float) -> Optional[str]:
-        """Get address from Google Maps API"""
+                                 lat: float, lng: float) -> Tuple[Optional[str], bool]:
+        """Get address from Google Maps API; returns (address, called_api)"""
         if not self.api_keys['google']:
-            return None
+            return None, False
+        cached = self.geocode_cache.get_reverse(lat, lng, kind='reverse_google')
+        if cached is not MISS:
+            return cached, False
             
         try:
             url = f"{self.endpoints['google_geocoding']}?latlng={lat},{lng}&key={self.api_keys['google']}"
@@ -219,42 +241,54 @@ class MultiAPIEnricher:
                 if response.status == 200:
                     data = await response.json()
                     if data['status'] == 'OK' and data['results']:
-                        return data['results'][0]['formatted_address']
+                        address = data['results'][0]['formatted_address']
+                        self.geocode_cache.put_reverse(lat, lng, address, 'google', kind='reverse_google')
+                        return address, True
+                    if data['status'] == 'ZERO_RESULTS':
+                        self.geocode_cache.put_reverse(lat, lng, None, 'google', kind='reverse_google')
         except Exception:
             pass
         
-        return None
+        return None, True
 
     async def _get_ban_address(self, session: aiohttp.ClientSession,
-                              lat: float, lng: float) -> Optional[str]:
-        """Get address from BAN service (already working)"""
+                              lat: float, lng: float) -> Tuple[Optional[str], bool]:
+        """Get address from BAN service (already working); returns (address, called_api)"""
+        cached = self.geocode_cache.get_reverse(lat, lng)
+        if cached is not MISS:
+            return cached, False
         try:
             url = f"{self.endpoints['ban_address']}?lat={lat}&lon={lng}"
             async with session.get(url) as response:
                 if response.status == 200:
                     data = await response.json()
-                    if 'features' in data and data['features']:
-                        return data['features'][0]['properties']['label']
+                    address = data['features'][0]['properties']['label'] if data.get('features') else None
+                    self.geocode_cache.put_reverse(lat, lng, address, 'legacy')
+                    return address, True
         except Exception:
             pass
         
-        return None
+        return None, True
 
     async def _get_nominatim_address(self, session: aiohttp.ClientSession,
-                                   lat: float, lng: float) -> Optional[str]:
-        """Get address from Nominatim/OSM"""
+                                   lat: float, lng: float) -> Tuple[Optional[str], bool]:
+        """Get address from Nominatim/OSM; returns (address, called_api)"""
+        cached = self.geocode_cache.get_reverse(lat, lng, kind='reverse_osm')
+        if cached is not MISS:
+            return cached, False
         try:
             url = f"{self.endpoints['nominatim']}?lat={lat}&lon={lng}&format=json"
             headers = {'User-Agent': 'SPOTS-Project/1.0'}
             async with session.get(url, headers=headers) as response:
                 if response.status == 200:
                     data = await response.json()
-                    if 'display_name' in data:
-                        return data['display_name']
+                    address = data.get('display_name')
+                    self.geocode_cache.put_reverse(lat, lng, address, 'nominatim', kind='reverse_osm')
+                    return address, True
         except Exception:
             pass
         
-        return None
+        return None, True
 
     def _extract_administrative_data(self, address: str) -> Dict[str, Optional[str]]:
         """Extract administrative data from address"""
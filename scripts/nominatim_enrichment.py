@@ -9,6 +9,13 @@ import requests
 import time
 import asyncio
 import aiohttp
+import sys
+from pathlib import Path
+from typing import Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.backend.scrapers.geocoding_cache import MISS, get_geocoding_cache
+from src.backend.scrapers.geocoding_france import OccitanieGeocoder
 
 class NominatimEnricher:
     def __init__(self, db_path: str):
@@ -18,13 +25,43 @@ class NominatimEnricher:
         
         self.nominatim_url = 'https://nominatim.openstreetmap.org/reverse'
         self.rate_limit = 1.0  # 1 second between requests (respectful)
+        self.geocode_cache = get_geocoding_cache()
         
         self.stats = {
             'processed': 0,
             'found_addresses': 0,
+            'ban_addresses': 0,
             'errors': 0
         }
 
+    def enrich_with_ban_bulk(self):
+        """Fill what BAN can in a few CSV uploads, leaving only the rest for rate-limited OSM"""
+        print("📮 BAN BULK PRE-PASS")
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT id, latitude, longitude
+            FROM spots 
+            WHERE (address IS NULL OR address = '') AND latitude IS NOT NULL AND longitude IS NOT NULL
+            ORDER BY id
+        """)
+        missing_spots = cursor.fetchall()
+        if not missing_spots:
+            return
+        
+        addresses = OccitanieGeocoder().reverse_many([(lat, lng) for _, lat, lng in missing_spots])
+        for (spot_id, _, _), address in zip(missing_spots, addresses):
+            if address:
+                cursor.execute("""
+                    UPDATE spots 
+                    SET address = ?,
+                        access_info = COALESCE(access_info, '') || ' | Source: BAN'
+                    WHERE id = ?
+                """, (address, spot_id))
+                self.stats['ban_addresses'] += 1
+        
+        self.conn.commit()
+        print(f"✅ BAN bulk: {self.stats['ban_addresses']}/{len(missing_spots)} addresses, rest go to Nominatim")
+
     async def enrich_with_nominatim(self):
         """Enrich missing addresses using Nominatim"""
         print("🗺️ NOMINATIM (OSM) ADDRESS ENRICHMENT")
@@ -54,7 +91,7 @@ class NominatimEnricher:
                     print(f"   Progress: {i}/{total_spots} ({progress:.1f}%) - Found: {self.stats['found_addresses']}")
                 
                 try:
-                    address = await self._get_nominatim_address(session, lat, lng)
+                    address, called_api = await self._get_nominatim_address(session, lat, lng)
                     
                     if address:
                         # Clean and format the address
@@ -81,8 +118,9 @@ class NominatimEnricher:
                     
                     self.stats['processed'] += 1
                     
-                    # Respectful rate limiting
-                    await asyncio.sleep(self.rate_limit)
+                    # Respectful rate limiting (cache hits never reached OSM)
+                    if called_api:
+                        await asyncio.sleep(self.rate_limit)
                     
                 except Exception as e:
                     print(f"❌ Error processing spot {spot_id}: {e}")
@@ -93,11 +131,15 @@ class NominatimEnricher:
         print(f"\\n✅ Nominatim enrichment complete!")
         print(f"   Processed: {self.stats['processed']}")
         print(f"   Found addresses: {self.stats['found_addresses']}")
-        print(f"   Success rate: {self.stats['found_addresses']/self.stats['processed']*100:.1f}%")
+        print(f"   Success rate: {self.stats['found_addresses']/max(self.stats['processed'], 1)*100:.1f}%")
 
     async def _get_nominatim_address(self, session: aiohttp.ClientSession, 
-                                   lat: float, lng: float) -> str:
-        """Get address from Nominatim service"""
+                                   lat: float, lng: float) -> Tuple[Optional[str], bool]:
+        """Get address from Nominatim service; returns (address, called_api)"""
+        cached = self.geocode_cache.get_reverse(lat, lng, kind='reverse_osm')
+        if cached is not MISS:
+            return cached, False
+
         try:
             url = f"{self.nominatim_url}?lat={lat}&lon={lng}&format=json&addressdetails=1"
             headers = {'User-Agent': 'SPOTS-Project/1.0 (educational)'}
@@ -105,8 +147,9 @@ class NominatimEnricher:
             async with session.get(url, headers=headers) as response:
                 if response.status == 200:
                     data = await response.json()
-                    if 'display_name' in data:
-                        return data['display_name']
+                    address = data.get('display_name')
+                    self.geocode_cache.put_reverse(lat, lng, address, 'nominatim', kind='reverse_osm')
+                    return address, True
                 elif response.status == 429:  # Rate limited
                     print("⚠️ Rate limited, waiting longer...")
                     await asyncio.sleep(5)
@@ -114,7 +157,7 @@ class NominatimEnricher:
         except Exception as e:
             pass
         
-        return None
+        return None, True
 
     def _clean_nominatim_address(self, address: str) -> str:
         """Clean and format Nominatim address"""
@@ -202,7 +245,7 @@ class NominatimEnricher:
         
         print(f"📈 ENRICHMENT RESULTS:")
         print(f"  New OSM addresses: {self.stats['found_addresses']}")
-        print(f"  Success rate: {self.stats['found_addresses']/self.stats['processed']*100:.1f}%")
+        print(f"  Success rate: {self.stats['found_addresses']/max(self.stats['processed'], 1)*100:.1f}%")
         print(f"  Processing errors: {self.stats['errors']}")
         
         print(f"\\n✅ UPDATED DATABASE QUALITY:")
@@ -229,6 +272,7 @@ class NominatimEnricher:
         """Run complete Nominatim enrichment"""
         start_time = time.time()
         
+        self.enrich_with_ban_bulk()
         await self.enrich_with_nominatim()
         self.update_quality_scores()
         
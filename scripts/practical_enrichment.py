@@ -9,7 +9,12 @@ import requests
 import asyncio
 import aiohttp
 import time
-from typing import Optional
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.backend.scrapers.geocoding_cache import MISS, get_geocoding_cache
+from typing import Optional, Tuple
 
 class PracticalEnricher:
     def __init__(self, db_path: str):
@@ -26,6 +31,7 @@ class PracticalEnricher:
         # Rate limiting
         self.ban_delay = 0.1  # 10 requests per second
         self.osm_delay = 1.0  # 1 request per second (respectful)
+        self.geocode_cache = get_geocoding_cache()
         
         # Statistics
         self.stats = {
@@ -60,7 +66,7 @@ class PracticalEnricher:
                 
                 try:
                     # BAN Reverse Geocoding
-                    address = await self._get_ban_address(session, lat, lng)
+                    address, called_api = await self._get_ban_address(session, lat, lng)
                     
                     if address:
                         # Extract administrative info
@@ -87,8 +93,9 @@ class PracticalEnricher:
                                 (department, spot_id)
                             )
                     
-                    self.stats['api_calls'] += 1
-                    await asyncio.sleep(self.ban_delay)
+                    if called_api:
+                        self.stats['api_calls'] += 1
+                        await asyncio.sleep(self.ban_delay)
                     
                 except Exception as e:
                     print(f"❌ Error enriching spot {spot_id}: {e}")
@@ -98,18 +105,23 @@ class PracticalEnricher:
         print(f"✅ BAN enrichment complete: {self.stats['enriched_addresses_ban']} addresses added")
 
     async def _get_ban_address(self, session: aiohttp.ClientSession, 
-                              lat: float, lng: float) -> Optional[str]:
-        """Get address from BAN service"""
+                              lat: float, lng: float) -> Tuple[Optional[str], bool]:
+        """Get address from BAN service; returns (address, called_api)"""
+        cached = self.geocode_cache.get_reverse(lat, lng)
+        if cached is not MISS:
+            return cached, False
+
         try:
             url = f"{self.apis['ban_address']}?lat={lat}&lon={lng}"
             async with session.get(url) as response:
                 if response.status == 200:
                     data = await response.json()
-                    if 'features' in data and data['features']:
-                        return data['features'][0]['properties']['label']
+                    address = data['features'][0]['properties']['label'] if data.get('features') else None
+                    self.geocode_cache.put_reverse(lat, lng, address, 'legacy')
+                    return address, True
         except Exception as e:
             print(f"BAN error: {e}")
-        return None
+        return None, True
 
     def _extract_admin_from_ban_address(self, address: str) -> tuple:
         """Extract administrative info from BAN address"""
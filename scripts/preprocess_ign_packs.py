@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Convert IGN department packs once for fast spot analysis.
+RGE ALTI ASC grids become a cloud-optimized GeoTIFF and BD Forêt shapefiles an
+R-tree indexed GeoPackage per department; /api/ign/spots/{id}/environment then
+reads only the window around each spot instead of whole packs.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.backend.scrapers.ign_opendata import IGNOpenDataService
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Preprocess IGN department packs (COG / GeoPackage)')
+    parser.add_argument('--departments', default=','.join(IGNOpenDataService.OCCITANIE_DEPARTMENTS),
+                        help='Comma-separated department codes')
+    parser.add_argument('--datasets', default='rgealti,bd_foret,rpg')
+    parser.add_argument('--cache-dir', default='/tmp/ign_data')
+    args = parser.parse_args()
+
+    service = IGNOpenDataService(cache_dir=args.cache_dir)
+    datasets = tuple(args.datasets.split(','))
+    failed = 0
+
+    for dept in args.departments.split(','):
+        start = time.time()
+        results = service.preprocess_department(dept, datasets)
+        for dataset, path in results.items():
+            failed += path is None
+            print(f"{dept:>3} {dataset:<10} {'✅ ' + str(path) if path else '❌ failed'}")
+        print(f"    {time.time() - start:.1f}s")
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Sync the local GeoPackage mirror of IGN WFS layers for Occitanie.
+The first run downloads each layer completely (paged with STARTINDEX/COUNT); later runs
+only fetch features modified since the last sync. Run with --full now and then to drop
+features deleted upstream. Schedule it (cron) to keep spot analysis fully offline.
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.backend.scrapers.ign_config import OCCITANIE_BOUNDS
+from src.backend.services.wfs_mirror import MIRROR_LAYERS, WFSMirror
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Mirror IGN WFS layers into a GeoPackage')
+    parser.add_argument('--layers', default=','.join(MIRROR_LAYERS), help='Comma-separated WFS type names')
+    parser.add_argument('--bbox', default=','.join(str(v) for v in OCCITANIE_BOUNDS), help='minlon,minlat,maxlon,maxlat')
+    parser.add_argument('--gpkg', default=None, help='GeoPackage path (default: $SPOTS_WFS_MIRROR or data/ign/)')
+    parser.add_argument('--page-size', type=int, default=5000)
+    parser.add_argument('--full', action='store_true', help='Re-download everything and remove deleted features')
+    args = parser.parse_args()
+
+    mirror = WFSMirror(args.gpkg, page_size=args.page_size)
+    bbox = tuple(float(v) for v in args.bbox.split(','))
+    print(f"🗺️  Mirroring into {mirror.gpkg_path}")
+
+    results = mirror.sync(args.layers.split(','), bbox, full=args.full)
+
+    print(f"\n{'layer':<42} {'mode':<12} {'pages':>6} {'written':>9} {'deleted':>8} {'total':>9} {'time':>8}")
+    for r in results:
+        if r['mode'] == 'failed':
+            print(f"{r['layer']:<42} {'failed':<12} {r['error'][:60]}")
+            continue
+        print(f"{r['layer']:<42} {r['mode']:<12} {r['pages']:>6} {r['written']:>9} {r['deleted']:>8} "
+              f"{r['feature_count']:>9} {r['seconds']:>7.1f}s")
+    sys.exit(1 if any(r['mode'] == 'failed' for r in results) else 0)
@@ -2,20 +2,24 @@
 """API endpoints for IGN OpenData integration"""
 
 from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 import logging
 from pathlib import Path
 
 from ..scrapers.ign_opendata import IGNOpenDataService
 from ..services.ign_wfs_service import IGNWFSService
+from ..services.landcover_overlay import DEFAULT_RADIUS, ensure_environment_table, stored_landcover
+from ..services.registry import registry
+from .services import require_service
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Initialize IGN service
-ign_service = IGNOpenDataService()
-# Initialize WFS service
-wfs_service = IGNWFSService()
+# IGN services are built on first use or by the startup warm-up
+# (the WFS connectivity check no longer blocks imports, and failing offline is not fatal)
+registry.register("ign_opendata", IGNOpenDataService)
+registry.register("wfs", IGNWFSService)
 
 
 @router.get("/spots/{spot_id}/environment")
@@ -31,6 +35,7 @@ async def get_spot_environment(
     - Land use classification
     - Accessibility information
     """
+    ign_service = await require_service("ign_opendata")
     import sqlite3
 
     db_path = Path(__file__).parent.parent.parent.parent / "data" / "occitanie_spots.db"
@@ -82,6 +87,7 @@ async def get_enriched_spots(
     - min_forest_coverage: Minimum forest coverage percentage
     - terrain_difficulty: Terrain difficulty level
     """
+    ign_service = await require_service("ign_opendata")
     import sqlite3
 
     db_path = Path(__file__).parent.parent.parent.parent / "data" / "occitanie_spots.db"
@@ -94,29 +100,32 @@ async def get_enriched_spots(
     params = []
 
     if type:
-        where_clauses.append("type = ?")
+        where_clauses.append("s.type = ?")
         params.append(type)
 
     where_clause = " WHERE " + " AND ".join(where_clauses) if where_clauses else ""
 
-    # Get spots
+    # Get spots, with the forest / land-use results stored by the batch landcover overlay
+    ensure_environment_table(conn)
     cursor.execute(
         f"""
-        SELECT * FROM spots
+        SELECT s.*, e.forest AS env_forest, e.land_use AS env_land_use FROM spots s
+        LEFT JOIN spot_environment e ON e.spot_id = s.id AND e.radius_meters = ?
         {where_clause}
-        ORDER BY confidence_score DESC
+        ORDER BY s.confidence_score DESC
         LIMIT ? OFFSET ?
     """,
-        params + [limit, offset],
+        [DEFAULT_RADIUS] + params + [limit, offset],
     )
 
     spots = []
     for row in cursor.fetchall():
         spot_dict = dict(row)
+        landcover = stored_landcover(spot_dict)
 
-        # Enrich with IGN data (in production, this would be cached)
+        # Enrich with IGN data (forest / land use from the overlay when stored)
         if spot_dict.get("latitude") and spot_dict.get("longitude"):
-            enriched = ign_service.enrich_spot_data(spot_dict)
+            enriched = ign_service.enrich_spot_data(spot_dict, landcover=landcover)
 
             # Apply filters
             if min_forest_coverage is not None:
@@ -156,6 +165,7 @@ async def get_ign_map_layers():
     - Tourism & Services
     - Historical
     """
+    ign_service = await require_service("ign_opendata")
     layers = ign_service.get_map_layers()
 
     # Add extensive additional layers organized by category
@@ -399,6 +409,7 @@ async def download_ign_data(
 
     Note: This would typically be an admin-only endpoint
     """
+    ign_service = await require_service("ign_opendata")
     try:
         file_path = ign_service.download_department_data(department, dataset)
 
@@ -420,6 +431,7 @@ async def download_ign_data(
 @router.get("/wfs/capabilities")
 async def get_wfs_capabilities():
     """Get IGN WFS service capabilities and available layers"""
+    wfs_service = await require_service("wfs")
     capabilities = wfs_service.get_capabilities()
 
     return {
@@ -433,6 +445,8 @@ async def get_wfs_capabilities():
             "Hydrography features",
             "Spot surroundings analysis",
         ],
+        "grid_cache": wfs_service.grid_cache.get_stats(),
+        "mirror": wfs_service.mirror.get_stats() if wfs_service.mirror else None,
     }
 
 
@@ -441,6 +455,7 @@ async def get_spot_wfs_analysis(
     spot_id: int, radius: int = Query(1500, description="Analysis radius in meters", le=5000)
 ):
     """Get real-time WFS analysis for a specific spot"""
+    wfs_service = await require_service("wfs")
     import sqlite3
 
     db_path = Path(__file__).parent.parent.parent.parent / "data" / "occitanie_spots.db"
@@ -461,7 +476,9 @@ async def get_spot_wfs_analysis(
     if not (spot_dict.get("latitude") and spot_dict.get("longitude")):
         raise HTTPException(status_code=400, detail="Spot has no coordinates")
 
-    analysis = wfs_service.analyze_spot_surroundings(spot_id, (spot_dict["latitude"], spot_dict["longitude"]), radius)
+    analysis = await wfs_service.analyze_spot_surroundings_async(
+        spot_id, (spot_dict["latitude"], spot_dict["longitude"]), radius
+    )
 
     return {
         "spot": {
@@ -472,10 +489,51 @@ async def get_spot_wfs_analysis(
         },
         "wfs_analysis": analysis,
         "data_source": "IGN Géoplateforme WFS (real-time)",
+        "fallback_layers": wfs_service.fallback_layers(analysis),
         "analysis_timestamp": analysis["timestamp"],
     }
 
 
+class WFSBatchAnalysisRequest(BaseModel):
+    spot_ids: List[int] = Field(..., min_length=1, max_length=500, description="Spots to analyse")
+    radius: int = Field(1500, le=5000, description="Analysis radius in meters")
+
+
+@router.post("/wfs-analysis/batch")
+async def get_spots_wfs_analysis(request: WFSBatchAnalysisRequest):
+    """WFS analysis for many spots at once; grid cells shared by nearby spots are fetched once"""
+    wfs_service = await require_service("wfs")
+    import sqlite3
+
+    db_path = Path(__file__).parent.parent.parent.parent / "data" / "occitanie_spots.db"
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    placeholders = ",".join("?" * len(request.spot_ids))
+    rows = conn.execute(
+        f"SELECT id, name, type, latitude, longitude FROM spots WHERE id IN ({placeholders})", request.spot_ids
+    ).fetchall()
+    conn.close()
+
+    spots = [dict(row) for row in rows if row["latitude"] and row["longitude"]]
+    analyses = await wfs_service.analyze_spots_async(
+        [(spot["id"], (spot["latitude"], spot["longitude"])) for spot in spots], request.radius
+    )
+
+    found = {spot["id"] for spot in spots}
+    # Spots whose deadline passed before every layer answered carry fallback estimates
+    fallback_ids = [analysis["spot_id"] for analysis in analyses if wfs_service.fallback_layers(analysis)]
+    return {
+        "analyses": analyses,
+        "count": len(analyses),
+        "skipped_spot_ids": [spot_id for spot_id in request.spot_ids if spot_id not in found],
+        "fallback_count": len(fallback_ids),
+        "fallback_spot_ids": fallback_ids,
+        "grid_cache": wfs_service.grid_cache.get_stats(),
+        "data_source": "IGN Géoplateforme WFS (real-time)"
+        + (f", fallback estimates for {len(fallback_ids)} spots" if fallback_ids else ""),
+    }
+
+
 @router.get("/wfs/transport")
 async def query_transport_network(
     lat: float = Query(..., description="Latitude"),
@@ -484,6 +542,7 @@ async def query_transport_network(
     transport_type: str = Query("all", regex="^(all|hiking|cycling|roads)$"),
 ):
     """Query transport networks around coordinates using WFS"""
+    wfs_service = await require_service("wfs")
 
     result = wfs_service.query_transport_network((lat, lon), radius, transport_type)
 
@@ -502,6 +561,7 @@ async def query_water_features(
     feature_type: str = Query("all", regex="^(all|rivers|lakes|springs)$"),
 ):
     """Query water features around coordinates using WFS"""
+    wfs_service = await require_service("wfs")
 
     result = wfs_service.query_hydrography((lat, lon), radius, feature_type)
 
@@ -518,6 +578,7 @@ async def query_administrative_boundaries(
     level: str = Query("commune", regex="^(commune|department|region)$"),
 ):
     """Query administrative boundaries using WFS"""
+    wfs_service = await require_service("wfs")
 
     try:
         bbox_coords = [float(x) for x in bbox.split(",")]
@@ -11,6 +11,9 @@ from typing import Optional, Dict, List
 from datetime import datetime
 import logging
 
+from ..services.registry import registry
+from .services import require_service
+
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
@@ -20,6 +23,7 @@ MBTILES_DIR = IGN_BASE / "01_active_maps"
 DOWNLOADS_DIR = IGN_BASE / "02_downloads"
 CACHE_DIR = IGN_BASE / "03_cache_recovered"
 SCRIPTS_DIR = IGN_BASE / "04_scripts"
+DERIVED_DIR = IGN_BASE / "05_derived"  # Locally tiled rasters (NDVI, hillshade, ...)
 
 # Active MBTiles databases
 MBTILES_SOURCES = {
@@ -31,6 +35,27 @@ MBTILES_SOURCES = {
     "cache_recovered": CACHE_DIR / "recovered_tiles.mbtiles"
 }
 
+def register_derived_sources() -> List[str]:
+    """
+    Register derived layers (src.backend.raster.tiler, raster.hillshade_tiles) found in DERIVED_DIR
+
+    Called at import and again by /status and /layers, so newly rendered overlays
+    are served without a restart. Generators write ``*.mbtiles.part`` and rename
+    when done, so only complete files match. Returns the names added.
+    """
+    added = []
+    if DERIVED_DIR.exists():
+        for derived_path in sorted(DERIVED_DIR.glob("*.mbtiles")):
+            if derived_path.stem not in MBTILES_SOURCES:
+                MBTILES_SOURCES[derived_path.stem] = derived_path
+                added.append(derived_path.stem)
+    if added and registry.is_ready("mbtiles"):
+        manager = registry.get("mbtiles")
+        for name in added:
+            manager.connect(name, MBTILES_SOURCES[name])
+    return added
+
+
 class MBTilesManager:
     """Manager for MBTiles offline map databases"""
     
@@ -41,14 +66,18 @@ class MBTilesManager:
     def _init_connections(self):
         """Initialize connections to all available MBTiles"""
         for name, path in MBTILES_SOURCES.items():
-            if path.exists():
-                try:
-                    conn = sqlite3.connect(str(path), check_same_thread=False)
-                    conn.row_factory = sqlite3.Row
-                    self.connections[name] = conn
-                    logger.info(f"Connected to {name}: {path}")
-                except Exception as e:
-                    logger.error(f"Failed to connect to {name}: {e}")
+            self.connect(name, path)
+
+    def connect(self, name: str, path: Path):
+        """Open one MBTiles source (ignored when the file does not exist)"""
+        if path.exists() and name not in self.connections:
+            try:
+                conn = sqlite3.connect(str(path), check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                self.connections[name] = conn
+                logger.info(f"Connected to {name}: {path}")
+            except Exception as e:
+                logger.error(f"Failed to connect to {name}: {e}")
     
     def get_tile(self, source: str, z: int, x: int, y: int) -> Optional[bytes]:
         """Get a tile from specified MBTiles source"""
@@ -114,12 +143,21 @@ class MBTilesManager:
         
         return stats
 
-# Initialize manager
-mbtiles_manager = MBTilesManager()
+    def close(self):
+        """Close all MBTiles connections"""
+        for conn in self.connections.values():
+            conn.close()
+        self.connections.clear()
+
+# Connections are opened on first use or by the startup warm-up
+registry.register("mbtiles", MBTilesManager, close=MBTilesManager.close)
+register_derived_sources()
 
 @router.get("/status")
 async def get_offline_maps_status():
     """Get status of all offline map sources"""
+    mbtiles_manager = await require_service("mbtiles")
+    register_derived_sources()
     status = {
         "sources": {},
         "total_size_mb": 0,
@@ -166,6 +204,7 @@ async def get_tile(
     fallback: Optional[str] = Query(None, description="Fallback source if tile not found")
 ):
     """Get a tile from offline MBTiles source"""
+    mbtiles_manager = await require_service("mbtiles")
     
     # Try primary source
     tile_data = mbtiles_manager.get_tile(source, z, x, y)
@@ -189,6 +228,7 @@ async def get_tile(
 @router.get("/metadata/{source}")
 async def get_source_metadata(source: str):
     """Get metadata for a specific MBTiles source"""
+    mbtiles_manager = await require_service("mbtiles")
     
     if source not in mbtiles_manager.connections:
         raise HTTPException(status_code=404, detail=f"Source '{source}' not found")
@@ -205,6 +245,7 @@ async def get_source_metadata(source: str):
 @router.get("/coverage")
 async def get_coverage_map():
     """Get combined coverage of all offline maps"""
+    mbtiles_manager = await require_service("mbtiles")
     
     coverage = {
         "type": "FeatureCollection",
@@ -231,6 +272,8 @@ async def get_coverage_map():
 @router.get("/layers")
 async def get_available_layers():
     """Get configuration for all available offline layers"""
+    mbtiles_manager = await require_service("mbtiles")
+    register_derived_sources()
     
     layers = {}
     
@@ -254,8 +297,11 @@ async def get_available_layers():
                 "size_mb": round(path.stat().st_size / (1024 * 1024), 2)
             }
             
-            # Set appropriate category
-            if "ortho" in source:
+            # Set appropriate category (generated overlays declare theirs in metadata)
+            if metadata.get("category") == "overlay":
+                layer_config["category"] = "overlay"
+                layer_config["opacity"] = 1.0
+            elif "ortho" in source:
                 layer_config["category"] = "satellite"
                 layer_config["opacity"] = 1.0
             elif "plan" in source:
@@ -351,6 +397,7 @@ async def get_download_progress():
 @router.post("/cache/optimize")
 async def optimize_cache():
     """Optimize MBTiles databases (VACUUM and ANALYZE)"""
+    mbtiles_manager = await require_service("mbtiles")
     
     results = {}
     
@@ -380,6 +427,7 @@ async def optimize_cache():
 @router.get("/statistics")
 async def get_detailed_statistics():
     """Get detailed statistics about offline maps"""
+    mbtiles_manager = await require_service("mbtiles")
     
     stats = {
         "summary": {
@@ -93,7 +93,7 @@ async def reverse_geocode(coords: Coordinates):
 @router.post("/elevation", response_model=ElevationResponse)
 async def get_elevation(request: ElevationRequest):
     """Get elevation for coordinates"""
-    if not geocoder.ola_api_key:
+    if not geocoder.ola_api_key and not geocoder.dem.available:
         raise HTTPException(status_code=503, detail="Elevation service not configured")
 
     elevation = geocoder.get_elevation(request.latitude, request.longitude)
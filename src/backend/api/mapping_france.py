@@ -2,18 +2,25 @@
 """API endpoints for mapping features using French BAN and IGN services"""
 
 from fastapi import APIRouter, HTTPException, Query
+import asyncio
 from typing import List, Optional, Dict
 import logging
 from pydantic import BaseModel, Field
 from pathlib import Path
 
+from ..raster.profile import elevation_profile, local_terrain
+from ..scrapers.geocoding_async import AsyncGeocoder
 from ..scrapers.geocoding_france import FrenchGeocodingMixin, OccitanieGeocoder
+from ..services.registry import registry
+from .services import require_service
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Initialize geocoding services
-geocoder = OccitanieGeocoder()
+# Geocoding services are built on first use or by the startup warm-up
+# (handlers use the async client so lookups never block the event loop)
+registry.register("geocoder", OccitanieGeocoder)
+registry.register("async_geocoder", lambda: AsyncGeocoder(registry.get("geocoder")), close=AsyncGeocoder.close)
 
 
 # Pydantic models
@@ -51,7 +58,18 @@ class ElevationResponse(BaseModel):
     latitude: float
     longitude: float
     elevation: float
-    source: str = Field(description="Data source (IGN or Open-Elevation)")
+    source: str = Field(description="Data source (DEM, IGN or Open-Elevation)")
+
+
+class ElevationBatchRequest(BaseModel):
+    points: List[Coordinates] = Field(..., max_length=10000, description="Points to look up")
+
+
+class ElevationProfileRequest(BaseModel):
+    points: Optional[List[Coordinates]] = Field(None, max_length=5000, description="Polyline vertices")
+    from_spot_id: Optional[int] = Field(None, description="Start spot (used when no points are given)")
+    to_spot_id: Optional[int] = Field(None, description="End spot (used when no points are given)")
+    spacing_m: float = Field(default=25.0, ge=5, le=1000, description="Sample spacing in meters")
 
 
 class PlaceSearchRequest(BaseModel):
@@ -65,7 +83,8 @@ class PlaceSearchRequest(BaseModel):
 async def geocode_address(request: GeocodingRequest):
     """
     Convert an address to coordinates using geocoding services
-    Priority: ADRESSE-PREMIUM (if enabled) -> BAN -> Legacy BAN
+    Priority: BAN -> Legacy BAN, then ADRESSE-PREMIUM (if enabled, within its daily quota)
+    for addresses BAN misses or only matches with low confidence
 
     Premium service provides:
     - Sub-meter accuracy for addresses
@@ -73,7 +92,8 @@ async def geocode_address(request: GeocodingRequest):
     - Historical names recognition
     - Building entrance precision
     """
-    result = geocoder.geocode_occitanie(request.address)
+    async_geocoder = await require_service("async_geocoder")
+    result = await async_geocoder.geocode_occitanie(request.address)
     if not result:
         raise HTTPException(status_code=404, detail="Address not found or not in Occitanie")
 
@@ -86,7 +106,9 @@ async def reverse_geocode(coords: Coordinates):
     Convert coordinates to an address using French BAN API
     Free service, no API key required
     """
-    address = geocoder.reverse_geocode(coords.latitude, coords.longitude)
+    geocoder = await require_service("geocoder")
+    async_geocoder = await require_service("async_geocoder")
+    address = await async_geocoder.reverse_geocode(coords.latitude, coords.longitude)
     if not address:
         raise HTTPException(status_code=404, detail="Address not found for coordinates")
 
@@ -104,16 +126,23 @@ async def reverse_geocode(coords: Coordinates):
 @router.post("/elevation", response_model=ElevationResponse)
 async def get_elevation(request: ElevationRequest):
     """
-    Get elevation for coordinates using IGN or Open-Elevation
+    Get elevation for coordinates from the local DEM, IGN or Open-Elevation
     Free service, no API key required
     """
-    # Try IGN first
-    elevation = geocoder.get_elevation_ign(request.latitude, request.longitude)
-    source = "IGN"
+    geocoder = await require_service("geocoder")
+    # Tile reads (a first use converts the tile) and HTTP fallbacks run off the event loop
+    # Local RGE ALTI / SRTM tiles first (no network)
+    elevation = await asyncio.to_thread(geocoder.dem.elevation, request.latitude, request.longitude)
+    source = "DEM"
+
+    # Then IGN
+    if elevation is None:
+        elevation = await asyncio.to_thread(geocoder.get_elevation_ign, request.latitude, request.longitude)
+        source = "IGN"
 
     # Fallback to Open-Elevation
     if elevation is None:
-        elevation = geocoder.get_elevation_open(request.latitude, request.longitude)
+        elevation = await asyncio.to_thread(geocoder.get_elevation_open, request.latitude, request.longitude)
         source = "Open-Elevation"
 
     if elevation is None:
@@ -122,12 +151,73 @@ async def get_elevation(request: ElevationRequest):
     return ElevationResponse(latitude=request.latitude, longitude=request.longitude, elevation=elevation, source=source)
 
 
+@router.post("/elevation/batch")
+async def get_elevations(request: ElevationBatchRequest):
+    """
+    Get elevations for many points at once
+    Points covered by the local DEM are answered in a single vectorized lookup;
+    the rest fall back to IGN / Open-Elevation one by one
+    """
+    geocoder = await require_service("geocoder")
+    points = [(p.latitude, p.longitude) for p in request.points]
+    elevations = await asyncio.to_thread(geocoder.get_elevations, points)
+    return {
+        "count": len(points),
+        "found": sum(1 for e in elevations if e is not None),
+        "results": [
+            {"latitude": lat, "longitude": lon, "elevation": elevation}
+            for (lat, lon), elevation in zip(points, elevations)
+        ],
+    }
+
+
+@router.post("/elevation-profile")
+async def get_path_elevation_profile(request: ElevationProfileRequest):
+    """
+    Elevation profile along a polyline, or along the straight line between two spots
+    Sampled from the local DEM at fixed spacing in one vectorized pass; returns
+    the profile, total ascent / descent and maximum slope
+    """
+    geocoder = await require_service("geocoder")
+    if request.points:
+        points = [(p.latitude, p.longitude) for p in request.points]
+    elif request.from_spot_id is not None and request.to_spot_id is not None:
+        points = [_spot_coordinates(request.from_spot_id), _spot_coordinates(request.to_spot_id)]
+    else:
+        raise HTTPException(status_code=422, detail="Provide points or from_spot_id and to_spot_id")
+
+    if len(points) < 2:
+        raise HTTPException(status_code=422, detail="A profile needs at least two points")
+    # The first call scans the DEM directories
+    if not await asyncio.to_thread(lambda: geocoder.dem.available):
+        raise HTTPException(status_code=503, detail="No local DEM tiles configured")
+
+    profile = await asyncio.to_thread(elevation_profile, points, spacing=request.spacing_m, dem=geocoder.dem)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Path is outside local DEM coverage")
+    return profile
+
+
+def _spot_coordinates(spot_id: int) -> tuple:
+    """(lat, lon) of a spot, 404 when unknown or not located"""
+    import sqlite3
+
+    db_path = Path(__file__).parent.parent.parent.parent / "data" / "occitanie_spots.db"
+    conn = sqlite3.connect(db_path)
+    row = conn.execute("SELECT latitude, longitude FROM spots WHERE id = ?", (spot_id,)).fetchone()
+    conn.close()
+    if not row or row[0] is None or row[1] is None:
+        raise HTTPException(status_code=404, detail=f"Spot {spot_id} not found or has no coordinates")
+    return row[0], row[1]
+
+
 @router.post("/search-places")
 async def search_places(request: PlaceSearchRequest):
     """
     Search for places using French BAN API
     Can be biased towards a location if coordinates provided
     """
+    geocoder = await require_service("geocoder")
     places = geocoder.search_places_ban(request.query, request.latitude, request.longitude, request.limit)
 
     # Filter to Occitanie if we have results
@@ -154,6 +244,7 @@ async def get_nearest_spots(
     max_distance: float = Query(50, le=200, description="Maximum distance in km"),
 ):
     """Get nearest spots to a location using Haversine formula"""
+    async_geocoder = await require_service("async_geocoder")
     import sqlite3
 
     db_path = Path(__file__).parent.parent.parent.parent / "data" / "occitanie_spots.db"
@@ -187,8 +278,8 @@ async def get_nearest_spots(
 
     conn.close()
 
-    # Get address for the search location
-    search_address = geocoder.reverse_geocode(lat, lon) or "Unknown location"
+    # Get address for the search location (answered locally when the offline BAN store is built)
+    search_address = await async_geocoder.reverse_geocode(lat, lon) or "Unknown location"
 
     return {
         "center": {"latitude": lat, "longitude": lon, "address": search_address},
@@ -201,6 +292,8 @@ async def get_nearest_spots(
 @router.get("/spots/elevation-profile/{spot_id}")
 async def get_spot_elevation_profile(spot_id: int):
     """Get elevation profile for a specific spot"""
+    geocoder = await require_service("geocoder")
+    async_geocoder = await require_service("async_geocoder")
     import sqlite3
 
     db_path = Path(__file__).parent.parent.parent.parent / "data" / "occitanie_spots.db"
@@ -227,7 +320,7 @@ async def get_spot_elevation_profile(spot_id: int):
 
     # If spot doesn't have elevation, get it
     if spot_dict["elevation"] is None and spot_dict["latitude"] and spot_dict["longitude"]:
-        elevation = geocoder.get_elevation(spot_dict["latitude"], spot_dict["longitude"])
+        elevation = await asyncio.to_thread(geocoder.get_elevation, spot_dict["latitude"], spot_dict["longitude"])
         if elevation:
             # Update database
             cursor.execute("UPDATE spots SET elevation = ? WHERE id = ?", (elevation, spot_id))
@@ -236,7 +329,7 @@ async def get_spot_elevation_profile(spot_id: int):
 
     # If spot doesn't have address, get it
     if not spot_dict["address"] and spot_dict["latitude"] and spot_dict["longitude"]:
-        address = geocoder.reverse_geocode(spot_dict["latitude"], spot_dict["longitude"])
+        address = await async_geocoder.reverse_geocode(spot_dict["latitude"], spot_dict["longitude"])
         if address:
             cursor.execute("UPDATE spots SET address = ? WHERE id = ?", (address, spot_id))
             conn.commit()
@@ -244,7 +337,16 @@ async def get_spot_elevation_profile(spot_id: int):
 
     conn.close()
 
-    return {"spot": spot_dict, "elevation_category": get_elevation_category(spot_dict.get("elevation"))}
+    terrain = None
+    lat, lon = spot_dict["latitude"], spot_dict["longitude"]
+    if lat and lon and await asyncio.to_thread(lambda: geocoder.dem.available):
+        terrain = await asyncio.to_thread(local_terrain, lat, lon, dem=geocoder.dem)
+
+    return {
+        "spot": spot_dict,
+        "elevation_category": get_elevation_category(spot_dict.get("elevation")),
+        "terrain": terrain,
+    }
 
 
 def get_elevation_category(elevation: Optional[float]) -> str:
@@ -339,8 +441,12 @@ async def get_occitanie_departments():
 @router.get("/geocoding-status")
 async def get_geocoding_status():
     """Get the current status of geocoding services"""
+    geocoder = await require_service("geocoder")
+    async_geocoder = await require_service("async_geocoder")
     import os
 
+    # The first call scans the DEM directories
+    dem_available = await asyncio.to_thread(lambda: geocoder.dem.available)
     return {
         "services": {
             "premium": {
@@ -358,6 +464,13 @@ async def get_geocoding_status():
                 "authenticated": (
                     geocoder.premium_service.access_token is not None if geocoder.premium_service.enabled else False
                 ),
+                "quota": geocoder.premium_service.get_quota_usage(),
+            },
+            "offline_ban": {
+                "enabled": geocoder.offline_geocoder.available,
+                "name": "Offline BAN store",
+                "description": "Local KD-tree over the BAN address dump (reverse geocoding, no network)",
+                "store": str(geocoder.offline_geocoder.store_path),
             },
             "ban": {
                 "enabled": True,
@@ -371,6 +484,12 @@ async def get_geocoding_status():
                 "description": "Fallback geocoding service",
                 "endpoint": geocoder.ban_legacy_url,
             },
+            "local_dem": {
+                "enabled": dem_available,
+                "name": "Local DEM tiles",
+                "description": "Memory-mapped RGE ALTI / SRTM tiles (elevation, no network)",
+                "directories": [str(d) for d in geocoder.dem.dem_dirs],
+            },
             "ign_elevation": {
                 "enabled": True,
                 "name": "IGN Elevation Service",
@@ -385,20 +504,25 @@ async def get_geocoding_status():
             },
         },
         "hierarchy": [
-            "ADRESSE-PREMIUM (if enabled)",
+            "Offline BAN store (reverse geocoding, if built)",
+            "Local DEM tiles (elevation, if present)",
             "BAN (IGN hosted)",
             "Legacy BAN (data.gouv.fr)",
+            "ADRESSE-PREMIUM (if enabled, low-confidence BAN answers only, daily quota)",
             "Open-Elevation (for elevation only)",
         ],
+        "async_client": async_geocoder.get_stats(),
     }
 
 
 @router.get("/validate-location")
 async def validate_location(lat: float, lon: float):
     """Check if coordinates are in Occitanie region"""
+    geocoder = await require_service("geocoder")
+    async_geocoder = await require_service("async_geocoder")
     is_in_occitanie = geocoder.is_in_occitanie(lat, lon)
-    dept_code = geocoder.get_department_code(lat, lon)
-    address = geocoder.reverse_geocode(lat, lon)
+    dept_code = await asyncio.to_thread(geocoder.get_department_code, lat, lon)
+    address = await async_geocoder.reverse_geocode(lat, lon)
 
     return {
         "coordinates": {"latitude": lat, "longitude": lon},
@@ -427,6 +551,7 @@ async def search_poi(
     - Lakes (lac)
     - Viewpoints (belvédère)
     """
+    geocoder = await require_service("geocoder")
     if not geocoder.premium_service.enabled:
         raise HTTPException(status_code=503, detail="POI search requires ADRESSE-PREMIUM service to be enabled")
 
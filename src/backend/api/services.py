@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""Access to lazily built services from request handlers"""
+
+from typing import Any
+
+from fastapi import HTTPException
+
+from ..services.registry import registry
+
+
+async def require_service(name: str) -> Any:
+    """Registered service, building it on first use; 503 while it cannot be built (e.g. offline)"""
+    try:
+        return await registry.aget(name)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
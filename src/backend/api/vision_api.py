@@ -12,13 +12,15 @@ from datetime import datetime
 from ..vision.image_locator import ImageLocator
 from ..vision.place_recognizer import PlaceRecognizer  
 from ..vision.similarity_search import SimilaritySearch
+from ..services.registry import registry
+from .services import require_service
 
 router = APIRouter(prefix="/api/vision", tags=["vision"])
 
-# Initialize vision services
-image_locator = ImageLocator()
-place_recognizer = PlaceRecognizer()
-similarity_search = SimilaritySearch()
+# Vision models are heavy and rarely used: built on the first vision request, not at startup
+registry.register("image_locator", ImageLocator, warm=False)
+registry.register("place_recognizer", PlaceRecognizer, warm=False)
+registry.register("similarity_search", SimilaritySearch, warm=False)
 
 # Upload directory
 UPLOAD_DIR = Path("data/uploads")
@@ -34,6 +36,7 @@ async def locate_from_image(
     Identify location from uploaded image
     Uses EXIF data, landmark recognition, and scene classification
     """
+    image_locator = await require_service("image_locator")
     
     # Validate file type
     if not file.content_type.startswith("image/"):
@@ -89,6 +92,7 @@ async def recognize_place(
     """
     Recognize place type and activities using CLIP zero-shot classification
     """
+    place_recognizer = await require_service("place_recognizer")
     
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
@@ -136,6 +140,7 @@ async def search_similar_spots(
     """
     Find visually similar spots from the database
     """
+    similarity_search = await require_service("similarity_search")
     
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
@@ -174,6 +179,7 @@ async def add_to_index(spot_images: List[Dict]):
     Add spot images to the similarity search index
     Expected format: [{"spot_id": 1, "image_path": "path/to/image.jpg", ...}]
     """
+    similarity_search = await require_service("similarity_search")
     try:
         similarity_search.add_spot_images(spot_images)
         return {
@@ -187,11 +193,13 @@ async def add_to_index(spot_images: List[Dict]):
 @router.get("/index/stats")
 async def get_index_stats():
     """Get statistics about the similarity search index"""
+    similarity_search = await require_service("similarity_search")
     return similarity_search.get_embedding_stats()
 
 @router.post("/index/rebuild")
 async def rebuild_index():
     """Rebuild the similarity search index"""
+    similarity_search = await require_service("similarity_search")
     try:
         similarity_search.rebuild_index()
         return {
@@ -210,6 +218,9 @@ async def analyze_image(
     """
     Comprehensive image analysis combining all vision capabilities
     """
+    image_locator = await require_service("image_locator")
+    place_recognizer = await require_service("place_recognizer")
+    similarity_search = await require_service("similarity_search")
     
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
@@ -271,6 +282,7 @@ async def analyze_image(
 @router.get("/duplicates")
 async def find_duplicate_images(threshold: float = Query(0.95, ge=0.5, le=1.0)):
     """Find duplicate or near-duplicate images in the index"""
+    similarity_search = await require_service("similarity_search")
     duplicates = similarity_search.find_duplicates(threshold)
     return {
         "duplicate_groups": duplicates,
@@ -286,6 +298,7 @@ async def match_to_known_spots(
     """
     Match uploaded image to a list of known spots
     """
+    place_recognizer = await require_service("place_recognizer")
     
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
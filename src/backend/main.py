@@ -5,7 +5,9 @@ Refactored Main API - Cleaner, more maintainable code
 
 from fastapi import FastAPI, HTTPException, Query, Path as PathParam
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pathlib import Path
+import asyncio
 import os
 import sqlite3
 from contextlib import contextmanager
@@ -20,6 +22,7 @@ load_dotenv()
 from src.backend.api import mapping_france
 from src.backend.api.urbex_api import router as urbex_router
 from src.backend.api.ign_offline import router as ign_offline_router
+from src.backend.services.registry import registry
 # Temporarily disabled due to missing dependencies
 # from src.backend.api import ign_data, code_analysis
 
@@ -94,7 +97,7 @@ app.include_router(ign_offline_router, prefix="/api/ign-offline", tags=["IGN Off
 
 @app.on_event("startup")
 async def startup_event():
-    """Create database indexes on startup"""
+    """Create database indexes, then warm up services in the background"""
     with get_db() as conn:
         cursor = conn.cursor()
         # Create indexes if they don't exist
@@ -125,6 +128,15 @@ async def startup_event():
         conn.commit()
         logger.info("✅ Database indexes created/verified")
 
+    # Services are built lazily; the warm-up runs while the server already accepts requests
+    app.state.warm_up = asyncio.create_task(registry.warm_up())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled upstream HTTP sessions and service resources"""
+    await registry.aclose()
+
 
 @app.get("/")
 def read_root():
@@ -135,6 +147,7 @@ def read_root():
         "total_spots": 817,
         "docs": "/docs",
         "health": "/health",
+        "ready": "/ready",
     }
 
 
@@ -150,6 +163,15 @@ def health_check():
         return {"status": "unhealthy", "error": str(e)}
 
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness endpoint: 503 until every warm service is initialized (/health is liveness only)"""
+    status = registry.status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
+
 @app.get("/api/config")
 def get_config():
     """Get frontend configuration (without exposing sensitive data)"""
@@ -0,0 +1,20 @@
+"""
+Raster processing for SPOTS
+Local GeoTIFF tiling into MBTiles for offline serving, DEM elevation lookups and profiles,
+precomputed terrain derivatives, hillshade / slope overlays, spectral indices
+and change detection between dates
+"""
+
+from .change_detection import ChangeDetector, load_districts
+from .dem import DEMElevationService, get_dem_service
+from .hillshade_tiles import TerrainTileGenerator
+from .indices import IndexCalculator, compute_indices
+from .profile import elevation_profile, local_terrain
+from .terrain import TerrainStore, build_terrain_grid, get_terrain_store
+from .tiler import RasterTiler, tile_raster
+
+__all__ = [
+    'DEMElevationService', 'get_dem_service', 'elevation_profile', 'local_terrain', 'RasterTiler', 'tile_raster',
+    'TerrainStore', 'build_terrain_grid', 'get_terrain_store', 'TerrainTileGenerator',
+    'IndexCalculator', 'compute_indices', 'ChangeDetector', 'load_districts',
+]
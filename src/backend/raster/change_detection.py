@@ -0,0 +1,650 @@
+#!/usr/bin/env python3
+"""
+Change detection between two dates of SPOT imagery, headless
+The later scene is co-registered on the earlier one (grid alignment through a
+WarpedVRT plus a phase-correlation shift), then a process pool streams blocks of both
+scenes, differences a spectral index, thresholds it and vectorizes the changed areas.
+Polygons are built in grid pixel coordinates so pieces split by block edges merge
+exactly; per-district statistics are accumulated from a rasterized district layer.
+Only a few blocks are in memory at once, so scenes larger than RAM are fine
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..scrapers.ign_feature_writers import GeoPackageWriter
+from ..scrapers.ign_projection import get_transformer
+from ..utils.geopackage import SHAPELY_AVAILABLE, decode_geometries
+from .indices import BAND_PRESETS, compute_indices, required_bands
+
+logger = logging.getLogger(__name__)
+
+try:
+    import rasterio
+    import rasterio.shutil
+    from affine import Affine
+    from rasterio import features
+    from rasterio.enums import Resampling
+    from rasterio.vrt import WarpedVRT
+    from rasterio.windows import Window
+
+    RASTERIO_AVAILABLE = True
+except ImportError:
+    RASTERIO_AVAILABLE = False
+    logger.warning("rasterio not available - change detection disabled")
+
+try:
+    from scipy import ndimage
+
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+if SHAPELY_AVAILABLE:
+    import shapely
+    from shapely.geometry import mapping, shape
+
+DIFFERENCE_NODATA = -9999.0
+CHANGE_NODATA = 255
+CHANGE_CLASSES = {1: "decrease", 2: "increase"}
+DISTRICT_NAME_FIELDS = ("nom_quartier", "quartier", "libelle", "nom", "name")
+
+Block = Tuple[int, int, int, int]
+
+
+# ----------------------------------------------------------------------
+# Co-registration
+# ----------------------------------------------------------------------
+
+
+def phase_correlation(
+    reference: np.ndarray, moving: np.ndarray, max_shift: Optional[int] = None
+) -> Tuple[float, float, float]:
+    """
+    Translation between two same-size images by phase correlation
+
+    Args:
+        reference, moving: Images (NaN allowed)
+        max_shift: Largest shift searched, in pixels (default: half the image)
+
+    Returns:
+        (dy, dx, peak) with ``moving[y, x] ~ reference[y - dy, x - dx]``; sub-pixel
+        by a parabola through the peak. ``peak`` (0..1) measures the match quality
+    """
+    images = []
+    window = np.outer(np.hanning(reference.shape[0]), np.hanning(reference.shape[1]))
+    for image in (reference, moving):
+        image = np.where(np.isnan(image), np.nanmean(image), image)
+        images.append(np.fft.fft2((image - image.mean()) * window))
+    cross = images[1] * np.conj(images[0])
+    surface = np.fft.ifft2(cross / (np.abs(cross) + 1e-12)).real
+
+    searched = surface
+    if max_shift is not None:
+        # Offsets wrap around: keep |offset| <= max_shift on both axes
+        rows = np.minimum(np.arange(surface.shape[0]), surface.shape[0] - np.arange(surface.shape[0]))
+        cols = np.minimum(np.arange(surface.shape[1]), surface.shape[1] - np.arange(surface.shape[1]))
+        searched = np.where((rows[:, None] <= max_shift) & (cols[None, :] <= max_shift), surface, -np.inf)
+    peak_y, peak_x = np.unravel_index(np.argmax(searched), surface.shape)
+    offsets = []
+    for axis, peak, size in ((0, peak_y, surface.shape[0]), (1, peak_x, surface.shape[1])):
+        before = surface[(peak - 1) % size, peak_x] if axis == 0 else surface[peak_y, (peak - 1) % size]
+        after = surface[(peak + 1) % size, peak_x] if axis == 0 else surface[peak_y, (peak + 1) % size]
+        curvature = before - 2 * surface[peak_y, peak_x] + after
+        fraction = 0.5 * (before - after) / curvature if curvature else 0.0
+        offset = peak + fraction
+        offsets.append(offset - size if offset > size / 2 else offset)
+    return offsets[0], offsets[1], float(surface[peak_y, peak_x])
+
+
+def _sample_windows(width: int, height: int, size: int, samples: int) -> List[Window]:
+    """``samples`` x ``samples`` windows spread over the grid"""
+    size = min(size, width, height)
+    cols = np.linspace(0, width - size, samples).astype(int)
+    rows = np.linspace(0, height - size, samples).astype(int)
+    return [Window(int(c), int(r), size, size) for r in rows for c in cols]
+
+
+# ----------------------------------------------------------------------
+# Districts
+# ----------------------------------------------------------------------
+
+
+def load_districts(path: str, name_field: Optional[str] = None, crs: Optional[str] = None) -> Dict:
+    """
+    Read district polygons from GeoJSON or GeoPackage
+
+    Args:
+        path: .geojson/.json (WGS84 unless a ``crs`` member says otherwise) or .gpkg
+        name_field: Property holding the district name (default: first of DISTRICT_NAME_FIELDS)
+        crs: Override the CRS of the file
+
+    Returns:
+        Dict with ``names``, ``geometries`` (shapely array) and ``crs``
+    """
+    if not SHAPELY_AVAILABLE:
+        raise RuntimeError("District summaries require shapely")
+    path = Path(path)
+    if path.suffix.lower() == ".gpkg":
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            table, column, srs_id = conn.execute(
+                "SELECT table_name, column_name, srs_id FROM gpkg_geometry_columns"
+            ).fetchone()
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+            name_field = name_field or next((f for f in DISTRICT_NAME_FIELDS if f in columns), None)
+            selected = f'"{column}", CAST("{name_field}" AS TEXT)' if name_field else f'"{column}", NULL'
+            rows = conn.execute(f'SELECT {selected} FROM {table} WHERE "{column}" IS NOT NULL').fetchall()
+        finally:
+            conn.close()
+        geometries = decode_geometries([row[0] for row in rows])
+        names = [row[1] for row in rows]
+        crs = crs or f"EPSG:{srs_id}"
+    else:
+        collection = json.loads(path.read_text())
+        items = [f for f in collection.get("features", []) if f.get("geometry")]
+        properties = [f.get("properties") or {} for f in items]
+        name_field = name_field or next((f for f in DISTRICT_NAME_FIELDS if properties and f in properties[0]), None)
+        geometries = [shape(f["geometry"]) for f in items]
+        names = [p.get(name_field) if name_field else None for p in properties]
+        declared = (collection.get("crs") or {}).get("properties", {}).get("name", "")
+        crs = crs or (f"EPSG:{declared.rsplit(':', 1)[-1]}" if "EPSG" in declared else "EPSG:4326")
+
+    names = [str(name) if name is not None else f"district_{i + 1}" for i, name in enumerate(names)]
+    logger.info(f"Loaded {len(names)} districts from {path.name} ({crs})")
+    return {"names": names, "geometries": np.array(geometries, dtype=object), "crs": crs}
+
+
+def _reproject(geometries: np.ndarray, source: str, target: str) -> np.ndarray:
+    if source == target:
+        return geometries
+    transformer = get_transformer(source, target)
+    return shapely.transform(geometries, lambda c: np.column_stack(transformer.transform(c[:, 0], c[:, 1])))
+
+
+# ----------------------------------------------------------------------
+# Worker process
+# ----------------------------------------------------------------------
+
+_worker: Dict = {}
+
+
+def _init_worker(old_path: str, new_path: str, vrt_options: Dict, options: Dict, districts: List[bytes]):
+    """Open both scenes once per process"""
+    new_src = rasterio.open(new_path)
+    _worker.update(
+        old=rasterio.open(old_path),
+        new_src=new_src,
+        new=WarpedVRT(new_src, **vrt_options),
+        options=options,
+        districts=shapely.from_wkb(districts) if districts else None,
+    )
+    _worker["district_tree"] = shapely.STRtree(_worker["districts"]) if districts else None
+
+
+def _read_bands(dataset, bands: Dict[str, int], window: Window) -> Dict[str, np.ndarray]:
+    names = list(bands)
+    data = dataset.read([bands[name] for name in names], window=window, masked=True)
+    return {name: data[i].astype(np.float32).filled(np.nan) for i, name in enumerate(names)}
+
+
+def _district_grid(window: Window, height: int, width: int) -> Optional[np.ndarray]:
+    """District number (1-based, 0 outside) of every pixel of the window"""
+    tree = _worker["district_tree"]
+    if tree is None:
+        return None
+    transform = rasterio.windows.transform(window, _worker["old"].transform)
+    minx, miny, maxx, maxy = rasterio.windows.bounds(window, _worker["old"].transform)
+    candidates = tree.query(shapely.box(minx, miny, maxx, maxy), predicate="intersects")
+    if not len(candidates):
+        return np.zeros((height, width), dtype=np.int32)
+    return features.rasterize(
+        [(_worker["districts"][i], int(i) + 1) for i in candidates],
+        out_shape=(height, width),
+        transform=transform,
+        fill=0,
+        dtype="int32",
+    )
+
+
+def detect_block(block: Block) -> Dict:
+    """
+    Difference, change classes, change polygons and district tallies of one block
+
+    Polygons are in grid pixel coordinates: (geometry WKB, class, pixel count, sum of differences, touches edge).
+    """
+    options = _worker["options"]
+    col, row, width, height = block
+    window = Window(col, row, width, height)
+    index, threshold = options["index"], options["threshold"]
+
+    before = compute_indices(_read_bands(_worker["old"], options["old_bands"], window), [index])[index]
+    after = compute_indices(_read_bands(_worker["new"], options["new_bands"], window), [index])[index]
+    difference = after - before
+    valid = ~np.isnan(difference)
+
+    classes = np.zeros((height, width), dtype=np.uint8)
+    classes[valid & (difference <= -threshold)] = 1
+    classes[valid & (difference >= threshold)] = 2
+    classes[~valid] = CHANGE_NODATA
+
+    polygons = []
+    changed = (classes == 1) | (classes == 2)
+    if changed.any():
+        structure = np.array([[0, 1, 0], [1, 1, 1], [0, 1, 0]])
+        labels = np.zeros((height, width), dtype=np.int32)
+        for value in CHANGE_CLASSES:
+            component, _ = ndimage.label(classes == value, structure=structure)
+            labels[component > 0] = component[component > 0] + labels.max()
+        ids = np.arange(1, labels.max() + 1)
+        counts = ndimage.sum_labels(np.ones_like(difference), labels, ids)
+        sums = ndimage.sum_labels(np.where(changed, difference, 0), labels, ids)
+        classes_by_id = ndimage.maximum(classes, labels, ids).astype(int)
+        edges = (col > 0, row > 0, col + width < options["width"], row + height < options["height"])
+        for geometry, label in features.shapes(
+            labels, mask=changed, connectivity=4, transform=Affine.translation(col, row)
+        ):
+            i = int(label) - 1
+            polygon = shape(geometry)
+            minx, miny, maxx, maxy = polygon.bounds
+            touches = (
+                (edges[0] and minx == col)
+                or (edges[1] and miny == row)
+                or (edges[2] and maxx == col + width)
+                or (edges[3] and maxy == row + height)
+            )
+            polygons.append((shapely.to_wkb(polygon), int(classes_by_id[i]), float(counts[i]), float(sums[i]), touches))
+
+    tallies = None
+    districts = _district_grid(window, height, width)
+    if districts is not None:
+        size = len(_worker["districts"]) + 1
+        tallies = np.stack([
+            np.bincount(districts.ravel(), minlength=size),
+            np.bincount(districts[valid], minlength=size),
+            np.bincount(districts[classes == 1], minlength=size),
+            np.bincount(districts[classes == 2], minlength=size),
+            np.bincount(districts[valid], weights=difference[valid], minlength=size),
+        ])
+
+    difference[~valid] = DIFFERENCE_NODATA
+    return {"block": block, "difference": difference, "classes": classes, "polygons": polygons, "tallies": tallies}
+
+
+# ----------------------------------------------------------------------
+# Pipeline
+# ----------------------------------------------------------------------
+
+
+class ChangeDetector:
+    """Index-difference change detection between two multispectral scenes"""
+
+    def __init__(
+        self,
+        old_scene: str,
+        new_scene: str,
+        index: str = "ndvi",
+        threshold: float = 0.2,
+        old_preset: str = "spot67",
+        new_preset: Optional[str] = None,
+        old_bands: Optional[Dict[str, int]] = None,
+        new_bands: Optional[Dict[str, int]] = None,
+        coregister: bool = True,
+        min_area: float = 500.0,
+        block_size: int = 1024,
+        tile_size: int = 512,
+        workers: Optional[int] = None,
+    ):
+        """
+        Initialize the detector
+
+        Args:
+            old_scene, new_scene: Multispectral GeoTIFFs; the old scene's grid is the reference
+            index: Index differenced (e.g. "ndvi" for vegetation loss, "bu" for urban growth)
+            threshold: Minimum absolute index change flagged
+            old_preset, new_preset: Keys of BAND_PRESETS (``new_preset`` defaults to ``old_preset``)
+            old_bands, new_bands: Explicit band mappings overriding the presets
+            coregister: Estimate and correct the residual shift of the new scene
+            min_area: Smallest change polygon kept, in square map units
+            block_size: Pixels per block side (one worker task); rounded to a multiple of ``tile_size``
+            tile_size: Internal tile size of the output rasters
+            workers: Worker processes (default: CPU count)
+        """
+        if not RASTERIO_AVAILABLE or not SHAPELY_AVAILABLE or not SCIPY_AVAILABLE:
+            raise RuntimeError("ChangeDetector requires rasterio, shapely and scipy")
+        needed = required_bands([index])
+        mappings = []
+        for bands, preset in ((old_bands, old_preset), (new_bands, new_preset or old_preset)):
+            if bands is None:
+                if preset not in BAND_PRESETS:
+                    raise ValueError(f"Unknown preset '{preset}', choose from {list(BAND_PRESETS)}")
+                bands = BAND_PRESETS[preset]
+            missing = [name for name in needed if name not in bands]
+            if missing:
+                raise ValueError(f"Index '{index}' needs bands {missing} missing from {sorted(bands)}")
+            mappings.append({name: bands[name] for name in needed})
+
+        self.old_scene, self.new_scene = str(old_scene), str(new_scene)
+        self.old_bands, self.new_bands = mappings
+        self.index, self.threshold = index, threshold
+        self.coregister, self.min_area = coregister, min_area
+        self.tile_size = tile_size
+        self.block_size = max(tile_size, block_size // tile_size * tile_size)
+        self.workers = workers or os.cpu_count() or 2
+        self.shift = (0.0, 0.0)
+
+        with rasterio.open(self.old_scene) as src:
+            self.width, self.height = src.width, src.height
+            self.crs, self.transform = src.crs, src.transform
+        self.pixel_area = abs(self.transform.a * self.transform.e)
+
+    # ------------------------------------------------------------------
+    # Co-registration
+    # ------------------------------------------------------------------
+
+    def _vrt_options(self, shift: Tuple[float, float] = (0.0, 0.0)) -> Dict:
+        """WarpedVRT arguments putting the new scene on the old grid, moved by -shift pixels"""
+        with rasterio.open(self.new_scene) as src:
+            dy, dx = shift
+            src_transform = Affine.translation(-dx * self.transform.a, -dy * self.transform.e) * src.transform
+            return {
+                "crs": self.crs,
+                "transform": self.transform,
+                "width": self.width,
+                "height": self.height,
+                "src_transform": src_transform,
+                "nodata": src.nodata if src.nodata is not None else 0,
+                "resampling": Resampling.bilinear,
+            }
+
+    def estimate_shift(
+        self, window_size: int = 512, samples: int = 3, max_shift: int = 32, min_peak: float = 0.05
+    ) -> Tuple[float, float]:
+        """
+        Residual shift (dy, dx) of the new scene on the old grid, in pixels
+
+        Phase correlation of the NIR band (red if absent) on ``samples`` x ``samples``
+        windows; the median over windows with a clear peak is kept. Georeferenced
+        products are off by a few pixels at most, and bounding the search at
+        ``max_shift`` keeps large changed areas from matching each other instead.
+        """
+        band = "nir" if "nir" in self.old_bands else "red" if "red" in self.old_bands else next(iter(self.old_bands))
+        estimates = []
+        with rasterio.open(self.old_scene) as old, rasterio.open(self.new_scene) as new_src:
+            with WarpedVRT(new_src, **self._vrt_options()) as new:
+                for window in _sample_windows(self.width, self.height, window_size, samples):
+                    reference = _read_bands(old, {band: self.old_bands[band]}, window)[band]
+                    moving = _read_bands(new, {band: self.new_bands[band]}, window)[band]
+                    if np.isnan(reference).mean() > 0.2 or np.isnan(moving).mean() > 0.2:
+                        continue
+                    dy, dx, peak = phase_correlation(reference, moving, max_shift)
+                    if peak >= min_peak:
+                        estimates.append((dy, dx))
+        if not estimates:
+            logger.warning("No reliable co-registration estimate, assuming the scenes are aligned")
+            return 0.0, 0.0
+        dy, dx = np.median(np.array(estimates), axis=0)
+        logger.info(f"Co-registration shift: dy={dy:.2f} px, dx={dx:.2f} px ({len(estimates)} windows)")
+        return float(dy), float(dx)
+
+    # ------------------------------------------------------------------
+    # Detection
+    # ------------------------------------------------------------------
+
+    def windows(self) -> Iterator[Block]:
+        """Blocks (col_off, row_off, width, height) covering the reference grid"""
+        for row in range(0, self.height, self.block_size):
+            for col in range(0, self.width, self.block_size):
+                yield col, row, min(self.block_size, self.width - col), min(self.block_size, self.height - row)
+
+    def _profile(self, dtype: str, nodata) -> Dict:
+        return {
+            "driver": "GTiff",
+            "width": self.width,
+            "height": self.height,
+            "count": 1,
+            "dtype": dtype,
+            "crs": self.crs,
+            "transform": self.transform,
+            "nodata": nodata,
+            "tiled": True,
+            "blockxsize": self.tile_size,
+            "blockysize": self.tile_size,
+            "BIGTIFF": "IF_SAFER",
+        }
+
+    def _feature(self, polygon, change: int, pixels: float, total: float, district_names, district_tree) -> Dict:
+        """GeoJSON-like feature of a change polygon (pixel coordinates -> map coordinates)"""
+        geometry = shapely.transform(polygon, lambda c: np.column_stack(self.transform * (c[:, 0], c[:, 1])))
+        properties = {
+            "change": CHANGE_CLASSES[change],
+            "area_m2": round(pixels * self.pixel_area, 1),
+            "mean_difference": round(total / pixels, 4),
+        }
+        if district_tree is not None:
+            hits = district_tree.query(shapely.point_on_surface(geometry), predicate="intersects")
+            properties["district"] = district_names[hits[0]] if len(hits) else None
+        return {"geometry": mapping(geometry), "properties": properties}
+
+    def _merge_edge_pieces(self, pieces: List[Tuple]) -> Iterator[Tuple]:
+        """Union polygons of the same class sharing a block edge (exact in pixel coordinates)"""
+        if not pieces:
+            return
+        geometries = shapely.from_wkb([p[0] for p in pieces])
+        changes = np.array([p[1] for p in pieces])
+        left, right = shapely.STRtree(geometries).query(geometries, predicate="touches")
+        keep = (left < right) & (changes[left] == changes[right])
+        left, right = left[keep], right[keep]
+        shared = shapely.length(shapely.intersection(geometries[left], geometries[right])) > 0
+        parent = np.arange(len(pieces))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for a, b in zip(left[shared], right[shared]):
+            parent[find(a)] = find(b)
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(pieces)):
+            groups.setdefault(find(i), []).append(i)
+        for members in groups.values():
+            geometry = geometries[members[0]] if len(members) == 1 else shapely.union_all(geometries[members])
+            yield (
+                geometry,
+                pieces[members[0]][1],
+                sum(pieces[i][2] for i in members),
+                sum(pieces[i][3] for i in members),
+            )
+
+    def run(
+        self,
+        output_dir: str,
+        prefix: str = "change",
+        districts: Optional[Dict] = None,
+        feature_batch: int = 2000,
+    ) -> Dict:
+        """
+        Run the pipeline into ``output_dir``
+
+        Writes ``<prefix>_difference.tif`` (index difference), ``<prefix>_classes.tif``
+        (0 no change, 1 decrease, 2 increase; both COG), ``<prefix>_polygons.gpkg`` and,
+        with ``districts`` (see load_districts), ``<prefix>_districts.json``.
+
+        Returns:
+            Summary dict (shift, counts, areas, per-district statistics, timings, outputs)
+        """
+        start = time.perf_counter()
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        outputs = {
+            "difference": output_dir / f"{prefix}_difference.tif",
+            "classes": output_dir / f"{prefix}_classes.tif",
+            "polygons": output_dir / f"{prefix}_polygons.gpkg",
+        }
+
+        self.shift = self.estimate_shift() if self.coregister else (0.0, 0.0)
+        district_names, district_geometries, district_tree = [], [], None
+        if districts:
+            district_names = districts["names"]
+            district_geometries = _reproject(districts["geometries"], districts["crs"], self.crs.to_string())
+            district_tree = shapely.STRtree(district_geometries)
+            outputs["districts"] = output_dir / f"{prefix}_districts.json"
+
+        options = {
+            "index": self.index,
+            "threshold": self.threshold,
+            "old_bands": self.old_bands,
+            "new_bands": self.new_bands,
+            "width": self.width,
+            "height": self.height,
+        }
+        windows = list(self.windows())
+        logger.info(f"Detecting {self.index} changes on {self.width}x{self.height} px in {len(windows)} blocks")
+
+        tallies = np.zeros((5, len(district_names) + 1))
+        edge_pieces: List[Tuple] = []
+        counts = {"polygons": 0, "dropped": 0, "decrease_pixels": 0, "increase_pixels": 0, "valid_pixels": 0}
+        writer = GeoPackageWriter(outputs["polygons"], epsg=self.crs.to_epsg() or 2154, layer_name="changes")
+        batch: List[Dict] = []
+
+        def emit(polygon, change, pixels, total):
+            if pixels * self.pixel_area < self.min_area:
+                counts["dropped"] += 1
+                return
+            batch.append(self._feature(polygon, change, pixels, total, district_names, district_tree))
+            counts["polygons"] += 1
+            if len(batch) >= feature_batch:
+                writer.write(batch)
+                batch.clear()
+
+        with tempfile.TemporaryDirectory(dir=output_dir) as tmp:
+            tmp = Path(tmp)
+            difference_dst = rasterio.open(tmp / "difference.tif", "w", **self._profile("float32", DIFFERENCE_NODATA))
+            classes_dst = rasterio.open(tmp / "classes.tif", "w", **self._profile("uint8", CHANGE_NODATA))
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_worker,
+                    initargs=(
+                        self.old_scene,
+                        self.new_scene,
+                        self._vrt_options(self.shift),
+                        options,
+                        list(shapely.to_wkb(district_geometries)) if districts else [],
+                    ),
+                ) as executor:
+                    queue = iter(windows)
+                    in_flight = set()
+                    while True:
+                        for block in queue:
+                            in_flight.add(executor.submit(detect_block, block))
+                            if len(in_flight) >= 2 * self.workers:
+                                break
+                        if not in_flight:
+                            break
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            result = future.result()
+                            window = Window(*result["block"])
+                            difference_dst.write(result["difference"], 1, window=window)
+                            classes_dst.write(result["classes"], 1, window=window)
+                            counts["valid_pixels"] += int((result["classes"] != CHANGE_NODATA).sum())
+                            counts["decrease_pixels"] += int((result["classes"] == 1).sum())
+                            counts["increase_pixels"] += int((result["classes"] == 2).sum())
+                            if result["tallies"] is not None:
+                                tallies += result["tallies"]
+                            for wkb, change, pixels, total, touches in result["polygons"]:
+                                if touches:
+                                    edge_pieces.append((wkb, change, pixels, total))
+                                else:
+                                    emit(shapely.from_wkb(wkb), change, pixels, total)
+            finally:
+                difference_dst.close()
+                classes_dst.close()
+            compute_seconds = time.perf_counter() - start
+
+            for polygon, change, pixels, total in self._merge_edge_pieces(edge_pieces):
+                emit(polygon, change, pixels, total)
+            if batch:
+                writer.write(batch)
+            writer.close()
+
+            for name in ("difference", "classes"):
+                rasterio.shutil.copy(
+                    tmp / f"{name}.tif",
+                    outputs[name],
+                    driver="COG",
+                    COMPRESS="DEFLATE",
+                    PREDICTOR="3" if name == "difference" else "2",
+                    BLOCKSIZE=str(self.tile_size),
+                    OVERVIEW_RESAMPLING="AVERAGE" if name == "difference" else "NEAREST",
+                    NUM_THREADS="ALL_CPUS",
+                    BIGTIFF="IF_SAFER",
+                )
+
+        hectares = self.pixel_area / 10000
+        summary = {
+            "index": self.index,
+            "threshold": self.threshold,
+            "shift_pixels": [round(v, 3) for v in self.shift],
+            "pixels": self.width * self.height,
+            "blocks": len(windows),
+            "polygons": counts["polygons"],
+            "polygons_below_min_area": counts["dropped"],
+            "valid_ha": round(counts["valid_pixels"] * hectares, 2),
+            "decrease_ha": round(counts["decrease_pixels"] * hectares, 2),
+            "increase_ha": round(counts["increase_pixels"] * hectares, 2),
+        }
+        if districts:
+            summary["districts"] = self._district_summary(district_names, tallies, outputs["polygons"])
+            outputs["districts"].write_text(json.dumps(summary, indent=2, ensure_ascii=False))
+
+        seconds = time.perf_counter() - start
+        summary.update(
+            compute_seconds=round(compute_seconds, 3),
+            seconds=round(seconds, 3),
+            mpx_per_second=round(self.width * self.height / 1e6 / seconds, 2) if seconds else None,
+            outputs={name: str(path) for name, path in outputs.items()},
+        )
+        logger.info(
+            f"{summary['polygons']} change polygons, -{summary['decrease_ha']} / +{summary['increase_ha']} ha "
+            f"in {seconds:.1f}s ({summary['mpx_per_second']} Mpx/s)"
+        )
+        return summary
+
+    def _district_summary(self, names: Sequence[str], tallies: np.ndarray, polygons_path: Path) -> List[Dict]:
+        """Per-district areas and mean difference from the block tallies, with polygon counts"""
+        conn = sqlite3.connect(f"file:{polygons_path}?mode=ro", uri=True)
+        try:
+            polygon_counts = dict(conn.execute("SELECT district, COUNT(*) FROM changes GROUP BY district").fetchall())
+        except sqlite3.OperationalError:  # no polygon written, so no district column
+            polygon_counts = {}
+        finally:
+            conn.close()
+
+        hectares = self.pixel_area / 10000
+        rows = []
+        for i, name in enumerate(names, start=1):
+            total, valid, decrease, increase, difference = tallies[:, i]
+            rows.append({
+                "district": name,
+                "area_ha": round(total * hectares, 2),
+                "valid_ha": round(valid * hectares, 2),
+                "decrease_ha": round(decrease * hectares, 2),
+                "increase_ha": round(increase * hectares, 2),
+                "changed_percent": round(100 * (decrease + increase) / valid, 2) if valid else None,
+                "mean_difference": round(difference / valid, 4) if valid else None,
+                "polygons": polygon_counts.get(name, 0),
+            })
+        return rows
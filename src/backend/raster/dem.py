@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Local DEM elevation engine over RGE ALTI (ASC / GeoTIFF) and SRTM (.hgt) tiles
+Tiles are found through a grid index and read as memory-mapped arrays, so batches of
+thousands of points are answered with bilinear interpolation in one vectorized pass
+"""
+
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..scrapers.ign_projection import can_transform, transform
+
+logger = logging.getLogger(__name__)
+
+try:
+    import rasterio
+    from rasterio.windows import Window
+
+    RASTERIO_AVAILABLE = True
+except ImportError:
+    RASTERIO_AVAILABLE = False
+
+DEFAULT_DEM_DIR = Path(__file__).parent.parent.parent.parent / "data" / "dem"
+WGS84 = "EPSG:4326"
+LAMBERT93 = "EPSG:2154"  # RGE ALTI ASC tiles carry no CRS of their own
+CONVERT_WINDOW_ROWS = 512  # GeoTIFF rows read at once when building a .npy sidecar
+
+HGT_NAME = re.compile(r"^([NS])(\d{2})([EW])(\d{3})", re.IGNORECASE)
+
+
+class DEMTile:
+    """
+    One georeferenced elevation grid
+
+    ``cx0``/``cy0`` are the coordinates of the centre of sample (0, 0), rows run south.
+    Samples are opened lazily through ``loader`` (a memmap, never a full read).
+    """
+
+    def __init__(self, path: Path, crs: str, cx0: float, cy0: float, dx: float, dy: float,
+                 nrows: int, ncols: int, nodata: Optional[float], source: str, loader):
+        self.path = path
+        self.crs = crs
+        self.cx0, self.cy0, self.dx, self.dy = cx0, cy0, dx, dy
+        self.nrows, self.ncols = nrows, ncols
+        self.nodata = nodata
+        self.source = source
+        self.loader = loader
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """Pixel-edge extent (xmin, ymin, xmax, ymax)"""
+        return (
+            self.cx0 - self.dx / 2,
+            self.cy0 - (self.nrows - 0.5) * self.dy,
+            self.cx0 + (self.ncols - 0.5) * self.dx,
+            self.cy0 + self.dy / 2,
+        )
+
+    @property
+    def resolution_m(self) -> float:
+        return self.dx * 111_320.0 if self.crs == WGS84 else self.dx
+
+
+# ----------------------------------------------------------------------
+# Tile readers
+# ----------------------------------------------------------------------
+
+
+def _read_hgt(path: Path) -> Optional[DEMTile]:
+    """SRTM .hgt: raw big-endian int16, corner-registered 1x1 degree grid"""
+    match = HGT_NAME.match(path.name)
+    if not match:
+        return None
+    size = int(math.isqrt(path.stat().st_size // 2))
+    if size * size * 2 != path.stat().st_size:
+        logger.warning(f"Skipping {path.name}: not a square int16 grid")
+        return None
+    lat = int(match.group(2)) * (1 if match.group(1).upper() == "N" else -1)
+    lon = int(match.group(4)) * (1 if match.group(3).upper() == "E" else -1)
+    step = 1.0 / (size - 1)
+
+    def loader():
+        return np.memmap(path, dtype=">i2", mode="r", shape=(size, size))
+
+    return DEMTile(path, WGS84, lon, lat + 1, step, step, size, size, -32768, "SRTM", loader)
+
+
+def _sidecar(path: Path, cache_dir: Path) -> Path:
+    digest = hashlib.md5(str(path.resolve()).encode()).hexdigest()[:8]
+    return cache_dir / f"{path.stem}_{digest}.npy"
+
+
+def _mmap_npy(path: Path, cache_dir: Path, shape: Tuple[int, int], convert):
+    """
+    Memory-map the .npy sidecar of ``path``, (re)building it with ``convert`` when stale
+
+    ``convert(out)`` fills ``out``, a float32 array of ``shape`` memory-mapped on the
+    sidecar file itself, so a conversion never holds the whole tile in memory.
+    """
+    npy = _sidecar(path, cache_dir)
+    if not npy.exists() or npy.stat().st_mtime < path.stat().st_mtime:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # One temporary file per thread: concurrent first uses convert twice, never into the same file
+        tmp = npy.with_name(f"{npy.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npy")
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=shape)
+        convert(out)
+        out.flush()
+        del out
+        os.replace(tmp, npy)
+    return np.load(npy, mmap_mode="r")
+
+
+def _read_asc(path: Path, cache_dir: Path, crs: str) -> Optional[DEMTile]:
+    """ESRI ASCII grid (RGE ALTI): header parsed now, samples converted to .npy on first use"""
+    header: Dict[str, float] = {}
+    with open(path, "r") as handle:
+        for _ in range(6):
+            position = handle.tell()
+            parts = handle.readline().split()
+            if len(parts) != 2 or not parts[0][0].isalpha():
+                handle.seek(position)
+                break
+            header[parts[0].lower()] = float(parts[1])
+    try:
+        ncols, nrows, cell = int(header["ncols"]), int(header["nrows"]), header["cellsize"]
+    except KeyError:
+        logger.warning(f"Skipping {path.name}: incomplete ASC header")
+        return None
+    header_lines = len(header)
+    if "xllcenter" in header:
+        cx0, cy0 = header["xllcenter"], header["yllcenter"] + (nrows - 1) * cell
+    else:
+        cx0, cy0 = header["xllcorner"] + cell / 2, header["yllcorner"] + (nrows - 0.5) * cell
+
+    def convert(out: np.ndarray):
+        with open(path, "r") as handle:
+            for _ in range(header_lines):
+                handle.readline()
+            out[:] = np.array(handle.read().split(), dtype=np.float32).reshape(nrows, ncols)
+
+    return DEMTile(path, crs, cx0, cy0, cell, cell, nrows, ncols, header.get("nodata_value", -99999.0),
+                   "RGE ALTI", lambda: _mmap_npy(path, cache_dir, (nrows, ncols), convert))
+
+
+def _read_geotiff(path: Path, cache_dir: Path) -> Optional[DEMTile]:
+    """GeoTIFF/COG via rasterio: band 1 converted to a memory-mappable .npy on first use"""
+    if not RASTERIO_AVAILABLE:
+        return None
+    with rasterio.open(path) as src:
+        transform = src.transform
+        if transform.b or transform.d or src.crs is None:
+            logger.warning(f"Skipping {path.name}: rotated or unreferenced raster")
+            return None
+        crs = src.crs.to_string()
+        nrows, ncols, nodata = src.height, src.width, src.nodata
+    dx, dy = transform.a, -transform.e
+
+    def convert(out: np.ndarray):
+        # Row windows of whole blocks: a large COG is never read into memory at once
+        with rasterio.open(path) as src:
+            step = src.block_shapes[0][0] * max(1, CONVERT_WINDOW_ROWS // src.block_shapes[0][0])
+            for row in range(0, nrows, step):
+                height = min(step, nrows - row)
+                out[row:row + height] = src.read(1, window=Window(0, row, ncols, height)).astype(np.float32)
+
+    source = "RGE ALTI" if "RGEALTI" in path.name.upper().replace("_", "") else "DEM"
+    return DEMTile(path, crs, transform.c + dx / 2, transform.f - dy / 2, dx, dy, nrows, ncols, nodata,
+                   source, lambda: _mmap_npy(path, cache_dir, (nrows, ncols), convert))
+
+
+# ----------------------------------------------------------------------
+# Index and sampling
+# ----------------------------------------------------------------------
+
+
+class _GridIndex:
+    """Uniform grid over one CRS; each cell lists the tiles overlapping it, finest first"""
+
+    def __init__(self, tiles: List[DEMTile]):
+        self.tiles = sorted(tiles, key=lambda t: t.resolution_m)
+        extents = np.array([t.bounds for t in self.tiles])
+        self.cell_w = float(np.max(extents[:, 2] - extents[:, 0]))
+        self.cell_h = float(np.max(extents[:, 3] - extents[:, 1]))
+        self.bounds = extents
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for tile_id, (xmin, ymin, xmax, ymax) in enumerate(extents):
+            for i in range(math.floor(xmin / self.cell_w), math.floor(xmax / self.cell_w) + 1):
+                for j in range(math.floor(ymin / self.cell_h), math.floor(ymax / self.cell_h) + 1):
+                    self.cells.setdefault((i, j), []).append(tile_id)
+
+    def locate(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Tile id for each point (-1 when no tile covers it)"""
+        owner = np.full(len(xs), -1, dtype=np.int64)
+        keys = np.column_stack([np.floor(xs / self.cell_w), np.floor(ys / self.cell_h)]).astype(np.int64)
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for k, (i, j) in enumerate(unique):
+            candidates = self.cells.get((int(i), int(j)))
+            if not candidates:
+                continue
+            members = np.nonzero(inverse == k)[0]
+            for tile_id in candidates:
+                xmin, ymin, xmax, ymax = self.bounds[tile_id]
+                px, py = xs[members], ys[members]
+                inside = (owner[members] < 0) & (px >= xmin) & (px <= xmax) & (py >= ymin) & (py <= ymax)
+                owner[members[inside]] = tile_id
+        return owner
+
+
+def bilinear(grid: np.ndarray, tile: DEMTile, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """Bilinear samples at (xs, ys); nodata neighbours are dropped and weights renormalized"""
+    col = np.clip((xs - tile.cx0) / tile.dx, 0, tile.ncols - 1)
+    row = np.clip((tile.cy0 - ys) / tile.dy, 0, tile.nrows - 1)
+    c0 = np.minimum(np.floor(col).astype(np.int64), max(tile.ncols - 2, 0))
+    r0 = np.minimum(np.floor(row).astype(np.int64), max(tile.nrows - 2, 0))
+    c1 = np.minimum(c0 + 1, tile.ncols - 1)
+    r1 = np.minimum(r0 + 1, tile.nrows - 1)
+    fc, fr = col - c0, row - r0
+
+    values = np.stack([grid[r0, c0], grid[r0, c1], grid[r1, c0], grid[r1, c1]]).astype(np.float64)
+    weights = np.stack([(1 - fc) * (1 - fr), fc * (1 - fr), (1 - fc) * fr, fc * fr])
+    valid = np.isfinite(values)
+    if tile.nodata is not None:
+        valid &= values != tile.nodata
+    weights = np.where(valid, weights, 0.0)
+    total = weights.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = (np.where(valid, values, 0.0) * weights).sum(axis=0) / total
+    result[total <= 0] = np.nan
+    return result
+
+
+class DEMElevationService:
+    """Vectorized elevation lookups over local DEM tiles (finest resolution wins)"""
+
+    def __init__(
+        self,
+        dem_dirs: Optional[Sequence[str]] = None,
+        cache_dir: Optional[str] = None,
+        asc_crs: str = LAMBERT93,
+        max_open_tiles: int = 128,
+    ):
+        """
+        Initialize the service (directories are scanned on first use)
+
+        Args:
+            dem_dirs: Folders searched recursively for *.hgt, *.asc and *.tif
+                (default: $SPOTS_DEM_DIRS, os.pathsep-separated, or data/dem)
+            cache_dir: Where ASC/GeoTIFF tiles are converted to memory-mappable .npy
+            asc_crs: CRS assumed for ASC grids (RGE ALTI is Lambert-93)
+            max_open_tiles: Memory maps kept open at once
+        """
+        env_dirs = os.getenv("SPOTS_DEM_DIRS")
+        if dem_dirs is None:
+            dem_dirs = env_dirs.split(os.pathsep) if env_dirs else [str(DEFAULT_DEM_DIR)]
+        self.dem_dirs = [Path(d) for d in dem_dirs]
+        self.cache_dir = Path(cache_dir) if cache_dir else self.dem_dirs[0] / ".npy_cache"
+        self.asc_crs = asc_crs
+        self.max_open_tiles = max_open_tiles
+
+        self._indexes: Optional[List[Tuple[str, _GridIndex]]] = None
+        self._open: "OrderedDict[Path, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def scan(self) -> List[Tuple[str, _GridIndex]]:
+        """(Re)build the per-CRS grid indexes from the DEM directories"""
+        tiles: List[DEMTile] = []
+        for directory in self.dem_dirs:
+            if not directory.exists():
+                continue
+            for path in sorted(directory.rglob("*")):
+                if self.cache_dir in path.parents:
+                    continue
+                suffix = path.suffix.lower()
+                try:
+                    if suffix == ".hgt":
+                        tile = _read_hgt(path)
+                    elif suffix == ".asc":
+                        tile = _read_asc(path, self.cache_dir, self.asc_crs)
+                    elif suffix in (".tif", ".tiff"):
+                        tile = _read_geotiff(path, self.cache_dir)
+                    else:
+                        continue
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping DEM tile {path}: {e}")
+                    continue
+                if tile is not None:
+                    tiles.append(tile)
+
+        by_crs: Dict[str, List[DEMTile]] = {}
+        for tile in tiles:
+            if tile.crs != WGS84 and not can_transform(WGS84, tile.crs):
+                logger.warning(f"No projection backend for {tile.crs}, ignoring {tile.path.name}")
+                continue
+            by_crs.setdefault(tile.crs, []).append(tile)
+
+        indexes = [(crs, _GridIndex(group)) for crs, group in by_crs.items()]
+        indexes.sort(key=lambda item: item[1].tiles[0].resolution_m)
+        self._indexes = indexes
+        logger.info(f"DEM index: {len(tiles)} tiles in {len(indexes)} CRS group(s)")
+        return indexes
+
+    def _ensure_index(self) -> List[Tuple[str, _GridIndex]]:
+        if self._indexes is None:
+            with self._lock:
+                if self._indexes is None:
+                    self.scan()
+        return self._indexes
+
+    @property
+    def available(self) -> bool:
+        return bool(self._ensure_index())
+
+    def _grid(self, tile: DEMTile) -> np.ndarray:
+        with self._lock:
+            grid = self._open.get(tile.path)
+            if grid is not None:
+                self._open.move_to_end(tile.path)
+                return grid
+        grid = tile.loader()
+        with self._lock:
+            self._open[tile.path] = grid
+            while len(self._open) > self.max_open_tiles:
+                self._open.popitem(last=False)
+        return grid
+
+    def _project(self, crs: str, lons: np.ndarray, lats: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if crs == WGS84:
+            return lons, lats
+        return transform(lons, lats, WGS84, crs)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def elevations(self, lats: Sequence[float], lons: Sequence[float]) -> np.ndarray:
+        """Elevation in metres for each point (NaN where no local DEM covers it)"""
+        lats = np.asarray(lats, dtype=np.float64).reshape(-1)
+        lons = np.asarray(lons, dtype=np.float64).reshape(-1)
+        result = np.full(len(lats), np.nan)
+
+        for crs, index in self._ensure_index():
+            todo = np.nonzero(np.isnan(result) & np.isfinite(lats) & np.isfinite(lons))[0]
+            if not len(todo):
+                break
+            xs, ys = self._project(crs, lons[todo], lats[todo])
+            owner = index.locate(xs, ys)
+            for tile_id in np.unique(owner[owner >= 0]):
+                members = owner == tile_id
+                tile = index.tiles[tile_id]
+                result[todo[members]] = bilinear(self._grid(tile), tile, xs[members], ys[members])
+        return result
+
+    def elevation(self, lat: float, lon: float) -> Optional[float]:
+        """Elevation for one point, or None outside local coverage"""
+        value = self.elevations([lat], [lon])[0]
+        return round(float(value), 2) if np.isfinite(value) else None
+
+    def get_stats(self) -> Dict:
+        indexes = self._ensure_index()
+        return {
+            "directories": [str(d) for d in self.dem_dirs],
+            "groups": [
+                {
+                    "crs": crs,
+                    "tiles": len(index.tiles),
+                    "sources": sorted({t.source for t in index.tiles}),
+                    "best_resolution_m": round(index.tiles[0].resolution_m, 2),
+                }
+                for crs, index in indexes
+            ],
+            "open_tiles": len(self._open),
+        }
+
+
+_services: Dict[Tuple[str, ...], DEMElevationService] = {}
+_services_lock = threading.Lock()
+
+
+def get_dem_service(dem_dirs: Optional[Sequence[str]] = None) -> DEMElevationService:
+    """Get the shared DEM service for a set of directories"""
+    env_dirs = os.getenv("SPOTS_DEM_DIRS")
+    if dem_dirs is None:
+        dem_dirs = env_dirs.split(os.pathsep) if env_dirs else [str(DEFAULT_DEM_DIR)]
+    key = tuple(str(Path(d).resolve()) for d in dem_dirs)
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = _services[key] = DEMElevationService(list(key))
+        return service
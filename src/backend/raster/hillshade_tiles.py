@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Hillshade and slope-class tile layers rendered from the RGE ALTI DEM into MBTiles
+Work is split into metatiles (blocks of N x N tiles) across a process pool. Each metatile
+is warped to Web Mercator with an edge buffer, shaded in one pass and cut into tiles, so
+neighbouring tiles share their edge pixels and the shading has no seams
+"""
+
+import io
+import logging
+import math
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..utils.mbtiles import init_mbtiles
+from .terrain import horn_derivatives
+from .tiler import PIL_AVAILABLE, RASTERIO_AVAILABLE, TILE_SIZE, tile_bounds, tiles_for_bounds
+
+logger = logging.getLogger(__name__)
+
+if RASTERIO_AVAILABLE:
+    import rasterio
+    from affine import Affine
+    from rasterio.enums import Resampling
+    from rasterio.vrt import WarpedVRT
+    from rasterio.warp import transform_bounds
+
+if PIL_AVAILABLE:
+    from PIL import Image
+
+EARTH_RADIUS = 6378137.0
+LAYERS = ("hillshade", "slope")
+
+# Slope classes: (lower bound in degrees, RGBA), in the style of French mountain slope maps
+SLOPE_CLASSES = [
+    (15.0, (255, 255, 150, 110)),
+    (30.0, (255, 200, 0, 150)),
+    (35.0, (255, 120, 0, 170)),
+    (40.0, (220, 20, 20, 180)),
+    (45.0, (130, 0, 130, 190)),
+]
+
+Bounds = Tuple[float, float, float, float]
+
+
+# ----------------------------------------------------------------------
+# Shading
+# ----------------------------------------------------------------------
+
+
+def hillshade(slope: np.ndarray, aspect: np.ndarray, azimuth: float = 315.0, altitude: float = 45.0) -> np.ndarray:
+    """
+    Illumination in 0..1 from slope and aspect (degrees, aspect as compass direction faced)
+
+    Flat cells get cos(zenith); slopes facing the sun (azimuth) are brightest.
+    """
+    zenith = math.radians(90.0 - altitude)
+    slope_r = np.radians(slope)
+    aspect_r = np.radians(np.nan_to_num(aspect))
+    shade = math.cos(zenith) * np.cos(slope_r) + math.sin(zenith) * np.sin(slope_r) * np.cos(
+        math.radians(azimuth) - aspect_r
+    )
+    return np.clip(shade, 0.0, 1.0)
+
+
+def encode_hillshade(shade: np.ndarray, max_alpha: int = 180) -> np.ndarray:
+    """RGBA shadow overlay: black, more opaque where darker, transparent where fully lit or nodata"""
+    rgba = np.zeros(shade.shape + (4,), dtype=np.uint8)
+    alpha = np.nan_to_num((1.0 - shade) * max_alpha, nan=0.0)
+    rgba[..., 3] = np.clip(alpha, 0, 255).astype(np.uint8)
+    return rgba
+
+
+def encode_slope_classes(slope: np.ndarray) -> np.ndarray:
+    """RGBA slope classes (gentle slopes and nodata transparent)"""
+    palette = np.array([(0, 0, 0, 0)] + [color for _, color in SLOPE_CLASSES], dtype=np.uint8)
+    classes = np.digitize(np.nan_to_num(slope, nan=-1.0), [bound for bound, _ in SLOPE_CLASSES])
+    return palette[classes]
+
+
+def _png(rgba: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, "RGBA").save(buffer, "PNG", optimize=False)
+    return buffer.getvalue()
+
+
+def _mercator_latitude(y: float) -> float:
+    return math.degrees(2 * math.atan(math.exp(y / EARTH_RADIUS)) - math.pi / 2)
+
+
+# ----------------------------------------------------------------------
+# Worker process
+# ----------------------------------------------------------------------
+
+_worker: Dict = {}
+
+
+def _init_worker(dem_paths: Sequence[str], source_bounds: Sequence[Bounds], options: Dict):
+    """Open the DEM sources once per process"""
+    _worker.update(
+        sources=[rasterio.open(path) for path in dem_paths],
+        bounds=list(source_bounds),
+        options=options,
+    )
+
+
+def _read_buffered(transform, width: int, height: int, bounds: Bounds) -> np.ndarray:
+    """Elevations of a buffered metatile in Web Mercator (NaN outside all sources; first source wins)"""
+    data = np.full((height, width), np.nan)
+    for src, (minx, miny, maxx, maxy) in zip(_worker["sources"], _worker["bounds"]):
+        if minx > bounds[2] or maxx < bounds[0] or miny > bounds[3] or maxy < bounds[1]:
+            continue
+        with WarpedVRT(
+            src, crs="EPSG:3857", transform=transform, width=width, height=height, resampling=Resampling.bilinear
+        ) as vrt:
+            block = vrt.read(1, masked=True).astype(np.float64).filled(np.nan)
+        data = np.where(np.isnan(data), block, data)
+        if not np.isnan(data).any():
+            break
+    return data
+
+
+def render_metatile(z: int, mx: int, my: int) -> Dict[str, List[Tuple[int, int, int, bytes]]]:
+    """
+    Render every tile of metatile (mx, my) at zoom z
+
+    Returns:
+        Layer -> [(z, x, tms_y, png)] for tiles with data
+    """
+    options = _worker["options"]
+    size, buffer, n = options["metatile"], options["buffer"], 2**z
+    x0, y0 = mx * size, my * size
+    x1, y1 = min(x0 + size, n), min(y0 + size, n)
+
+    minx, _, _, maxy = tile_bounds(z, x0, y0)
+    _, miny, maxx, _ = tile_bounds(z, x1 - 1, y1 - 1)
+    resolution = (maxx - minx) / ((x1 - x0) * TILE_SIZE)
+    width, height = (x1 - x0) * TILE_SIZE + 2 * buffer, (y1 - y0) * TILE_SIZE + 2 * buffer
+    transform = Affine(resolution, 0, minx - buffer * resolution, 0, -resolution, maxy + buffer * resolution)
+    pad = buffer * resolution
+    elevations = _read_buffered(transform, width, height, (minx - pad, miny - pad, maxx + pad, maxy + pad))
+    rendered: Dict[str, List[Tuple[int, int, int, bytes]]] = {layer: [] for layer in options["layers"]}
+    if np.isnan(elevations).all():
+        return rendered
+
+    # Mercator pixels are 1 / cos(latitude) times larger than on the ground
+    ground = resolution * math.cos(math.radians(_mercator_latitude((miny + maxy) / 2)))
+    terrain = horn_derivatives(elevations * options["z_factor"], ground, ground)
+    inner = (slice(buffer - 1, buffer - 1 + height - 2 * buffer), slice(buffer - 1, buffer - 1 + width - 2 * buffer))
+    slope, aspect = terrain["slope"][inner], terrain["aspect"][inner]
+
+    images = {}
+    if "hillshade" in options["layers"]:
+        images["hillshade"] = encode_hillshade(hillshade(slope, aspect, options["azimuth"], options["altitude"]))
+    if "slope" in options["layers"]:
+        images["slope"] = encode_slope_classes(slope)
+
+    for x in range(x0, x1):
+        for y in range(y0, y1):
+            rows = slice((y - y0) * TILE_SIZE, (y - y0 + 1) * TILE_SIZE)
+            cols = slice((x - x0) * TILE_SIZE, (x - x0 + 1) * TILE_SIZE)
+            if np.isnan(slope[rows, cols]).all():
+                continue
+            for layer, image in images.items():
+                rendered[layer].append((z, x, (n - 1) - y, _png(image[rows, cols])))
+    return rendered
+
+
+def _render_task(task: Tuple[int, int, int]) -> Dict[str, List[Tuple[int, int, int, bytes]]]:
+    return render_metatile(*task)
+
+
+# ----------------------------------------------------------------------
+# Generator
+# ----------------------------------------------------------------------
+
+
+class TerrainTileGenerator:
+    """Render hillshade and slope-class MBTiles overlays from DEM rasters"""
+
+    def __init__(
+        self,
+        dem_paths: Sequence[str],
+        min_zoom: int = 8,
+        max_zoom: int = 15,
+        layers: Sequence[str] = LAYERS,
+        metatile: int = 8,
+        buffer: int = 4,
+        azimuth: float = 315.0,
+        altitude: float = 45.0,
+        z_factor: float = 1.0,
+        workers: Optional[int] = None,
+    ):
+        """
+        Initialize the generator
+
+        Args:
+            dem_paths: DEM rasters (e.g. the per-department RGE ALTI COGs); earlier ones win on overlaps
+            min_zoom, max_zoom: Zoom range rendered
+            layers: Subset of LAYERS
+            metatile: Tiles per metatile side (one worker task)
+            buffer: Edge pixels read around each metatile (at least 1 for the 3x3 kernels)
+            azimuth, altitude: Sun position in degrees
+            z_factor: Vertical exaggeration
+            workers: Worker processes (default: CPU count)
+        """
+        if not RASTERIO_AVAILABLE or not PIL_AVAILABLE:
+            raise RuntimeError("TerrainTileGenerator requires rasterio and Pillow")
+        unknown = set(layers) - set(LAYERS)
+        if unknown:
+            raise ValueError(f"Unknown layers {sorted(unknown)}, choose from {list(LAYERS)}")
+        if buffer < 1:
+            raise ValueError("buffer must be at least 1 pixel")
+
+        self.dem_paths = [str(p) for p in dem_paths]
+        self.min_zoom, self.max_zoom = min_zoom, max_zoom
+        self.layers = list(layers)
+        self.options = {
+            "layers": self.layers,
+            "metatile": metatile,
+            "buffer": buffer,
+            "azimuth": azimuth,
+            "altitude": altitude,
+            "z_factor": z_factor,
+        }
+        self.workers = workers or os.cpu_count() or 2
+
+        self.source_bounds: List[Bounds] = []
+        wgs84 = []
+        for path in self.dem_paths:
+            with rasterio.open(path) as src:
+                self.source_bounds.append(transform_bounds(src.crs, "EPSG:3857", *src.bounds))
+                wgs84.append(transform_bounds(src.crs, "EPSG:4326", *src.bounds))
+        self.wgs84_bounds = (
+            min(b[0] for b in wgs84),
+            min(b[1] for b in wgs84),
+            max(b[2] for b in wgs84),
+            max(b[3] for b in wgs84),
+        )
+
+    def plan(self) -> List[Tuple[int, int, int]]:
+        """Metatiles (z, mx, my) touching a DEM, lowest zoom first"""
+        size = self.options["metatile"]
+        metatiles = []
+        for z in range(self.min_zoom, self.max_zoom + 1):
+            keys = set()
+            for bounds in self.source_bounds:
+                keys.update((z, x // size, y // size) for _, x, y in tiles_for_bounds(bounds, z))
+            metatiles.extend(sorted(keys))
+        return metatiles
+
+    def metadata(self, layer: str, name: str) -> Dict[str, str]:
+        west, south, east, north = self.wgs84_bounds
+        description = {
+            "hillshade": f"Hillshade (sun {self.options['azimuth']:.0f}°/{self.options['altitude']:.0f}°)",
+            "slope": "Slope classes: 15°, 30°, 35°, 40°, 45°",
+        }[layer]
+        return {
+            "name": name,
+            "type": "overlay",
+            "category": "overlay",
+            "version": "1.0.0",
+            "description": f"{description} from {', '.join(Path(p).name for p in self.dem_paths)}",
+            "format": "png",
+            "bounds": f"{west:.6f},{south:.6f},{east:.6f},{north:.6f}",
+            "center": f"{(west + east) / 2:.6f},{(south + north) / 2:.6f},{min(self.max_zoom, self.min_zoom + 3)}",
+            "minzoom": str(self.min_zoom),
+            "maxzoom": str(self.max_zoom),
+            "attribution": "© IGN RGE ALTI / SPOTS",
+        }
+
+    def generate(self, output_dir: str, prefix: str = "rgealti", batch_size: int = 500) -> Dict:
+        """
+        Render all layers into ``output_dir/<prefix>_<layer>.mbtiles``
+
+        Workers render metatiles; only this process writes SQLite, with at most two
+        metatiles per worker in flight. Each layer is written to ``<name>.mbtiles.part``
+        and renamed once complete, so the offline API never registers a partial file.
+
+        Returns:
+            Dict with metatile and per-layer tile counts and output paths
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        outputs = {layer: output_dir / f"{prefix}_{layer}.mbtiles" for layer in self.layers}
+        partials = {layer: path.with_name(path.name + ".part") for layer, path in outputs.items()}
+        conns = {}
+        for layer, path in outputs.items():
+            partials[layer].unlink(missing_ok=True)
+            conns[layer] = init_mbtiles(partials[layer], self.metadata(layer, path.stem))
+            conns[layer].execute("PRAGMA synchronous=OFF")
+
+        tasks = self.plan()
+        stats = {
+            "metatiles": len(tasks),
+            "min_zoom": self.min_zoom,
+            "max_zoom": self.max_zoom,
+            "tiles": {layer: 0 for layer in self.layers},
+            "outputs": {layer: str(path) for layer, path in outputs.items()},
+        }
+        logger.info(f"Rendering {self.layers} z{self.min_zoom}-{self.max_zoom}: {len(tasks)} metatiles")
+
+        pending: Dict[str, List] = {layer: [] for layer in self.layers}
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.dem_paths, self.source_bounds, self.options),
+        ) as executor:
+            queue = iter(tasks)
+            in_flight = set()
+            while True:
+                for task in queue:
+                    in_flight.add(executor.submit(_render_task, task))
+                    if len(in_flight) >= 2 * self.workers:
+                        break
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for layer, rows in future.result().items():
+                        pending[layer].extend(rows)
+                        stats["tiles"][layer] += len(rows)
+                        if len(pending[layer]) >= batch_size:
+                            self._flush(conns[layer], pending[layer])
+                            pending[layer] = []
+        for layer, conn in conns.items():
+            self._flush(conn, pending[layer])
+            conn.close()
+            os.replace(partials[layer], outputs[layer])
+
+        logger.info(f"Wrote {stats['tiles']} tiles to {output_dir}")
+        return stats
+
+    @staticmethod
+    def _flush(conn, rows: List[Tuple[int, int, int, bytes]]):
+        if not rows:
+            return
+        conn.executemany(
+            "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)", rows
+        )
+        conn.commit()
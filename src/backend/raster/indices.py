@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Spectral indices (NDVI, NDWI, built-up) for large SPOT scenes, headless
+The scene is cut into blocks aligned on the output tiles; a process pool reads each
+block through a windowed read and computes every requested index with NumPy, while
+this process writes the blocks into tiled GeoTIFFs that are then copied to COG
+(DEFLATE, overviews). Memory stays at a few blocks whatever the scene size
+"""
+
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import rasterio
+    import rasterio.shutil
+    from rasterio.windows import Window
+
+    RASTERIO_AVAILABLE = True
+except ImportError:
+    RASTERIO_AVAILABLE = False
+    logger.warning("rasterio not available - spectral indices disabled")
+
+NODATA = -9999.0
+
+# 1-based band numbers of each product
+BAND_PRESETS: Dict[str, Dict[str, int]] = {
+    "spot67": {"blue": 1, "green": 2, "red": 3, "nir": 4},
+    "spot5": {"green": 1, "red": 2, "nir": 3, "swir": 4},
+}
+
+# Normalized differences (a - b) / (a + b)
+NORMALIZED_DIFFERENCES: Dict[str, Tuple[str, str]] = {
+    "ndvi": ("nir", "red"),  # vegetation
+    "ndwi": ("green", "nir"),  # open water (McFeeters)
+    "ndbi": ("swir", "nir"),  # built-up
+}
+# Built-up index NDBI - NDVI (Zha et al. 2003)
+INDICES = tuple(NORMALIZED_DIFFERENCES) + ("bu",)
+
+
+def required_bands(indices: Sequence[str]) -> Tuple[str, ...]:
+    """Band names needed to compute ``indices``"""
+    unknown = set(indices) - set(INDICES)
+    if unknown:
+        raise ValueError(f"Unknown indices {sorted(unknown)}, choose from {list(INDICES)}")
+    names = set()
+    for index in indices:
+        for part in ("ndbi", "ndvi") if index == "bu" else (index,):
+            names.update(NORMALIZED_DIFFERENCES[part])
+    return tuple(sorted(names))
+
+
+def normalized_difference(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(a - b) / (a + b), NaN where a + b is 0"""
+    total = a + b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total != 0, (a - b) / total, np.nan)
+
+
+def compute_indices(bands: Dict[str, np.ndarray], indices: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    Compute spectral indices from band arrays
+
+    Args:
+        bands: Band name -> float array (NaN for nodata)
+        indices: Names from INDICES
+
+    Returns:
+        Index name -> float32 array (NaN where undefined)
+    """
+    results: Dict[str, np.ndarray] = {}
+    cache: Dict[str, np.ndarray] = {}
+
+    def difference(name: str) -> np.ndarray:
+        if name not in cache:
+            a, b = NORMALIZED_DIFFERENCES[name]
+            cache[name] = normalized_difference(bands[a], bands[b])
+        return cache[name]
+
+    for index in indices:
+        values = difference("ndbi") - difference("ndvi") if index == "bu" else difference(index)
+        results[index] = values.astype(np.float32)
+    return results
+
+
+# ----------------------------------------------------------------------
+# Worker process
+# ----------------------------------------------------------------------
+
+_worker: Dict = {}
+
+
+def _init_worker(path: str, bands: Dict[str, int], indices: Sequence[str]):
+    """Open the scene once per process"""
+    _worker.update(src=rasterio.open(path), bands=bands, indices=list(indices))
+
+
+def compute_block(window: Tuple[int, int, int, int]) -> Tuple[Tuple[int, int, int, int], Dict[str, np.ndarray]]:
+    """
+    Compute the indices of one block (col_off, row_off, width, height)
+
+    Returns:
+        The window and index name -> float32 array with NODATA where undefined
+    """
+    src, bands = _worker["src"], _worker["bands"]
+    names = list(bands)
+    data = src.read([bands[name] for name in names], window=Window(*window), masked=True)
+    arrays = {name: data[i].astype(np.float32).filled(np.nan) for i, name in enumerate(names)}
+    results = compute_indices(arrays, _worker["indices"])
+    for values in results.values():
+        values[np.isnan(values)] = NODATA
+    return window, results
+
+
+# ----------------------------------------------------------------------
+# Engine
+# ----------------------------------------------------------------------
+
+
+class IndexCalculator:
+    """Block-wise, parallel spectral indices for a multispectral scene"""
+
+    def __init__(
+        self,
+        scene_path: str,
+        bands: Optional[Dict[str, int]] = None,
+        preset: str = "spot67",
+        indices: Sequence[str] = ("ndvi", "ndwi"),
+        block_size: int = 1024,
+        tile_size: int = 512,
+        workers: Optional[int] = None,
+    ):
+        """
+        Initialize the calculator
+
+        Args:
+            scene_path: Multispectral GeoTIFF (e.g. SPOT 6/7 MS, SPOT 5)
+            bands: Band name -> 1-based band number (overrides ``preset``)
+            preset: Key of BAND_PRESETS
+            indices: Names from INDICES
+            block_size: Pixels per block side (one worker task); rounded to a multiple of ``tile_size``
+            tile_size: Internal tile size of the outputs
+            workers: Worker processes (default: CPU count)
+        """
+        if not RASTERIO_AVAILABLE:
+            raise RuntimeError("IndexCalculator requires rasterio")
+        if bands is None:
+            if preset not in BAND_PRESETS:
+                raise ValueError(f"Unknown preset '{preset}', choose from {list(BAND_PRESETS)}")
+            bands = BAND_PRESETS[preset]
+        needed = required_bands(indices)
+        missing = [name for name in needed if name not in bands]
+        if missing:
+            raise ValueError(f"Indices {list(indices)} need bands {missing} missing from {sorted(bands)}")
+
+        self.scene_path = str(scene_path)
+        self.bands = {name: bands[name] for name in needed}
+        self.indices = list(indices)
+        self.tile_size = tile_size
+        self.block_size = max(tile_size, block_size // tile_size * tile_size)
+        self.workers = workers or os.cpu_count() or 2
+
+        with rasterio.open(self.scene_path) as src:
+            if max(self.bands.values()) > src.count:
+                raise ValueError(f"{self.scene_path} has {src.count} bands, need band {max(self.bands.values())}")
+            self.width, self.height = src.width, src.height
+            self.profile = {
+                "driver": "GTiff",
+                "width": src.width,
+                "height": src.height,
+                "count": 1,
+                "dtype": "float32",
+                "crs": src.crs,
+                "transform": src.transform,
+                "nodata": NODATA,
+                "tiled": True,
+                "blockxsize": tile_size,
+                "blockysize": tile_size,
+                "BIGTIFF": "IF_SAFER",
+            }
+
+    def windows(self) -> Iterator[Tuple[int, int, int, int]]:
+        """Blocks (col_off, row_off, width, height) covering the scene"""
+        for row in range(0, self.height, self.block_size):
+            for col in range(0, self.width, self.block_size):
+                yield col, row, min(self.block_size, self.width - col), min(self.block_size, self.height - row)
+
+    def run(self, output_dir: str, prefix: Optional[str] = None) -> Dict:
+        """
+        Compute all indices into ``output_dir/<prefix>_<index>.tif`` (COG)
+
+        Workers compute blocks; only this process writes, with at most two blocks per
+        worker in flight.
+
+        Returns:
+            Dict with pixel and block counts, timings, throughput (Mpx/s, index computation
+            alone and including the COG conversion) and output paths
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        prefix = prefix or Path(self.scene_path).stem
+        outputs = {index: output_dir / f"{prefix}_{index}.tif" for index in self.indices}
+        windows = list(self.windows())
+        logger.info(
+            f"Computing {self.indices} for {self.width}x{self.height} px in {len(windows)} blocks "
+            f"with {self.workers} workers"
+        )
+
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory(dir=output_dir) as tmp:
+            dsts = {index: rasterio.open(Path(tmp) / f"{index}.tif", "w", **self.profile) for index in self.indices}
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_worker,
+                    initargs=(self.scene_path, self.bands, self.indices),
+                ) as executor:
+                    queue = iter(windows)
+                    in_flight = set()
+                    while True:
+                        for window in queue:
+                            in_flight.add(executor.submit(compute_block, window))
+                            if len(in_flight) >= 2 * self.workers:
+                                break
+                        if not in_flight:
+                            break
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            window, results = future.result()
+                            for index, values in results.items():
+                                dsts[index].write(values, 1, window=Window(*window))
+            finally:
+                for dst in dsts.values():
+                    dst.close()
+            compute_seconds = time.perf_counter() - start
+
+            for index, path in outputs.items():
+                rasterio.shutil.copy(
+                    Path(tmp) / f"{index}.tif",
+                    path,
+                    driver="COG",
+                    COMPRESS="DEFLATE",
+                    PREDICTOR="3",
+                    BLOCKSIZE=str(self.tile_size),
+                    OVERVIEW_RESAMPLING="AVERAGE",
+                    NUM_THREADS="ALL_CPUS",
+                    BIGTIFF="IF_SAFER",
+                )
+        seconds = time.perf_counter() - start
+
+        pixels = self.width * self.height
+        stats = {
+            "pixels": pixels,
+            "blocks": len(windows),
+            "workers": self.workers,
+            "compute_seconds": round(compute_seconds, 3),
+            "seconds": round(seconds, 3),
+            "compute_mpx_per_second": round(pixels / 1e6 / compute_seconds, 2) if compute_seconds else None,
+            "mpx_per_second": round(pixels / 1e6 / seconds, 2) if seconds else None,
+            "outputs": {index: str(path) for index, path in outputs.items()},
+        }
+        logger.info(f"Indices done in {seconds:.1f}s ({stats['mpx_per_second']} Mpx/s)")
+        return stats
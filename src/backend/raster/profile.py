@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Elevation profiles and local terrain statistics sampled from the local DEM
+A path is densified at a fixed spacing and every sample is read in one vectorized DEM lookup
+"""
+
+import logging
+import math
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .dem import DEMElevationService, get_dem_service
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6_371_000.0
+MAX_SAMPLES = 20_000
+
+
+def _segment_lengths(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Haversine length in metres of each consecutive segment"""
+    lat1, lat2 = np.radians(lats[:-1]), np.radians(lats[1:])
+    dlat = lat2 - lat1
+    dlon = np.radians(lons[1:] - lons[:-1])
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def densify(points: Sequence[Tuple[float, float]], spacing: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Resample a polyline at a fixed spacing (vertices are kept)
+
+    Args:
+        points: (lat, lon) vertices
+        spacing: Target distance between samples in metres
+
+    Returns:
+        (lats, lons, cumulative distance in metres)
+    """
+    vertices = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    lats, lons = vertices[:, 0], vertices[:, 1]
+    if len(vertices) < 2:
+        return lats, lons, np.zeros(len(lats))
+
+    lengths = _segment_lengths(lats, lons)
+    total = float(lengths.sum())
+    if total / spacing > MAX_SAMPLES:
+        spacing = total / MAX_SAMPLES
+        logger.info(f"Profile spacing raised to {spacing:.1f} m to stay under {MAX_SAMPLES} samples")
+
+    out_lat, out_lon, out_dist = [], [], []
+    offset = 0.0
+    for i, length in enumerate(lengths):
+        steps = max(int(math.ceil(length / spacing)), 1)
+        t = np.arange(steps) / steps
+        out_lat.append(lats[i] + (lats[i + 1] - lats[i]) * t)
+        out_lon.append(lons[i] + (lons[i + 1] - lons[i]) * t)
+        out_dist.append(offset + length * t)
+        offset += float(length)
+    out_lat.append(lats[-1:])
+    out_lon.append(lons[-1:])
+    out_dist.append(np.array([offset]))
+    return np.concatenate(out_lat), np.concatenate(out_lon), np.concatenate(out_dist)
+
+
+def elevation_profile(
+    points: Sequence[Tuple[float, float]],
+    spacing: float = 25.0,
+    dem: Optional[DEMElevationService] = None,
+    slope_window: float = 50.0,
+) -> Optional[Dict]:
+    """
+    Elevation profile along a polyline
+
+    Ascent and descent are summed over consecutive valid samples; slopes are measured over
+    at least ``slope_window`` metres so DEM noise between close samples does not dominate.
+
+    Args:
+        points: (lat, lon) vertices of the path
+        spacing: Sample spacing in metres
+        dem: DEM service (default: the shared one)
+        slope_window: Minimum horizontal distance for slope computation
+
+    Returns:
+        Dict with samples and summary, or None when the DEM covers no sample
+    """
+    if len(points) < 2:
+        raise ValueError("A profile needs at least two points")
+    dem = dem or get_dem_service()
+
+    lats, lons, distances = densify(points, spacing)
+    elevations = dem.elevations(lats, lons)
+    valid = np.isfinite(elevations)
+    if not valid.any():
+        return None
+
+    z, d = elevations[valid], distances[valid]
+    steps = np.diff(z)
+    ascent = float(steps[steps > 0].sum())
+    descent = float(np.abs(steps[steps < 0]).sum())
+
+    max_slope = 0.0
+    if len(z) > 1:
+        # Compare each sample with the first one at least slope_window metres further along
+        ahead = np.searchsorted(d, d + max(slope_window, spacing), side="left")
+        usable = ahead < len(d)
+        if usable.any():
+            run = d[ahead[usable]] - d[usable]
+            rise = z[ahead[usable]] - z[usable]
+            max_slope = float(np.max(np.abs(rise) / run) * 100)
+        else:
+            max_slope = float(abs(z[-1] - z[0]) / max(d[-1] - d[0], 1e-9) * 100)
+
+    return {
+        "length_m": round(float(distances[-1]), 1),
+        "spacing_m": round(float(distances[1] - distances[0]) if len(distances) > 1 else 0.0, 1),
+        "samples": int(len(lats)),
+        "coverage": round(float(valid.mean()), 3),
+        "ascent_m": round(ascent, 1),
+        "descent_m": round(descent, 1),
+        "min_elevation": round(float(z.min()), 1),
+        "max_elevation": round(float(z.max()), 1),
+        "max_slope_percent": round(max_slope, 1),
+        "max_slope_degrees": round(math.degrees(math.atan(max_slope / 100)), 1),
+        "profile": [
+            {
+                "distance_m": round(float(dist), 1),
+                "latitude": round(float(lat), 6),
+                "longitude": round(float(lon), 6),
+                "elevation": round(float(elev), 1) if np.isfinite(elev) else None,
+            }
+            for dist, lat, lon, elev in zip(distances, lats, lons, elevations)
+        ],
+    }
+
+
+def local_terrain(
+    lat: float, lon: float, radius: float = 200.0, step: float = 25.0, dem: Optional[DEMElevationService] = None
+) -> Optional[Dict]:
+    """
+    Relief and slope on a small grid centred on a point
+
+    Args:
+        lat, lon: Centre of the neighbourhood
+        radius: Half-width of the square window in metres
+        step: Grid spacing in metres
+
+    Returns:
+        Dict with elevation, relief_m, max_slope_degrees and mean_slope_degrees, or None without coverage
+    """
+    dem = dem or get_dem_service()
+    n = int(radius // step)
+    offsets = np.arange(-n, n + 1) * step
+    dy, dx = np.meshgrid(offsets, offsets, indexing="ij")
+    lats = lat + dy / 110_574.0
+    lons = lon + dx / (111_320.0 * math.cos(math.radians(lat)))
+
+    grid = dem.elevations(lats.ravel(), lons.ravel()).reshape(lats.shape)
+    centre = grid[n, n]
+    if not np.isfinite(centre):
+        return None
+
+    gy, gx = np.gradient(grid, step)
+    slopes = np.degrees(np.arctan(np.hypot(gx, gy)))
+    finite = np.isfinite(slopes)
+    return {
+        "elevation": round(float(centre), 1),
+        "relief_m": round(float(np.nanmax(grid) - np.nanmin(grid)), 1),
+        "max_slope_degrees": round(float(slopes[finite].max()), 1) if finite.any() else None,
+        "mean_slope_degrees": round(float(slopes[finite].mean()), 1) if finite.any() else None,
+    }
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Precomputed terrain derivatives (slope, aspect, ruggedness) from the local DEM
+A one-off job runs 3x3 Horn kernels over the DEM tile by tile (shifted-slice convolution with
+a halo) and stores the results as compressed, quantized tiles, together with the steepest slope
+and the relief within 200 m of each cell; lookups then cost a tile index computation and one
+array read, for single points or whole batches
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ..scrapers.ign_projection import can_transform, transform
+from .dem import LAMBERT93, RASTERIO_AVAILABLE, WGS84
+
+logger = logging.getLogger(__name__)
+
+if RASTERIO_AVAILABLE:
+    import rasterio
+    from rasterio.windows import Window
+
+DEFAULT_TERRAIN_DIR = Path(__file__).parent.parent.parent.parent / "data" / "terrain"
+METADATA_FILE = "terrain.json"
+
+# Stored as uint16 hundredths (slopes and aspect in degrees, ruggedness and relief in metres, so relief
+# saturates at 655 m); max_slope and relief cover the square NEIGHBOURHOOD around each cell
+LAYERS = ("slope", "aspect", "ruggedness", "max_slope", "relief")
+SCALE = 0.01
+NODATA = np.iinfo(np.uint16).max
+
+# Half-width (m) of the window for max_slope and relief, as in raster.profile.local_terrain
+NEIGHBOURHOOD = 200.0
+
+# Riley TRI per metre of cell size at which ruggedness_index reaches 1 (a smooth plane of about 50°)
+RUGGEDNESS_FULL_SCALE = 3.0
+
+
+# ----------------------------------------------------------------------
+# Derivatives
+# ----------------------------------------------------------------------
+
+
+def horn_derivatives(z: np.ndarray, cell_x: float, cell_y: float) -> Dict[str, np.ndarray]:
+    """
+    Slope, aspect and terrain ruggedness of the inner cells of a haloed elevation block
+
+    Args:
+        z: (h + 2, w + 2) elevations with a one-cell halo, rows running south, NaN as nodata
+        cell_x, cell_y: Cell size in metres
+
+    Returns:
+        {"slope": degrees, "aspect": compass degrees of the downhill direction (NaN on flats),
+        "ruggedness": Riley TRI in metres}, each (h, w) and NaN where a neighbour is missing
+    """
+    h, w = z.shape[0] - 2, z.shape[1] - 2
+
+    def shifted(dr: int, dc: int) -> np.ndarray:
+        return z[1 + dr : 1 + dr + h, 1 + dc : 1 + dc + w]
+
+    a, b, c = shifted(-1, -1), shifted(-1, 0), shifted(-1, 1)
+    d, e, f = shifted(0, -1), shifted(0, 0), shifted(0, 1)
+    g, i_, k = shifted(1, -1), shifted(1, 0), shifted(1, 1)
+
+    # Horn (1981) weighted differences: eastward and northward elevation gradients
+    dz_dx = ((c + 2 * f + k) - (a + 2 * d + g)) / (8 * cell_x)
+    dz_dy = ((a + 2 * b + c) - (g + 2 * i_ + k)) / (8 * cell_y)
+
+    # The centre cell has no weight in the kernels: nodata cells must be masked explicitly
+    dz_dx[np.isnan(e)] = np.nan
+    slope = np.degrees(np.arctan(np.hypot(dz_dx, dz_dy)))
+    aspect = np.degrees(np.arctan2(-dz_dx, -dz_dy)) % 360.0
+    aspect[np.hypot(dz_dx, dz_dy) < 1e-6] = np.nan
+
+    ruggedness = np.sqrt(sum((n - e) ** 2 for n in (a, b, c, d, f, g, i_, k)))
+    return {"slope": slope, "aspect": aspect, "ruggedness": ruggedness}
+
+
+def quantize(values: np.ndarray) -> np.ndarray:
+    """Float layer to uint16 hundredths (NaN becomes NODATA)"""
+    out = np.full(values.shape, NODATA, dtype=np.uint16)
+    finite = np.isfinite(values)
+    out[finite] = np.clip(np.round(values[finite] / SCALE), 0, NODATA - 1).astype(np.uint16)
+    return out
+
+
+def window_extreme(values: np.ndarray, radius: int, reduce=np.fmax) -> np.ndarray:
+    """
+    Maximum (np.fmax) or minimum (np.fmin) over the (2 radius + 1)² square around each
+    cell at least ``radius`` cells from the border, ignoring NaN; separable, rows then columns
+    """
+    size = 2 * radius + 1
+    rows = reduce.reduce(sliding_window_view(values, size, axis=0), axis=-1)
+    return reduce.reduce(sliding_window_view(rows, size, axis=1), axis=-1)
+
+
+def _read_haloed(src, row: int, col: int, height: int, width: int, halo: int = 1) -> np.ndarray:
+    """
+    Window plus a ``halo``-cell margin; past the raster border the first cell is linearly
+    extrapolated (so the Horn kernels apply at the edge) and the others are NaN
+    """
+    r0, c0 = max(row - halo, 0), max(col - halo, 0)
+    r1, c1 = min(row + height + halo, src.height), min(col + width + halo, src.width)
+    block = src.read(1, window=Window(c0, r0, c1 - c0, r1 - r0), masked=True)
+    block = block.astype(np.float64).filled(np.nan)
+    pad = ((r0 - (row - halo), (row + height + halo) - r1), (c0 - (col - halo), (col + width + halo) - c1))
+    if not any(p for pair in pad for p in pair):
+        return block
+    edge = tuple((min(before, 1), min(after, 1)) for before, after in pad)
+    block = np.pad(block, edge, mode="reflect", reflect_type="odd")
+    rest = tuple((before - e0, after - e1) for (before, after), (e0, e1) in zip(pad, edge))
+    return np.pad(block, rest, constant_values=np.nan)
+
+
+def build_terrain_grid(
+    dem_path: Path,
+    output_dir: Path,
+    tile_size: int = 256,
+    crs: Optional[str] = None,
+    neighbourhood: float = NEIGHBOURHOOD,
+) -> Path:
+    """
+    Compute slope, aspect, ruggedness, neighbourhood max slope and relief for a DEM raster
+    into a tiled terrain grid
+
+    Args:
+        dem_path: GeoTIFF / COG (or ASC) elevation raster in a projected CRS
+        output_dir: Grid directory (terrain.json and tiles/<row>_<col>.npz)
+        tile_size: Cells per tile side
+        crs: CRS when the raster has none (default Lambert-93, as for RGE ALTI)
+        neighbourhood: Half-width (m) of the square window for max_slope and relief
+
+    Returns:
+        output_dir
+    """
+    if not RASTERIO_AVAILABLE:
+        raise ImportError("Terrain grids require rasterio. Install with: pip install rasterio")
+    output_dir = Path(output_dir)
+    tiles_dir = output_dir / "tiles"
+    tiles_dir.mkdir(parents=True, exist_ok=True)
+
+    with rasterio.open(dem_path) as src:
+        geo = src.transform
+        if geo.b or geo.d:
+            raise ValueError(f"{dem_path}: rotated rasters are not supported")
+        grid_crs = src.crs.to_string() if src.crs else (crs or LAMBERT93)
+        cell_x, cell_y = geo.a, -geo.e
+        radius = int(math.ceil(neighbourhood / min(cell_x, cell_y)))
+        written = 0
+        for row in range(0, src.height, tile_size):
+            for col in range(0, src.width, tile_size):
+                height, width = min(tile_size, src.height - row), min(tile_size, src.width - col)
+                # Derivatives over the tile grown by the neighbourhood radius, so windows cross tile edges
+                z = _read_haloed(src, row, col, height, width, halo=radius + 1)
+                derivatives = horn_derivatives(z, cell_x, cell_y)
+                inner = (slice(radius, radius + height), slice(radius, radius + width))
+                layers = {name: values[inner] for name, values in derivatives.items()}
+                if np.isnan(layers["slope"]).all():
+                    continue
+                elevations = z[1:-1, 1:-1]
+                layers["max_slope"] = window_extreme(derivatives["slope"], radius, np.fmax)
+                layers["relief"] = window_extreme(elevations, radius, np.fmax) - window_extreme(
+                    elevations, radius, np.fmin
+                )
+                for name in ("max_slope", "relief"):
+                    layers[name][np.isnan(layers["slope"])] = np.nan
+                np.savez_compressed(
+                    tiles_dir / f"{row // tile_size}_{col // tile_size}.npz",
+                    **{name: quantize(values) for name, values in layers.items()},
+                )
+                written += 1
+
+        metadata = {
+            "version": 2,
+            "source": Path(dem_path).name,
+            "crs": grid_crs,
+            "origin": [geo.c, geo.f],
+            "cell_size": [cell_x, cell_y],
+            "width": src.width,
+            "height": src.height,
+            "tile_size": tile_size,
+            "layers": list(LAYERS),
+            "neighbourhood_m": neighbourhood,
+            "scale": SCALE,
+            "nodata": int(NODATA),
+        }
+    tmp = output_dir / f"{METADATA_FILE}.tmp"
+    tmp.write_text(json.dumps(metadata, indent=2))
+    os.replace(tmp, output_dir / METADATA_FILE)
+    logger.info(f"Terrain grid {output_dir.name}: {written} tiles from {Path(dem_path).name}")
+    return output_dir
+
+
+# ----------------------------------------------------------------------
+# Lookups
+# ----------------------------------------------------------------------
+
+
+class TerrainGrid:
+    """One terrain grid; decompressed tiles are kept in an LRU cache"""
+
+    def __init__(self, root: Path, max_tiles: int = 256):
+        self.root = Path(root)
+        meta = json.loads((self.root / METADATA_FILE).read_text())
+        self.crs = meta["crs"]
+        self.x0, self.y0 = meta["origin"]
+        self.cell_x, self.cell_y = meta["cell_size"]
+        self.width, self.height = meta["width"], meta["height"]
+        self.tile_size = meta["tile_size"]
+        self.scale = meta["scale"]
+        self.source = meta["source"]
+        # Version 1 grids have no max_slope / relief layers
+        self.layers = tuple(name for name in meta.get("layers", LAYERS) if name in LAYERS)
+        self.max_tiles = max_tiles
+        self._tiles: "OrderedDict[Tuple[int, int], Optional[Dict[str, np.ndarray]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        return (
+            self.x0,
+            self.y0 - self.height * self.cell_y,
+            self.x0 + self.width * self.cell_x,
+            self.y0,
+        )
+
+    def _tile(self, key: Tuple[int, int]) -> Optional[Dict[str, np.ndarray]]:
+        with self._lock:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                return self._tiles[key]
+        path = self.root / "tiles" / f"{key[0]}_{key[1]}.npz"
+        tile = None
+        if path.exists():
+            with np.load(path) as data:
+                tile = {name: data[name] for name in self.layers}
+        with self._lock:
+            self._tiles[key] = tile
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+        return tile
+
+    def sample(self, xs: np.ndarray, ys: np.ndarray) -> Dict[str, np.ndarray]:
+        """Layer values at grid-CRS points (NaN outside the grid or on nodata)"""
+        xs, ys = np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+        result = {name: np.full(len(xs), np.nan) for name in LAYERS}
+        with np.errstate(invalid="ignore"):
+            cols = np.floor((xs - self.x0) / self.cell_x)
+            rows = np.floor((self.y0 - ys) / self.cell_y)
+        inside = np.nonzero((cols >= 0) & (cols < self.width) & (rows >= 0) & (rows < self.height))[0]
+        if not len(inside):
+            return result
+        rows, cols = rows[inside].astype(np.int64), cols[inside].astype(np.int64)
+
+        keys = (rows // self.tile_size) * (self.width // self.tile_size + 1) + cols // self.tile_size
+        for key in np.unique(keys):
+            members = np.nonzero(keys == key)[0]
+            tile_row, tile_col = int(rows[members[0]] // self.tile_size), int(cols[members[0]] // self.tile_size)
+            tile = self._tile((tile_row, tile_col))
+            if tile is None:
+                continue
+            r, c = rows[members] % self.tile_size, cols[members] % self.tile_size
+            for name in self.layers:
+                raw = tile[name][r, c]
+                result[name][inside[members]] = np.where(raw == NODATA, np.nan, raw * self.scale)
+        return result
+
+
+class TerrainStore:
+    """Terrain grids under a directory (one sub-directory per grid), finest resolution first"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or os.getenv("SPOTS_TERRAIN_DIR") or DEFAULT_TERRAIN_DIR)
+        self._grids: Optional[List[TerrainGrid]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def grids(self) -> List[TerrainGrid]:
+        if self._grids is None:
+            with self._lock:
+                if self._grids is None:
+                    grids = []
+                    for meta in sorted(self.root.glob(f"*/{METADATA_FILE}")) if self.root.exists() else []:
+                        grid = TerrainGrid(meta.parent)
+                        if grid.crs != WGS84 and not can_transform(WGS84, grid.crs):
+                            logger.warning(f"No projection backend for {grid.crs}, ignoring {meta.parent.name}")
+                            continue
+                        grids.append(grid)
+                    grids.sort(key=lambda g: g.cell_x)
+                    self._grids = grids
+        return self._grids
+
+    @property
+    def available(self) -> bool:
+        return bool(self.grids)
+
+    def sample(self, lats: Sequence[float], lons: Sequence[float]) -> Dict[str, np.ndarray]:
+        """
+        Terrain layers for each WGS84 point, plus the "resolution" (m) of the grid that
+        answered (NaN where no grid covers it)
+        """
+        lats = np.asarray(lats, dtype=np.float64).reshape(-1)
+        lons = np.asarray(lons, dtype=np.float64).reshape(-1)
+        result = {name: np.full(len(lats), np.nan) for name in LAYERS + ("resolution",)}
+        projected: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+        for grid in self.grids:
+            todo = np.nonzero(np.isnan(result["slope"]) & np.isfinite(lats) & np.isfinite(lons))[0]
+            if not len(todo):
+                break
+            if grid.crs not in projected:
+                projected[grid.crs] = (lons, lats) if grid.crs == WGS84 else transform(lons, lats, WGS84, grid.crs)
+            xs, ys = projected[grid.crs]
+            values = grid.sample(xs[todo], ys[todo])
+            for name in LAYERS:
+                result[name][todo] = values[name]
+            result["resolution"][todo[np.isfinite(values["slope"])]] = grid.cell_x
+        return result
+
+    def lookup(self, lat: float, lon: float) -> Optional[Dict]:
+        """terrain_record() at one point, or None without coverage"""
+        values = self.sample([lat], [lon])
+        return terrain_record(values, 0)
+
+    def get_stats(self) -> Dict:
+        return {
+            "directory": str(self.root),
+            "grids": [
+                {"name": g.root.name, "source": g.source, "crs": g.crs, "resolution_m": g.cell_x, "bounds": g.bounds}
+                for g in self.grids
+            ],
+        }
+
+
+def terrain_record(values: Dict[str, np.ndarray], index: int) -> Optional[Dict]:
+    """
+    One point of TerrainStore.sample() as a dict (None without coverage): slope, aspect and
+    ruggedness at the point, max slope and relief around it, and a 0-1 ruggedness_index
+    """
+    if not math.isfinite(values["slope"][index]):
+        return None
+
+    def value(name: str) -> Optional[float]:
+        v = values[name][index] if name in values else math.nan
+        return round(float(v), 2) if math.isfinite(v) else None
+
+    record = {
+        "slope_degrees": value("slope"),
+        "aspect_degrees": value("aspect"),
+        "ruggedness_m": value("ruggedness"),
+        "max_slope_degrees": value("max_slope"),
+        "relief_m": value("relief"),
+        "resolution_m": value("resolution"),
+        "ruggedness_index": None,
+    }
+    # TRI grows with the cell size: per metre of cell it compares across DEM resolutions
+    if record["ruggedness_m"] is not None and record["resolution_m"]:
+        ruggedness = record["ruggedness_m"] / record["resolution_m"] / RUGGEDNESS_FULL_SCALE
+        record["ruggedness_index"] = round(min(ruggedness, 1.0), 3)
+    return record
+
+
+_stores: Dict[str, TerrainStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_terrain_store(root: Optional[str] = None) -> TerrainStore:
+    """Get the shared terrain store for a directory"""
+    key = str(Path(root or os.getenv("SPOTS_TERRAIN_DIR") or DEFAULT_TERRAIN_DIR).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = TerrainStore(key)
+        return store
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Cut local rasters (GeoTIFF/COG) into a Web Mercator tile pyramid written straight to MBTiles
+Used for derived layers (NDVI, classification, hillshade, RGE ALTI) served by /api/ign-offline/tiles
+"""
+
+import io
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..utils.mbtiles import init_mbtiles
+
+logger = logging.getLogger(__name__)
+
+try:
+    import rasterio
+    from rasterio.enums import Resampling
+    from rasterio.errors import WindowError
+    from rasterio.vrt import WarpedVRT
+    from rasterio.warp import transform_bounds
+    from rasterio.windows import Window, from_bounds
+
+    RASTERIO_AVAILABLE = True
+except ImportError:
+    RASTERIO_AVAILABLE = False
+    logger.warning("rasterio not available. Install with: pip install rasterio")
+
+try:
+    from PIL import Image
+
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Web Mercator constants
+ORIGIN_SHIFT = 20037508.342789244
+WORLD_SIZE = 2 * ORIGIN_SHIFT
+TILE_SIZE = 256
+
+Tile = Tuple[int, int, int]  # (z, x, y) XYZ scheme
+
+# Colormap stops: (value in 0..1, (r, g, b))
+COLORMAPS = {
+    "gray": [(0.0, (0, 0, 0)), (1.0, (255, 255, 255))],
+    "ndvi": [
+        (0.0, (165, 0, 38)),
+        (0.3, (244, 109, 67)),
+        (0.5, (255, 255, 191)),
+        (0.7, (166, 217, 106)),
+        (1.0, (0, 104, 55)),
+    ],
+    "terrain": [
+        (0.0, (51, 102, 0)),
+        (0.25, (129, 195, 31)),
+        (0.5, (255, 255, 204)),
+        (0.75, (160, 110, 60)),
+        (1.0, (255, 255, 255)),
+    ],
+    "slope": [(0.0, (255, 255, 255)), (0.4, (255, 220, 0)), (0.7, (255, 120, 0)), (1.0, (180, 0, 0))],
+}
+
+
+def build_colormap(name: str) -> np.ndarray:
+    """Expand colormap stops into a 256x3 uint8 lookup table"""
+    stops = COLORMAPS[name]
+    positions = np.array([s[0] for s in stops]) * 255
+    colors = np.array([s[1] for s in stops], dtype=float)
+    index = np.arange(256)
+    return np.stack([np.interp(index, positions, colors[:, c]) for c in range(3)], axis=1).astype(np.uint8)
+
+
+# ----------------------------------------------------------------------
+# Tile math
+# ----------------------------------------------------------------------
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """EPSG:3857 bounds (minx, miny, maxx, maxy) of an XYZ tile"""
+    size = WORLD_SIZE / (2**z)
+    minx = -ORIGIN_SHIFT + x * size
+    maxy = ORIGIN_SHIFT - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def tiles_for_bounds(bounds: Tuple[float, float, float, float], z: int) -> Iterator[Tile]:
+    """XYZ tiles covering EPSG:3857 bounds at zoom z"""
+    size = WORLD_SIZE / (2**z)
+    n = 2**z
+    minx, miny, maxx, maxy = bounds
+    eps = size * 1e-6  # bounds that sit exactly on a tile edge must not pull in the neighbour
+    x0 = max(0, int(math.floor((minx + ORIGIN_SHIFT + eps) / size)))
+    x1 = min(n - 1, int(math.floor((maxx + ORIGIN_SHIFT - eps) / size)))
+    y0 = max(0, int(math.floor((ORIGIN_SHIFT - maxy + eps) / size)))
+    y1 = min(n - 1, int(math.floor((ORIGIN_SHIFT - miny - eps) / size)))
+    for x in range(x0, x1 + 1):
+        for y in range(y0, y1 + 1):
+            yield z, x, y
+
+
+def zoom_for_resolution(resolution: float, tile_size: int = TILE_SIZE) -> int:
+    """Smallest zoom whose pixel size is at least as fine as ``resolution`` (metres)"""
+    return max(0, int(math.ceil(math.log2(WORLD_SIZE / (tile_size * resolution)) - 1e-6)))
+
+
+# ----------------------------------------------------------------------
+# Rendering
+# ----------------------------------------------------------------------
+
+
+def render_tile(
+    data: np.ndarray,
+    mask: np.ndarray,
+    rescale: Optional[Tuple[float, float]] = None,
+    colormap: Optional[np.ndarray] = None,
+    image_format: str = "png",
+) -> Optional[bytes]:
+    """
+    Turn a (bands, h, w) array and validity mask into encoded tile bytes
+
+    Single-band data is rescaled to 0-255 and optionally colour-mapped;
+    three or more bands are treated as RGB. Returns None for empty tiles.
+    """
+    if not mask.any():
+        return None
+
+    if data.shape[0] >= 3:
+        rgb = data[:3].astype(float)
+        if rescale:
+            rgb = (rgb - rescale[0]) / (rescale[1] - rescale[0]) * 255
+        rgb = np.clip(rgb, 0, 255).astype(np.uint8).transpose(1, 2, 0)
+    else:
+        band = data[0].astype(float)
+        low, high = rescale if rescale else (float(band[mask].min()), float(band[mask].max()))
+        scaled = np.clip((band - low) / ((high - low) or 1) * 255, 0, 255).astype(np.uint8)
+        rgb = (colormap if colormap is not None else build_colormap("gray"))[scaled]
+
+    alpha = np.where(mask, 255, 0).astype(np.uint8)
+    buffer = io.BytesIO()
+    if image_format == "jpeg":
+        Image.fromarray(rgb, "RGB").save(buffer, "JPEG", quality=85)
+    else:
+        Image.fromarray(np.dstack([rgb, alpha]), "RGBA").save(buffer, "PNG", optimize=False)
+    return buffer.getvalue()
+
+
+# ----------------------------------------------------------------------
+# Worker process
+# ----------------------------------------------------------------------
+
+_worker: Dict = {}
+
+
+def _init_worker(src_path: str, options: Dict):
+    """Open the source once per process and wrap it in a Web Mercator VRT"""
+    src = rasterio.open(src_path)
+    vrt = WarpedVRT(src, crs="EPSG:3857", resampling=Resampling[options["resampling"]])
+    _worker.update(
+        src=src,
+        vrt=vrt,
+        options=options,
+        colormap=build_colormap(options["colormap"]) if options.get("colormap") else None,
+    )
+
+
+def _read_tile(vrt, z: int, x: int, y: int, tile_size: int, resampling) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Windowed read of one tile from the mercator VRT
+
+    The window is clipped to the VRT extent (WarpedVRT forbids boundless reads)
+    and read with a reduced ``out_shape``, so GDAL picks the matching overview
+    level for low zooms instead of decimating full-resolution pixels.
+    """
+    data = np.zeros((vrt.count, tile_size, tile_size), dtype=vrt.dtypes[0])
+    mask = np.zeros((tile_size, tile_size), dtype=bool)
+
+    window = from_bounds(*tile_bounds(z, x, y), transform=vrt.transform)
+    full = Window(0, 0, vrt.width, vrt.height)
+    try:
+        clipped = window.intersection(full)
+    except WindowError:
+        return data, mask
+
+    scale_x = tile_size / window.width
+    scale_y = tile_size / window.height
+    col0 = int(round((clipped.col_off - window.col_off) * scale_x))
+    row0 = int(round((clipped.row_off - window.row_off) * scale_y))
+    width = min(tile_size - col0, max(1, int(round(clipped.width * scale_x))))
+    height = min(tile_size - row0, max(1, int(round(clipped.height * scale_y))))
+    if width <= 0 or height <= 0:
+        return data, mask
+
+    data[:, row0 : row0 + height, col0 : col0 + width] = vrt.read(
+        window=clipped, out_shape=(vrt.count, height, width), resampling=resampling
+    )
+    mask[row0 : row0 + height, col0 : col0 + width] = (
+        vrt.dataset_mask(window=clipped, out_shape=(height, width), resampling=Resampling.nearest) > 0
+    )
+    return data, mask
+
+
+def _render_chunk(tiles: Sequence[Tile]) -> List[Tuple[int, int, int, bytes]]:
+    vrt = _worker["vrt"]
+    options = _worker["options"]
+    resampling = Resampling[options["resampling"]]
+    rendered = []
+    for z, x, y in tiles:
+        data, mask = _read_tile(vrt, z, x, y, options["tile_size"], resampling)
+        tile = render_tile(data, mask, options.get("rescale"), _worker["colormap"], options["format"])
+        if tile is not None:
+            rendered.append((z, x, (2**z - 1) - y, tile))
+    return rendered
+
+
+# ----------------------------------------------------------------------
+# Tiler
+# ----------------------------------------------------------------------
+
+
+class RasterTiler:
+    """Generate an MBTiles pyramid from a georeferenced raster"""
+
+    def __init__(
+        self,
+        src_path: str,
+        min_zoom: Optional[int] = None,
+        max_zoom: Optional[int] = None,
+        rescale: Optional[Tuple[float, float]] = None,
+        colormap: Optional[str] = None,
+        resampling: str = "bilinear",
+        image_format: str = "png",
+        workers: Optional[int] = None,
+        chunk_size: int = 64,
+        tile_size: int = TILE_SIZE,
+    ):
+        """
+        Initialize the tiler
+
+        Args:
+            src_path: Input raster (any CRS rasterio can read)
+            min_zoom: Lowest zoom (default: raster fits in ~one tile)
+            max_zoom: Highest zoom (default: native resolution)
+            rescale: (min, max) data range mapped to 0-255 (default: 2-98 percentile)
+            colormap: Colormap name for single-band rasters (see COLORMAPS)
+            resampling: rasterio resampling name used for reads
+            image_format: 'png' (with alpha) or 'jpeg'
+            workers: Worker processes (default: CPU count)
+            chunk_size: Tiles rendered per task, to amortize IPC
+            tile_size: Tile edge in pixels
+        """
+        if not RASTERIO_AVAILABLE or not PIL_AVAILABLE:
+            raise RuntimeError("RasterTiler requires rasterio and Pillow")
+        if colormap and colormap not in COLORMAPS:
+            raise ValueError(f"Unknown colormap '{colormap}', choose from {sorted(COLORMAPS)}")
+
+        self.src_path = str(src_path)
+        self.rescale = rescale
+        self.colormap = colormap
+        self.resampling = resampling
+        self.image_format = image_format
+        self.workers = workers or os.cpu_count() or 2
+        self.chunk_size = chunk_size
+        self.tile_size = tile_size
+
+        with rasterio.open(self.src_path) as src, WarpedVRT(src, crs="EPSG:3857") as vrt:
+            self.mercator_bounds = tuple(vrt.bounds)
+            self.wgs84_bounds = transform_bounds(src.crs, "EPSG:4326", *src.bounds)
+            resolution = max(abs(vrt.transform.a), abs(vrt.transform.e))
+            extent = max(vrt.bounds.right - vrt.bounds.left, vrt.bounds.top - vrt.bounds.bottom)
+            self.has_overviews = bool(src.overviews(1))
+            if rescale is None and src.count < 3:
+                self.rescale = self._global_range(vrt)
+
+        self.max_zoom = max_zoom if max_zoom is not None else zoom_for_resolution(resolution, tile_size)
+        default_min = max(0, int(math.floor(math.log2(WORLD_SIZE / extent))))
+        self.min_zoom = min_zoom if min_zoom is not None else min(default_min, self.max_zoom)
+
+    @staticmethod
+    def _global_range(vrt, max_pixels: int = 1024) -> Optional[Tuple[float, float]]:
+        """2-98 percentile range from a decimated read, so every tile shares one stretch"""
+        factor = max(1, max(vrt.width, vrt.height) // max_pixels)
+        shape = (max(1, vrt.height // factor), max(1, vrt.width // factor))
+        data = vrt.read(1, out_shape=shape, masked=True)
+        values = data.compressed()
+        if values.size == 0:
+            return None
+        low, high = np.percentile(values, [2, 98])
+        return float(low), float(high)
+
+    def plan(self) -> List[Tile]:
+        """All tiles of the pyramid, lowest zoom first"""
+        tiles = []
+        for z in range(self.min_zoom, self.max_zoom + 1):
+            tiles.extend(tiles_for_bounds(self.mercator_bounds, z))
+        return tiles
+
+    def build_overviews(self, factors: Sequence[int] = (2, 4, 8, 16, 32, 64)):
+        """Write external .ovr overviews so low zooms read pre-reduced pixels"""
+        with rasterio.open(self.src_path) as src:
+            src.build_overviews(list(factors), Resampling.average)
+        self.has_overviews = True
+
+    def metadata(self, name: str, description: str = "") -> Dict[str, str]:
+        west, south, east, north = self.wgs84_bounds
+        center_zoom = min(self.max_zoom, self.min_zoom + 2)
+        return {
+            "name": name,
+            "type": "overlay",
+            "version": "1.0.0",
+            "description": description or f"Generated from {Path(self.src_path).name}",
+            "format": self.image_format,
+            "bounds": f"{west:.6f},{south:.6f},{east:.6f},{north:.6f}",
+            "center": f"{(west + east) / 2:.6f},{(south + north) / 2:.6f},{center_zoom}",
+            "minzoom": str(self.min_zoom),
+            "maxzoom": str(self.max_zoom),
+            "attribution": "© IGN / SPOTS",
+        }
+
+    def generate(self, output_path: str, name: Optional[str] = None, description: str = "",
+                 batch_size: int = 1000) -> Dict:
+        """
+        Render the pyramid into ``output_path``
+
+        Workers read windows and encode tiles; only this process writes SQLite.
+
+        Returns:
+            Dict with tile counts and zoom range
+        """
+        if not self.has_overviews and self.max_zoom - self.min_zoom > 3:
+            logger.info("Source has no overviews; low zooms will read full-resolution pixels")
+
+        name = name or Path(output_path).stem
+        conn = init_mbtiles(output_path, self.metadata(name, description))
+        conn.execute("PRAGMA synchronous=OFF")
+
+        tiles = self.plan()
+        chunks = [tiles[i : i + self.chunk_size] for i in range(0, len(tiles), self.chunk_size)]
+        options = {
+            "resampling": self.resampling,
+            "rescale": self.rescale,
+            "colormap": self.colormap,
+            "format": self.image_format,
+            "tile_size": self.tile_size,
+        }
+        stats = {"planned": len(tiles), "written": 0, "empty": 0, "min_zoom": self.min_zoom, "max_zoom": self.max_zoom}
+
+        logger.info(f"Tiling {self.src_path}: {len(tiles)} tiles z{self.min_zoom}-{self.max_zoom}")
+        pending = []
+        with ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(self.src_path, options)
+        ) as executor:
+            futures = [executor.submit(_render_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                rendered = future.result()
+                pending.extend(rendered)
+                stats["written"] += len(rendered)
+                if len(pending) >= batch_size:
+                    self._flush(conn, pending)
+                    pending = []
+        self._flush(conn, pending)
+        conn.close()
+
+        stats["empty"] = stats["planned"] - stats["written"]
+        logger.info(f"Wrote {stats['written']} tiles to {output_path} ({stats['empty']} empty skipped)")
+        return stats
+
+    @staticmethod
+    def _flush(conn, rows: List[Tuple[int, int, int, bytes]]):
+        if not rows:
+            return
+        conn.executemany(
+            "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)", rows
+        )
+        conn.commit()
+
+
+def tile_raster(src_path: str, output_path: str, **kwargs) -> Dict:
+    """Convenience wrapper: RasterTiler(src_path, **kwargs).generate(output_path)"""
+    name = kwargs.pop("name", None)
+    description = kwargs.pop("description", "")
+    return RasterTiler(src_path, **kwargs).generate(output_path, name=name, description=description)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tile a GeoTIFF into MBTiles")
+    parser.add_argument("src")
+    parser.add_argument("output")
+    parser.add_argument("--minzoom", type=int)
+    parser.add_argument("--maxzoom", type=int)
+    parser.add_argument("--rescale", help="min,max")
+    parser.add_argument("--colormap", choices=sorted(COLORMAPS))
+    parser.add_argument("--format", default="png", choices=["png", "jpeg"])
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--build-overviews", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    tiler = RasterTiler(
+        args.src,
+        min_zoom=args.minzoom,
+        max_zoom=args.maxzoom,
+        rescale=tuple(float(v) for v in args.rescale.split(",")) if args.rescale else None,
+        colormap=args.colormap,
+        image_format=args.format,
+        workers=args.workers,
+    )
+    if args.build_overviews:
+        tiler.build_overviews()
+    print(tiler.generate(args.output))
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Adaptive (AIMD) concurrency control for upstream geoservices
+Raises in-flight concurrency while latency and errors stay healthy, backs off on 429/5xx/timeouts
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Status codes that signal the upstream is overloaded (as opposed to a bad request)
+CONGESTION_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class AdaptiveConcurrencyController:
+    """Additive-increase / multiplicative-decrease limiter for in-flight requests
+
+    Callers take a slot before each request and report the outcome afterwards.
+    The limit grows by ``additive_increase`` once a full window of requests has
+    completed with healthy latency, and is multiplied by ``decrease_factor`` on
+    congestion signals (429, 5xx, timeouts, latency above target). A 429 with a
+    ``Retry-After`` header also pauses new acquisitions until the cooldown ends.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        additive_increase: int = 1,
+        decrease_factor: float = 0.5,
+        latency_target: float = 2.0,
+        error_rate_threshold: float = 0.1,
+        window_size: int = 50,
+        default_cooldown: float = 2.0,
+    ):
+        """
+        Initialize the controller
+
+        Args:
+            name: Identifier used in logs and stats (usually the upstream host)
+            initial_limit: Concurrency limit to start with
+            min_limit: Lower bound for the limit
+            max_limit: Upper bound for the limit
+            additive_increase: Slots added after a healthy window
+            decrease_factor: Multiplier applied to the limit on congestion
+            latency_target: Smoothed latency (seconds) above which we back off
+            error_rate_threshold: Recent error ratio above which we stop increasing
+            window_size: Number of recent outcomes used for the error rate
+            default_cooldown: Pause (seconds) after a 429 without Retry-After
+        """
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.error_rate_threshold = error_rate_threshold
+        self.default_cooldown = default_cooldown
+
+        self._condition = threading.Condition()
+        self._async_waiters = []
+        self._in_flight = 0
+        self._cooldown_until = 0.0
+        self._last_decrease = 0.0
+        self._successes_since_increase = 0
+        self._outcomes = deque(maxlen=window_size)
+        self._latency_ewma: Optional[float] = None
+
+        # Statistics
+        self.total_requests = 0
+        self.successful_requests = 0
+        self.congestion_events = 0
+        self.rate_limited_count = 0
+        self.timeouts = 0
+
+    # ------------------------------------------------------------------
+    # Slot management
+    # ------------------------------------------------------------------
+
+    def _can_start(self) -> bool:
+        return self._in_flight < int(self.limit) and time.monotonic() >= self._cooldown_until
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a request slot is available
+
+        Args:
+            timeout: Maximum time to wait in seconds (None waits forever)
+
+        Returns:
+            True if a slot was acquired, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self._can_start():
+                now = time.monotonic()
+                wait = max(self._cooldown_until - now, 0.0) or None
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining) if wait else remaining
+                self._condition.wait(wait)
+            self._in_flight += 1
+            return True
+
+    def try_acquire(self) -> bool:
+        """Take a slot without blocking"""
+        with self._condition:
+            if not self._can_start():
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self):
+        """Return a slot taken with acquire()"""
+        with self._condition:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._notify_all()
+
+    def _notify_all(self):
+        """Wake blocked threads and async waiters; call with the condition held"""
+        self._condition.notify_all()
+        for waiter in self._async_waiters:
+            try:
+                waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:  # event loop already closed
+                pass
+        self._async_waiters.clear()
+
+    @contextmanager
+    def slot(self):
+        """Context manager holding one request slot"""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def async_slot(self):
+        """Async variant of slot() for aiohttp/httpx based jobs
+
+        Waits on a future resolved by release() (from any thread) instead of
+        polling, with a timeout only for the end of a 429 cooldown.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._can_start():
+                    self._in_flight += 1
+                    break
+                waiter = loop.create_future()
+                self._async_waiters.append(waiter)
+                wait = max(self._cooldown_until - time.monotonic(), 0.0) or None
+            try:
+                await asyncio.wait_for(waiter, wait)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._condition:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+        try:
+            yield
+        finally:
+            self.release()
+
+    # ------------------------------------------------------------------
+    # Feedback
+    # ------------------------------------------------------------------
+
+    def record_success(self, latency: float):
+        """Report a request that completed normally"""
+        with self._condition:
+            self.total_requests += 1
+            self.successful_requests += 1
+            self._outcomes.append(True)
+            self._update_latency(latency)
+
+            if self._latency_ewma > self.latency_target:
+                self._decrease("latency %.2fs above target" % self._latency_ewma)
+                return
+
+            self._successes_since_increase += 1
+            if self._successes_since_increase >= int(self.limit) and self._error_rate() < self.error_rate_threshold:
+                self._successes_since_increase = 0
+                if self.limit < self.max_limit:
+                    self.limit = min(self.max_limit, self.limit + self.additive_increase)
+                    logger.debug(f"[{self.name}] concurrency raised to {int(self.limit)}")
+                    self._notify_all()
+
+    def record_failure(
+        self,
+        status_code: Optional[int] = None,
+        timeout: bool = False,
+        retry_after: Optional[float] = None,
+        latency: Optional[float] = None,
+    ):
+        """Report a failed request
+
+        Only congestion signals (429, 5xx, timeouts) shrink the limit; other
+        failures such as 404 count towards the error rate only.
+        """
+        with self._condition:
+            self.total_requests += 1
+            self._outcomes.append(False)
+            if latency is not None:
+                self._update_latency(latency)
+
+            if timeout:
+                self.timeouts += 1
+            if status_code == 429:
+                self.rate_limited_count += 1
+                pause = retry_after if retry_after is not None else self.default_cooldown
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + pause)
+                logger.warning(f"[{self.name}] rate limited, pausing new requests for {pause:.1f}s")
+
+            if timeout or status_code in CONGESTION_STATUS_CODES:
+                self._decrease(f"status {status_code}" if status_code else "timeout")
+
+    def record_response(self, status_code: int, latency: float, retry_after: Optional[str] = None):
+        """Report an HTTP response, classifying it as success or failure"""
+        if status_code < 400:
+            self.record_success(latency)
+        else:
+            self.record_failure(status_code=status_code, retry_after=parse_retry_after(retry_after), latency=latency)
+
+    def execute(self, func: Callable, *args, **kwargs):
+        """Run a requests-style call inside a slot and record its outcome
+
+        The callable must return an object with ``status_code`` and ``headers``
+        (requests.Response, httpx.Response). Exceptions are recorded and re-raised.
+        """
+        with self.slot():
+            start = time.monotonic()
+            try:
+                response = func(*args, **kwargs)
+            except Exception as e:
+                self.record_failure(timeout=_is_timeout(e), latency=time.monotonic() - start)
+                raise
+            self.record_response(response.status_code, time.monotonic() - start, response.headers.get("Retry-After"))
+            return response
+
+    def _update_latency(self, latency: float, alpha: float = 0.2):
+        if self._latency_ewma is None:
+            self._latency_ewma = latency
+        else:
+            self._latency_ewma = alpha * latency + (1 - alpha) * self._latency_ewma
+
+    def _error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def _decrease(self, reason: str):
+        """Shrink the limit, at most once per smoothed round-trip"""
+        now = time.monotonic()
+        min_interval = self._latency_ewma or 0.1
+        self._successes_since_increase = 0
+        if now - self._last_decrease < min_interval:
+            return
+        self._last_decrease = now
+        self.congestion_events += 1
+        new_limit = max(self.min_limit, self.limit * self.decrease_factor)
+        if new_limit < self.limit:
+            logger.info(f"[{self.name}] concurrency {int(self.limit)} -> {int(new_limit)} ({reason})")
+        self.limit = new_limit
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    @property
+    def current_limit(self) -> int:
+        return int(self.limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def get_stats(self) -> dict:
+        """Get controller statistics"""
+        with self._condition:
+            return {
+                "name": self.name,
+                "limit": int(self.limit),
+                "in_flight": self._in_flight,
+                "latency_ewma": round(self._latency_ewma, 3) if self._latency_ewma is not None else None,
+                "error_rate": round(self._error_rate(), 3),
+                "total_requests": self.total_requests,
+                "successful_requests": self.successful_requests,
+                "congestion_events": self.congestion_events,
+                "rate_limited_count": self.rate_limited_count,
+                "timeouts": self.timeouts,
+                "cooling_down": time.monotonic() < self._cooldown_until,
+            }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds (HTTP-date values are ignored)"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def _is_timeout(error: Exception) -> bool:
+    name = type(error).__name__.lower()
+    return "timeout" in name or isinstance(error, (TimeoutError, asyncio.TimeoutError))
+
+
+# Shared controllers, one per upstream host, so every downloader, the WFS
+# service and enrichment jobs hitting the same host back off together.
+_controllers: Dict[str, AdaptiveConcurrencyController] = {}
+_controllers_lock = threading.Lock()
+
+# Per-host defaults; OSM tile usage policy forbids heavy parallel downloads
+HOST_PROFILES = {
+    "data.geopf.fr": {"initial_limit": 4, "max_limit": 32, "latency_target": 2.0},
+    "wxs.ign.fr": {"initial_limit": 4, "max_limit": 16, "latency_target": 2.0},
+    "api-adresse.data.gouv.fr": {"initial_limit": 4, "max_limit": 20, "latency_target": 1.0},
+    "tile.openstreetmap.org": {"initial_limit": 1, "max_limit": 2, "latency_target": 1.0},
+}
+
+
+def get_controller(name: str, **kwargs) -> AdaptiveConcurrencyController:
+    """Get (or create) the shared controller for an upstream host
+
+    Args:
+        name: Host name or logical service name
+        **kwargs: Constructor overrides, only used when the controller is created
+    """
+    with _controllers_lock:
+        controller = _controllers.get(name)
+        if controller is None:
+            options = {**HOST_PROFILES.get(name, {}), **kwargs}
+            controller = AdaptiveConcurrencyController(name=name, **options)
+            _controllers[name] = controller
+        return controller
+
+
+def get_all_stats() -> Dict[str, dict]:
+    """Statistics for every shared controller"""
+    with _controllers_lock:
+        controllers = list(_controllers.values())
+    return {c.name: c.get_stats() for c in controllers}
@@ -5,12 +5,13 @@ Based on Ollama's suggestion for more robust coordinate handling
 """
 
 import re
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List
 from decimal import Decimal, InvalidOperation
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 import logging
 from src.backend.core.logging_config import logger
+from src.backend.scrapers.gazetteer import get_gazetteer
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,10 @@ class EnhancedCoordinateExtractor:
         # Initialize geocoder with custom user agent
         self.geocoder = Nominatim(user_agent="SecretToulouseSpots/1.0")
 
+        # Offline place-name gazetteer (communes + IGN toponyms), tried before Nominatim
+        self.gazetteer = get_gazetteer()
+        self.gazetteer_min_score = 0.5
+
         # Enhanced regex patterns (including negative numbers as Ollama suggested)
         self.coord_patterns = [
             # Decimal degrees with optional negative
@@ -110,9 +115,19 @@ class EnhancedCoordinateExtractor:
 
         return None
 
+    def extract_places(self, text: str) -> List[Dict]:
+        """Place names found in text by the offline gazetteer, with coordinates and scores"""
+        return self.gazetteer.scan(text)
+
     def _extract_with_geocoding(self, text: str) -> Optional[Tuple[float, float]]:
         """Extract coordinates by geocoding location names"""
-        # Extract potential location names
+        # Offline gazetteer first: one pass over the text, no network
+        match = self.gazetteer.best_match(text, min_score=self.gazetteer_min_score)
+        if match and self._validate_coordinates(match["latitude"], match["longitude"]):
+            logger.info(f"Resolved '{match['text']}' offline to {match['latitude']}, {match['longitude']}")
+            return match["latitude"], match["longitude"]
+
+        # Unresolved or ambiguous names: extract potential location names for Nominatim
         location_patterns = [
             r"(?:à|au|aux|près de|proche de)\s+([A-Z][a-zÀ-ÿ\-\s]+)",
             r"(?:cascade|grotte|lac|château)\s+(?:de|d\')\s+([A-Z][a-zÀ-ÿ\-\s]+)",
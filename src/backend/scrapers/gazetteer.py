@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Offline gazetteer for resolving place names in free text (posts, captions, descriptions)
+Commune names (from the offline BAN store) and IGN BD TOPO toponyms are compiled into a
+token trie with accent folding, so a post is scanned in one pass without any network call
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import logging
+import math
+import os
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent.parent.parent.parent / "data" / "geocoding"
+DEFAULT_GAZETTEER_PATH = DATA_DIR / "gazetteer_occitanie.json.gz"
+
+# Occitanie bounding box (with a small margin)
+REGION_BOUNDS = (42.3, -0.4, 45.1, 4.9)
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+LIGATURES = {"œ": "oe", "æ": "ae", "ß": "ss"}
+TOKEN_ALIASES = {"st": "saint", "ste": "sainte"}  # "St-Béat", "Ste-Croix-Volvestre"
+
+# Single-word names that are also everyday French words; only matched when capitalized
+COMMON_WORDS = {
+    "aussi", "bien", "belle", "bon", "bonne", "cap", "des", "eau", "fort", "font", "gare", "lac", "les", "mas",
+    "mont", "moulin", "pont", "port", "puy", "roc", "saint", "sainte", "salles", "source", "sur", "tour", "vie",
+    "ville",
+}
+
+# Base confidence per kind of place
+KIND_WEIGHTS = {"commune": 1.0, "lieu-dit": 0.85, "toponyme": 0.8}
+
+# Name and kind columns found in BD TOPO toponym exports (WFS GeoJSON or CSV)
+NAME_FIELDS = ("graphie_du_toponyme", "graphie", "toponyme", "nom", "name")
+KIND_FIELDS = ("nature_de_l_objet", "nature", "classe_de_l_objet", "classe")
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents ("Saint-Béat" -> "saint-beat")"""
+    text = "".join(LIGATURES.get(c, c) for c in text.lower())
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """Folded word tokens with their (start, end) offsets in the original text"""
+    return [(fold(m.group()), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(text)]
+
+
+def name_tokens(name: str) -> Tuple[str, ...]:
+    tokens = [token for token, _, _ in tokenize(name)]
+    return tuple(TOKEN_ALIASES.get(t, t) if i < len(tokens) - 1 else t for i, t in enumerate(tokens))
+
+
+class Gazetteer:
+    """Place names compiled into a token trie; scan() finds every known name in a text"""
+
+    def __init__(self, entries: Optional[Iterable[Dict]] = None):
+        """
+        Args:
+            entries: Dicts with name, latitude, longitude and optionally kind, department, weight
+        """
+        self.entries: List[Dict] = []
+        self._trie: Dict = {}
+        self.max_tokens = 0
+        for entry in entries or []:
+            self.add(**entry)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(
+        self,
+        name: str,
+        latitude: float,
+        longitude: float,
+        kind: str = "toponyme",
+        department: str = "",
+        weight: float = 1.0,
+    ):
+        """Add one place; identical names are kept as alternative candidates"""
+        tokens = name_tokens(name)
+        if not tokens or (len(tokens) == 1 and len(tokens[0]) < 3):
+            return
+        entry = {
+            "name": name,
+            "latitude": round(float(latitude), 6),
+            "longitude": round(float(longitude), 6),
+            "kind": kind,
+            "department": department,
+            "weight": float(weight),
+        }
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        candidates = node.setdefault("", [])
+        # Same name at (almost) the same spot from two sources: keep one, with the higher weight
+        for index in candidates:
+            other = self.entries[index]
+            if abs(other["latitude"] - entry["latitude"]) + abs(other["longitude"] - entry["longitude"]) < 0.01:
+                other["weight"] = max(other["weight"], entry["weight"])
+                return
+        candidates.append(len(self.entries))
+        self.entries.append(entry)
+        self.max_tokens = max(self.max_tokens, len(tokens))
+
+    # ------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------
+
+    def scan(self, text: str, near: Optional[Tuple[float, float]] = None) -> List[Dict]:
+        """
+        Find known place names in text (leftmost-longest, non-overlapping)
+
+        Args:
+            text: Free text
+            near: Optional (lat, lon) used to rank homonyms by distance
+
+        Returns:
+            One dict per match: the matched text, its span, the best candidate's coordinates,
+            the number of candidates ("ambiguity") and a 0-1 confidence score
+        """
+        if not text or not self.entries:
+            return []
+        tokens = tokenize(text)
+        matches = []
+        i = 0
+        while i < len(tokens):
+            node = self._trie
+            found = None
+            for j in range(i, min(i + self.max_tokens, len(tokens))):
+                token = tokens[j][0]
+                child = node.get(token)
+                if child is None and token in TOKEN_ALIASES:
+                    child = node.get(TOKEN_ALIASES[token])
+                if child is None:
+                    break
+                node = child
+                if "" in node:
+                    found = (j, node[""])
+            if found is None:
+                i += 1
+                continue
+            j, candidates = found
+            match = self._score(text, tokens[i : j + 1], candidates, near)
+            if match:
+                matches.append(match)
+            i = j + 1
+        return matches
+
+    def _score(self, text: str, span: List[Tuple[str, int, int]], candidates: List[int], near) -> Optional[Dict]:
+        start, end = span[0][1], span[-1][2]
+        surface = text[start:end]
+        capitalized = surface[:1].isupper()
+        if len(span) == 1 and span[0][0] in COMMON_WORDS and not capitalized:
+            return None
+
+        entries = [self.entries[i] for i in candidates]
+        if near is not None:
+            ranked = sorted(entries, key=lambda e: _distance_km(near, (e["latitude"], e["longitude"])))
+        else:
+            ranked = sorted(entries, key=lambda e: -e["weight"] * KIND_WEIGHTS.get(e["kind"], 0.8))
+        best = ranked[0]
+
+        score = KIND_WEIGHTS.get(best["kind"], 0.8)
+        score *= 1.0 if capitalized else 0.4
+        score *= min(1.0, 0.7 + 0.15 * len(span))  # multi-word names are more specific
+        if len(entries) > 1:
+            total = sum(e["weight"] for e in entries) or 1.0
+            share = best["weight"] / total if near is None else 1.0 / len(entries) ** 0.5
+            score *= max(share, 1.0 / len(entries))
+
+        return {
+            "text": surface,
+            "start": start,
+            "end": end,
+            "name": best["name"],
+            "latitude": best["latitude"],
+            "longitude": best["longitude"],
+            "kind": best["kind"],
+            "department": best["department"],
+            "ambiguity": len(entries),
+            "score": round(score, 3),
+        }
+
+    def best_match(self, text: str, min_score: float = 0.5, near=None) -> Optional[Dict]:
+        """Highest-scoring match at or above min_score, or None"""
+        matches = [m for m in self.scan(text, near) if m["score"] >= min_score]
+        return max(matches, key=lambda m: (m["score"], len(m["text"]))) if matches else None
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as handle:
+            json.dump(self.entries, handle, ensure_ascii=False, separators=(",", ":"))
+        logger.info(f"Gazetteer written to {path} ({len(self.entries)} names)")
+
+    @classmethod
+    def load(cls, path: Path) -> "Gazetteer":
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            return cls(json.load(handle))
+
+
+def _distance_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    dlat = math.radians(b[0] - a[0])
+    dlon = math.radians(b[1] - a[1]) * math.cos(math.radians((a[0] + b[0]) / 2))
+    return 6371.0 * math.hypot(dlat, dlon)
+
+
+def _in_region(lat: float, lon: float) -> bool:
+    lat_min, lon_min, lat_max, lon_max = REGION_BOUNDS
+    return lat_min <= lat <= lat_max and lon_min <= lon <= lon_max
+
+
+# ----------------------------------------------------------------------
+# Sources
+# ----------------------------------------------------------------------
+
+
+def communes_from_ban_store(store_path: Path) -> List[Dict]:
+    """Commune names with address-weighted centroids from the offline BAN store (.npz)"""
+    with np.load(store_path, allow_pickle=False) as npz:
+        commune_id = npz["commune_id"]
+        lats, lons = npz["lat"].astype(np.float64), npz["lon"].astype(np.float64)
+        names, insee = npz["commune_name"], npz["commune_insee"]
+
+    counts = np.bincount(commune_id, minlength=len(names))
+    lat_sum = np.bincount(commune_id, weights=lats, minlength=len(names))
+    lon_sum = np.bincount(commune_id, weights=lons, minlength=len(names))
+
+    # One row per (insee, postcode) in the store: merge postcodes of the same commune
+    merged: Dict[str, List] = {}
+    for i, code in enumerate(insee):
+        if not counts[i]:
+            continue
+        item = merged.setdefault(str(code), [str(names[i]), 0, 0.0, 0.0])
+        item[1] += counts[i]
+        item[2] += lat_sum[i]
+        item[3] += lon_sum[i]
+
+    largest = max((item[1] for item in merged.values()), default=1)
+    return [
+        {
+            "name": name,
+            "latitude": lat / count,
+            "longitude": lon / count,
+            "kind": "commune",
+            "department": code[:2],
+            # Bigger communes (more addresses) win homonym ties
+            "weight": 0.5 + 0.5 * math.log1p(count) / math.log1p(largest),
+        }
+        for code, (name, count, lat, lon) in merged.items()
+    ]
+
+
+def toponyms_from_file(path: Path) -> List[Dict]:
+    """
+    BD TOPO toponyms from a WFS GeoJSON export (EPSG:4326) or a CSV with name/lat/lon columns
+
+    Non-point geometries are reduced to the mean of their vertices.
+    """
+    path = Path(path)
+    opener = gzip.open if path.suffix == ".gz" else open
+    entries = []
+    with opener(path, "rt", encoding="utf-8") as handle:
+        if ".csv" in path.suffixes:
+            delimiter = ";" if ";" in handle.readline() else ","
+            handle.seek(0)
+            features = [
+                (row, (row.get("lat") or row.get("latitude"), row.get("lon") or row.get("longitude")))
+                for row in csv.DictReader(handle, delimiter=delimiter)
+            ]
+        else:
+            data = json.load(handle)
+            features = [(f.get("properties") or {}, _representative_point(f.get("geometry"))) for f in data["features"]]
+
+    for props, (lat, lon) in features:
+        name = next((props[f] for f in NAME_FIELDS if props.get(f)), None)
+        try:
+            lat, lon = float(lat), float(lon)
+        except (TypeError, ValueError):
+            continue
+        if not name or not _in_region(lat, lon):
+            continue
+        nature = next((str(props[f]) for f in KIND_FIELDS if props.get(f)), "")
+        kind = "lieu-dit" if "lieu-dit" in nature.lower() else "toponyme"
+        entries.append({"name": name, "latitude": lat, "longitude": lon, "kind": kind, "weight": 0.5})
+    return entries
+
+
+def _representative_point(geometry: Optional[Dict]) -> Tuple[Optional[float], Optional[float]]:
+    if not geometry or not geometry.get("coordinates"):
+        return None, None
+    coords = np.asarray(_flatten(geometry["coordinates"]), dtype=np.float64).reshape(-1, 2)
+    lon, lat = coords.mean(axis=0)
+    return lat, lon
+
+
+def _flatten(coords) -> List[float]:
+    if coords and isinstance(coords[0], (int, float)):
+        return list(coords[:2])
+    return [value for part in coords for value in _flatten(part)]
+
+
+def build_gazetteer(
+    ban_store: Optional[Path] = None, toponym_files: Sequence[Path] = (), output: Optional[Path] = None
+) -> Gazetteer:
+    """Compile communes and toponyms into a gazetteer (and save it when output is given)"""
+    gazetteer = Gazetteer()
+    if ban_store and Path(ban_store).exists():
+        for entry in communes_from_ban_store(Path(ban_store)):
+            gazetteer.add(**entry)
+    for path in toponym_files:
+        for entry in toponyms_from_file(Path(path)):
+            gazetteer.add(**entry)
+    if output:
+        gazetteer.save(Path(output))
+    return gazetteer
+
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """
+    Shared gazetteer: $SPOTS_GAZETTEER or data/geocoding/gazetteer_occitanie.json.gz, else the
+    communes of the offline BAN store, else empty (callers then fall back to live geocoding)
+    """
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            path = Path(os.getenv("SPOTS_GAZETTEER") or DEFAULT_GAZETTEER_PATH)
+            if path.exists():
+                _gazetteer = Gazetteer.load(path)
+            else:
+                from .offline_geocoder import DEFAULT_STORE_PATH
+
+                store = Path(os.getenv("SPOTS_BAN_STORE") or DEFAULT_STORE_PATH)
+                _gazetteer = build_gazetteer(store if store.exists() else None)
+            logger.info(f"Gazetteer ready with {len(_gazetteer)} names")
+        return _gazetteer
+
+
+def main():
+    from .offline_geocoder import DEFAULT_STORE_PATH
+
+    parser = argparse.ArgumentParser(description="Build the offline place-name gazetteer")
+    parser.add_argument("toponyms", nargs="*", help="BD TOPO toponym exports (GeoJSON in EPSG:4326, or CSV)")
+    parser.add_argument("--ban-store", default=str(DEFAULT_STORE_PATH), help="Offline BAN store for commune names")
+    parser.add_argument("--output", default=str(DEFAULT_GAZETTEER_PATH))
+    parser.add_argument("--query", help="Test text to scan after building")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    gazetteer = build_gazetteer(Path(args.ban_store), [Path(p) for p in args.toponyms], Path(args.output))
+    print(f"✅ {len(gazetteer)} place names written to {args.output}")
+
+    if args.query:
+        for match in gazetteer.scan(args.query):
+            print(f"📍 {match}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Async geocoding client for the API (BAN -> legacy BAN, premium for weak answers)
+Runs on one pooled aiohttp session, coalesces identical in-flight lookups, gives each
+provider its own concurrency limit and time budget, and hedges to the next provider
+when the current one is slow. The billed premium service is only asked when BAN
+misses or answers with low confidence, within its daily quota. The sqlite cache and
+the offline store are sync and run on worker threads, off the event loop
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .adaptive_concurrency import get_controller
+from .geocoding_cache import MISS, coordinate_key, normalize_address
+from .geocoding_france import OccitanieGeocoder
+
+logger = logging.getLogger(__name__)
+
+# Per-provider time budget (seconds) for one lookup, including the wait for a slot
+DEFAULT_BUDGETS = {"premium": 3.0, "ban": 4.0, "legacy": 4.0}
+
+Attempt = Tuple[str, Callable[[], Awaitable]]
+
+
+class AsyncGeocoder:
+    """Non-blocking counterpart of OccitanieGeocoder.geocode_address / reverse_geocode
+
+    Attempts return a result, None for a definitive "not found" (stops the chain), or
+    MISS when the provider failed or timed out and the next one should be tried.
+    """
+
+    def __init__(
+        self,
+        geocoder: Optional[OccitanieGeocoder] = None,
+        hedge_delay: float = 0.5,
+        budgets: Optional[Dict[str, float]] = None,
+        max_connections: int = 64,
+    ):
+        """
+        Initialize the client (the HTTP session is opened on first use)
+
+        Args:
+            geocoder: Sync geocoder whose endpoints, cache, offline store and premium service are reused
+            hedge_delay: Seconds to wait on a provider before also asking the next one
+            budgets: Per-provider time budget overrides (premium, ban, legacy)
+            max_connections: Size of the shared connection pool
+        """
+        self.geocoder = geocoder or OccitanieGeocoder()
+        self.hedge_delay = hedge_delay
+        self.budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+        self.max_connections = max_connections
+
+        self.providers = {
+            "premium": get_controller("adresse-premium"),  # billed API: own limit, apart from BAN on the same host
+            "ban": get_controller(urlparse(self.geocoder.ban_base_url).netloc),
+            "legacy": get_controller(urlparse(self.geocoder.ban_legacy_url).netloc),
+        }
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+
+        # Statistics
+        self.coalesced_requests = 0
+        self.hedged_requests = 0
+        self.provider_failures = {name: 0 for name in self.providers}
+
+    # ------------------------------------------------------------------
+    # Session
+    # ------------------------------------------------------------------
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, headers={"User-Agent": "SPOTS-Occitanie/1.0"})
+        return self._session
+
+    async def close(self):
+        """Close the pooled session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    # ------------------------------------------------------------------
+    # Coalescing, limits and hedging
+    # ------------------------------------------------------------------
+
+    async def _coalesce(self, key: Tuple, factory: Callable[[], Awaitable]):
+        """Share one upstream call between concurrent identical lookups"""
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced_requests += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(factory())
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded so a cancelled caller does not cancel the call others are waiting on
+        return await asyncio.shield(future)
+
+    async def _call(self, provider: str, factory: Callable[[], Awaitable]):
+        """Run one provider attempt inside its concurrency slot and time budget"""
+        controller = self.providers[provider]
+        start = time.monotonic()
+
+        async def run():
+            async with controller.async_slot():
+                return await factory()
+
+        try:
+            return await asyncio.wait_for(run(), self.budgets[provider])
+        except asyncio.TimeoutError:
+            controller.record_failure(timeout=True, latency=time.monotonic() - start)
+            logger.info(f"{provider} geocoding exceeded its {self.budgets[provider]}s budget")
+        except aiohttp.ClientError as e:
+            controller.record_failure(latency=time.monotonic() - start)
+            logger.warning(f"{provider} geocoding error: {e}")
+        except Exception as e:
+            logger.error(f"{provider} geocoding error: {e}")
+        self.provider_failures[provider] += 1
+        return MISS
+
+    async def _first_answer(self, attempts: List[Attempt]) -> Tuple[Optional[str], object]:
+        """
+        Try providers in priority order, hedging to the next one after hedge_delay
+
+        Returns:
+            (provider, result) for the first provider with an answer, (provider, None) for a
+            definitive "not found", or (None, MISS) when every provider failed
+        """
+        queue = list(attempts)
+        rank = {name: i for i, (name, _) in enumerate(attempts)}
+        pending: Dict[asyncio.Task, str] = {}
+        negative: Optional[str] = None
+
+        def launch():
+            name, factory = queue.pop(0)
+            pending[asyncio.ensure_future(self._call(name, factory))] = name
+
+        launch()
+        try:
+            while pending:
+                can_hedge = bool(queue) and negative is None
+                done, _ = await asyncio.wait(
+                    pending, timeout=self.hedge_delay if can_hedge else None, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self.hedged_requests += 1
+                    launch()
+                    continue
+
+                failed = False
+                for task in done:
+                    name = pending.pop(task)
+                    value = task.result()
+                    if value is MISS:
+                        failed = True
+                    elif value is not None:
+                        return name, value
+                    elif negative is None:
+                        negative = name
+                        # Lower-priority providers cannot overrule a definitive "not found"
+                        for other in [t for t, n in pending.items() if rank[n] > rank[name]]:
+                            pending.pop(other).cancel()
+
+                if queue and negative is None and (failed or not pending):
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return (negative, None) if negative else (None, MISS)
+
+    async def _ban_json(self, provider: str, url: str, params: Dict) -> Optional[Dict]:
+        """GET a BAN endpoint; returns the JSON body, or None on a non-200 answer"""
+        controller = self.providers[provider]
+        session = await self._get_session()
+        start = time.monotonic()
+        async with session.get(url, params=params) as response:
+            controller.record_response(response.status, time.monotonic() - start, response.headers.get("Retry-After"))
+            if response.status != 200:
+                return None
+            return await response.json(content_type=None)
+
+    # ------------------------------------------------------------------
+    # Forward geocoding
+    # ------------------------------------------------------------------
+
+    async def geocode_address(self, address: str, limit: int = 1) -> Optional[Dict]:
+        """Async geocode_address: same priority order, cache and result format"""
+        if not address or not address.strip():
+            return None
+        cached = await asyncio.to_thread(self.geocoder.geocode_cache.get_geocode, address)
+        if cached is not MISS:
+            return cached
+        return await self._coalesce(("geocode", normalize_address(address)), lambda: self._geocode(address, limit))
+
+    async def _geocode(self, address: str, limit: int) -> Optional[Dict]:
+        geocoder = self.geocoder
+        params = {"q": address, "limit": limit, "type": "municipality,street,housenumber"}
+
+        async def ban(provider: str, base_url: str):
+            data = await self._ban_json(provider, f"{base_url}/search", params)
+            if data is None:
+                return MISS
+            features = data.get("features") or []
+            return geocoder._result_from_feature(features[0], provider) if features else None
+
+        attempts: List[Attempt] = [
+            ("ban", lambda: ban("ban", geocoder.ban_base_url)),
+            ("legacy", lambda: ban("legacy", geocoder.ban_legacy_url)),
+        ]
+        provider, result = await self._first_answer(attempts)
+
+        if await self._should_upgrade(None if result is MISS else result):
+            premium_result = await self._call(
+                "premium", lambda: self._premium(geocoder.premium_service.geocode_premium, address)
+            )
+            if premium_result is not MISS and premium_result["confidence"] >= (result["confidence"] if result else 0):
+                provider, result = "premium", premium_result
+
+        if result is not MISS:
+            await asyncio.to_thread(geocoder.geocode_cache.put_geocode, address, result, provider)
+            return result
+        return None
+
+    async def geocode_occitanie(self, address: str) -> Optional[Dict]:
+        """Async geocode_occitanie: retries with regional context, keeps Occitanie results only"""
+        result = await self.geocode_address(address)
+
+        if not result or result["confidence"] < 0.7:
+            enhanced_result = await self.geocode_address(f"{address}, Occitanie, France")
+            if enhanced_result and enhanced_result["confidence"] > (result["confidence"] if result else 0):
+                result = enhanced_result
+
+        if result and self.geocoder.is_in_occitanie(result["latitude"], result["longitude"]):
+            return result
+        return None
+
+    # ------------------------------------------------------------------
+    # Reverse geocoding
+    # ------------------------------------------------------------------
+
+    async def reverse_geocode(self, lat: float, lon: float) -> Optional[str]:
+        """Async reverse_geocode: offline BAN store, cache, then BAN -> legacy -> premium"""
+        geocoder = self.geocoder
+        if geocoder.offline_geocoder.available:
+            # The first lookup loads the store and builds its KD-tree
+            address = await asyncio.to_thread(geocoder.offline_geocoder.reverse_geocode, lat, lon)
+            if address:
+                return address
+
+        cached = await asyncio.to_thread(geocoder.geocode_cache.get_reverse, lat, lon)
+        if cached is not MISS:
+            return cached
+        key = ("reverse", coordinate_key(lat, lon, geocoder.geocode_cache.precision))
+        return await self._coalesce(key, lambda: self._reverse(lat, lon))
+
+    async def _reverse(self, lat: float, lon: float) -> Optional[str]:
+        geocoder = self.geocoder
+
+        async def ban(provider: str, base_url: str, params: Dict):
+            data = await self._ban_json(provider, f"{base_url}/reverse", params)
+            if data is None:
+                return MISS
+            features = data.get("features") or []
+            return features[0]["properties"].get("label", "") if features else None
+
+        async def premium():
+            result = await self._premium(geocoder.premium_service.reverse_geocode_premium, lat, lon)
+            return result.get("address", "") if isinstance(result, dict) else result
+
+        params = {"lon": lon, "lat": lat}
+        typed = {**params, "type": "municipality,street,housenumber"}
+        attempts: List[Attempt] = [
+            ("ban", lambda: ban("ban", geocoder.ban_base_url, typed)),
+            ("legacy", lambda: ban("legacy", geocoder.ban_legacy_url, params)),
+        ]
+        provider, address = await self._first_answer(attempts)
+
+        # Premium only when BAN has no answer at all
+        if not address and await self._should_upgrade(None):
+            premium_address = await self._call("premium", premium)
+            if premium_address is not MISS:
+                provider, address = "premium", premium_address
+
+        if address is not MISS:
+            await asyncio.to_thread(geocoder.geocode_cache.put_reverse, lat, lon, address, provider)
+            return address
+        return None
+
+    async def _should_upgrade(self, ban_result: Optional[Dict]) -> bool:
+        """premium_service.should_upgrade, with its quota ledger query (SQLite) off the event loop"""
+        premium = self.geocoder.premium_service
+        return premium.enabled and await asyncio.to_thread(premium.should_upgrade, ban_result)
+
+    async def _premium(self, method: Callable, *args):
+        """Premium lookups keep their sync OAuth flow and run on a worker thread
+
+        A premium miss is not definitive (BAN may still know the address), so it maps to MISS.
+        """
+        result = await asyncio.to_thread(method, *args)
+        return result if result else MISS
+
+    def get_stats(self) -> Dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "coalesced_requests": self.coalesced_requests,
+            "hedged_requests": self.hedged_requests,
+            "provider_failures": dict(self.provider_failures),
+            "providers": {name: controller.get_stats() for name, controller in self.providers.items()},
+        }
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Persistent geocoding cache shared by every geocoder, API worker and enrichment script
+SQLite (WAL) keyed by normalized address or rounded coordinates, with provider provenance
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent.parent / "data" / "cache" / "geocoding_cache.db"
+
+# Returned by get() when nothing usable is cached (None is a valid cached negative result)
+MISS = object()
+
+# Common French street-type abbreviations, expanded so "av. Jean Jaurès" and
+# "Avenue Jean-Jaures" share a cache key
+ABBREVIATIONS = {
+    "av": "avenue",
+    "ave": "avenue",
+    "bd": "boulevard",
+    "bld": "boulevard",
+    "bvd": "boulevard",
+    "ch": "chemin",
+    "chem": "chemin",
+    "imp": "impasse",
+    "pl": "place",
+    "r": "rue",
+    "rte": "route",
+    "sq": "square",
+    "st": "saint",
+    "ste": "sainte",
+    "fbg": "faubourg",
+    "all": "allee",
+    "crs": "cours",
+}
+
+
+def normalize_address(address: str) -> str:
+    """Accent-fold, lowercase, strip punctuation and expand street abbreviations"""
+    folded = unicodedata.normalize("NFKD", address)
+    folded = "".join(c for c in folded if not unicodedata.combining(c)).lower()
+    tokens = re.split(r"[^a-z0-9]+", folded)
+    return " ".join(ABBREVIATIONS.get(t, t) for t in tokens if t)
+
+
+def coordinate_key(lat: float, lon: float, precision: int) -> str:
+    """Round coordinates to ``precision`` decimals (5 ≈ 1 m, 4 ≈ 11 m)"""
+    return f"{round(lat, precision):.{precision}f},{round(lon, precision):.{precision}f}"
+
+
+class GeocodingCache:
+    """SQLite-backed cache for geocode, reverse-geocode and elevation lookups"""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        precision: int = 5,
+        ttl: float = 90 * 86400,
+        negative_ttl: float = 86400,
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            db_path: SQLite file (default: $SPOTS_GEOCODE_CACHE or data/cache/geocoding_cache.db)
+            precision: Decimal places kept when keying coordinates
+            ttl: Lifetime of positive results in seconds
+            negative_ttl: Lifetime of "no result" entries in seconds
+        """
+        self.db_path = Path(db_path or os.getenv("SPOTS_GEOCODE_CACHE") or DEFAULT_CACHE_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.precision = precision
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._local = threading.local()
+
+        # Statistics (per process)
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocode_cache (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                result TEXT,
+                provider TEXT,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_geocode_cache_expiry ON geocode_cache (expires_at)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets API workers and scripts share the file"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Generic access
+    # ------------------------------------------------------------------
+
+    def get(self, kind: str, key: str) -> Any:
+        """Return the cached value (None for a cached negative), or MISS"""
+        row = self._conn().execute(
+            "SELECT result, expires_at FROM geocode_cache WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            self.misses += 1
+            return MISS
+        if row[0] is None:
+            self.negative_hits += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def get_entry(self, kind: str, key: str) -> Optional[Dict]:
+        """Full cache entry including provenance, or None"""
+        row = self._conn().execute(
+            "SELECT result, provider, created_at, expires_at FROM geocode_cache WHERE kind = ? AND key = ?",
+            (kind, key),
+        ).fetchone()
+        if row is None or row[3] < time.time():
+            return None
+        return {
+            "result": json.loads(row[0]) if row[0] is not None else None,
+            "provider": row[1],
+            "created_at": row[2],
+            "expires_at": row[3],
+        }
+
+    def put(self, kind: str, key: str, value: Any, provider: str, ttl: Optional[float] = None):
+        """
+        Store a result; ``value=None`` records a negative result with the short TTL
+
+        Only call with None when the provider answered definitively (e.g. HTTP 200
+        with no features) - transport errors must not be cached.
+        """
+        now = time.time()
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO geocode_cache (kind, key, result, provider, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (kind, key, json.dumps(value) if value is not None else None, provider, now, now + ttl),
+        )
+        conn.commit()
+
+    # ------------------------------------------------------------------
+    # Typed helpers
+    # ------------------------------------------------------------------
+
+    # BAN and Premium labels share the "reverse" kind; other providers (Ola, Nominatim,
+    # Google, IGN OLS) pass their own kind so a negative BAN answer never masks them.
+
+    def get_geocode(self, address: str) -> Any:
+        return self.get("geocode", normalize_address(address))
+
+    def put_geocode(self, address: str, result: Optional[Dict], provider: str):
+        self.put("geocode", normalize_address(address), result, provider)
+
+    def get_reverse(self, lat: float, lon: float, kind: str = "reverse") -> Any:
+        return self.get(kind, coordinate_key(lat, lon, self.precision))
+
+    def put_reverse(self, lat: float, lon: float, address: Optional[str], provider: str, kind: str = "reverse"):
+        self.put(kind, coordinate_key(lat, lon, self.precision), address, provider)
+
+    def get_elevation(self, lat: float, lon: float) -> Any:
+        return self.get("elevation", coordinate_key(lat, lon, self.precision))
+
+    def put_elevation(self, lat: float, lon: float, elevation: Optional[float], provider: str):
+        self.put("elevation", coordinate_key(lat, lon, self.precision), elevation, provider)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def purge_expired(self) -> int:
+        """Delete expired entries, returning how many were removed"""
+        conn = self._conn()
+        cursor = conn.execute("DELETE FROM geocode_cache WHERE expires_at < ?", (time.time(),))
+        conn.commit()
+        return cursor.rowcount
+
+    def get_stats(self) -> Dict:
+        """Cache statistics (entry counts from disk, hit counts for this process)"""
+        rows = self._conn().execute(
+            "SELECT kind, provider, COUNT(*), SUM(result IS NULL) FROM geocode_cache "
+            "WHERE expires_at >= ? GROUP BY kind, provider",
+            (time.time(),),
+        ).fetchall()
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "path": str(self.db_path),
+            "entries": {
+                f"{kind}:{provider}": {"total": total, "negative": negative}
+                for kind, provider, total, negative in rows
+            },
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.negative_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+
+_caches: Dict[str, GeocodingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_geocoding_cache(db_path: Optional[str] = None, **kwargs) -> GeocodingCache:
+    """Get the shared cache for a database path (created on first use)"""
+    path = str(Path(db_path or os.getenv("SPOTS_GEOCODE_CACHE") or DEFAULT_CACHE_PATH).resolve())
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = GeocodingCache(path, **kwargs)
+            _caches[path] = cache
+        return cache
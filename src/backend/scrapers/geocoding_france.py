@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 """Geocoding using French Base Adresse Nationale (BAN) API and IGN elevation service"""
 
+import codecs
+import csv
+import io
 import logging
 import requests
 from typing import Optional, Dict, List, Tuple
 import time
-from functools import lru_cache
+from .geocoding_cache import MISS, get_geocoding_cache
 from .geocoding_premium import PremiumGeocodingService
+from .offline_geocoder import get_offline_geocoder
+from ..raster.dem import get_dem_service
 
 
 class FrenchGeocodingMixin:
@@ -23,10 +28,23 @@ class FrenchGeocodingMixin:
         # Premium geocoding service
         self.premium_service = PremiumGeocodingService()
 
+        # Persistent cache shared with other geocoders, API workers and enrichment scripts
+        self.geocode_cache = get_geocoding_cache()
+
+        # Local BAN dump (first tier for reverse geocoding when the store has been built)
+        self.offline_geocoder = get_offline_geocoder()
+
+        # Local RGE ALTI / SRTM tiles (first tier for elevation when data/dem is populated)
+        self.dem = get_dem_service()
+
         # Rate limiting
         self.last_request_time = 0
         self.min_request_interval = 0.02  # 50 requests/second max
 
+        # Batch mode (BAN /search/csv and /reverse/csv)
+        self.batch_chunk_size = 5000  # Rows per CSV upload
+        self.batch_timeout = 300
+
         self.logger = logging.getLogger(__name__)
 
     def _rate_limit(self):
@@ -37,11 +55,10 @@ class FrenchGeocodingMixin:
             time.sleep(self.min_request_interval - time_since_last)
         self.last_request_time = time.time()
 
-    @lru_cache(maxsize=1000)
     def geocode_address(self, address: str, limit: int = 1) -> Optional[Dict]:
         """
         Convert address to coordinates using geocoding services
-        Priority: Premium -> BAN -> Legacy BAN
+        Priority: BAN -> Legacy BAN, then Premium (billed) only for misses and low-confidence answers
 
         Returns dict with:
         - latitude: float
@@ -53,15 +70,26 @@ class FrenchGeocodingMixin:
         - department: str (context)
         - precision: str ('premium', 'ban', or 'legacy')
         """
-        # Try premium first if enabled
-        if self.premium_service.enabled:
+        cached = self.geocode_cache.get_geocode(address)
+        if cached is not MISS:
+            return cached
+
+        provider, result = self._geocode_ban(address, limit)
+
+        if self.premium_service.should_upgrade(result):
             self.logger.debug(f"Trying premium geocoding for: {address}")
             premium_result = self.premium_service.geocode_premium(address)
-            if premium_result:
-                self.logger.info(f"Premium geocoding success for: {address}")
-                return premium_result
+            if premium_result and premium_result["confidence"] >= (result["confidence"] if result else 0):
+                self.logger.info(f"Premium geocoding upgraded: {address}")
+                provider, result = "premium", premium_result
+
+        # provider is None when every service failed: nothing definitive to remember
+        if provider:
+            self.geocode_cache.put_geocode(address, result, provider)
+        return result
 
-        # Fallback to standard BAN
+    def _geocode_ban(self, address: str, limit: int = 1) -> Tuple[Optional[str], Optional[Dict]]:
+        """Free BAN lookup; returns (provider, result), provider None when both endpoints failed"""
         self._rate_limit()
 
         try:
@@ -80,45 +108,29 @@ class FrenchGeocodingMixin:
                 )
 
             if response.status_code == 200:
+                provider = "ban" if "data.geopf.fr" in response.url else "legacy"
                 data = response.json()
-                if data.get("features"):
-                    feature = data["features"][0]
-                    props = feature.get("properties", {})
-                    coords = feature.get("geometry", {}).get("coordinates", [])
-
-                    if len(coords) >= 2:
-                        return {
-                            "latitude": coords[1],  # BAN returns [lon, lat]
-                            "longitude": coords[0],
-                            "formatted_address": props.get("label", ""),
-                            "confidence": props.get("score", 0.5),
-                            "city": props.get("city", ""),
-                            "postcode": props.get("postcode", ""),
-                            "department": (
-                                props.get("context", "").split(",")[0].strip() if props.get("context") else ""
-                            ),
-                            "type": props.get("type", ""),
-                            "importance": props.get("importance", 0),
-                            "precision": "ban" if "data.geopf.fr" in response.url else "legacy",
-                        }
+                result = self._result_from_feature(data["features"][0], provider) if data.get("features") else None
+                return provider, result
 
         except Exception as e:
             self.logger.error(f"Geocoding error for '{address}': {e}")
 
-        return None
+        return None, None
 
-    @lru_cache(maxsize=1000)
     def reverse_geocode(self, lat: float, lon: float) -> Optional[str]:
         """Convert coordinates to address using geocoding services
-        Priority: Premium -> BAN -> Legacy BAN"""
+        Priority: Offline BAN store -> BAN -> Legacy BAN -> Premium (only when BAN has no answer)"""
+        if self.offline_geocoder.available:
+            address = self.offline_geocoder.reverse_geocode(lat, lon)
+            if address:
+                return address
 
-        # Try premium first if enabled
-        if self.premium_service.enabled:
-            premium_result = self.premium_service.reverse_geocode_premium(lat, lon)
-            if premium_result:
-                return premium_result.get("address", "")
+        cached = self.geocode_cache.get_reverse(lat, lon)
+        if cached is not MISS:
+            return cached
 
-        # Fallback to standard BAN
+        provider, address = None, None
         self._rate_limit()
 
         try:
@@ -134,15 +146,248 @@ class FrenchGeocodingMixin:
                 response = requests.get(f"{self.ban_legacy_url}/reverse", params={"lon": lon, "lat": lat}, timeout=10)
 
             if response.status_code == 200:
+                provider = "ban" if "data.geopf.fr" in response.url else "legacy"
                 data = response.json()
-                if data.get("features"):
-                    return data["features"][0]["properties"].get("label", "")
+                address = data["features"][0]["properties"].get("label", "") if data.get("features") else None
 
         except Exception as e:
             self.logger.error(f"Reverse geocoding error for {lat},{lon}: {e}")
 
+        if not address and self.premium_service.should_upgrade(None):
+            premium_result = self.premium_service.reverse_geocode_premium(lat, lon)
+            if premium_result:
+                provider, address = "premium", premium_result.get("address", "")
+
+        if provider:
+            self.geocode_cache.put_reverse(lat, lon, address, provider)
+        return address
+
+    # ------------------------------------------------------------------
+    # Batch mode (BAN CSV bulk endpoints)
+    # ------------------------------------------------------------------
+
+    def _bulk_csv(self, endpoint: str, header: List[str], rows: List[List], form: Dict) -> Optional[Tuple[str, Dict]]:
+        """
+        Upload one CSV chunk to a BAN bulk endpoint and stream-parse the answer
+
+        Tries the IGN-hosted endpoint, then the legacy one. Returns (provider, rows keyed by
+        the "id" column), or None when neither endpoint accepted the chunk.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        writer.writerows(rows)
+        payload = buffer.getvalue().encode("utf-8")
+
+        for base_url, provider in ((self.ban_base_url, "ban"), (self.ban_legacy_url, "legacy")):
+            self._rate_limit()
+            try:
+                with requests.post(
+                    f"{base_url}/{endpoint}",
+                    files={"data": ("spots.csv", payload, "text/csv")},
+                    data=form,
+                    stream=True,
+                    timeout=self.batch_timeout,
+                ) as response:
+                    if response.status_code != 200:
+                        self.logger.info(f"BAN bulk {endpoint} returned {response.status_code} at {base_url}")
+                        continue
+                    # Parse rows as they arrive instead of buffering the whole CSV
+                    reader = csv.DictReader(self._iter_csv_lines(response))
+                    return provider, {row["id"]: row for row in reader if row.get("id")}
+            except Exception as e:
+                self.logger.error(f"BAN bulk {endpoint} error at {base_url}: {e}")
+
         return None
 
+    @staticmethod
+    def _iter_csv_lines(response):
+        """Decode a streamed response into lines, keeping line endings for the csv module"""
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        pending = ""
+        for chunk in response.iter_content(chunk_size=65536):
+            pending += decoder.decode(chunk)
+            lines = pending.splitlines(keepends=True)
+            pending = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+            yield from lines
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            yield pending
+
+    @staticmethod
+    def _csv_status(row: Optional[Dict]) -> str:
+        """Row outcome: 'ok', 'not-found', or 'error' (missing row or failed match)"""
+        if row is None:
+            return "error"
+        status = row.get("result_status") or ("ok" if row.get("latitude") or row.get("result_label") else "not-found")
+        return status if status in ("ok", "not-found") else "error"
+
+    def geocode_many(self, addresses: List[str], chunk_size: Optional[int] = None) -> List[Optional[Dict]]:
+        """
+        Geocode many addresses through BAN's /search/csv bulk endpoint
+
+        Cached addresses are answered locally and duplicates are sent once. Rows the bulk
+        endpoint failed on (or whole chunks it rejected) fall back to geocode_address.
+        BAN misses and low-confidence rows are then sent together to the premium batch
+        endpoint, within its daily quota. Results come back in input order, in the same
+        format as geocode_address.
+        """
+        chunk_size = chunk_size or self.batch_chunk_size
+        results: List[Optional[Dict]] = [None] * len(addresses)
+        pending: Dict[str, List[int]] = {}
+
+        for i, address in enumerate(addresses):
+            if not address or not address.strip():
+                continue
+            cached = self.geocode_cache.get_geocode(address)
+            if cached is MISS:
+                pending.setdefault(address, []).append(i)
+            else:
+                results[i] = cached
+
+        unique = list(pending)
+        for start in range(0, len(unique), chunk_size):
+            chunk = unique[start : start + chunk_size]
+            rows = [[str(n), " ".join(address.split())] for n, address in enumerate(chunk)]
+            answer = self._bulk_csv("search/csv", ["id", "q"], rows, {"columns": "q"})
+            provider, parsed = answer if answer else (None, {})
+            fallbacks = 0
+
+            for n, address in enumerate(chunk):
+                row = parsed.get(str(n))
+                status = self._csv_status(row)
+                if status == "error":
+                    fallbacks += 1
+                    result = self.geocode_address(address)
+                elif status == "not-found":
+                    result = None
+                    self.geocode_cache.put_geocode(address, None, provider)
+                else:
+                    result = self._result_from_csv(row, provider)
+                    self.geocode_cache.put_geocode(address, result, provider)
+                for i in pending[address]:
+                    results[i] = result
+
+            if fallbacks:
+                self.logger.warning(f"BAN bulk geocoding: {fallbacks}/{len(chunk)} rows retried one by one")
+
+        self._upgrade_with_premium(pending, results)
+        return results
+
+    def _upgrade_with_premium(self, pending: Dict[str, List[int]], results: List[Optional[Dict]]):
+        """Replace weak batch answers with premium ones, submitted as one quota-checked batch"""
+        weak = [address for address, indexes in pending.items() if self.premium_service.should_upgrade(results[indexes[0]])]
+        if not weak:
+            return
+
+        upgraded = 0
+        for address, premium_result in zip(weak, self.premium_service.batch_geocode_premium(weak)):
+            current = results[pending[address][0]]
+            if not premium_result or premium_result["confidence"] < (current["confidence"] if current else 0):
+                continue
+            upgraded += 1
+            self.geocode_cache.put_geocode(address, premium_result, "premium")
+            for i in pending[address]:
+                results[i] = premium_result
+        self.logger.info(f"Premium batch: {upgraded}/{len(weak)} weak BAN answers upgraded")
+
+    def reverse_many(self, points: List[Tuple[float, float]], chunk_size: Optional[int] = None) -> List[Optional[str]]:
+        """
+        Reverse geocode many (lat, lon) points through BAN's /reverse/csv bulk endpoint
+
+        Points within reach of the offline BAN store are answered locally first. Otherwise
+        the same caching, de-duplication and per-item fallback rules as geocode_many apply.
+        Returns address labels in input order.
+        """
+        chunk_size = chunk_size or self.batch_chunk_size
+        results: List[Optional[str]] = [None] * len(points)
+        pending: Dict[Tuple[float, float], List[int]] = {}
+
+        # Offline store answers most points in one vectorized KD-tree query
+        offline = [None] * len(points)
+        if self.offline_geocoder.available:
+            valid = [i for i, (lat, lon) in enumerate(points) if lat is not None and lon is not None]
+            for i, record in zip(valid, self.offline_geocoder.nearest_many([points[i] for i in valid])):
+                offline[i] = record
+
+        for i, (lat, lon) in enumerate(points):
+            if lat is None or lon is None:
+                continue
+            if offline[i]:
+                results[i] = offline[i]["label"]
+                continue
+            cached = self.geocode_cache.get_reverse(lat, lon)
+            if cached is MISS:
+                pending.setdefault((lat, lon), []).append(i)
+            else:
+                results[i] = cached
+
+        unique = list(pending)
+        for start in range(0, len(unique), chunk_size):
+            chunk = unique[start : start + chunk_size]
+            rows = [[str(n), lat, lon] for n, (lat, lon) in enumerate(chunk)]
+            answer = self._bulk_csv("reverse/csv", ["id", "lat", "lon"], rows, {})
+            provider, parsed = answer if answer else (None, {})
+            fallbacks = 0
+
+            for n, (lat, lon) in enumerate(chunk):
+                row = parsed.get(str(n))
+                status = self._csv_status(row)
+                if status == "error":
+                    fallbacks += 1
+                    address = self.reverse_geocode(lat, lon)
+                else:
+                    address = (row.get("result_label") or None) if status == "ok" else None
+                    self.geocode_cache.put_reverse(lat, lon, address, provider)
+                for i in pending[(lat, lon)]:
+                    results[i] = address
+
+            if fallbacks:
+                self.logger.warning(f"BAN bulk reverse geocoding: {fallbacks}/{len(chunk)} rows retried one by one")
+
+        return results
+
+    @staticmethod
+    def _result_from_feature(feature: Dict, provider: str) -> Optional[Dict]:
+        """Map a BAN /search GeoJSON feature to the geocode_address result format"""
+        props = feature.get("properties", {})
+        coords = feature.get("geometry", {}).get("coordinates", [])
+        if len(coords) < 2:
+            return None
+        return {
+            "latitude": coords[1],  # BAN returns [lon, lat]
+            "longitude": coords[0],
+            "formatted_address": props.get("label", ""),
+            "confidence": props.get("score", 0.5),
+            "city": props.get("city", ""),
+            "postcode": props.get("postcode", ""),
+            "department": props.get("context", "").split(",")[0].strip() if props.get("context") else "",
+            "type": props.get("type", ""),
+            "importance": props.get("importance", 0),
+            "precision": provider,
+        }
+
+    @staticmethod
+    def _result_from_csv(row: Dict, provider: str) -> Optional[Dict]:
+        """Map a /search/csv result row to the geocode_address result format"""
+        try:
+            latitude, longitude = float(row["latitude"]), float(row["longitude"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        context = row.get("result_context") or ""
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "formatted_address": row.get("result_label", ""),
+            "confidence": float(row.get("result_score") or 0.5),
+            "city": row.get("result_city", ""),
+            "postcode": row.get("result_postcode", ""),
+            "department": context.split(",")[0].strip() if context else "",
+            "type": row.get("result_type", ""),
+            "importance": float(row.get("result_importance") or 0),
+            "precision": provider,
+        }
+
     def get_elevation_ign(self, lat: float, lon: float) -> Optional[float]:
         """
         Get elevation using IGN altimetry service
@@ -195,13 +440,41 @@ class FrenchGeocodingMixin:
         return None
 
     def get_elevation(self, lat: float, lon: float) -> Optional[float]:
-        """Get elevation, trying IGN first then fallback"""
+        """Get elevation, trying the local DEM, then IGN, then Open-Elevation"""
+        elevation = self.dem.elevation(lat, lon)
+        if elevation is not None:
+            return elevation
+
+        cached = self.geocode_cache.get_elevation(lat, lon)
+        if cached is not MISS:
+            return cached
+
+        provider = "ign"
         elevation = self.get_elevation_ign(lat, lon)
         if elevation is None:
             self.logger.info(f"IGN elevation failed for {lat},{lon}, trying Open-Elevation")
+            provider = "open-elevation"
             elevation = self.get_elevation_open(lat, lon)
+        # Failures are not cached: both services only return None on errors
+        if elevation is not None:
+            self.geocode_cache.put_elevation(lat, lon, elevation, provider)
         return elevation
 
+    def get_elevations(self, points: List[Tuple[float, float]]) -> List[Optional[float]]:
+        """
+        Elevation for many (lat, lon) points
+
+        The local DEM answers the whole batch in one vectorized pass; only points outside
+        its coverage go through get_elevation (cache, then IGN / Open-Elevation).
+        """
+        if not points:
+            return []
+        values = self.dem.elevations([p[0] for p in points], [p[1] for p in points])
+        return [
+            round(float(value), 2) if value == value else self.get_elevation(lat, lon)
+            for (lat, lon), value in zip(points, values)
+        ]
+
     def search_places_ban(
         self, query: str, lat: Optional[float] = None, lon: Optional[float] = None, limit: int = 10
     ) -> List[Dict]:
@@ -254,6 +527,11 @@ class FrenchGeocodingMixin:
 
     def get_department_code(self, lat: float, lon: float) -> Optional[str]:
         """Get department code from coordinates"""
+        if self.offline_geocoder.available:
+            record = self.offline_geocoder.nearest(lat, lon)
+            if record and record["citycode"]:
+                return record["citycode"][:2]
+
         address = self.reverse_geocode(lat, lon)
         if address:
             # Try to extract department from context
@@ -6,6 +6,8 @@ import logging
 import requests
 from typing import Optional, Tuple, Dict
 import time
+from .geocoding_cache import MISS, get_geocoding_cache, normalize_address
+from ..raster.dem import get_dem_service
 
 
 class GeocodingMixin:
@@ -14,7 +16,8 @@ class GeocodingMixin:
     def __init__(self):
         self.ola_api_key = os.getenv("OLA_MAPS_API_KEY", "")
         self.ola_base_url = "https://api.olamaps.io/places/v1"
-        self.geocoding_cache = {}
+        self.geocoding_cache = get_geocoding_cache()
+        self.dem = get_dem_service()
 
     def geocode_address(self, address: str) -> Optional[Dict]:
         """Convert address to coordinates using Ola Maps"""
@@ -22,9 +25,11 @@ class GeocodingMixin:
             logging.warning("OLA_MAPS_API_KEY not set, skipping geocoding")
             return None
 
-        # Check cache first
-        if address in self.geocoding_cache:
-            return self.geocoding_cache[address]
+        # Check cache first (Ola results are kept apart from BAN ones)
+        cache_key = normalize_address(address)
+        cached = self.geocoding_cache.get("geocode_ola", cache_key)
+        if cached is not MISS:
+            return cached
 
         try:
             # Add region context for better results
@@ -47,8 +52,9 @@ class GeocodingMixin:
                         "confidence": result.get("confidence", 0.5),
                         "place_id": result.get("place_id"),
                     }
-                    self.geocoding_cache[address] = geocoded
+                    self.geocoding_cache.put("geocode_ola", cache_key, geocoded, "ola")
                     return geocoded
+                self.geocoding_cache.put("geocode_ola", cache_key, None, "ola")
 
         except Exception as e:
             logging.error(f"Geocoding error for '{address}': {e}")
@@ -60,9 +66,9 @@ class GeocodingMixin:
         if not self.ola_api_key:
             return None
 
-        cache_key = f"{lat},{lon}"
-        if cache_key in self.geocoding_cache:
-            return self.geocoding_cache[cache_key]
+        cached = self.geocoding_cache.get_reverse(lat, lon, kind="reverse_ola")
+        if cached is not MISS:
+            return cached
 
         try:
             response = requests.get(
@@ -75,7 +81,7 @@ class GeocodingMixin:
                 data = response.json()
                 if data.get("status") == "ok" and data.get("results"):
                     address = data["results"][0].get("formatted_address", "")
-                    self.geocoding_cache[cache_key] = address
+                    self.geocoding_cache.put_reverse(lat, lon, address, "ola", kind="reverse_ola")
                     return address
 
         except Exception as e:
@@ -84,7 +90,11 @@ class GeocodingMixin:
         return None
 
     def get_elevation(self, lat: float, lon: float) -> Optional[float]:
-        """Get elevation for coordinates using Ola Maps"""
+        """Get elevation from the local DEM, falling back to Ola Maps"""
+        elevation = self.dem.elevation(lat, lon)
+        if elevation is not None:
+            return elevation
+
         if not self.ola_api_key:
             return None
 
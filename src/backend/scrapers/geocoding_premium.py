@@ -6,9 +6,11 @@ import requests
 from typing import Optional, Dict, List, Tuple
 import time
 import os
-from functools import lru_cache
+import json
 from datetime import datetime, timedelta
 import base64
+from .geocoding_cache import MISS, coordinate_key, get_geocoding_cache, normalize_address
+from .quota_ledger import QuotaLedger
 
 
 class PremiumGeocodingService:
@@ -35,6 +37,21 @@ class PremiumGeocodingService:
 
         self.logger = logging.getLogger(__name__)
 
+        # Persistent cache (premium lookups are billed, so keep them across restarts)
+        self.cache = get_geocoding_cache()
+
+        # Billed usage: per-day allowance shared by every process using the cache database
+        self.ledger = QuotaLedger(
+            "adresse-premium",
+            daily_limit=int(os.getenv("ADRESSE_PREMIUM_DAILY_LIMIT", "1000")),
+            cost_per_request=float(os.getenv("ADRESSE_PREMIUM_COST_PER_REQUEST", "0")),
+            db_path=str(self.cache.db_path),
+        )
+
+        # Routing: only BAN answers below this score (or BAN misses) are sent to premium
+        self.min_ban_confidence = float(os.getenv("ADRESSE_PREMIUM_MIN_CONFIDENCE", "0.6"))
+        self.batch_size = 50
+
         if self.enabled and not all([self.api_key, self.username, self.password]):
             self.logger.warning("ADRESSE-PREMIUM enabled but credentials missing")
             self.enabled = False
@@ -86,7 +103,48 @@ class PremiumGeocodingService:
             time.sleep(self.min_request_interval - time_since_last)
         self.last_request_time = time.time()
 
-    @lru_cache(maxsize=2000)  # Larger cache for premium
+    @staticmethod
+    def _result_from_feature(feature: Dict) -> Optional[Dict]:
+        """Map a premium GeoJSON feature to the geocode result format (with premium-only fields)"""
+        props = feature.get("properties", {})
+        coords = feature.get("geometry", {}).get("coordinates", [])
+        if len(coords) < 2:
+            return None
+        return {
+            "latitude": coords[1],
+            "longitude": coords[0],
+            "formatted_address": props.get("label", ""),
+            "confidence": props.get("score", 0.95),  # Premium has higher confidence
+            "city": props.get("city", ""),
+            "postcode": props.get("postcode", ""),
+            "department": props.get("context", "").split(",")[0].strip(),
+            "type": props.get("type", ""),
+            "importance": props.get("importance", 0),
+            # Premium-specific fields
+            "housenumber": props.get("housenumber", ""),
+            "street": props.get("street", ""),
+            "locality": props.get("locality", ""),
+            "district": props.get("district", ""),
+            "oldcity": props.get("oldcity", ""),  # Historical name
+            "oldstreet": props.get("oldstreet", ""),  # Historical street
+            "entrance": props.get("entrance", ""),  # Building entrance
+            "quality": props.get("quality", ""),  # Data quality indicator
+            "precision": "premium",
+        }
+
+    @staticmethod
+    def _cache_key(address: str, filters: Optional[Dict]) -> str:
+        key = normalize_address(address)
+        return key + "|" + json.dumps(filters, sort_keys=True) if filters else key
+
+    def should_upgrade(self, ban_result: Optional[Dict]) -> bool:
+        """True when a BAN answer is weak enough to be worth a billed premium lookup"""
+        if not self.enabled:
+            return False
+        if ban_result is not None and ban_result.get("confidence", 0) >= self.min_ban_confidence:
+            return False
+        return self.ledger.remaining() > 0
+
     def geocode_premium(self, address: str, filters: Optional[Dict] = None) -> Optional[Dict]:
         """
         Premium geocoding with enhanced features
@@ -101,8 +159,13 @@ class PremiumGeocodingService:
         if not self.enabled:
             return None
 
+        cache_key = self._cache_key(address, filters)
+        cached = self.cache.get("geocode_premium", cache_key)
+        if cached is not MISS:
+            return cached
+
         token = self._get_auth_token()
-        if not token:
+        if not token or not self.ledger.reserve(1, "geocode"):
             return None
 
         self._rate_limit()
@@ -129,33 +192,9 @@ class PremiumGeocodingService:
 
             if response.status_code == 200:
                 data = response.json()
-                if data.get("features"):
-                    feature = data["features"][0]
-                    props = feature.get("properties", {})
-                    coords = feature.get("geometry", {}).get("coordinates", [])
-
-                    if len(coords) >= 2:
-                        return {
-                            "latitude": coords[1],
-                            "longitude": coords[0],
-                            "formatted_address": props.get("label", ""),
-                            "confidence": props.get("score", 0.95),  # Premium has higher confidence
-                            "city": props.get("city", ""),
-                            "postcode": props.get("postcode", ""),
-                            "department": props.get("context", "").split(",")[0].strip(),
-                            "type": props.get("type", ""),
-                            "importance": props.get("importance", 0),
-                            # Premium-specific fields
-                            "housenumber": props.get("housenumber", ""),
-                            "street": props.get("street", ""),
-                            "locality": props.get("locality", ""),
-                            "district": props.get("district", ""),
-                            "oldcity": props.get("oldcity", ""),  # Historical name
-                            "oldstreet": props.get("oldstreet", ""),  # Historical street
-                            "entrance": props.get("entrance", ""),  # Building entrance
-                            "quality": props.get("quality", ""),  # Data quality indicator
-                            "precision": "premium",
-                        }
+                result = self._result_from_feature(data["features"][0]) if data.get("features") else None
+                self.cache.put("geocode_premium", cache_key, result, "premium")
+                return result
             else:
                 self.logger.error(f"Premium geocoding failed: {response.status_code}")
 
@@ -164,7 +203,6 @@ class PremiumGeocodingService:
 
         return None
 
-    @lru_cache(maxsize=2000)
     def reverse_geocode_premium(self, lat: float, lon: float, zoom: int = 18) -> Optional[Dict]:
         """
         Premium reverse geocoding with detailed results
@@ -178,8 +216,13 @@ class PremiumGeocodingService:
         if not self.enabled:
             return None
 
+        cache_key = f"{coordinate_key(lat, lon, self.cache.precision)}|{zoom}"
+        cached = self.cache.get("reverse_premium", cache_key)
+        if cached is not MISS:
+            return cached
+
         token = self._get_auth_token()
-        if not token:
+        if not token or not self.ledger.reserve(1, "reverse"):
             return None
 
         self._rate_limit()
@@ -198,7 +241,7 @@ class PremiumGeocodingService:
                     feature = data["features"][0]
                     props = feature.get("properties", {})
 
-                    return {
+                    result = {
                         "address": props.get("label", ""),
                         "housenumber": props.get("housenumber", ""),
                         "street": props.get("street", ""),
@@ -209,6 +252,9 @@ class PremiumGeocodingService:
                         "distance": props.get("distance", 0),  # Distance from query point
                         "precision": "premium",
                     }
+                    self.cache.put("reverse_premium", cache_key, result, "premium")
+                    return result
+                self.cache.put("reverse_premium", cache_key, None, "premium")
 
         except Exception as e:
             self.logger.error(f"Premium reverse geocoding error: {e}")
@@ -218,20 +264,39 @@ class PremiumGeocodingService:
     def batch_geocode_premium(self, addresses: List[str], filters: Optional[Dict] = None) -> List[Optional[Dict]]:
         """
         Batch geocoding for multiple addresses
-        Premium API supports batch operations for efficiency
+
+        Cached addresses are answered locally and duplicates are sent once. Only as many
+        addresses as today's quota allows are submitted; the rest come back as None.
+        Results follow input order and are stored in the shared geocoding cache.
         """
+        results: List[Optional[Dict]] = [None] * len(addresses)
         if not self.enabled or not addresses:
-            return [None] * len(addresses)
+            return results
+
+        pending: Dict[str, List[int]] = {}
+        for i, address in enumerate(addresses):
+            if not address or not address.strip():
+                continue
+            cached = self.cache.get("geocode_premium", self._cache_key(address, filters))
+            if cached is not MISS:
+                results[i] = cached
+            else:
+                pending.setdefault(address, []).append(i)
+        if not pending:
+            return results
 
         token = self._get_auth_token()
         if not token:
-            return [None] * len(addresses)
+            return results
 
-        results = []
-        batch_size = 50  # Premium allows larger batches
+        queue = list(pending)
+        granted = self.ledger.reserve(len(queue), "batch")
+        if granted < len(queue):
+            self.logger.warning(f"Premium quota: {len(queue) - granted} address(es) left to BAN results")
+        queue = queue[:granted]
 
-        for i in range(0, len(addresses), batch_size):
-            batch = addresses[i : i + batch_size]
+        for start in range(0, len(queue), self.batch_size):
+            batch = queue[start : start + self.batch_size]
             self._rate_limit()
 
             try:
@@ -246,42 +311,27 @@ class PremiumGeocodingService:
                     json={"queries": [{"q": addr} for addr in batch], "filters": filters or {}},
                     timeout=30,
                 )
-
-                if response.status_code == 200:
-                    batch_data = response.json()
-                    for result in batch_data.get("results", []):
-                        if result.get("features"):
-                            feature = result["features"][0]
-                            props = feature.get("properties", {})
-                            coords = feature.get("geometry", {}).get("coordinates", [])
-
-                            if len(coords) >= 2:
-                                results.append(
-                                    {
-                                        "latitude": coords[1],
-                                        "longitude": coords[0],
-                                        "formatted_address": props.get("label", ""),
-                                        "confidence": props.get("score", 0.95),
-                                        "precision": "premium",
-                                    }
-                                )
-                            else:
-                                results.append(None)
-                        else:
-                            results.append(None)
-                else:
-                    # Fallback to individual requests
-                    for addr in batch:
-                        results.append(self.geocode_premium(addr, filters))
-
+                if response.status_code != 200:
+                    self.logger.error(f"Premium batch geocoding failed: {response.status_code}")
+                    continue
+                answers = response.json().get("results", [])
             except Exception as e:
                 self.logger.error(f"Batch geocoding error: {e}")
-                # Fallback to individual requests
-                for addr in batch:
-                    results.append(self.geocode_premium(addr, filters))
+                continue
+
+            for address, answer in zip(batch, answers):
+                features = answer.get("features") if answer else None
+                result = self._result_from_feature(features[0]) if features else None
+                self.cache.put("geocode_premium", self._cache_key(address, filters), result, "premium")
+                for i in pending[address]:
+                    results[i] = result
 
         return results
 
+    def get_quota_usage(self) -> Dict:
+        """Today's billed usage and remaining allowance"""
+        return {"enabled": self.enabled, "min_ban_confidence": self.min_ban_confidence, **self.ledger.get_usage()}
+
     def search_poi_premium(self, query: str, lat: float, lon: float, radius: int = 1000) -> List[Dict]:
         """
         Search for Points of Interest near a location
@@ -97,6 +97,13 @@ DATASETS = {
     },
 }
 
+# Output formats of the paged, streaming WFS download (any WFS dataset)
+WFS_STREAM_FORMATS = ["geojson", "geojsonseq", "gpkg", "fgb"]
+WFS_PAGE_SIZE = 5000  # features per GetFeature page (COUNT)
+WFS_PAGE_CONCURRENCY = 4  # pages in flight (and held in memory) at once
+# Feature properties holding a unique identifier, used to page in a stable order (SORTBY)
+WFS_ID_FIELDS = ("cleabs", "gid", "id", "identifier", "inspireid")
+
 # Occitanie region configuration
 OCCITANIE_BOUNDS = [-0.5, 42.5, 4.5, 45.0]
 OCCITANIE_DEPARTMENTS = ["09", "11", "12", "30", "31", "32", "34", "46", "48", "65", "66", "81", "82"]
\ No newline at end of file
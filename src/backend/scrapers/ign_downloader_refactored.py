@@ -9,7 +9,7 @@ from typing import Optional, Dict, List, Tuple
 from datetime import datetime
 from src.backend.core.logging_config import logger
 
-from .ign_config import DATASETS, OCCITANIE_BOUNDS
+from .ign_config import DATASETS, OCCITANIE_BOUNDS, WFS_STREAM_FORMATS
 from .ign_downloaders import download_wfs, download_wms, download_direct
 
 
@@ -63,7 +63,7 @@ class IGNDatasetDownloader:
         Args:
             dataset_id: Dataset identifier (e.g., "ADMINEXPRESS-COG-CARTO.LATEST:commune")
             bbox: Bounding box as (min_lon, min_lat, max_lon, max_lat)
-            format: Output format (geojson, shp, gml, etc.)
+            format: Output format (geojson, shp, gml, etc.; WFS layers also geojsonseq, gpkg, fgb)
             output_file: Optional output filename
 
         Returns:
@@ -81,7 +81,8 @@ class IGNDatasetDownloader:
 
         dataset_info = DATASETS[dataset_id]
 
-        if format not in dataset_info["formats"]:
+        streamable = dataset_info["type"] == "wfs" and format in WFS_STREAM_FORMATS
+        if format not in dataset_info["formats"] and not streamable:
             raise ValueError(f"Format {format} not supported for {dataset_id}")
 
         # Route to appropriate download method
@@ -4,19 +4,146 @@ IGN Download Methods - Specialized downloaders for different IGN services
 """
 
 import os
+import re
 import requests
 import zipfile
 import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 from src.backend.core.logging_config import logger
 
 from .ign_config import (
     WFS_BASE_URL, WMS_BASE_URL, DOWNLOAD_BASE_URL,
-    API_KEYS, DATASETS, RASTER_RESOLUTION
+    API_KEYS, DATASETS, RASTER_RESOLUTION,
+    WFS_STREAM_FORMATS, WFS_PAGE_SIZE, WFS_PAGE_CONCURRENCY, WFS_ID_FIELDS
 )
-from .ign_geo_utils import reproject_bbox, get_bbox_in_meters, reproject_geojson
+from .ign_feature_writers import WRITERS, open_feature_writer
+from .ign_geo_utils import reproject_bbox, get_bbox_in_meters, reproject_features
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+
+def _wfs_number_matched(session: requests.Session, url: str, params: Dict) -> Optional[int]:
+    """Total features of a GetFeature query (RESULTTYPE=hits), or None if the server does not say"""
+    try:
+        response = session.get(url, params={**params, "RESULTTYPE": "hits"}, timeout=60)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"WFS hits request failed, paging sequentially: {e}")
+        return None
+    match = re.search(r'numberMatched="(\d+)"', response.text)
+    return int(match.group(1)) if match else None
+
+
+def _wfs_sort_field(session: requests.Session, url: str, params: Dict) -> Optional[str]:
+    """Identifier property of the queried layer, read from one sample feature (None if it has none)"""
+    try:
+        features = _fetch_wfs_page(session, url, params, 0, 1)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"WFS sample request failed, paging in the server's order: {e}")
+        return None
+    properties = (features[0].get("properties") or {}) if features else {}
+    field = next((field for field in WFS_ID_FIELDS if field in properties), None)
+    if features and field is None:
+        logger.warning("No identifier property, paging in the server's order")
+    return field
+
+
+def _fetch_wfs_page(session: requests.Session, url: str, params: Dict, start: int, count: int) -> List[Dict]:
+    """Features of one GetFeature page, parsed incrementally from the socket when ijson is installed"""
+    page_params = {**params, "STARTINDEX": str(start), "COUNT": str(count)}
+    response = session.get(url, params=page_params, stream=IJSON_AVAILABLE, timeout=120)
+    response.raise_for_status()
+    if IJSON_AVAILABLE:
+        response.raw.decode_content = True
+        return list(ijson.items(response.raw, "features.item", use_float=True))
+    return response.json().get("features", [])
+
+
+def _iter_wfs_sequential(
+    session: requests.Session, url: str, params: Dict, start: int, count: int
+) -> Iterator[List[Dict]]:
+    """Pages from ``start`` one after the other, until a page shorter than ``count``"""
+    while True:
+        features = _fetch_wfs_page(session, url, params, start, count)
+        if features:
+            yield features
+        if len(features) < count:
+            return
+        start += len(features)
+
+
+def iter_wfs_pages(
+    url: str,
+    params: Dict,
+    page_size: int = WFS_PAGE_SIZE,
+    concurrency: int = WFS_PAGE_CONCURRENCY,
+    session: Optional[requests.Session] = None,
+) -> Iterator[List[Dict]]:
+    """Yield GetFeature results page by page (WFS 2.0 STARTINDEX/COUNT), in order
+
+    Pages are sorted on the layer's identifier (SORTBY) so that STARTINDEX is stable.
+    The first page gives the real page length, which the server may cap below
+    ``page_size``. When the server reports numberMatched, the remaining pages are
+    planned with that length and up to ``concurrency`` are fetched in parallel; only
+    those pages are held in memory. Otherwise, or as soon as a page comes back short,
+    pages are fetched one after the other until a short page.
+
+    Args:
+        url: WFS endpoint
+        params: GetFeature parameters (without paging)
+        page_size: Features per page
+        concurrency: Pages in flight at once
+        session: HTTP session (one is created if omitted)
+    """
+    session = session or requests.Session()
+    sort_field = _wfs_sort_field(session, url, params)
+    if sort_field:
+        params = {**params, "SORTBY": f"{sort_field} ASC"}
+    total = _wfs_number_matched(session, url, params) if concurrency > 1 else None
+
+    features = _fetch_wfs_page(session, url, params, 0, page_size)
+    if features:
+        yield features
+    step = len(features)
+    if not step or (total is not None and step >= total):
+        return
+    if total is None:
+        yield from _iter_wfs_sequential(session, url, params, step, step)
+        return
+
+    starts = iter(range(step, total, step))
+    resume = None
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        window = deque(
+            (start, executor.submit(_fetch_wfs_page, session, url, params, start, step))
+            for start in islice(starts, concurrency)
+        )
+        while window:
+            start, future = window.popleft()
+            features = future.result()
+            if features:
+                yield features
+            if len(features) < min(step, total - start):
+                # The layer changed or the server lowered its cap: the planned offsets no longer hold
+                logger.warning(f"Short WFS page at {start}, continuing sequentially")
+                for _, pending in window:
+                    pending.cancel()
+                resume = start + len(features)
+                break
+            # Keep the window full: the next page downloads while this one is written
+            for next_start in islice(starts, 1):
+                window.append((next_start, executor.submit(_fetch_wfs_page, session, url, params, next_start, step)))
+    if resume is not None:
+        yield from _iter_wfs_sequential(session, url, params, resume, step)
 
 
 def download_wfs(
@@ -25,12 +152,22 @@ def download_wfs(
     format: str,
     output_file: Optional[str],
     download_dir: Path,
-    target_epsg: int = 3857
+    target_epsg: int = 3857,
+    page_size: int = WFS_PAGE_SIZE,
+    concurrency: int = WFS_PAGE_CONCURRENCY,
 ) -> Path:
-    """Download data via WFS service"""
-    
+    """Download data via WFS service
+
+    GeoJSON, GeoJSONSeq, GeoPackage and FlatGeobuf outputs are paged (so large layers are
+    not truncated at the server limit), fetched concurrently, reprojected per page and
+    streamed to disk; memory use is bounded by ``concurrency`` pages. Shapefile and GML
+    come from a single request, streamed to disk.
+    """
+
     dataset_info = DATASETS[dataset_id]
     api_key = API_KEYS.get(dataset_info["service"], "essentiels")
+    url = WFS_BASE_URL.format(key=api_key)
+    paged = format in WFS_STREAM_FORMATS
 
     # Build WFS request
     params = {
@@ -38,11 +175,12 @@ def download_wfs(
         "VERSION": "2.0.0",
         "REQUEST": "GetFeature",
         "TYPENAME": dataset_id,
-        "SRSNAME": f"EPSG:{target_epsg}",  # Request data in target projection
+        # Pages are requested in WGS84 and reprojected locally, chunk by chunk
+        "SRSNAME": "EPSG:4326" if paged else f"EPSG:{target_epsg}",
     }
 
     # Add format
-    if format == "geojson":
+    if paged:
         params["OUTPUTFORMAT"] = "application/json"
     elif format == "shp":
         params["OUTPUTFORMAT"] = "SHAPE-ZIP"
@@ -52,28 +190,42 @@ def download_wfs(
     # Add bbox filter if provided
     if bbox:
         # Convert bbox to target projection if needed
-        if target_epsg != 4326:
+        if not paged and target_epsg != 4326:
             bbox_proj = reproject_bbox(bbox, 4326, target_epsg)
             params["BBOX"] = f"{bbox_proj[1]},{bbox_proj[0]},{bbox_proj[3]},{bbox_proj[2]},EPSG:{target_epsg}"
         else:
             params["BBOX"] = f"{bbox[1]},{bbox[0]},{bbox[3]},{bbox[2]},EPSG:4326"
 
-    # Make request
-    url = WFS_BASE_URL.format(key=api_key)
+    # Determine filename
+    if not output_file:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        ext = WRITERS[format].extension if paged else format
+        output_file = f"{dataset_id.replace(':', '_')}_{timestamp}.{ext}"
+
+    output_path = download_dir / output_file
     logger.info(f"Downloading {dataset_id} from WFS...")
 
     try:
+        if paged:
+            # Written to <output>.part and renamed once complete, so a failed download never
+            # leaves a valid-looking partial layer at the final path
+            partial = output_path.with_name(output_path.name + ".part")
+            partial.unlink(missing_ok=True)
+            try:
+                with open_feature_writer(format, partial, target_epsg, dataset_id.split(":")[-1]) as writer:
+                    for features in iter_wfs_pages(url, params, page_size, concurrency):
+                        writer.write(reproject_features(features, 4326, target_epsg))
+                        logger.info(f"{dataset_id}: {writer.count} features written")
+            except BaseException:
+                partial.unlink(missing_ok=True)
+                raise
+            os.replace(partial, output_path)
+            logger.info(f"Downloaded {writer.count} features to {output_path}")
+            return output_path
+
         response = requests.get(url, params=params, stream=True)
         response.raise_for_status()
 
-        # Determine filename
-        if not output_file:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            ext = "json" if format == "geojson" else format
-            output_file = f"{dataset_id.replace(':', '_')}_{timestamp}.{ext}"
-
-        output_path = download_dir / output_file
-
         # Handle zip files (shapefiles)
         if format == "shp" and response.headers.get("content-type") == "application/zip":
             # Save zip temporarily
@@ -99,11 +251,6 @@ def download_wfs(
                     f.write(chunk)
 
             logger.info(f"Downloaded to {output_path}")
-
-            # Reproject if GeoJSON and not already in target projection
-            if format == "geojson" and target_epsg != 4326:
-                output_path = reproject_geojson(output_path, target_epsg)
-
             return output_path
 
     except requests.exceptions.RequestException as e:
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+IGN Feature Writers - Streaming vector outputs for paged WFS downloads
+Each writer receives features chunk by chunk (one WFS page at a time) and appends
+them to disk, so memory stays bounded by the page size whatever the layer size
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.backend.core.logging_config import logger
+
+from ..utils.geopackage import (
+    SHAPELY_AVAILABLE,
+    create_feature_table,
+    encode_geometry,
+    ensure_srs,
+    init_geopackage,
+    table_name_for,
+    update_extent,
+    upsert_rtree,
+)
+
+if SHAPELY_AVAILABLE:
+    from shapely.geometry import shape
+
+try:
+    from osgeo import ogr, osr
+
+    GDAL_AVAILABLE = True
+except ImportError:
+    GDAL_AVAILABLE = False
+
+
+class FeatureWriter:
+    """Base class: write(features) per chunk, close() once (also usable as a context manager)"""
+
+    extension = ""
+
+    def __init__(self, path: Path, epsg: int = 4326, layer_name: str = "features"):
+        self.path = Path(path)
+        self.epsg = epsg
+        self.layer_name = layer_name
+        self.count = 0
+
+    def write(self, features: List[Dict]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GeoJSONWriter(FeatureWriter):
+    """A single FeatureCollection, written incrementally"""
+
+    extension = "json"
+
+    def __init__(self, path: Path, epsg: int = 4326, layer_name: str = "features"):
+        super().__init__(path, epsg, layer_name)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write('{"type":"FeatureCollection","name":' + json.dumps(layer_name))
+        if epsg != 4326:
+            crs = {"type": "name", "properties": {"name": f"urn:ogc:def:crs:EPSG::{epsg}"}}
+            self._file.write(',"crs":' + json.dumps(crs))
+        self._file.write(',"features":[\n')
+
+    def write(self, features: List[Dict]):
+        for feature in features:
+            if self.count:
+                self._file.write(",\n")
+            self._file.write(json.dumps(feature, ensure_ascii=False, separators=(",", ":")))
+            self.count += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.write("\n]}\n")
+            self._file.close()
+
+
+class GeoJSONSeqWriter(FeatureWriter):
+    """Newline-delimited GeoJSON features (GeoJSONSeq), appendable and streamable"""
+
+    extension = "geojsonl"
+
+    def __init__(self, path: Path, epsg: int = 4326, layer_name: str = "features"):
+        super().__init__(path, epsg, layer_name)
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def write(self, features: List[Dict]):
+        self._file.writelines(
+            json.dumps(feature, ensure_ascii=False, separators=(",", ":")) + "\n" for feature in features
+        )
+        self.count += len(features)
+
+    def close(self):
+        self._file.close()
+
+
+def _sql_type(value) -> str:
+    if isinstance(value, bool) or isinstance(value, int):
+        return "INTEGER"
+    if isinstance(value, float):
+        return "REAL"
+    return "TEXT"
+
+
+class GeoPackageWriter(FeatureWriter):
+    """GeoPackage feature table with an R-tree index; columns are added as properties appear"""
+
+    extension = "gpkg"
+    RESERVED = {"fid", "geom", "feature_id"}
+
+    def __init__(self, path: Path, epsg: int = 4326, layer_name: str = "features"):
+        if not SHAPELY_AVAILABLE:
+            raise ImportError("GeoPackage output requires shapely")
+        super().__init__(path, epsg, layer_name)
+        if self.path.exists():
+            self.path.unlink()
+        self.table = table_name_for(layer_name)
+        self._conn = init_geopackage(self.path)
+        self._conn.execute("PRAGMA synchronous=OFF")
+        ensure_srs(self._conn, epsg)
+        create_feature_table(self._conn, self.table, [("feature_id", "TEXT")], srs_id=epsg, identifier=layer_name)
+        self._columns: Dict[str, str] = {}
+
+    def _column(self, name: str) -> str:
+        return f"wfs_{name}" if name.lower() in self.RESERVED else name
+
+    def _add_columns(self, features: List[Dict]):
+        for feature in features:
+            for key, value in (feature.get("properties") or {}).items():
+                if key not in self._columns and value is not None:
+                    column = self._column(key)
+                    self._conn.execute(f'ALTER TABLE {self.table} ADD COLUMN "{column}" {_sql_type(value)}')
+                    self._columns[key] = column
+
+    def write(self, features: List[Dict]):
+        with self._conn:
+            self._add_columns(features)
+            entries = []
+            for feature in features:
+                properties = {k: v for k, v in (feature.get("properties") or {}).items() if k in self._columns}
+                blob, bounds = None, None
+                if feature.get("geometry"):
+                    blob, bounds = encode_geometry(shape(feature["geometry"]), self.epsg)
+                names = ["geom", "feature_id"] + [f'"{self._columns[k]}"' for k in properties]
+                values = [blob, None if feature.get("id") is None else str(feature["id"])]
+                values += [json.dumps(v) if isinstance(v, (dict, list)) else v for v in properties.values()]
+                cursor = self._conn.execute(
+                    f"INSERT INTO {self.table} ({', '.join(names)}) VALUES ({', '.join('?' for _ in values)})", values
+                )
+                if bounds:
+                    entries.append((cursor.lastrowid, bounds))
+            upsert_rtree(self._conn, self.table, entries)
+        self.count += len(features)
+
+    def close(self):
+        with self._conn:
+            update_extent(self._conn, self.table)
+        self._conn.close()
+
+
+class FlatGeobufWriter(FeatureWriter):
+    """FlatGeobuf through GDAL/OGR (features are appended; the spatial index is built on close)"""
+
+    extension = "fgb"
+
+    def __init__(self, path: Path, epsg: int = 4326, layer_name: str = "features"):
+        if not GDAL_AVAILABLE:
+            raise ImportError("FlatGeobuf output requires GDAL. Install with: pip install GDAL")
+        super().__init__(path, epsg, layer_name)
+        driver = ogr.GetDriverByName("FlatGeobuf")
+        if self.path.exists():
+            driver.DeleteDataSource(str(self.path))
+        self._ds = driver.CreateDataSource(str(self.path))
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(epsg)
+        srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        self._layer = self._ds.CreateLayer(layer_name, srs, ogr.wkbUnknown, ["SPATIAL_INDEX=YES"])
+        self._fields: Optional[List[str]] = None
+
+    def _create_fields(self, features: List[Dict]):
+        # FlatGeobuf fixes the schema with the first feature; later properties are dropped
+        types = {}
+        for feature in features:
+            for key, value in (feature.get("properties") or {}).items():
+                if key not in types and value is not None:
+                    types[key] = value
+        ogr_types = {"INTEGER": ogr.OFTInteger64, "REAL": ogr.OFTReal, "TEXT": ogr.OFTString}
+        for key, value in types.items():
+            self._layer.CreateField(ogr.FieldDefn(key, ogr_types[_sql_type(value)]))
+        self._fields = list(types)
+
+    def write(self, features: List[Dict]):
+        if self._fields is None:
+            self._create_fields(features)
+        defn = self._layer.GetLayerDefn()
+        for feature in features:
+            out = ogr.Feature(defn)
+            for key in self._fields:
+                value = (feature.get("properties") or {}).get(key)
+                if value is not None:
+                    out.SetField(key, json.dumps(value) if isinstance(value, (dict, list)) else value)
+            if feature.get("geometry"):
+                out.SetGeometry(ogr.CreateGeometryFromJson(json.dumps(feature["geometry"])))
+            self._layer.CreateFeature(out)
+        self.count += len(features)
+
+    def close(self):
+        self._layer = None
+        self._ds = None
+
+
+WRITERS = {
+    "geojson": GeoJSONWriter,
+    "geojsonseq": GeoJSONSeqWriter,
+    "gpkg": GeoPackageWriter,
+    "fgb": FlatGeobufWriter,
+}
+
+
+def open_feature_writer(format: str, path: Path, epsg: int = 4326, layer_name: str = "features") -> FeatureWriter:
+    """Streaming writer for an output format (see WRITERS)"""
+    if format not in WRITERS:
+        raise ValueError(f"No streaming writer for format {format}")
+    logger.debug(f"Writing {format} to {path}")
+    return WRITERS[format](path, epsg, layer_name)
@@ -4,9 +4,10 @@ IGN Geographic Utilities - Coordinate transformations and spatial calculations
 """
 
 import math
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from pathlib import Path
 from src.backend.core.logging_config import logger
+from .ign_projection import transform, transform_bbox
 
 try:
     from osgeo import gdal, ogr, osr
@@ -31,24 +32,8 @@ def reproject_bbox(
     Returns:
         Reprojected bbox
     """
-    if not GDAL_AVAILABLE:
-        logger.warning("GDAL not available, returning original bbox")
-        return bbox
-
-    # Create coordinate transformation
-    source = osr.SpatialReference()
-    source.ImportFromEPSG(source_epsg)
-
-    target = osr.SpatialReference()
-    target.ImportFromEPSG(target_epsg)
-
-    transform = osr.CoordinateTransformation(source, target)
-
-    # Transform corners
-    min_x, min_y, _ = transform.TransformPoint(bbox[0], bbox[1])
-    max_x, max_y, _ = transform.TransformPoint(bbox[2], bbox[3])
-
-    return (min_x, min_y, max_x, max_y)
+    # Cached, vectorized transformer (works without GDAL through pyproj or NumPy)
+    return transform_bbox(bbox, source_epsg, target_epsg)
 
 
 def get_bbox_in_meters(bbox: Tuple[float, float, float, float]) -> Tuple[float, float, float, float]:
@@ -145,6 +130,46 @@ def reproject_geojson(geojson_path: Path, target_epsg: int = 3857) -> Path:
     return output_path
 
 
+def _positions(coordinates, out: List[list]):
+    """Collect the [x, y, ...] position lists of a GeoJSON coordinates array"""
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        out.append(coordinates)
+        return
+    for part in coordinates or []:
+        _positions(part, out)
+
+
+def reproject_features(features: List[Dict], source_epsg: int = 4326, target_epsg: int = 3857) -> List[Dict]:
+    """Reproject a chunk of GeoJSON features in place (one vectorized transform per chunk)
+
+    Args:
+        features: GeoJSON features, e.g. one WFS page
+        source_epsg: EPSG of the coordinates
+        target_epsg: Target EPSG
+
+    Returns:
+        The same features, with transformed coordinates
+    """
+    if source_epsg == target_epsg or not features:
+        return features
+
+    positions: List[list] = []
+    for feature in features:
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") == "GeometryCollection":
+            for part in geometry.get("geometries", []):
+                _positions(part.get("coordinates"), positions)
+        else:
+            _positions(geometry.get("coordinates"), positions)
+    if not positions:
+        return features
+
+    xs, ys = transform([p[0] for p in positions], [p[1] for p in positions], source_epsg, target_epsg)
+    for position, x, y in zip(positions, xs.tolist(), ys.tolist()):
+        position[0], position[1] = x, y
+    return features
+
+
 def get_departments_in_bbox(bbox: Tuple[float, float, float, float]) -> list[str]:
     """Get department codes that intersect with bbox
     
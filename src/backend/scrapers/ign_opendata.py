@@ -7,6 +7,7 @@ Fetches and processes French geographic datasets to enrich spot information
 import requests
 import json
 import logging
+import shutil
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import geopandas as gpd
@@ -16,6 +17,9 @@ from rasterio.mask import mask
 import numpy as np
 from src.backend.core.logging_config import logger
 from src.backend.validators.real_data_validator import enforce_real_data
+from .ign_pretiled import RPG_CLASS_FIELDS, PretiledStore, build_dem_cog, build_vector_gpkg, extract_archive
+from .ign_projection import wgs84_to_lambert93
+from ..raster.terrain import get_terrain_store
 
 logger = logging.getLogger(__name__)
 
@@ -77,8 +81,12 @@ class IGNOpenDataService:
         """Initialize IGN OpenData service"""
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Department packs converted to COG / GeoPackage by preprocess_department()
+        self.pretiled = PretiledStore(self.cache_dir / "processed")
 
-    def analyze_spot_environment(self, lat: float, lon: float, radius: int = 1000) -> Dict:
+    def analyze_spot_environment(
+        self, lat: float, lon: float, radius: int = 1000, landcover: Optional[Dict] = None
+    ) -> Dict:
         """
         Analyze the environment around a spot using IGN data
 
@@ -86,6 +94,7 @@ class IGNOpenDataService:
             lat: Latitude of the spot
             lon: Longitude of the spot
             radius: Analysis radius in meters
+            landcover: Precomputed {"forest", "land_use"} (batch overlay); skips those analyses
 
         Returns:
             Environmental analysis including forest, elevation, land use
@@ -104,19 +113,25 @@ class IGNOpenDataService:
             # Convert WGS84 to Lambert 93
             point_lambert = self._transform_coordinates(lat, lon)
 
+            if landcover is not None:
+                analysis["forest"] = landcover.get("forest")
+                analysis["land_use"] = landcover.get("land_use")
+
             # Analyze forest coverage
-            forest_data = self._analyze_forest_coverage(point_lambert, radius)
+            forest_data = None if landcover else self._analyze_forest_coverage(point_lambert, radius)
             if forest_data:
                 analysis["forest"] = forest_data
 
-            # Analyze elevation and terrain
+            # Analyze elevation and terrain (precomputed terrain grids when they cover the spot)
             elevation_data = self._analyze_elevation(point_lambert, radius)
+            terrain = get_terrain_store().lookup(lat, lon)
             if elevation_data:
                 analysis["elevation"] = elevation_data
-                analysis["terrain"] = self._calculate_terrain_difficulty(elevation_data)
+            if elevation_data or terrain:
+                analysis["terrain"] = self._calculate_terrain_difficulty(elevation_data or {}, terrain)
 
             # Analyze land use from RPG
-            land_use = self._analyze_land_use(point_lambert, radius)
+            land_use = None if landcover else self._analyze_land_use(point_lambert, radius)
             if land_use:
                 analysis["land_use"] = land_use
 
@@ -132,29 +147,44 @@ class IGNOpenDataService:
 
     def _transform_coordinates(self, lat: float, lon: float) -> Point:
         """Transform WGS84 coordinates to Lambert 93"""
-        import pyproj
-
-        transformer = pyproj.Transformer.from_crs("EPSG:4326", "EPSG:2154", always_xy=True)
-        x, y = transformer.transform(lon, lat)
-        return Point(x, y)
+        xs, ys = wgs84_to_lambert93([lon], [lat])
+        return Point(xs[0], ys[0])
 
     def _analyze_forest_coverage(self, point: Point, radius: int) -> Optional[Dict]:
-        """Analyze forest coverage around a point"""
-        # TODO: Implement actual BD Forêt data loading
-        logger.warning("Forest coverage analysis not yet implemented with real data")
-        return None  # Return None instead of mock data
+        """Analyze forest coverage around a point (BD Forêt polygons intersecting the radius)"""
+        coverage = self.pretiled.coverage("bd_foret", point.x, point.y, radius)
+        if coverage is None:
+            logger.debug("No preprocessed BD Forêt data for this location")
+            return None
+        return {
+            "coverage_percent": coverage["coverage_percent"],
+            "forest_types": coverage["classes"],
+            "dominant_type": coverage["dominant_type"],
+            "source": "IGN BD Forêt",
+        }
 
     def _analyze_elevation(self, point: Point, radius: int) -> Optional[Dict]:
-        """Analyze elevation profile around a point"""
-        # TODO: Implement actual RGE ALTI data loading
-        logger.warning("Elevation analysis not yet implemented with real data")
-        return None  # Return None instead of mock data
+        """Analyze elevation profile around a point (RGE ALTI window covering the radius)"""
+        elevation = self.pretiled.elevation_stats(point.x, point.y, radius)
+        if elevation is None:
+            logger.debug("No preprocessed RGE ALTI data for this location")
+            return None
+        elevation["source"] = "IGN RGE ALTI"
+        return elevation
 
-    def _calculate_terrain_difficulty(self, elevation_data: Dict) -> Dict:
-        """Calculate terrain difficulty based on elevation data"""
-        slope = elevation_data.get("slope_average", 0)
-        elevation_range = elevation_data.get("elevation_range", 0)
-        ruggedness = elevation_data.get("ruggedness_index", 0)
+    def _calculate_terrain_difficulty(self, elevation_data: Dict, terrain: Optional[Dict] = None) -> Dict:
+        """
+        Calculate terrain difficulty from a terrain grid record (steepest slope and relief within
+        200 m, 0-1 ruggedness index), or from the RGE ALTI window statistics without one
+        """
+        if terrain and terrain.get("max_slope_degrees") is not None:
+            slope = terrain["max_slope_degrees"]
+            elevation_range = terrain.get("relief_m") or 0
+            ruggedness = terrain.get("ruggedness_index") or 0
+        else:
+            slope = elevation_data.get("slope_average", 0)
+            elevation_range = elevation_data.get("elevation_range", 0)
+            ruggedness = elevation_data.get("ruggedness_index", 0)
 
         # Simple difficulty calculation
         difficulty_score = (slope / 45) * 0.4 + (elevation_range / 500) * 0.3 + ruggedness * 0.3
@@ -177,17 +207,24 @@ class IGNOpenDataService:
             "score": round(difficulty_score, 2),
             "description": description,
             "factors": {
-                "slope": f"{elevation_data.get('slope_average', 0):.1f}°",
-                "elevation_gain": f"{elevation_data.get('elevation_range', 0)}m",
+                "slope": f"{slope:.1f}°",
+                "elevation_gain": f"{elevation_range}m",
                 "ruggedness": f"{ruggedness:.2f}",
             },
         }
 
     def _analyze_land_use(self, point: Point, radius: int) -> Optional[Dict]:
-        """Analyze land use from RPG data"""
-        # TODO: Implement actual RPG data loading
-        logger.warning("Land use analysis not yet implemented with real data")
-        return None  # Return None instead of mock data
+        """Analyze land use from RPG parcels intersecting the radius"""
+        coverage = self.pretiled.coverage("rpg", point.x, point.y, radius, RPG_CLASS_FIELDS)
+        if coverage is None:
+            logger.debug("No preprocessed RPG data for this location")
+            return None
+        return {
+            "agricultural_percent": coverage["coverage_percent"],
+            "land_use_mix": coverage["classes"],
+            "dominant_use": coverage["dominant_type"],
+            "source": "IGN RPG",
+        }
 
     def _analyze_accessibility(self, point: Point, radius: int) -> Optional[Dict]:
         """Analyze accessibility using DNSB and other data"""
@@ -195,13 +232,15 @@ class IGNOpenDataService:
         logger.warning("Accessibility analysis not yet implemented with real data")
         return None  # Return None instead of mock data
 
-    def enrich_spot_data(self, spot: Dict) -> Dict:
-        """Enrich a spot with IGN OpenData information"""
+    def enrich_spot_data(self, spot: Dict, landcover: Optional[Dict] = None) -> Dict:
+        """Enrich a spot with IGN OpenData information (landcover: stored batch overlay results)"""
         if "latitude" not in spot or "longitude" not in spot:
             return spot
 
         # Get environmental analysis
-        env_analysis = self.analyze_spot_environment(spot["latitude"], spot["longitude"], radius=1000)
+        env_analysis = self.analyze_spot_environment(
+            spot["latitude"], spot["longitude"], radius=1000, landcover=landcover
+        )
 
         # Add enriched data to spot
         spot["environment"] = env_analysis
@@ -305,6 +344,50 @@ class IGNOpenDataService:
             logger.error(f"Error downloading {dataset}: {str(e)}")
             return None
 
+    def preprocess_department(self, dept_code: str, datasets: Tuple[str, ...] = ("rgealti", "bd_foret", "rpg")) -> Dict:
+        """
+        Convert a department's packs once for windowed analysis
+
+        RGE ALTI ASC grids become a cloud-optimized GeoTIFF, BD Forêt and RPG shapefiles
+        R-tree indexed GeoPackages (under cache_dir/processed/<dataset>/<dept>).
+
+        Args:
+            dept_code: Department code (e.g., '31')
+            datasets: Datasets to convert
+
+        Returns:
+            Dataset -> processed file path (None when download or conversion failed)
+        """
+        results = {}
+        for dataset in datasets:
+            output = self.pretiled.path_for(dataset, dept_code)
+            if output.exists():
+                results[dataset] = output
+                continue
+
+            archive = self.download_department_data(dept_code, dataset)
+            if archive is None:
+                results[dataset] = None
+                continue
+
+            extracted = self.cache_dir / dataset / dept_code / "extracted"
+            try:
+                extract_archive(archive, extracted)
+                if dataset == "rgealti":
+                    build_dem_cog(sorted(extracted.rglob("*.asc")), output)
+                else:
+                    build_vector_gpkg(sorted(extracted.rglob("*.shp")), output, dataset)
+                results[dataset] = output
+            except Exception as e:
+                logger.error(f"Preprocessing {dataset} for {dept_code} failed: {e}")
+                output.unlink(missing_ok=True)
+                results[dataset] = None
+            finally:
+                shutil.rmtree(extracted, ignore_errors=True)
+
+        self.pretiled.refresh()
+        return results
+
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Pre-tiled per-department IGN data for windowed spot analysis
+Department packs (7z archives of RGE ALTI ASC grids and BD Forêt shapefiles) are converted
+once into a cloud-optimized GeoTIFF and an R-tree indexed GeoPackage per department.
+Spot analysis then reads only the raster blocks or features intersecting the spot radius
+"""
+
+import logging
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..utils.geopackage import SHAPELY_AVAILABLE, decode_geometries, rtree_candidates
+from .ign_feature_writers import GeoPackageWriter
+
+logger = logging.getLogger(__name__)
+
+try:
+    import rasterio
+    import rasterio.shutil
+    from rasterio.windows import Window, from_bounds
+
+    RASTERIO_AVAILABLE = True
+except ImportError:
+    RASTERIO_AVAILABLE = False
+
+try:
+    import py7zr
+
+    PY7ZR_AVAILABLE = True
+except ImportError:
+    PY7ZR_AVAILABLE = False
+
+if SHAPELY_AVAILABLE:
+    import shapely
+    from shapely.geometry import Point
+
+LAMBERT93 = "EPSG:2154"
+RGEALTI_NODATA = -99999.0
+
+# Properties holding the vegetation class in BD Forêt, by preference
+FOREST_CLASS_FIELDS = ("TFV", "tfv", "LIBELLE", "libelle", "ESSENCE", "essence")
+# Properties holding the crop group of RPG parcels, by preference
+RPG_CLASS_FIELDS = ("CODE_GROUP", "code_group", "CODE_CULTU", "code_cultu")
+
+# ----------------------------------------------------------------------
+# Preprocessing
+# ----------------------------------------------------------------------
+
+
+def extract_archive(archive: Path, dest: Path) -> Path:
+    """
+    Extract an IGN 7z pack (py7zr when installed, else the 7z command)
+
+    Returns:
+        Destination folder
+    """
+    dest.mkdir(parents=True, exist_ok=True)
+    if PY7ZR_AVAILABLE:
+        with py7zr.SevenZipFile(archive, "r") as pack:
+            pack.extractall(dest)
+        return dest
+    command = shutil.which("7z") or shutil.which("7za")
+    if command is None:
+        raise RuntimeError("Extracting IGN packs needs py7zr (pip install py7zr) or the 7z command")
+    subprocess.run([command, "x", "-y", f"-o{dest}", str(archive)], check=True, capture_output=True)
+    return dest
+
+
+def build_dem_cog(asc_paths: Sequence[Path], output: Path, crs: str = LAMBERT93, blocksize: int = 512) -> Path:
+    """
+    Mosaic ASC grid tiles into one cloud-optimized GeoTIFF (tiled, DEFLATE, overviews)
+
+    Tiles are copied one at a time into their window of a tiled intermediate, so memory
+    stays at one ASC tile whatever the department size.
+
+    Args:
+        asc_paths: RGE ALTI tiles of a department (same resolution)
+        output: Destination .tif
+        crs: CRS of the tiles (ASC grids carry none; RGE ALTI is Lambert-93)
+        blocksize: Internal tile size in pixels
+    """
+    if not RASTERIO_AVAILABLE:
+        raise ImportError("Building GeoTIFFs requires rasterio")
+    if not asc_paths:
+        raise ValueError("No ASC tiles to convert")
+
+    bounds = []
+    for path in asc_paths:
+        with rasterio.open(path) as src:
+            bounds.append(src.bounds)
+            res = src.res[0]
+            nodata = src.nodata if src.nodata is not None else RGEALTI_NODATA
+    left, bottom = min(b.left for b in bounds), min(b.bottom for b in bounds)
+    right, top = max(b.right for b in bounds), max(b.top for b in bounds)
+    width, height = round((right - left) / res), round((top - bottom) / res)
+    profile = {
+        "driver": "GTiff",
+        "width": width,
+        "height": height,
+        "count": 1,
+        "dtype": "float32",
+        "crs": crs,
+        "transform": rasterio.transform.from_origin(left, top, res, res),
+        "nodata": nodata,
+        "tiled": True,
+        "blockxsize": blocksize,
+        "blockysize": blocksize,
+        "BIGTIFF": "IF_SAFER",
+    }
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=output.parent) as tmp:
+        mosaic = Path(tmp) / "mosaic.tif"
+        with rasterio.open(mosaic, "w", **profile) as dst:
+            for path, tile_bounds in zip(asc_paths, bounds):
+                with rasterio.open(path) as src:
+                    data = src.read(1).astype(np.float32)
+                    if src.nodata is not None and src.nodata != nodata:
+                        data[data == src.nodata] = nodata
+                col = round((tile_bounds.left - left) / res)
+                row = round((top - tile_bounds.top) / res)
+                dst.write(data, 1, window=Window(col, row, data.shape[1], data.shape[0]))
+        rasterio.shutil.copy(
+            mosaic,
+            output,
+            driver="COG",
+            COMPRESS="DEFLATE",
+            PREDICTOR="3",
+            BLOCKSIZE=str(blocksize),
+            BIGTIFF="IF_SAFER",
+        )
+    logger.info(f"Built {output.name}: {width}x{height} px at {res} m from {len(asc_paths)} tiles")
+    return output
+
+
+def build_vector_gpkg(shp_paths: Sequence[Path], output: Path, layer: str, chunk_size: int = 5000) -> Path:
+    """
+    Convert shapefiles into one R-tree indexed GeoPackage layer (Lambert-93)
+
+    Shapefiles are read ``chunk_size`` rows at a time and streamed to the GeoPackage.
+
+    Args:
+        shp_paths: Shapefiles of a department (e.g. BD Forêt formations)
+        output: Destination .gpkg
+        layer: Table name
+        chunk_size: Rows read per chunk
+    """
+    import geopandas as gpd
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with GeoPackageWriter(output, epsg=2154, layer_name=layer) as writer:
+        for path in shp_paths:
+            start = 0
+            while True:
+                chunk = gpd.read_file(path, rows=slice(start, start + chunk_size))
+                if chunk.empty:
+                    break
+                if chunk.crs is not None and chunk.crs.to_epsg() != 2154:
+                    chunk = chunk.to_crs(2154)
+                writer.write(list(chunk.iterfeatures(na="drop")))
+                start += chunk_size
+    logger.info(f"Built {output.name}: {writer.count} features")
+    return output
+
+
+# ----------------------------------------------------------------------
+# Windowed reads
+# ----------------------------------------------------------------------
+
+
+class PretiledStore:
+    """
+    Per-department COG/GeoPackage files under ``root/<dataset>/<dept>.(tif|gpkg)``
+
+    Files are located by their extent (read once from the headers); datasets are
+    kept open per thread.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._extents: Dict[str, List[Tuple[Path, Tuple[float, float, float, float]]]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def path_for(self, dataset: str, dept_code: str) -> Path:
+        suffix = ".tif" if dataset == "rgealti" else ".gpkg"
+        return self.root / dataset / f"{dept_code}{suffix}"
+
+    def _extent(self, path: Path) -> Optional[Tuple[float, float, float, float]]:
+        if path.suffix == ".tif":
+            if not RASTERIO_AVAILABLE:
+                return None
+            with rasterio.open(path) as src:
+                return tuple(src.bounds)
+        conn = sqlite3.connect(str(path))
+        try:
+            row = conn.execute(
+                "SELECT min_x, min_y, max_x, max_y FROM gpkg_contents WHERE data_type = 'features'"
+            ).fetchone()
+        finally:
+            conn.close()
+        return tuple(row) if row and row[0] is not None else None
+
+    def files(self, dataset: str) -> List[Tuple[Path, Tuple[float, float, float, float]]]:
+        """(path, extent) of the processed files of a dataset"""
+        with self._lock:
+            if dataset not in self._extents:
+                entries = []
+                for path in sorted((self.root / dataset).glob("*.*")) if (self.root / dataset).exists() else []:
+                    if path.suffix not in (".tif", ".gpkg"):
+                        continue
+                    extent = self._extent(path)
+                    if extent:
+                        entries.append((path, extent))
+                self._extents[dataset] = entries
+            return self._extents[dataset]
+
+    def refresh(self):
+        """Forget known files (after preprocessing new departments)"""
+        with self._lock:
+            self._extents.clear()
+        self._local = threading.local()
+
+    def find(self, dataset: str, x: float, y: float, radius: float = 0.0) -> List[Path]:
+        """Every file whose extent meets the square of ``radius`` around a point (department extents overlap)"""
+        return [
+            path
+            for path, (min_x, min_y, max_x, max_y) in self.files(dataset)
+            if x + radius >= min_x and x - radius <= max_x and y + radius >= min_y and y - radius <= max_y
+        ]
+
+    def _handle(self, path: Path):
+        """Open dataset (rasterio) or connection (sqlite) for this thread"""
+        handles = getattr(self._local, "handles", None)
+        if handles is None:
+            handles = self._local.handles = {}
+        handle = handles.get(path)
+        if handle is None:
+            if path.suffix == ".tif":
+                handle = rasterio.open(path)
+            else:
+                handle = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            handles[path] = handle
+        return handle
+
+    def _elevation_window(self, path: Path, x: float, y: float, radius: float):
+        """Elevations (NaN for nodata) of the window around a point, with the window transform"""
+        src = self._handle(path)
+        window = from_bounds(x - radius, y - radius, x + radius, y + radius, src.transform)
+        window = window.round_offsets().round_lengths()
+        grid = src.read(1, window=window, boundless=True, fill_value=src.nodata, masked=True).astype(np.float64)
+        return grid.filled(np.nan), src.window_transform(window), src.res[0]
+
+    def elevation_stats(self, x: float, y: float, radius: float) -> Optional[Dict]:
+        """
+        Elevation and slope statistics within ``radius`` metres of a Lambert-93 point
+
+        Only the COG blocks covering the circle are read. Department COGs overlap at
+        their borders: every one containing the point is read, the one with most data
+        in the circle is kept and its nodata cells are filled from the others.
+
+        Returns:
+            Dict with spot_elevation, min/max/mean, elevation_range, slope_average, slope_max
+            and ruggedness_index (0-1), or None without coverage
+        """
+        if not RASTERIO_AVAILABLE:
+            return None
+        windows = []
+        for path in self.find("rgealti", x, y):
+            grid, win_transform, res = self._elevation_window(path, x, y, radius)
+            rows, cols = grid.shape
+            xs = win_transform.c + (np.arange(cols) + 0.5) * res
+            ys = win_transform.f - (np.arange(rows) + 0.5) * res
+            inside = np.hypot(xs[None, :] - x, ys[:, None] - y) <= radius
+            row, col = int((win_transform.f - y) // res), int((x - win_transform.c) // res)
+            if 0 <= row < rows and 0 <= col < cols and np.isfinite(grid[row, col]):
+                valid = int(np.count_nonzero(inside & np.isfinite(grid)))
+                windows.append((valid, path, grid, win_transform, res, inside, row, col))
+        if not windows:
+            return None
+        windows.sort(key=lambda w: -w[0])
+        _, path, grid, win_transform, res, inside, row, col = windows[0]
+        for _, _, other, other_transform, *_ in windows[1:]:
+            # Same grid (RGE ALTI departments share it): fill the gaps across the border
+            if other.shape == grid.shape and other_transform.almost_equals(win_transform):
+                grid = np.where(np.isnan(grid), other, grid)
+
+        gy, gx = np.gradient(grid, res)
+        slopes = np.degrees(np.arctan(np.hypot(gx, gy)))
+        values = grid[inside & np.isfinite(grid)]
+        slope_values = slopes[inside & np.isfinite(slopes)]
+        return {
+            "spot_elevation": round(float(grid[row, col]), 1),
+            "min_elevation": round(float(values.min()), 1),
+            "max_elevation": round(float(values.max()), 1),
+            "mean_elevation": round(float(values.mean()), 1),
+            "elevation_range": round(float(values.max() - values.min()), 1),
+            "slope_average": round(float(slope_values.mean()), 1) if slope_values.size else 0.0,
+            "slope_max": round(float(slope_values.max()), 1) if slope_values.size else 0.0,
+            # Spread of slopes, scaled so a 45° standard deviation is 1
+            "ruggedness_index": round(min(float(slope_values.std()) / 45.0, 1.0), 3) if slope_values.size else 0.0,
+            "resolution_m": res,
+            "source": path.name,
+        }
+
+    def coverage(
+        self, dataset: str, x: float, y: float, radius: float, class_fields: Iterable[str] = FOREST_CLASS_FIELDS
+    ) -> Optional[Dict]:
+        """
+        Share of the circle around a Lambert-93 point covered by a polygon layer, per class
+
+        Candidates come from the GeoPackage R-tree; only they are decoded and clipped.
+
+        Returns:
+            Dict with coverage_percent and classes [{type, percent}], or None without coverage
+        """
+        if not SHAPELY_AVAILABLE:
+            return None
+        paths = self.find(dataset, x, y, radius)
+        if not paths:
+            return None
+        circle = Point(x, y).buffer(radius, quad_segs=32)
+        by_class: Dict[str, float] = {}
+        sources = []
+        # Department extents overlap: every file meeting the circle contributes, as in LandcoverOverlay
+        for path in paths:
+            conn = self._handle(path)
+            table = conn.execute("SELECT table_name FROM gpkg_contents WHERE data_type = 'features'").fetchone()[0]
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            class_field = next((field for field in class_fields if field in columns), None)
+            selected = f'f.geom, f."{class_field}"' if class_field else "f.geom, NULL"
+
+            rows = rtree_candidates(conn, table, (x - radius, y - radius, x + radius, y + radius), selected)
+            if not rows:
+                continue
+            geometries = decode_geometries([row[0] for row in rows])
+            areas = shapely.area(shapely.intersection(geometries, circle))
+            for row, area in zip(rows, areas):
+                if area > 0:
+                    by_class[row[1] or "unknown"] = by_class.get(row[1] or "unknown", 0.0) + float(area)
+            if (areas > 0).any():
+                sources.append(path.name)
+
+        total = sum(by_class.values())
+        classes = sorted(by_class.items(), key=lambda item: -item[1])
+        return {
+            "coverage_percent": round(min(100.0, 100.0 * total / circle.area), 1),
+            "classes": [{"type": name, "percent": round(100.0 * area / circle.area, 1)} for name, area in classes],
+            "dominant_type": classes[0][0] if classes else None,
+            "source": ", ".join(sources) if sources else paths[0].name,
+        }
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Vectorized coordinate transformations between WGS84, Lambert-93 and Web Mercator
+Transformers are built once per CRS pair and reused; whole NumPy arrays are converted
+in one call. Backends, in order: pyproj, GDAL/OSR, then a pure-NumPy implementation of
+Lambert-93 (EPSG:2154) and Web Mercator (EPSG:3857)
+"""
+
+import logging
+import math
+import threading
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pyproj import Transformer
+
+    PYPROJ_AVAILABLE = True
+except ImportError:
+    PYPROJ_AVAILABLE = False
+
+try:
+    from osgeo import osr
+
+    GDAL_AVAILABLE = True
+except ImportError:
+    GDAL_AVAILABLE = False
+
+CRS = Union[int, str]
+
+WGS84 = 4326
+LAMBERT93 = 2154
+WEB_MERCATOR = 3857
+
+# Lambert-93 (IGN): conic conformal on GRS80, RGF93 is WGS84 to well under a metre
+GRS80_A = 6378137.0
+GRS80_E = math.sqrt(2 / 298.257222101 - (1 / 298.257222101) ** 2)
+L93_LON0 = math.radians(3.0)
+L93_LAT0 = math.radians(46.5)
+L93_LAT1 = math.radians(44.0)
+L93_LAT2 = math.radians(49.0)
+L93_X0 = 700000.0
+L93_Y0 = 6600000.0
+MERCATOR_R = 6378137.0
+
+_transformers: Dict[Tuple[int, int, str], object] = {}
+_lock = threading.Lock()
+
+
+def epsg_code(crs: CRS) -> int:
+    """EPSG code from 2154, "2154" or "EPSG:2154"
+
+    Args:
+        crs: EPSG code or authority string
+    """
+    if isinstance(crs, int):
+        return crs
+    text = str(crs).strip().upper()
+    if text.startswith("EPSG:"):
+        text = text[5:]
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError(f"Unsupported CRS {crs!r} (expected an EPSG code)")
+
+
+# ------------------------------------------------------------------
+# Pure-NumPy projections
+# ------------------------------------------------------------------
+
+
+def _iso_t(lat: np.ndarray) -> np.ndarray:
+    """Isometric latitude term t(phi) of the conformal conic"""
+    esin = GRS80_E * np.sin(lat)
+    return np.tan(np.pi / 4 - lat / 2) / ((1 - esin) / (1 + esin)) ** (GRS80_E / 2)
+
+
+def _lcc_constants() -> Tuple[float, float, float]:
+    def m(lat):
+        return math.cos(lat) / math.sqrt(1 - (GRS80_E * math.sin(lat)) ** 2)
+
+    t0, t1, t2 = (float(_iso_t(np.float64(lat))) for lat in (L93_LAT0, L93_LAT1, L93_LAT2))
+    n = (math.log(m(L93_LAT1)) - math.log(m(L93_LAT2))) / (math.log(t1) - math.log(t2))
+    af = GRS80_A * m(L93_LAT1) / (n * t1**n)
+    return n, af, af * t0**n
+
+
+L93_N, L93_AF, L93_RHO0 = _lcc_constants()
+
+
+def _lambert93_forward(lons: np.ndarray, lats: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    lat = np.radians(lats)
+    rho = L93_AF * _iso_t(lat) ** L93_N
+    theta = L93_N * (np.radians(lons) - L93_LON0)
+    return L93_X0 + rho * np.sin(theta), L93_Y0 + L93_RHO0 - rho * np.cos(theta)
+
+
+def _lambert93_inverse(xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    dx = xs - L93_X0
+    dy = L93_RHO0 - (ys - L93_Y0)
+    rho = np.hypot(dx, dy)
+    t = (rho / L93_AF) ** (1 / L93_N)
+    lon = np.arctan2(dx, dy) / L93_N + L93_LON0
+
+    # Latitude from t by fixed-point iteration (converges to 1e-12 rad in ~6 steps)
+    lat = np.pi / 2 - 2 * np.arctan(t)
+    for _ in range(15):
+        esin = GRS80_E * np.sin(lat)
+        updated = np.pi / 2 - 2 * np.arctan(t * ((1 - esin) / (1 + esin)) ** (GRS80_E / 2))
+        converged = np.nanmax(np.abs(updated - lat), initial=0.0) < 1e-12
+        lat = updated
+        if converged:
+            break
+    return np.degrees(lon), np.degrees(lat)
+
+
+def _mercator_forward(lons: np.ndarray, lats: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    lat = np.radians(np.clip(lats, -85.06, 85.06))
+    return MERCATOR_R * np.radians(lons), MERCATOR_R * np.log(np.tan(np.pi / 4 + lat / 2))
+
+
+def _mercator_inverse(xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    return np.degrees(xs / MERCATOR_R), np.degrees(2 * np.arctan(np.exp(ys / MERCATOR_R)) - np.pi / 2)
+
+
+_TO_WGS84 = {LAMBERT93: _lambert93_inverse, WEB_MERCATOR: _mercator_inverse}
+_FROM_WGS84 = {LAMBERT93: _lambert93_forward, WEB_MERCATOR: _mercator_forward}
+
+
+class _NumpyTransformer:
+    """Fallback transformer through WGS84 for the CRSs above"""
+
+    def __init__(self, source: int, target: int):
+        for code in (source, target):
+            if code != WGS84 and code not in _FROM_WGS84:
+                raise ValueError(f"EPSG:{code} needs pyproj or GDAL")
+        self.source = source
+        self.target = target
+
+    def transform(self, xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.source != WGS84:
+            xs, ys = _TO_WGS84[self.source](xs, ys)
+        if self.target != WGS84:
+            xs, ys = _FROM_WGS84[self.target](xs, ys)
+        return xs, ys
+
+
+class _OSRTransformer:
+    """GDAL/OSR transformer with lon/lat axis order"""
+
+    def __init__(self, source: int, target: int):
+        def srs(code):
+            ref = osr.SpatialReference()
+            ref.ImportFromEPSG(code)
+            ref.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+            return ref
+
+        self._transform = osr.CoordinateTransformation(srs(source), srs(target))
+
+    def transform(self, xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        points = np.asarray(self._transform.TransformPoints(np.column_stack([xs, ys])), dtype=np.float64)
+        return points[:, 0], points[:, 1]
+
+
+# ------------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------------
+
+
+def get_transformer(source: CRS, target: CRS, backend: Optional[str] = None):
+    """
+    Cached transformer for a CRS pair (axis order is always x/lon, y/lat)
+
+    Args:
+        source: Source CRS (EPSG code or "EPSG:xxxx")
+        target: Target CRS
+        backend: Force "pyproj", "gdal" or "numpy" (default: best available)
+    """
+    source, target = epsg_code(source), epsg_code(target)
+    if backend is None:
+        backend = "pyproj" if PYPROJ_AVAILABLE else "gdal" if GDAL_AVAILABLE else "numpy"
+    key = (source, target, backend)
+
+    transformer = _transformers.get(key)
+    if transformer is not None:
+        return transformer
+    with _lock:
+        transformer = _transformers.get(key)
+        if transformer is None:
+            if backend == "pyproj":
+                transformer = Transformer.from_crs(source, target, always_xy=True)
+            elif backend == "gdal":
+                transformer = _OSRTransformer(source, target)
+            elif backend == "numpy":
+                transformer = _NumpyTransformer(source, target)
+            else:
+                raise ValueError(f"Unknown projection backend: {backend}")
+            _transformers[key] = transformer
+    return transformer
+
+
+def can_transform(source: CRS, target: CRS) -> bool:
+    """True when some backend can convert between the two CRSs"""
+    if PYPROJ_AVAILABLE or GDAL_AVAILABLE:
+        return True
+    try:
+        get_transformer(source, target, "numpy")
+    except ValueError:
+        return False
+    return True
+
+
+def transform(
+    xs: Union[Sequence[float], np.ndarray],
+    ys: Union[Sequence[float], np.ndarray],
+    source: CRS,
+    target: CRS,
+    backend: Optional[str] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert coordinate arrays from one CRS to another
+
+    Args:
+        xs: Eastings or longitudes
+        ys: Northings or latitudes
+        source: Source CRS
+        target: Target CRS
+        backend: Force a backend (see get_transformer)
+
+    Returns:
+        (xs, ys) as float64 arrays
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    if epsg_code(source) == epsg_code(target):
+        return xs, ys
+    out_x, out_y = get_transformer(source, target, backend).transform(xs, ys)
+    return np.asarray(out_x, dtype=np.float64), np.asarray(out_y, dtype=np.float64)
+
+
+def wgs84_to_lambert93(lons, lats) -> Tuple[np.ndarray, np.ndarray]:
+    """Longitudes/latitudes (degrees) to Lambert-93 eastings/northings (metres)"""
+    return transform(lons, lats, WGS84, LAMBERT93)
+
+
+def lambert93_to_wgs84(xs, ys) -> Tuple[np.ndarray, np.ndarray]:
+    """Lambert-93 eastings/northings (metres) to longitudes/latitudes (degrees)"""
+    return transform(xs, ys, LAMBERT93, WGS84)
+
+
+def transform_bbox(
+    bbox: Tuple[float, float, float, float], source: CRS, target: CRS, densify: int = 21
+) -> Tuple[float, float, float, float]:
+    """
+    Reproject a bounding box, sampling its edges so curved edges stay inside the result
+
+    Args:
+        bbox: (min_x, min_y, max_x, max_y) in the source CRS
+        source: Source CRS
+        target: Target CRS
+        densify: Points per edge
+    """
+    min_x, min_y, max_x, max_y = bbox
+    steps = np.linspace(0.0, 1.0, max(2, densify))
+    edge_x = min_x + (max_x - min_x) * steps
+    edge_y = min_y + (max_y - min_y) * steps
+    xs = np.concatenate([edge_x, edge_x, np.full_like(steps, min_x), np.full_like(steps, max_x)])
+    ys = np.concatenate([np.full_like(steps, min_y), np.full_like(steps, max_y), edge_y, edge_y])
+    out_x, out_y = transform(xs, ys, source, target)
+    return (float(out_x.min()), float(out_y.min()), float(out_x.max()), float(out_y.max()))
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Offline reverse geocoder built from the BAN address dumps (adresses-XX.csv.gz)
+Addresses are stored column-wise in a single .npz file and queried through a KD-tree,
+so nearest-address lookups need no network and take microseconds
+"""
+
+import argparse
+import csv
+import gzip
+import logging
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = Path(__file__).parent.parent.parent.parent / "data" / "geocoding" / "ban_occitanie.npz"
+BAN_CSV_URL = "https://adresse.data.gouv.fr/data/ban/adresses/latest/csv/adresses-{department}.csv.gz"
+OCCITANIE_DEPARTMENTS = ("09", "11", "12", "30", "31", "32", "34", "46", "48", "65", "66", "81", "82")
+
+# Local equirectangular projection centred on Occitanie: metres, < 0.5% error across the region
+_REF_LAT = 43.7
+_M_PER_DEG_LAT = 110_574.0
+_M_PER_DEG_LON = 111_320.0 * math.cos(math.radians(_REF_LAT))
+
+
+def _project(lat, lon) -> np.ndarray:
+    """Project degrees to local metres so KD-tree distances are metric"""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    return np.column_stack([lon * _M_PER_DEG_LON, lat * _M_PER_DEG_LAT])
+
+
+class _Dictionary:
+    """Assigns dense integer ids to repeated strings (street names, communes)"""
+
+    def __init__(self):
+        self.ids: Dict[Tuple, int] = {}
+        self.values: List[Tuple] = []
+
+    def add(self, value: Tuple) -> int:
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+def build_store(csv_paths: Iterable[Path], store_path: Optional[Path] = None) -> Dict:
+    """
+    Ingest BAN CSV dumps (plain or gzipped, ';'-separated) into a compact columnar store
+
+    Street names and communes are dictionary-encoded; coordinates are kept as float32
+    (~0.5 m resolution). Only the columns needed to rebuild the BAN label are kept.
+
+    Returns:
+        Dict with the number of addresses, streets, communes and the store size in bytes
+    """
+    store_path = Path(store_path or DEFAULT_STORE_PATH)
+    start = time.time()
+
+    lats: List[float] = []
+    lons: List[float] = []
+    numbers: List[str] = []
+    street_ids: List[int] = []
+    commune_ids: List[int] = []
+    streets = _Dictionary()
+    communes = _Dictionary()
+
+    for csv_path in csv_paths:
+        csv_path = Path(csv_path)
+        opener = gzip.open if csv_path.suffix == ".gz" else open
+        with opener(csv_path, "rt", encoding="utf-8", newline="") as handle:
+            reader = csv.DictReader(handle, delimiter=";")
+            for row in reader:
+                try:
+                    lat, lon = float(row["lat"]), float(row["lon"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                number = row.get("numero", "")
+                if number == "99999":  # BAN placeholder for named places without a number
+                    number = ""
+                lats.append(lat)
+                lons.append(lon)
+                numbers.append(f"{number}{row.get('rep', '')}".strip())
+                street_ids.append(streets.add((row.get("nom_voie") or row.get("nom_ld") or "",)))
+                commune_ids.append(
+                    communes.add((row.get("code_insee", ""), row.get("code_postal", ""), row.get("nom_commune", "")))
+                )
+        logger.info(f"Ingested {csv_path.name}: {len(lats)} addresses so far")
+
+    if not lats:
+        raise ValueError("No addresses found in the BAN CSV files")
+
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    commune_values = np.array(communes.values, dtype=str)
+    np.savez_compressed(
+        store_path,
+        lat=np.array(lats, dtype=np.float32),
+        lon=np.array(lons, dtype=np.float32),
+        number=np.array(numbers, dtype=str),
+        street_id=np.array(street_ids, dtype=np.int32),
+        commune_id=np.array(commune_ids, dtype=np.int32),
+        streets=np.array([value[0] for value in streets.values], dtype=str),
+        commune_insee=commune_values[:, 0],
+        commune_postcode=commune_values[:, 1],
+        commune_name=commune_values[:, 2],
+    )
+
+    stats = {
+        "addresses": len(lats),
+        "streets": len(streets.values),
+        "communes": len(communes.values),
+        "bytes": store_path.stat().st_size,
+        "seconds": round(time.time() - start, 1),
+    }
+    logger.info(f"Offline BAN store written to {store_path}: {stats}")
+    return stats
+
+
+def download_ban_csv(departments: Sequence[str], dest_dir: Path) -> List[Path]:
+    """Fetch the BAN address dumps for the given departments (skips files already present)"""
+    from ..utils.ranged_download import RangedDownloader
+
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    downloader = RangedDownloader()
+    paths = []
+    for department in departments:
+        dest = dest_dir / f"adresses-{department}.csv.gz"
+        if not dest.exists():
+            downloader.download(BAN_CSV_URL.format(department=department), dest)
+        paths.append(dest)
+    return paths
+
+
+class OfflineReverseGeocoder:
+    """Nearest-address lookups against the local BAN store"""
+
+    def __init__(self, store_path: Optional[str] = None, max_distance: float = 1000.0):
+        """
+        Initialize the geocoder (the store is loaded lazily on first query)
+
+        Args:
+            store_path: .npz built by build_store (default: $SPOTS_BAN_STORE or data/geocoding/ban_occitanie.npz)
+            max_distance: Metres beyond which a query counts as "no local address"
+        """
+        self.store_path = Path(store_path or os.getenv("SPOTS_BAN_STORE") or DEFAULT_STORE_PATH)
+        self.max_distance = max_distance
+        self._data: Optional[Dict[str, np.ndarray]] = None
+        self._points: Optional[np.ndarray] = None
+        self._tree = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self._data is not None or self.store_path.exists()
+
+    def _load(self) -> bool:
+        if self._data is not None:
+            return True
+        with self._lock:
+            if self._data is not None:
+                return True
+            if not self.store_path.exists():
+                return False
+            start = time.time()
+            with np.load(self.store_path, allow_pickle=False) as npz:
+                data = {key: npz[key] for key in npz.files}
+            self._points = _project(data["lat"], data["lon"])
+            if SCIPY_AVAILABLE:
+                self._tree = cKDTree(self._points, balanced_tree=False, compact_nodes=False)
+            self._data = data
+            logger.info(
+                f"Loaded offline BAN store ({len(data['lat'])} addresses) in {time.time() - start:.1f}s"
+                + ("" if SCIPY_AVAILABLE else " - scipy missing, using brute-force search")
+            )
+            return True
+
+    def _query(self, query: np.ndarray, max_distance: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest store index and distance (m) for each projected query point"""
+        if self._tree is not None:
+            distances, indices = self._tree.query(query, k=1, distance_upper_bound=max_distance)
+            return np.asarray(indices), np.asarray(distances)
+        indices = np.empty(len(query), dtype=np.int64)
+        distances = np.empty(len(query), dtype=np.float64)
+        for i, point in enumerate(query):
+            d2 = np.einsum("ij,ij->i", self._points - point, self._points - point)
+            indices[i] = int(np.argmin(d2))
+            distances[i] = math.sqrt(d2[indices[i]])
+        distances[distances > max_distance] = np.inf
+        return indices, distances
+
+    def _record(self, index: int, distance: float) -> Dict:
+        data = self._data
+        commune = int(data["commune_id"][index])
+        number = str(data["number"][index])
+        street = str(data["streets"][data["street_id"][index]])
+        postcode = str(data["commune_postcode"][commune])
+        city = str(data["commune_name"][commune])
+        label = " ".join(part for part in (number, street, postcode, city) if part)
+        return {
+            "label": label,
+            "housenumber": number,
+            "street": street,
+            "postcode": postcode,
+            "city": city,
+            "citycode": str(data["commune_insee"][commune]),
+            "latitude": float(data["lat"][index]),
+            "longitude": float(data["lon"][index]),
+            "distance": round(float(distance), 1),
+        }
+
+    def nearest(self, lat: float, lon: float, max_distance: Optional[float] = None) -> Optional[Dict]:
+        """Closest address within max_distance metres, or None"""
+        return self.nearest_many([(lat, lon)], max_distance)[0]
+
+    def nearest_many(self, points: Sequence[Tuple[float, float]], max_distance: Optional[float] = None):
+        """Vectorized nearest-address lookup; returns one dict (or None) per (lat, lon)"""
+        if not points or not self._load():
+            return [None] * len(points)
+        max_distance = self.max_distance if max_distance is None else max_distance
+        query = _project([p[0] for p in points], [p[1] for p in points])
+        indices, distances = self._query(query, max_distance)
+        return [
+            self._record(int(index), distance) if np.isfinite(distance) else None
+            for index, distance in zip(indices, distances)
+        ]
+
+    def reverse_geocode(self, lat: float, lon: float) -> Optional[str]:
+        """Address label in BAN format ("12 Rue de Metz 31000 Toulouse"), or None"""
+        record = self.nearest(lat, lon)
+        return record["label"] if record else None
+
+    def get_stats(self) -> Dict:
+        return {
+            "store": str(self.store_path),
+            "available": self.available,
+            "loaded": self._data is not None,
+            "addresses": int(len(self._data["lat"])) if self._data is not None else None,
+            "index": "kdtree" if self._tree is not None else ("brute-force" if self._data is not None else None),
+            "max_distance_m": self.max_distance,
+        }
+
+
+_geocoders: Dict[str, OfflineReverseGeocoder] = {}
+_geocoders_lock = threading.Lock()
+
+
+def get_offline_geocoder(store_path: Optional[str] = None) -> OfflineReverseGeocoder:
+    """Get the shared offline geocoder for a store path"""
+    path = str(Path(store_path or os.getenv("SPOTS_BAN_STORE") or DEFAULT_STORE_PATH).resolve())
+    with _geocoders_lock:
+        geocoder = _geocoders.get(path)
+        if geocoder is None:
+            geocoder = _geocoders[path] = OfflineReverseGeocoder(path)
+        return geocoder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline BAN reverse-geocoding store")
+    parser.add_argument("csv", nargs="*", help="BAN CSV dumps (default: download the Occitanie departments)")
+    parser.add_argument("--departments", nargs="+", default=list(OCCITANIE_DEPARTMENTS))
+    parser.add_argument("--download-dir", default=str(DEFAULT_STORE_PATH.parent / "ban_csv"))
+    parser.add_argument("--output", default=str(DEFAULT_STORE_PATH))
+    parser.add_argument("--query", nargs=2, type=float, metavar=("LAT", "LON"), help="Test lookup after building")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    paths = [Path(p) for p in args.csv] or download_ban_csv(args.departments, Path(args.download_dir))
+    stats = build_store(paths, Path(args.output))
+    print(f"✅ {stats['addresses']} addresses, {stats['streets']} streets, {stats['communes']} communes")
+    print(f"   Store: {args.output} ({stats['bytes'] / 1e6:.1f} MB)")
+
+    if args.query:
+        geocoder = OfflineReverseGeocoder(args.output)
+        print(f"📍 {geocoder.nearest(*args.query)}")
+
+
+if __name__ == "__main__":
+    main()
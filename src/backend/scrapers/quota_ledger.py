@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Local quota and cost ledger for billed geoservices (ADRESSE-PREMIUM)
+Daily request counts and costs live next to the geocoding cache in SQLite, so every
+API worker and enrichment script draws from the same per-day allowance
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict, Optional
+
+from .geocoding_cache import DEFAULT_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaLedger:
+    """Per-day request allowance with atomic reservations"""
+
+    def __init__(
+        self,
+        service: str,
+        daily_limit: int,
+        cost_per_request: float = 0.0,
+        db_path: Optional[str] = None,
+    ):
+        """
+        Initialize the ledger
+
+        Args:
+            service: Name the usage is booked under
+            daily_limit: Maximum billed requests per calendar day (0 disables the service)
+            cost_per_request: Cost booked for each request, in euros
+            db_path: SQLite file (default: the geocoding cache database)
+        """
+        self.service = service
+        self.daily_limit = daily_limit
+        self.cost_per_request = cost_per_request
+        self.db_path = Path(db_path or os.getenv("SPOTS_GEOCODE_CACHE") or DEFAULT_CACHE_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        # Statistics (per process)
+        self.denied = 0
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS quota_ledger (
+                day TEXT NOT NULL,
+                service TEXT NOT NULL,
+                operation TEXT NOT NULL,
+                requests INTEGER NOT NULL DEFAULT 0,
+                cost REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, service, operation)
+            )
+        """)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _used(self, conn: sqlite3.Connection, day: str) -> int:
+        row = conn.execute(
+            "SELECT COALESCE(SUM(requests), 0) FROM quota_ledger WHERE day = ? AND service = ?", (day, self.service)
+        ).fetchone()
+        return int(row[0])
+
+    def reserve(self, requests: int = 1, operation: str = "geocode") -> int:
+        """
+        Book up to ``requests`` billed calls against today's allowance
+
+        Returns:
+            Number of calls granted (may be fewer than asked, 0 when the quota is spent)
+        """
+        if requests <= 0:
+            return 0
+        day = date.today().isoformat()
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front, so concurrent processes cannot overbook
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            granted = max(0, min(requests, self.daily_limit - self._used(conn, day)))
+            if granted:
+                conn.execute(
+                    """
+                    INSERT INTO quota_ledger (day, service, operation, requests, cost) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (day, service, operation)
+                    DO UPDATE SET requests = requests + excluded.requests, cost = cost + excluded.cost
+                    """,
+                    (day, self.service, operation, granted, granted * self.cost_per_request),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if granted < requests:
+            self.denied += requests - granted
+            logger.warning(f"{self.service} daily quota reached: {requests - granted} request(s) refused")
+        return granted
+
+    def remaining(self) -> int:
+        """Billed calls still available today"""
+        return max(0, self.daily_limit - self._used(self._conn(), date.today().isoformat()))
+
+    def get_usage(self, day: Optional[str] = None) -> Dict:
+        """Requests and cost booked on a day (default: today), per operation"""
+        day = day or date.today().isoformat()
+        rows = self._conn().execute(
+            "SELECT operation, requests, cost FROM quota_ledger WHERE day = ? AND service = ?", (day, self.service)
+        ).fetchall()
+        operations = {op: {"requests": n, "cost": round(cost, 4)} for op, n, cost in rows}
+        used = sum(item["requests"] for item in operations.values())
+        return {
+            "service": self.service,
+            "day": day,
+            "daily_limit": self.daily_limit,
+            "used": used,
+            "remaining": max(0, self.daily_limit - used),
+            "cost": round(sum(item["cost"] for item in operations.values()), 4),
+            "operations": operations,
+            "denied_this_process": self.denied,
+        }
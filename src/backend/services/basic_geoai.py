@@ -9,6 +9,9 @@ from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 import json
 from src.backend.core.logging_config import logger
+from src.backend.raster.dem import get_dem_service
+from src.backend.raster.profile import local_terrain
+from src.backend.raster.terrain import get_terrain_store, terrain_record
 
 
 class BasicGeoAI:
@@ -29,8 +32,14 @@ class BasicGeoAI:
             "elevation_change_easy": 100,  # meters
             "elevation_change_moderate": 300,
             "elevation_change_difficult": 500,
+            "ruggedness_rough": 0.5,  # ruggedness index (0-1), see raster.terrain.terrain_record
         }
 
+        # Local DEM tiles: real slope and relief around spots when available
+        self.dem = get_dem_service()
+        # Precomputed slope / aspect / ruggedness grids for batch scoring
+        self.terrain_grids = get_terrain_store()
+
     def calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate distance between two points using Haversine formula"""
         R = 6371  # Earth's radius in kilometers
@@ -125,14 +134,75 @@ class BasicGeoAI:
         else:
             return "high"
 
-    def calculate_difficulty_score(self, spot: Dict) -> Dict[str, any]:
+    def get_terrain(self, spot: Dict) -> Optional[Dict]:
+        """Slope and relief around a spot (None without coverage), see get_terrains"""
+        return self.get_terrains([spot])[0]
+
+    def get_terrains(self, spots: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Terrain around each spot: the precomputed grids in one batch lookup (max slope and relief
+        within 200 m, plus slope, aspect and ruggedness at the spot), then the local DEM sampled
+        on the same 200 m window for spots no grid covers. Single and batch scoring share it.
+        """
+        records: List[Optional[Dict]] = [None] * len(spots)
+        located = [i for i, s in enumerate(spots) if s.get("latitude") is not None and s.get("longitude") is not None]
+        if located and self.terrain_grids.available:
+            values = self.terrain_grids.sample(
+                [spots[i]["latitude"] for i in located], [spots[i]["longitude"] for i in located]
+            )
+            for k, i in enumerate(located):
+                records[i] = terrain_record(values, k)
+        if self.dem.available:
+            for i in located:
+                if records[i] is not None:
+                    continue
+                lat, lon = spots[i]["latitude"], spots[i]["longitude"]
+                try:
+                    records[i] = local_terrain(lat, lon, dem=self.dem)
+                except Exception as e:
+                    logger.warning(f"Terrain lookup failed for {lat},{lon}: {e}")
+        return records
+
+    def calculate_difficulty_score(self, spot: Dict, terrain: Optional[Dict] = None) -> Dict[str, any]:
         """
         Calculate difficulty score based on available data
+
+        ``terrain`` is a record from get_terrains (as passed by calculate_difficulty_scores);
+        without it the spot's terrain is looked up the same way.
         """
         difficulty = {"overall": "unknown", "score": 0.5, "factors": {}}
 
-        # Elevation factor
-        if elevation := spot.get("elevation"):
+        # Terrain factor: steepest slope and relief within 200 m
+        if terrain is None:
+            terrain = self.get_terrain(spot)
+        if terrain:
+            difficulty["factors"]["terrain"] = terrain
+            slope = terrain.get("max_slope_degrees")
+            if slope is None:
+                slope = terrain.get("slope_degrees") or 0  # grids built before the neighbourhood layers
+            relief = terrain.get("relief_m") or 0
+            factors = self.terrain_factors
+            if slope > factors["slope_difficult"] or relief > factors["elevation_change_moderate"]:
+                difficulty["factors"]["slope"] = "difficult"
+                difficulty["score"] += 0.3
+            elif slope > factors["slope_moderate"] or relief > factors["elevation_change_easy"]:
+                difficulty["factors"]["slope"] = "moderate"
+                difficulty["score"] += 0.2
+            else:
+                difficulty["factors"]["slope"] = "easy"
+                difficulty["score"] += 0.1
+
+            # Broken ground, and steep north faces where snow, ice and wet rock linger (grid records only)
+            if (terrain.get("ruggedness_index") or 0) > factors["ruggedness_rough"]:
+                difficulty["factors"]["ruggedness"] = "rough"
+                difficulty["score"] += 0.1
+            aspect = terrain.get("aspect_degrees")
+            if aspect is not None and slope > factors["slope_moderate"] and (aspect >= 315 or aspect <= 45):
+                difficulty["factors"]["exposure"] = "north-facing"
+                difficulty["score"] += 0.05
+
+        # Elevation factor (fallback when no DEM covers the spot)
+        elif elevation := spot.get("elevation"):
             if elevation > 2000:
                 difficulty["factors"]["elevation"] = "difficult"
                 difficulty["score"] += 0.3
@@ -164,6 +234,16 @@ class BasicGeoAI:
 
         return difficulty
 
+    def calculate_difficulty_scores(self, spots: List[Dict]) -> List[Dict]:
+        """
+        Difficulty (with accessibility) for many spots at once
+
+        Terrain comes from get_terrains (one batch grid lookup), so each spot scores as with
+        calculate_difficulty_score; spots without terrain fall back to the elevation thresholds.
+        """
+        records = self.get_terrains(spots)
+        return [self.calculate_difficulty_score(spot, terrain=record or {}) for spot, record in zip(spots, records)]
+
     def recommend_spots(
         self, user_lat: float, user_lon: float, preferences: Dict, spots: List[Dict], limit: int = 10
     ) -> List[Dict]:
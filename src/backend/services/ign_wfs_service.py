@@ -4,36 +4,69 @@ IGN WFS-Geoportail integration service for real-time vector data queries
 Enhanced with robust error handling and fallback mechanisms
 """
 
+import asyncio
 import requests
 import json
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlparse
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..scrapers.adaptive_concurrency import get_controller
+from .wfs_grid_cache import CellFetcher, PartialFeatures, WFSGridCache, get_wfs_grid_cache, merge_features
+from .wfs_mirror import WFSMirror, get_wfs_mirror
 
 logger = logging.getLogger(__name__)
 
 
+# CQL filters sent with transport queries, per transport type
+TRANSPORT_FILTERS = {
+    "hiking": "nature = 'Sentier'",
+    "cycling": "nature IN ('Piste cyclable', 'Voie verte')",
+    "roads": "nature IN ('Route', 'Chemin')",
+}
+
+
 class IGNWFSService:
     """Service for querying IGN WFS-Geoportail real-time vector data with resilience"""
 
-    def __init__(self):
-        self.base_url = "https://data.geopf.fr/wfs/ows"
+    def __init__(
+        self,
+        base_url: str = "https://data.geopf.fr/wfs/ows",
+        grid_cache: Optional[WFSGridCache] = None,
+        mirror: Optional[WFSMirror] = None,
+    ):
+        self.base_url = base_url
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": "SPOTS-Occitanie/2.2.0 (https://github.com/spots-occitanie)"})
         self.timeout = 15  # seconds
         self.max_features = 50
         self.cache = {}
         self.cache_duration = timedelta(minutes=5)
+        # Feature queries go through a per-layer grid of cells stored on disk
+        self.grid_cache = grid_cache or get_wfs_grid_cache()
+        self.cell_max_features = 500
+        # A cell answering cell_max_features is split in four, up to this many times
+        self.cell_max_splits = 2
+        # Local GeoPackage copy of the layers (scripts/sync_wfs_mirror.py), used before the network
+        self.mirror = mirror or get_wfs_mirror()
         self.is_online = True
+        # Shared AIMD limiter so parallel analyses back off together on 429/5xx
+        self.concurrency = get_controller(urlparse(self.base_url).netloc)
+        # Async analyses run their sync queries on this bounded pool, never on the loop's default executor
+        self.query_workers = 16
+        self._executor = ThreadPoolExecutor(max_workers=self.query_workers, thread_name_prefix="ign-wfs")
+        self._local = threading.local()
         self._test_connectivity()
 
     def _test_connectivity(self):
         """Test WFS service connectivity on initialization"""
         try:
             params = {"SERVICE": "WFS", "VERSION": "2.0.0", "REQUEST": "GetCapabilities"}
-            response = self.session.get(self.base_url, params=params, timeout=5)
+            response = self._get(params, timeout=5)
             self.is_online = response.status_code == 200
             if self.is_online:
                 logger.info("✅ IGN WFS service is online")
@@ -43,6 +76,125 @@ class IGNWFSService:
             self.is_online = False
             logger.warning(f"⚠️ IGN WFS service unavailable: {e}")
 
+    def _get(self, params: Dict, timeout: Optional[float] = None) -> requests.Response:
+        """Issue a WFS GET through the shared adaptive concurrency controller"""
+        return self.concurrency.execute(self.session.get, self.base_url, params=params, timeout=timeout or self.timeout)
+
+    def _request_timeout(self) -> float:
+        """HTTP timeout for the calling thread: the request timeout, cut to what is left of an async deadline"""
+        until = getattr(self._local, "until", None)
+        if until is None:
+            return self.timeout
+        remaining = until - time.monotonic()
+        if remaining <= 0:
+            raise requests.exceptions.Timeout("analysis deadline passed")
+        return min(self.timeout, remaining)
+
+    def _run_until(self, until: float, func):
+        """Run func on this thread with network calls bounded by ``until`` (time.monotonic())"""
+        self._local.until = until
+        try:
+            return func()
+        finally:
+            self._local.until = None
+
+    def _fetch_cell(self, typename: str, cql: str = "") -> CellFetcher:
+        """
+        GetFeature for one grid cell; returns its features, or None on a bad answer
+
+        A cell that hits cell_max_features is fetched again as four quadrants (recursively,
+        cell_max_splits times) so dense areas are complete; if it is still truncated the
+        features are returned as PartialFeatures, which the grid cache does not store.
+        """
+
+        def request(bbox: Tuple[float, float, float, float]) -> Optional[List[Dict]]:
+            params = {
+                "SERVICE": "WFS",
+                "VERSION": "2.0.0",
+                "REQUEST": "GetFeature",
+                "TYPENAME": typename,
+                "OUTPUTFORMAT": "application/json",
+                "BBOX": f"{bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]},EPSG:4326",
+                "SRSNAME": "EPSG:4326",
+                "MAXFEATURES": str(self.cell_max_features),
+            }
+            if cql:
+                params["CQL_FILTER"] = cql
+
+            response = self._get(params, timeout=self._request_timeout())
+            if response.status_code != 200:
+                logger.error(f"WFS returned status {response.status_code} for {typename}")
+                return None
+            try:
+                features = response.json().get("features", [])
+            except json.JSONDecodeError:
+                logger.error("Invalid JSON response from WFS")
+                return None
+            return features
+
+        def fetch(bbox: Tuple[float, float, float, float], depth: int = 0) -> Optional[List[Dict]]:
+            features = request(bbox)
+            if features is None or len(features) < self.cell_max_features:
+                return features
+            if depth >= self.cell_max_splits:
+                logger.warning(f"{typename} cell {bbox} truncated at {self.cell_max_features} features")
+                return PartialFeatures(features)
+            min_x, min_y, max_x, max_y = bbox
+            mid_x, mid_y = round((min_x + max_x) / 2, 9), round((min_y + max_y) / 2, 9)
+            parts = []
+            for quadrant in (
+                (min_x, min_y, mid_x, mid_y),
+                (mid_x, min_y, max_x, mid_y),
+                (min_x, mid_y, mid_x, max_y),
+                (mid_x, mid_y, max_x, max_y),
+            ):
+                part = fetch(quadrant, depth + 1)
+                if part is None:
+                    return None
+                parts.append(part)
+            return merge_features(parts)
+
+        return fetch
+
+    def _query_grid(
+        self, typename: str, bbox: Tuple[float, float, float, float], limit: int, cql: str = ""
+    ) -> Optional[Dict]:
+        """Features intersecting bbox, from the local mirror or assembled from cached grid cells"""
+        if self.mirror is not None:
+            data = self.mirror.query(typename, bbox, cql, limit)
+            if data is not None:
+                data["cache"] = {"source": "mirror", "cells": 0, "fetched": 0, "hits": 0}
+                return data
+        if not self.is_online:
+            return None
+        return self.grid_cache.query(typename, bbox, self._fetch_cell(typename, cql), cql=cql, limit=limit)
+
+    def _available(self, typename: str) -> bool:
+        """Whether a layer can be queried: WFS online, or the layer is mirrored locally"""
+        return self.is_online or (self.mirror is not None and self.mirror.has_layer(typename))
+
+    @staticmethod
+    def _cache_status(data: Dict) -> str:
+        if data["cache"].get("source") == "mirror":
+            return "mirror"
+        return "fresh" if data["cache"]["fetched"] else "cached"
+
+    @staticmethod
+    def _radius_bbox(coordinates: Tuple[float, float], radius: int) -> Tuple[float, float, float, float]:
+        """(min_lon, min_lat, max_lon, max_lat) around (lat, lon), radius converted to degrees (approximate)"""
+        radius_deg = radius / 111000.0
+        return (
+            coordinates[1] - radius_deg,
+            coordinates[0] - radius_deg,
+            coordinates[1] + radius_deg,
+            coordinates[0] + radius_deg,
+        )
+
+    @staticmethod
+    def _admin_bbox(coordinates: Tuple[float, float]) -> Tuple[float, float, float, float]:
+        """Smaller bbox used for the administrative context of a spot (~1km)"""
+        return (coordinates[1] - 0.01, coordinates[0] - 0.01, coordinates[1] + 0.01, coordinates[0] + 0.01)
+
     def get_capabilities(self) -> Dict:
         """Get WFS service capabilities with error handling"""
         cache_key = "capabilities"
@@ -56,7 +208,7 @@ class IGNWFSService:
         params = {"SERVICE": "WFS", "VERSION": "2.0.0", "REQUEST": "GetCapabilities"}
 
         try:
-            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            response = self._get(params)
             response.raise_for_status()
 
             # Parse XML capabilities (simplified)
@@ -110,60 +262,24 @@ class IGNWFSService:
         """Query transport networks with robust error handling"""
         try:
             # Check if service is online
-            if not self.is_online:
+            if not self._available("TRANSPORTNETWORKS.ROADS"):
                 return self._get_fallback_transport_data(coordinates, radius, transport_type)
 
-            # Convert radius to degrees (approximate)
-            radius_deg = radius / 111000.0
+            bbox = self._radius_bbox(coordinates, radius)
+            cql = TRANSPORT_FILTERS.get(transport_type, "")
 
-            # Create bounding box
-            bbox = (
-                coordinates[1] - radius_deg,  # min lon
-                coordinates[0] - radius_deg,  # min lat
-                coordinates[1] + radius_deg,  # max lon
-                coordinates[0] + radius_deg,  # max lat
-            )
+            data = self._query_grid("TRANSPORTNETWORKS.ROADS", bbox, self.max_features, cql)
+            if data is None:
+                return self._get_fallback_transport_data(coordinates, radius, transport_type)
 
-            params = {
-                "SERVICE": "WFS",
-                "VERSION": "2.0.0",
-                "REQUEST": "GetFeature",
-                "TYPENAME": "TRANSPORTNETWORKS.ROADS",
-                "OUTPUTFORMAT": "application/json",
-                "BBOX": f"{bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]},EPSG:4326",
-                "SRSNAME": "EPSG:4326",
-                "MAXFEATURES": str(self.max_features),
+            return {
+                "status": "success",
+                "query_type": f"transport network ({transport_type})",
+                "feature_count": len(data["features"]),
+                "data": data,
+                "cache_status": self._cache_status(data),
             }
 
-            # Add CQL filter based on transport type
-            if transport_type == "hiking":
-                params["CQL_FILTER"] = "nature = 'Sentier'"
-            elif transport_type == "cycling":
-                params["CQL_FILTER"] = "nature IN ('Piste cyclable', 'Voie verte')"
-            elif transport_type == "roads":
-                params["CQL_FILTER"] = "nature IN ('Route', 'Chemin')"
-
-            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
-
-            if response.status_code == 200:
-                try:
-                    data = response.json()
-                    feature_count = len(data.get("features", []))
-
-                    return {
-                        "status": "success",
-                        "query_type": f"transport network ({transport_type})",
-                        "feature_count": feature_count,
-                        "data": data,
-                        "cache_status": "fresh",
-                    }
-                except json.JSONDecodeError:
-                    logger.error("Invalid JSON response from WFS")
-                    return self._get_fallback_transport_data(coordinates, radius, transport_type)
-            else:
-                logger.error(f"WFS returned status {response.status_code}")
-                return self._get_fallback_transport_data(coordinates, radius, transport_type)
-
         except requests.exceptions.Timeout:
             logger.warning("Transport query timed out, using fallback")
             return self._get_fallback_transport_data(coordinates, radius, transport_type)
@@ -195,47 +311,24 @@ class IGNWFSService:
     ) -> Dict:
         """Query water features with error handling"""
         try:
-            if not self.is_online:
+            if not self._available("HYDROGRAPHY.HYDROGRAPHY"):
                 return self._get_fallback_hydrography_data(coordinates, radius, feature_type)
 
-            radius_deg = radius / 111000.0
-            bbox = (
-                coordinates[1] - radius_deg,
-                coordinates[0] - radius_deg,
-                coordinates[1] + radius_deg,
-                coordinates[0] + radius_deg,
-            )
-
-            params = {
-                "SERVICE": "WFS",
-                "VERSION": "2.0.0",
-                "REQUEST": "GetFeature",
-                "TYPENAME": "HYDROGRAPHY.HYDROGRAPHY",
-                "OUTPUTFORMAT": "application/json",
-                "BBOX": f"{bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]},EPSG:4326",
-                "SRSNAME": "EPSG:4326",
-                "MAXFEATURES": str(self.max_features // 2),  # Fewer water features expected
-            }
+            bbox = self._radius_bbox(coordinates, radius)
 
-            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
-
-            if response.status_code == 200:
-                try:
-                    data = response.json()
-                    feature_count = len(data.get("features", []))
-
-                    return {
-                        "status": "success",
-                        "query_type": f"hydrography ({feature_type})",
-                        "feature_count": feature_count,
-                        "data": data,
-                        "cache_status": "fresh",
-                    }
-                except json.JSONDecodeError:
-                    return self._get_fallback_hydrography_data(coordinates, radius, feature_type)
-            else:
+            # Fewer water features expected
+            data = self._query_grid("HYDROGRAPHY.HYDROGRAPHY", bbox, self.max_features // 2)
+            if data is None:
                 return self._get_fallback_hydrography_data(coordinates, radius, feature_type)
 
+            return {
+                "status": "success",
+                "query_type": f"hydrography ({feature_type})",
+                "feature_count": len(data["features"]),
+                "data": data,
+                "cache_status": self._cache_status(data),
+            }
+
         except Exception as e:
             logger.error(f"Hydrography query failed: {e}")
             return self._get_fallback_hydrography_data(coordinates, radius, feature_type)
@@ -262,36 +355,21 @@ class IGNWFSService:
     def query_administrative_boundaries(self, bbox: Tuple[float, float, float, float], level: str = "commune") -> Dict:
         """Query administrative boundaries with error handling"""
         try:
-            if not self.is_online:
+            if not self._available("LIMITES_ADMINISTRATIVES_EXPRESS.LATEST"):
                 return self._get_fallback_administrative_data(bbox, level)
 
-            params = {
-                "SERVICE": "WFS",
-                "VERSION": "2.0.0",
-                "REQUEST": "GetFeature",
-                "TYPENAME": "LIMITES_ADMINISTRATIVES_EXPRESS.LATEST",
-                "OUTPUTFORMAT": "application/json",
-                "BBOX": f"{bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]},EPSG:4326",
-                "SRSNAME": "EPSG:4326",
-                "MAXFEATURES": "10",  # Administrative boundaries are complex
-            }
-
-            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
-
-            if response.status_code == 200:
-                try:
-                    data = response.json()
-                    return {
-                        "status": "success",
-                        "query_type": f"administrative boundaries ({level})",
-                        "feature_count": len(data.get("features", [])),
-                        "data": data,
-                    }
-                except json.JSONDecodeError:
-                    return self._get_fallback_administrative_data(bbox, level)
-            else:
+            # Administrative boundaries are complex
+            data = self._query_grid("LIMITES_ADMINISTRATIVES_EXPRESS.LATEST", bbox, 10)
+            if data is None:
                 return self._get_fallback_administrative_data(bbox, level)
 
+            return {
+                "status": "success",
+                "query_type": f"administrative boundaries ({level})",
+                "feature_count": len(data["features"]),
+                "data": data,
+            }
+
         except Exception as e:
             logger.error(f"Administrative query failed: {e}")
             return self._get_fallback_administrative_data(bbox, level)
@@ -312,28 +390,190 @@ class IGNWFSService:
         """Comprehensive spot analysis with fallback handling"""
         logger.info(f"Analyzing surroundings for spot {spot_id} at {coordinates}")
 
+        # Query administrative boundaries first (smaller bbox)
+        admin_data = self.query_administrative_boundaries(self._admin_bbox(coordinates), "commune")
+        transport_data = self.query_transport_network(coordinates, analysis_radius, "hiking")
+        water_data = self.query_hydrography(coordinates, analysis_radius, "all")
+
+        return self._build_analysis(spot_id, coordinates, analysis_radius, admin_data, transport_data, water_data)
+
+    async def analyze_spot_surroundings_async(
+        self,
+        spot_id: int,
+        coordinates: Tuple[float, float],
+        analysis_radius: int = 1500,
+        deadline: Optional[float] = None,
+    ) -> Dict:
+        """
+        Async analyze_spot_surroundings: the three layer queries run concurrently
+
+        Args:
+            spot_id: Spot identifier
+            coordinates: (lat, lon)
+            analysis_radius: Radius in meters for transport and water queries
+            deadline: Seconds for the whole analysis (default: one request timeout);
+                      layers still running then get their usual fallback data
+        """
+        until = time.monotonic() + (deadline or self.timeout)
+        return await self._analyze_until(spot_id, coordinates, analysis_radius, until)
+
+    async def _analyze_until(
+        self, spot_id: int, coordinates: Tuple[float, float], analysis_radius: int, until: float
+    ) -> Dict:
+        """Analysis whose network calls end by ``until`` (time.monotonic())"""
+        admin_bbox = self._admin_bbox(coordinates)
+        layers = {
+            "administrative": (
+                lambda: self.query_administrative_boundaries(admin_bbox, "commune"),
+                lambda: self._get_fallback_administrative_data(admin_bbox, "commune"),
+            ),
+            "transport": (
+                lambda: self.query_transport_network(coordinates, analysis_radius, "hiking"),
+                lambda: self._get_fallback_transport_data(coordinates, analysis_radius, "hiking"),
+            ),
+            "hydrography": (
+                lambda: self.query_hydrography(coordinates, analysis_radius, "all"),
+                lambda: self._get_fallback_hydrography_data(coordinates, analysis_radius, "all"),
+            ),
+        }
+
+        # Queries keep their sync session and grid cache and run on the bounded query pool. Their HTTP
+        # timeout is cut to the deadline, so a late layer's thread finishes instead of holding a worker
+        loop = asyncio.get_running_loop()
+        tasks = {
+            name: loop.run_in_executor(self._executor, self._run_until, until, query)
+            for name, (query, _) in layers.items()
+        }
+        remaining = until - time.monotonic()
+        # Past the deadline queries cannot reach the network (_request_timeout), only the cache and mirror
+        done, pending = await asyncio.wait(tasks.values(), timeout=remaining if remaining > 0 else None)
+        for task in pending:
+            task.cancel()
+
+        results = {}
+        for name, task in tasks.items():
+            if task in done and task.exception() is None:
+                results[name] = task.result()
+            else:
+                logger.warning(f"{name} query for spot {spot_id} missed its deadline, using fallback")
+                results[name] = layers[name][1]()
+
+        return self._build_analysis(
+            spot_id,
+            coordinates,
+            analysis_radius,
+            results["administrative"],
+            results["transport"],
+            results["hydrography"],
+        )
+
+    def _spot_cells(self, coordinates: Tuple[float, float], analysis_radius: int) -> List[Tuple[str, str, Tuple]]:
+        """(layer, cql, cell) grid cells a spot analysis reads from the network"""
+        radius_bbox = self._radius_bbox(coordinates, analysis_radius)
+        cells = []
+        # Same layers, filters and bboxes as analyze_spot_surroundings
+        for layer, cql, bbox in (
+            ("LIMITES_ADMINISTRATIVES_EXPRESS.LATEST", "", self._admin_bbox(coordinates)),
+            ("TRANSPORTNETWORKS.ROADS", TRANSPORT_FILTERS["hiking"], radius_bbox),
+            ("HYDROGRAPHY.HYDROGRAPHY", "", radius_bbox),
+        ):
+            if self.mirror is not None and self.mirror.has_layer(layer):
+                continue  # answered locally
+            cells.extend((layer, cql, cell) for cell in self.grid_cache.cells_for_bbox(bbox))
+        return cells
+
+    @staticmethod
+    def fallback_layers(analysis: Dict) -> List[str]:
+        """Layers of an analysis answered with fallback estimates instead of IGN data"""
+        return [name for name, data in analysis["data"].items() if data.get("status") == "fallback"]
+
+    async def analyze_spots_async(
+        self,
+        spots: List[Tuple[int, Tuple[float, float]]],
+        analysis_radius: int = 1500,
+        max_concurrency: int = 8,
+        deadline: Optional[float] = None,
+    ) -> List[Dict]:
+        """
+        Analyse many spots, fetching the grid cells they share only once
+
+        Spots are worked through in input order, ``max_concurrency`` at a time. Each one
+        prefetches its own grid cells (a cell already requested for an earlier spot is
+        awaited, not fetched again) and is then assembled from the cache, within its own
+        deadline: a slow upstream degrades the spots it delays, not the whole batch.
+
+        Args:
+            spots: (spot_id, (lat, lon)) pairs
+            analysis_radius: Radius in meters for transport and water queries
+            max_concurrency: Upstream requests (and spot analyses) in flight at once
+            deadline: Seconds for each spot, from when it starts (default: one request
+                      timeout). Once spent, no more requests are sent for it; its layers
+                      are answered from the cache, the mirror or fallback data
+
+        Returns:
+            One analysis per spot, in input order
+        """
+        budget = deadline or self.timeout
+        spot_slots = asyncio.Semaphore(max_concurrency)
+        request_slots = asyncio.Semaphore(max_concurrency)
+        loop = asyncio.get_running_loop()
+        fetches: Dict[Tuple, asyncio.Future] = {}
+
+        async def fetch_cell(layer: str, cql: str, cell, until: float):
+            await request_slots.acquire()
+            future = self._executor.submit(
+                self._run_until,
+                until,
+                lambda: self.grid_cache.ensure_cell(layer, cell, self._fetch_cell(layer, cql), cql),
+            )
+            # The slot is freed when the thread is done, not when this task is cancelled
+            future.add_done_callback(lambda _: loop.call_soon_threadsafe(request_slots.release))
+            await asyncio.wrap_future(future)
+
+        async def analyze(spot_id: int, coordinates: Tuple[float, float]) -> Dict:
+            # asyncio semaphores are FIFO: spots start in input order
+            async with spot_slots:
+                until = time.monotonic() + budget
+                if self.is_online:
+                    tasks = []
+                    for key in self._spot_cells(coordinates, analysis_radius):
+                        if key not in fetches:
+                            fetches[key] = asyncio.ensure_future(fetch_cell(*key, until))
+                        tasks.append(fetches[key])
+                    if tasks:
+                        await asyncio.wait(tasks, timeout=max(until - time.monotonic(), 0))
+                return await self._analyze_until(spot_id, coordinates, analysis_radius, until)
+
+        analyses = await asyncio.gather(*(analyze(spot_id, coordinates) for spot_id, coordinates in spots))
+
+        fetched = sum(1 for task in fetches.values() if task.done() and not task.cancelled() and not task.exception())
+        for task in fetches.values():
+            task.cancel()  # still waiting for a request slot after every spot's deadline
+        fallbacks = sum(1 for analysis in analyses if self.fallback_layers(analysis))
+        logger.info(
+            f"Fetched {fetched}/{len(fetches)} WFS cells for {len(spots)} spots, {fallbacks} with fallback layers"
+        )
+        return analyses
+
+    def _build_analysis(
+        self,
+        spot_id: int,
+        coordinates: Tuple[float, float],
+        analysis_radius: int,
+        admin_data: Dict,
+        transport_data: Dict,
+        water_data: Dict,
+    ) -> Dict:
+        """Assemble the layer results and compute the accessibility score"""
         analysis = {
             "spot_id": spot_id,
             "coordinates": coordinates,
             "analysis_radius": analysis_radius,
             "timestamp": datetime.utcnow().isoformat(),
-            "data": {},
+            "data": {"administrative": admin_data, "transport": transport_data, "hydrography": water_data},
             "accessibility_score": {"overall": 0, "transport": 0, "water_access": 0, "factors": []},
         }
 
-        # Query administrative boundaries first (smaller bbox)
-        bbox = (coordinates[1] - 0.01, coordinates[0] - 0.01, coordinates[1] + 0.01, coordinates[0] + 0.01)  # ~1km
-        admin_data = self.query_administrative_boundaries(bbox, "commune")
-        analysis["data"]["administrative"] = admin_data
-
-        # Query transport networks
-        transport_data = self.query_transport_network(coordinates, analysis_radius, "hiking")
-        analysis["data"]["transport"] = transport_data
-
-        # Query water features
-        water_data = self.query_hydrography(coordinates, analysis_radius, "all")
-        analysis["data"]["hydrography"] = water_data
-
         # Calculate accessibility score
         factors = []
         transport_score = 0
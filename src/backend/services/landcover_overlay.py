@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Batch forest / land-use overlay for spot enrichment
+BD Forêt and RPG polygons of a department are loaded once into a Shapely STRtree of
+prepared geometries; all spot buffers are then overlaid in vectorized calls (one tree
+query, one clipping pass) and the results written in bulk to the spot database
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..scrapers.ign_pretiled import FOREST_CLASS_FIELDS, RPG_CLASS_FIELDS, PretiledStore
+from ..scrapers.ign_projection import wgs84_to_lambert93
+from ..utils.geopackage import SHAPELY_AVAILABLE, decode_geometries
+
+logger = logging.getLogger(__name__)
+
+if SHAPELY_AVAILABLE:
+    import shapely
+
+DEFAULT_RADIUS = 1000
+
+# Polygon layers overlaid on spots, with the properties holding their class
+OVERLAY_DATASETS = {"bd_foret": FOREST_CLASS_FIELDS, "rpg": RPG_CLASS_FIELDS}
+
+ENVIRONMENT_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS spot_environment (
+        spot_id INTEGER PRIMARY KEY,
+        radius_meters INTEGER NOT NULL,
+        forest_coverage REAL,
+        forest_type TEXT,
+        agricultural_coverage REAL,
+        land_use_type TEXT,
+        forest TEXT,
+        land_use TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (spot_id) REFERENCES spots (id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_spot_environment_forest ON spot_environment(forest_coverage);
+"""
+
+
+def ensure_environment_table(conn: sqlite3.Connection):
+    """Create the spot_environment table (one row of overlay results per spot)"""
+    conn.executescript(ENVIRONMENT_SCHEMA)
+
+
+class OverlayLayer:
+    """Polygons of one department file in an STRtree, with their class labels"""
+
+    def __init__(self, geometries: Sequence, classes: Sequence[Optional[str]], source: str = ""):
+        self.geometries = np.asarray(geometries, dtype=object)
+        self.classes = np.array([c if c is not None else "unknown" for c in classes], dtype=object)
+        self.source = source
+        shapely.prepare(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+
+    @classmethod
+    def from_geopackage(cls, path: Path, class_fields: Iterable[str]) -> "OverlayLayer":
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            table = conn.execute("SELECT table_name FROM gpkg_contents WHERE data_type = 'features'").fetchone()[0]
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            class_field = next((field for field in class_fields if field in columns), None)
+            selected = f'geom, CAST("{class_field}" AS TEXT)' if class_field else "geom, NULL"
+            rows = conn.execute(f"SELECT {selected} FROM {table} WHERE geom IS NOT NULL").fetchall()
+        finally:
+            conn.close()
+        logger.info(f"Loaded {len(rows)} polygons from {Path(path).name}")
+        return cls(decode_geometries([row[0] for row in rows]), [row[1] for row in rows], Path(path).name)
+
+    def __len__(self) -> int:
+        return len(self.geometries)
+
+    def overlay(self, buffers: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Intersection areas of spot buffers with the layer polygons
+
+        Returns:
+            (spot index, class label, area) for every intersecting (buffer, polygon) pair
+        """
+        spot_idx, poly_idx = self.tree.query(buffers, predicate="intersects")
+        if not len(spot_idx):
+            return spot_idx, np.array([], dtype=object), np.array([])
+        polygons, spot_buffers = self.geometries[poly_idx], buffers[spot_idx]
+
+        # Buffers lying inside a polygon (prepared test) need no clipping
+        areas = shapely.area(spot_buffers)
+        clip = ~shapely.contains_properly(polygons, spot_buffers)
+        if clip.any():
+            areas[clip] = shapely.area(shapely.intersection(spot_buffers[clip], polygons[clip]))
+        return spot_idx, self.classes[poly_idx], areas
+
+
+def summarize(
+    n_spots: int, spot_idx: np.ndarray, classes: np.ndarray, areas: np.ndarray, buffer_areas: np.ndarray
+) -> List[Dict]:
+    """Per spot coverage_percent, classes [{type, percent}] (largest first) and dominant_type"""
+    labels, codes = np.unique(classes.astype(str), return_inverse=True) if len(classes) else (np.array([]), [])
+    totals = np.zeros((n_spots, len(labels)))
+    np.add.at(totals, (spot_idx, codes), areas)
+    percents = 100.0 * totals / buffer_areas[:, None]
+
+    summaries = []
+    for row in percents:
+        order = [i for i in np.argsort(-row, kind="stable") if row[i] > 0]
+        summaries.append(
+            {
+                "coverage_percent": round(min(100.0, float(row.sum())), 1),
+                "classes": [{"type": str(labels[i]), "percent": round(float(row[i]), 1)} for i in order],
+                "dominant_type": str(labels[order[0]]) if order else None,
+            }
+        )
+    return summaries
+
+
+class LandcoverOverlay:
+    """
+    Vectorized forest and land-use overlay of many spots at once
+
+    Department layers come from the pre-tiled store (see ign_pretiled) and the most
+    recently used ``max_layers`` stay in memory.
+    """
+
+    def __init__(self, store: PretiledStore, max_layers: int = 4):
+        if not SHAPELY_AVAILABLE:
+            raise ImportError("Landcover overlay requires shapely. Install with: pip install shapely")
+        self.store = store
+        self.max_layers = max_layers
+        self._layers: "OrderedDict[Path, OverlayLayer]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def layer(self, dataset: str, path: Path) -> OverlayLayer:
+        with self._lock:
+            if path in self._layers:
+                self._layers.move_to_end(path)
+                return self._layers[path]
+        layer = OverlayLayer.from_geopackage(path, OVERLAY_DATASETS[dataset])
+        with self._lock:
+            self._layers[path] = layer
+            while len(self._layers) > self.max_layers:
+                self._layers.popitem(last=False)
+        return layer
+
+    def overlay(
+        self, dataset: str, xs: np.ndarray, ys: np.ndarray, radius: float, departments: Optional[Sequence[str]] = None
+    ) -> List[Optional[Dict]]:
+        """
+        Coverage of each Lambert-93 spot buffer by a dataset's polygons
+
+        Every department file whose extent meets a buffer contributes, so spots near a
+        border are covered by both sides. Spots outside all files get None.
+        """
+        xs, ys = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)
+        buffers = shapely.buffer(shapely.points(xs, ys), radius, quad_segs=16)
+        covered = np.zeros(len(xs), dtype=bool)
+        parts = []
+
+        for path, (min_x, min_y, max_x, max_y) in self.store.files(dataset):
+            if departments is not None and path.stem not in departments:
+                continue
+            near = np.flatnonzero(
+                (xs + radius >= min_x) & (xs - radius <= max_x) & (ys + radius >= min_y) & (ys - radius <= max_y)
+            )
+            if not len(near):
+                continue
+            spot_idx, classes, areas = self.layer(dataset, path).overlay(buffers[near])
+            parts.append((near[spot_idx], classes, areas))
+            covered[near] = True
+
+        if not parts:
+            return [None] * len(xs)
+        spot_idx, classes, areas = (np.concatenate(arrays) for arrays in zip(*parts))
+        summaries = summarize(len(xs), spot_idx, classes, areas, shapely.area(buffers))
+        return [summary if covered[i] else None for i, summary in enumerate(summaries)]
+
+    def enrich(
+        self, spots: Sequence[Dict], radius: float = DEFAULT_RADIUS, departments: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        """
+        Forest and land-use results for spots with latitude/longitude
+
+        Returns:
+            One {"spot_id", "forest", "land_use"} per spot, in the formats of
+            IGNOpenDataService (forest / land_use analyses)
+        """
+        if not spots:
+            return []
+        xs, ys = wgs84_to_lambert93([s["longitude"] for s in spots], [s["latitude"] for s in spots])
+        forest = self.overlay("bd_foret", xs, ys, radius, departments)
+        land_use = self.overlay("rpg", xs, ys, radius, departments)
+
+        results = []
+        for spot, f, lu in zip(spots, forest, land_use):
+            results.append(
+                {
+                    "spot_id": spot["id"],
+                    "forest": f
+                    and {
+                        "coverage_percent": f["coverage_percent"],
+                        "forest_types": f["classes"],
+                        "dominant_type": f["dominant_type"],
+                        "source": "IGN BD Forêt",
+                    },
+                    "land_use": lu
+                    and {
+                        "agricultural_percent": lu["coverage_percent"],
+                        "land_use_mix": lu["classes"],
+                        "dominant_use": lu["dominant_type"],
+                        "source": "IGN RPG",
+                    },
+                }
+            )
+        return results
+
+    def enrich_database(
+        self,
+        db_path: str,
+        radius: float = DEFAULT_RADIUS,
+        departments: Optional[Sequence[str]] = None,
+        chunk_size: int = 20000,
+    ) -> Dict:
+        """
+        Overlay every spot of the database and store the results in spot_environment
+
+        Spots are processed ``chunk_size`` at a time; each chunk is written in one transaction.
+        """
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            ensure_environment_table(conn)
+            spots = [
+                dict(row)
+                for row in conn.execute(
+                    "SELECT id, latitude, longitude FROM spots WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+                )
+            ]
+            written = 0
+            for start in range(0, len(spots), chunk_size):
+                results = self.enrich(spots[start : start + chunk_size], radius, departments)
+                written += write_environment(conn, results, radius)
+        finally:
+            conn.close()
+        logger.info(f"Landcover overlay: {written}/{len(spots)} spots enriched")
+        return {"spots": len(spots), "enriched": written, "radius_meters": radius}
+
+
+def write_environment(conn: sqlite3.Connection, results: Iterable[Dict], radius: float) -> int:
+    """Bulk upsert of overlay results (spots outside all layers are skipped)"""
+    rows = [
+        (
+            r["spot_id"],
+            int(radius),
+            r["forest"] and r["forest"]["coverage_percent"],
+            r["forest"] and r["forest"]["dominant_type"],
+            r["land_use"] and r["land_use"]["agricultural_percent"],
+            r["land_use"] and r["land_use"]["dominant_use"],
+            json.dumps(r["forest"], ensure_ascii=False) if r["forest"] else None,
+            json.dumps(r["land_use"], ensure_ascii=False) if r["land_use"] else None,
+        )
+        for r in results
+        if r["forest"] or r["land_use"]
+    ]
+    with conn:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO spot_environment
+                (spot_id, radius_meters, forest_coverage, forest_type, agricultural_coverage, land_use_type,
+                 forest, land_use, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """,
+            rows,
+        )
+    return len(rows)
+
+
+def stored_landcover(row: Dict) -> Optional[Dict]:
+    """{"forest", "land_use"} from the env_forest / env_land_use columns of a spot row, if any"""
+    forest, land_use = row.pop("env_forest", None), row.pop("env_land_use", None)
+    if forest is None and land_use is None:
+        return None
+    return {"forest": forest and json.loads(forest), "land_use": land_use and json.loads(land_use)}
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Lazy service registry for the API
+Routers register factories instead of building services at import time; each service is
+built on first use, or by the background warm-up started once the server is listening.
+A service that fails to build (offline, missing model) is reported, not fatal
+"""
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+INITIALIZING = "initializing"
+READY = "ready"
+FAILED = "failed"
+
+
+class _Entry:
+    def __init__(self, factory: Callable[[], Any], warm: bool, close: Optional[Callable[[Any], Any]]):
+        self.factory = factory
+        self.warm = warm
+        self.close = close
+        self.instance: Any = None
+        self.state = PENDING
+        self.error: Optional[str] = None
+        self.init_seconds: Optional[float] = None
+        self.lock = threading.Lock()
+
+
+class ServiceRegistry:
+    """Named, lazily built singletons with readiness reporting"""
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self.warm_up_started: Optional[float] = None
+        self.warm_up_seconds: Optional[float] = None
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        warm: bool = True,
+        close: Optional[Callable[[Any], Any]] = None,
+    ):
+        """
+        Register a service factory (nothing is built yet)
+
+        Args:
+            name: Service name
+            factory: Builds the service; may call get() for services it depends on
+            warm: Build during the background warm-up (False: only on first use, e.g. large models)
+            close: Called with the instance on shutdown (sync or async)
+        """
+        with self._lock:
+            if name in self._entries:
+                logger.debug(f"Service {name} already registered, keeping the first factory")
+                return
+            self._entries[name] = _Entry(factory, warm, close)
+
+    def _entry(self, name: str) -> _Entry:
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"Unknown service: {name}")
+        return entry
+
+    def get(self, name: str) -> Any:
+        """
+        The service instance, built on first call (blocking)
+
+        Raises:
+            RuntimeError: The factory failed; the next call retries
+        """
+        entry = self._entry(name)
+        if entry.state == READY:
+            return entry.instance
+        with entry.lock:
+            if entry.state != READY:
+                entry.state = INITIALIZING
+                start = time.perf_counter()
+                try:
+                    entry.instance = entry.factory()
+                except Exception as e:
+                    entry.state = FAILED
+                    entry.error = str(e)
+                    logger.error(f"Service {name} failed to initialize: {e}")
+                    raise RuntimeError(f"Service {name} unavailable: {e}") from e
+                entry.init_seconds = round(time.perf_counter() - start, 3)
+                entry.error = None
+                entry.state = READY
+                logger.info(f"✅ Service {name} ready in {entry.init_seconds}s")
+        return entry.instance
+
+    async def aget(self, name: str) -> Any:
+        """get() for request handlers: a first-time build runs on a worker thread"""
+        entry = self._entry(name)
+        if entry.state == READY:
+            return entry.instance
+        return await asyncio.to_thread(self.get, name)
+
+    def is_ready(self, name: str) -> bool:
+        return self._entry(name).state == READY
+
+    async def warm_up(self, names: Optional[List[str]] = None):
+        """Build the warm services (or ``names``) concurrently in the background; failures are recorded"""
+        if names is None:
+            names = [name for name, entry in self._entries.items() if entry.warm]
+        self.warm_up_started = time.time()
+        start = time.perf_counter()
+
+        async def build(name: str):
+            try:
+                await self.aget(name)
+            except RuntimeError:
+                pass  # recorded on the entry, reported by status()
+
+        await asyncio.gather(*(build(name) for name in names))
+        self.warm_up_seconds = round(time.perf_counter() - start, 3)
+        logger.info(f"Service warm-up finished in {self.warm_up_seconds}s")
+
+    async def aclose(self):
+        """Run the close hooks of the services that were built"""
+        for name, entry in self._entries.items():
+            if entry.state != READY or entry.close is None:
+                continue
+            try:
+                result = entry.close(entry.instance)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Closing service {name} failed: {e}")
+
+    def status(self) -> Dict:
+        """Per-service state, plus whether every warm service is ready"""
+        services = {
+            name: {
+                "state": entry.state,
+                "warm": entry.warm,
+                "init_seconds": entry.init_seconds,
+                "error": entry.error,
+            }
+            for name, entry in self._entries.items()
+        }
+        return {
+            "ready": all(entry.state == READY for entry in self._entries.values() if entry.warm),
+            "warm_up_seconds": self.warm_up_seconds,
+            "services": services,
+        }
+
+
+# Shared by every router of the API process
+registry = ServiceRegistry()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Spatial-grid cache for WFS GetFeature results
+Features are fetched and stored per fixed grid cell and layer (SQLite, WAL), so a spot
+query is answered by assembling the cells covering its bbox and filtering locally.
+Neighbouring spots share cells instead of re-fetching overlapping bboxes
+"""
+
+import gzip
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    from shapely.geometry import box, shape
+
+    SHAPELY_AVAILABLE = True
+except ImportError:
+    SHAPELY_AVAILABLE = False
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent.parent / "data" / "cache" / "wfs_grid_cache.db"
+
+BBox = Tuple[float, float, float, float]
+Cell = Tuple[int, int]
+
+# Fetches one cell: bbox (min_lon, min_lat, max_lon, max_lat) -> features, or None on failure
+CellFetcher = Callable[[BBox], Optional[List[Dict]]]
+
+
+class PartialFeatures(list):
+    """Features of a cell the upstream truncated: returned to the caller, never cached"""
+
+
+def _iter_positions(coordinates) -> Iterator[Tuple[float, float]]:
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        yield coordinates[0], coordinates[1]
+        return
+    for part in coordinates or []:
+        yield from _iter_positions(part)
+
+
+def feature_bounds(feature: Dict) -> Optional[BBox]:
+    """Envelope of a GeoJSON feature (None for features without geometry)"""
+    geometry = feature.get("geometry") or {}
+    if geometry.get("type") == "GeometryCollection":
+        parts = [feature_bounds({"geometry": g}) for g in geometry.get("geometries", [])]
+        parts = [p for p in parts if p]
+        if not parts:
+            return None
+        return (min(p[0] for p in parts), min(p[1] for p in parts), max(p[2] for p in parts), max(p[3] for p in parts))
+    positions = list(_iter_positions(geometry.get("coordinates")))
+    if not positions:
+        return None
+    xs, ys = zip(*positions)
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _feature_key(feature: Dict) -> str:
+    """Identity used to drop duplicates of features that span several cells"""
+    if feature.get("id") is not None:
+        return str(feature["id"])
+    return json.dumps(feature.get("geometry"), sort_keys=True)
+
+
+def merge_features(parts: Iterable[List[Dict]]) -> List[Dict]:
+    """Features of several (sub-)cells without duplicates; partial when any part is"""
+    seen = set()
+    merged: List[Dict] = []
+    partial = False
+    for part in parts:
+        partial = partial or isinstance(part, PartialFeatures)
+        for feature in part:
+            key = _feature_key(feature)
+            if key not in seen:
+                seen.add(key)
+                merged.append(feature)
+    return PartialFeatures(merged) if partial else merged
+
+
+class WFSGridCache:
+    """Per-layer grid of cached WFS features"""
+
+    def __init__(self, db_path: Optional[str] = None, cell_size: float = 0.02, ttl: float = 7 * 86400):
+        """
+        Initialize the cache
+
+        Args:
+            db_path: SQLite file (default: $SPOTS_WFS_CACHE or data/cache/wfs_grid_cache.db)
+            cell_size: Grid cell size in degrees (0.02 ≈ 2.2 x 1.6 km in Occitanie)
+            ttl: Lifetime of a cached cell in seconds
+        """
+        self.db_path = Path(db_path or os.getenv("SPOTS_WFS_CACHE") or DEFAULT_CACHE_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.cell_size = cell_size
+        self.ttl = ttl
+        self._local = threading.local()
+        self._fetch_locks = [threading.Lock() for _ in range(64)]
+
+        # Statistics (per process)
+        self.cell_hits = 0
+        self.cell_fetches = 0
+        self.cell_failures = 0
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS wfs_cells (
+                layer TEXT NOT NULL,
+                filter TEXT NOT NULL,
+                cell_size REAL NOT NULL,
+                cx INTEGER NOT NULL,
+                cy INTEGER NOT NULL,
+                features BLOB NOT NULL,
+                feature_count INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (layer, filter, cell_size, cx, cy)
+            )
+        """)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets API workers and scripts share the file"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Grid
+    # ------------------------------------------------------------------
+
+    def cells_for_bbox(self, bbox: BBox) -> List[Cell]:
+        """Grid cells covering a (min_lon, min_lat, max_lon, max_lat) bbox"""
+        size = self.cell_size
+        x0, y0 = math.floor(bbox[0] / size), math.floor(bbox[1] / size)
+        x1, y1 = math.floor(bbox[2] / size), math.floor(bbox[3] / size)
+        return [(cx, cy) for cy in range(y0, y1 + 1) for cx in range(x0, x1 + 1)]
+
+    def cell_bbox(self, cell: Cell) -> BBox:
+        size = self.cell_size
+        # Rounded so the WFS BBOX parameter stays short and identical across processes
+        return tuple(round(v, 9) for v in (cell[0] * size, cell[1] * size, (cell[0] + 1) * size, (cell[1] + 1) * size))
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def get_cell(self, layer: str, cell: Cell, cql: str = "") -> Optional[List[Dict]]:
+        """Cached features of one cell, or None when missing or expired"""
+        row = self._conn().execute(
+            """
+            SELECT features, fetched_at FROM wfs_cells
+            WHERE layer = ? AND filter = ? AND cell_size = ? AND cx = ? AND cy = ?
+            """,
+            (layer, cql, self.cell_size, cell[0], cell[1]),
+        ).fetchone()
+        if row is None or row[1] + self.ttl < time.time():
+            return None
+        return json.loads(gzip.decompress(row[0]))
+
+    def put_cell(self, layer: str, cell: Cell, features: List[Dict], cql: str = ""):
+        """Store the features of one cell"""
+        blob = gzip.compress(json.dumps(features, separators=(",", ":")).encode("utf-8"), compresslevel=5)
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO wfs_cells VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (layer, cql, self.cell_size, cell[0], cell[1], blob, len(features), time.time()),
+        )
+        conn.commit()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def query(
+        self, layer: str, bbox: BBox, fetch: CellFetcher, cql: str = "", limit: Optional[int] = None
+    ) -> Optional[Dict]:
+        """
+        Features of ``layer`` intersecting ``bbox``, fetching only the cells not cached yet
+
+        Args:
+            layer: WFS type name
+            bbox: (min_lon, min_lat, max_lon, max_lat) in EPSG:4326
+            fetch: Called with a cell bbox for every missing cell
+            cql: Server-side filter the features were fetched with (part of the cache key)
+            limit: Maximum number of features returned
+
+        Returns:
+            GeoJSON FeatureCollection with a ``cache`` summary, or None when a cell could not be fetched
+        """
+        cells = self.cells_for_bbox(bbox)
+        fetched = 0
+        seen = set()
+        features: List[Dict] = []
+
+        for cell in cells:
+            cell_features = self.get_cell(layer, cell, cql)
+            if cell_features is None:
+                cell_features, was_fetched = self.ensure_cell(layer, cell, fetch, cql)
+                if cell_features is None:
+                    return None
+                fetched += was_fetched
+
+            for feature in cell_features:
+                key = _feature_key(feature)
+                if key not in seen:
+                    seen.add(key)
+                    features.append(feature)
+
+        self.cell_hits += len(cells) - fetched
+        features = self.clip(features, bbox)
+        if limit is not None:
+            features = features[:limit]
+        return {
+            "type": "FeatureCollection",
+            "features": features,
+            "cache": {"cells": len(cells), "fetched": fetched, "hits": len(cells) - fetched},
+        }
+
+    def ensure_cell(
+        self, layer: str, cell: Cell, fetch: CellFetcher, cql: str = ""
+    ) -> Tuple[Optional[List[Dict]], bool]:
+        """
+        Cached features of one cell, fetching and storing them when missing
+
+        Returns:
+            (features, fetched); features is None when the fetch failed. A truncated
+            answer (PartialFeatures) is returned but not cached, so the next lookup retries it
+        """
+        # Striped locks: concurrent callers wait for a cell being fetched instead of fetching it again
+        with self._fetch_locks[hash((layer, cql, cell)) % len(self._fetch_locks)]:
+            cell_features = self.get_cell(layer, cell, cql)
+            if cell_features is not None:
+                return cell_features, False
+            cell_features = fetch(self.cell_bbox(cell))
+            if cell_features is None:
+                self.cell_failures += 1
+                return None, False
+            self.cell_fetches += 1
+            if isinstance(cell_features, PartialFeatures):
+                logger.warning(f"{layer} cell {cell} is incomplete upstream, not caching it")
+            else:
+                self.put_cell(layer, cell, cell_features, cql)
+            return cell_features, True
+
+    @staticmethod
+    def clip(features: List[Dict], bbox: BBox) -> List[Dict]:
+        """Keep features whose geometry intersects the bbox"""
+        min_x, min_y, max_x, max_y = bbox
+        candidates = []
+        for feature in features:
+            bounds = feature_bounds(feature)
+            if bounds and bounds[0] <= max_x and bounds[2] >= min_x and bounds[1] <= max_y and bounds[3] >= min_y:
+                candidates.append(feature)
+        if not SHAPELY_AVAILABLE:
+            return candidates
+
+        # Envelopes overlap; check the actual geometry (a diagonal road can miss the bbox)
+        query = box(*bbox)
+        kept = []
+        for feature in candidates:
+            try:
+                if shape(feature["geometry"]).intersects(query):
+                    kept.append(feature)
+            except (ValueError, TypeError, AttributeError):
+                kept.append(feature)
+        return kept
+
+    def invalidate(self, layer: Optional[str] = None) -> int:
+        """Drop cached cells (one layer, or all); returns the number removed"""
+        conn = self._conn()
+        if layer:
+            cursor = conn.execute("DELETE FROM wfs_cells WHERE layer = ?", (layer,))
+        else:
+            cursor = conn.execute("DELETE FROM wfs_cells")
+        conn.commit()
+        return cursor.rowcount
+
+    def get_stats(self) -> Dict:
+        row = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(feature_count), 0) FROM wfs_cells").fetchone()
+        lookups = self.cell_hits + self.cell_fetches
+        return {
+            "db_path": str(self.db_path),
+            "cell_size_deg": self.cell_size,
+            "cached_cells": row[0],
+            "cached_features": row[1],
+            "cell_hits": self.cell_hits,
+            "cell_fetches": self.cell_fetches,
+            "cell_failures": self.cell_failures,
+            "hit_rate": round(self.cell_hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+_caches: Dict[str, WFSGridCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_wfs_grid_cache(db_path: Optional[str] = None, **kwargs) -> WFSGridCache:
+    """Get the shared grid cache for a database path (created on first use)"""
+    path = str(Path(db_path or os.getenv("SPOTS_WFS_CACHE") or DEFAULT_CACHE_PATH).resolve())
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = WFSGridCache(path, **kwargs)
+            _caches[path] = cache
+        return cache
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Local GeoPackage mirror of the IGN WFS layers used for spot analysis
+A sync job pages through each layer for the Occitanie bbox (STARTINDEX/COUNT) into an
+R-tree indexed GeoPackage, then refreshes it incrementally from the features' modification
+timestamp. IGNWFSService answers from the mirror when a layer is present, with no network
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from ..scrapers.ign_config import OCCITANIE_BOUNDS, WFS_ID_FIELDS
+from ..utils.geopackage import (
+    SHAPELY_AVAILABLE,
+    create_feature_table,
+    decode_geometries,
+    delete_rtree,
+    encode_geometry,
+    init_geopackage,
+    rtree_candidates,
+    table_name_for,
+    update_extent,
+    upsert_rtree,
+)
+
+logger = logging.getLogger(__name__)
+
+if SHAPELY_AVAILABLE:
+    import shapely
+    from shapely.geometry import box, mapping, shape
+
+DEFAULT_MIRROR_PATH = Path(__file__).parent.parent.parent.parent / "data" / "ign" / "occitanie_wfs.gpkg"
+
+# Layers queried by IGNWFSService and the WFS downloads
+MIRROR_LAYERS = [
+    "TRANSPORTNETWORKS.ROADS",
+    "HYDROGRAPHY.HYDROGRAPHY",
+    "LIMITES_ADMINISTRATIVES_EXPRESS.LATEST",
+    "BDTOPO_V3:troncon_de_route",
+    "BDTOPO_V3:cours_eau",
+    "BDTOPO_V3:batiment",
+]
+
+# Feature properties holding a last-modification timestamp, in order of preference
+TIMESTAMP_FIELDS = ("date_modification", "date_maj", "beginlifespanversion", "date_creation")
+
+_ISO_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}:?\d{2})?$")
+
+BBox = Tuple[float, float, float, float]
+
+_CQL_EQUALS = re.compile(r"^\s*(\w+)\s*=\s*'([^']*)'\s*$")
+_CQL_IN = re.compile(r"^\s*(\w+)\s+IN\s*\(((?:\s*'[^']*'\s*,?)+)\)\s*$", re.IGNORECASE)
+
+
+def cql_to_sql(cql: str) -> Optional[Tuple[str, List[str]]]:
+    """
+    SQL condition on the stored properties for the simple CQL filters the service sends
+    (``field = 'v'`` and ``field IN ('a', 'b')``); None when the filter is not supported
+    """
+    if not cql:
+        return "", []
+    match = _CQL_EQUALS.match(cql)
+    if match:
+        return f"json_extract(f.properties, '$.{match.group(1)}') = ?", [match.group(2)]
+    match = _CQL_IN.match(cql)
+    if match:
+        values = re.findall(r"'([^']*)'", match.group(2))
+        placeholders = ", ".join("?" for _ in values)
+        return f"json_extract(f.properties, '$.{match.group(1)}') IN ({placeholders})", values
+    return None
+
+
+def watermark_filter(timestamp_field: str, watermark: str) -> str:
+    """
+    CQL filter for features modified at or after the watermark. ``>=`` re-reads the features
+    sharing the watermark timestamp (upserted by feature id) so none of them is missed
+    """
+    if not _ISO_TIMESTAMP.match(watermark):
+        raise ValueError(f"Invalid watermark {watermark!r} for {timestamp_field}")
+    return f"{timestamp_field} >= '{watermark}'"
+
+
+class WFSMirror:
+    """GeoPackage copy of WFS layers with incremental refresh and R-tree queries"""
+
+    def __init__(
+        self,
+        gpkg_path: Optional[str] = None,
+        base_url: str = "https://data.geopf.fr/wfs/ows",
+        page_size: int = 5000,
+        timeout: float = 60,
+    ):
+        """
+        Initialize the mirror
+
+        Args:
+            gpkg_path: GeoPackage file (default: $SPOTS_WFS_MIRROR or data/ign/occitanie_wfs.gpkg)
+            base_url: WFS endpoint the layers are synced from
+            page_size: Features per GetFeature page (COUNT)
+            timeout: Seconds per page request
+        """
+        if not SHAPELY_AVAILABLE:
+            raise ImportError("WFSMirror requires shapely")
+        self.gpkg_path = Path(gpkg_path or os.getenv("SPOTS_WFS_MIRROR") or DEFAULT_MIRROR_PATH)
+        self.gpkg_path.parent.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url
+        self.page_size = page_size
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "SPOTS-Occitanie/2.2.0 (https://github.com/spots-occitanie)"})
+        self._local = threading.local()
+        self._sort_fields: Dict[str, Optional[str]] = {}
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS wfs_mirror_layers (
+                layer TEXT PRIMARY KEY,
+                table_name TEXT NOT NULL,
+                timestamp_field TEXT,
+                watermark TEXT,
+                feature_count INTEGER DEFAULT 0,
+                last_full_sync REAL,
+                last_sync REAL
+            )
+        """)
+        conn.commit()
+
+    def _conn(self):
+        """One connection per thread; WAL lets the API read while the sync job writes"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = init_geopackage(self.gpkg_path)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, params: Dict) -> requests.Response:
+        return self.session.get(self.base_url, params=params, timeout=self.timeout)
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def _layer_state(self, layer: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            """
+            SELECT table_name, timestamp_field, watermark, feature_count, last_full_sync, last_sync
+            FROM wfs_mirror_layers WHERE layer = ?
+            """,
+            (layer,),
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ("table_name", "timestamp_field", "watermark", "feature_count", "last_full_sync", "last_sync")
+        return dict(zip(keys, row))
+
+    def _sort_field(self, layer: str) -> Optional[str]:
+        """Identifier property of a layer, read from one sample feature"""
+        if layer not in self._sort_fields:
+            params = {
+                "SERVICE": "WFS",
+                "VERSION": "2.0.0",
+                "REQUEST": "GetFeature",
+                "TYPENAME": layer,
+                "OUTPUTFORMAT": "application/json",
+                "COUNT": "1",
+            }
+            response = self._get(params)
+            response.raise_for_status()
+            features = response.json().get("features", [])
+            properties = (features[0].get("properties") or {}) if features else {}
+            self._sort_fields[layer] = next((field for field in WFS_ID_FIELDS if field in properties), None)
+            if features and self._sort_fields[layer] is None:
+                logger.warning(f"{layer}: no identifier property, paging in the server's order")
+        return self._sort_fields[layer]
+
+    def _pages(self, layer: str, bbox: BBox, cql: str = "") -> Iterator[List[Dict]]:
+        """GetFeature pages (STARTINDEX/COUNT, sorted by feature identifier) until a short page"""
+        # Without SORTBY the server may order each page differently, skipping or repeating features
+        sort_field = self._sort_field(layer)
+        start = 0
+        while True:
+            params = {
+                "SERVICE": "WFS",
+                "VERSION": "2.0.0",
+                "REQUEST": "GetFeature",
+                "TYPENAME": layer,
+                "OUTPUTFORMAT": "application/json",
+                "SRSNAME": "EPSG:4326",
+                "BBOX": f"{bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]},EPSG:4326",
+                "STARTINDEX": str(start),
+                "COUNT": str(self.page_size),
+            }
+            if sort_field:
+                params["SORTBY"] = f"{sort_field} ASC"
+            if cql:
+                params["CQL_FILTER"] = cql
+            response = self._get(params)
+            response.raise_for_status()
+            features = response.json().get("features", [])
+            if features:
+                yield features
+            if len(features) < self.page_size:
+                return
+            start += len(features)
+
+    def _write_page(self, table: str, features: List[Dict], timestamp_field: Optional[str], sync_id: int):
+        """Upsert one page of features and their R-tree entries"""
+        conn = self._conn()
+        entries = []
+        with conn:
+            for feature in features:
+                properties = feature.get("properties") or {}
+                feature_id = feature.get("id")
+                if feature_id is None:
+                    feature_id = json.dumps([feature.get("geometry"), properties], sort_keys=True)
+                blob, bounds = None, None
+                if feature.get("geometry"):
+                    blob, bounds = encode_geometry(shape(feature["geometry"]))
+                fid = conn.execute(
+                    f"""
+                    INSERT INTO {table} (geom, feature_id, properties, updated, sync_id) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(feature_id) DO UPDATE SET
+                        geom = excluded.geom, properties = excluded.properties,
+                        updated = excluded.updated, sync_id = excluded.sync_id
+                    RETURNING fid
+                    """,
+                    (
+                        blob,
+                        str(feature_id),
+                        json.dumps(properties, ensure_ascii=False),
+                        properties.get(timestamp_field) if timestamp_field else None,
+                        sync_id,
+                    ),
+                ).fetchone()[0]
+                if bounds:
+                    entries.append((fid, bounds))
+                else:
+                    delete_rtree(conn, table, [fid])
+            upsert_rtree(conn, table, entries)
+
+    def sync_layer(self, layer: str, bbox: BBox = tuple(OCCITANIE_BOUNDS), full: bool = False) -> Dict:
+        """
+        Mirror one layer
+
+        A layer seen for the first time (or ``full=True``) is downloaded completely and
+        features that disappeared upstream are removed. Otherwise only features modified
+        at or after the last seen timestamp are requested; deletions are picked up by the next full sync.
+
+        Args:
+            layer: WFS type name
+            bbox: (min_lon, min_lat, max_lon, max_lat) in EPSG:4326
+            full: Force a complete download
+
+        Returns:
+            Sync summary (mode, pages, features written, features deleted, duration)
+        """
+        start = time.time()
+        conn = self._conn()
+        state = self._layer_state(layer)
+        table = state["table_name"] if state else table_name_for(layer)
+        timestamp_field = state["timestamp_field"] if state else None
+        watermark = state["watermark"] if state else None
+        incremental = bool(not full and state and state["last_full_sync"] and timestamp_field and watermark)
+
+        with conn:
+            create_feature_table(
+                conn,
+                table,
+                [("feature_id", "TEXT UNIQUE"), ("properties", "TEXT"), ("updated", "TEXT"), ("sync_id", "INTEGER")],
+                identifier=layer,
+            )
+
+        sync_id = time.time_ns()
+        cql = watermark_filter(timestamp_field, watermark) if incremental else ""
+        pages = written = 0
+        for features in self._pages(layer, bbox, cql):
+            if timestamp_field is None:
+                first = features[0].get("properties") or {}
+                timestamp_field = next((field for field in TIMESTAMP_FIELDS if field in first), None)
+            self._write_page(table, features, timestamp_field, sync_id)
+            pages += 1
+            written += len(features)
+            if timestamp_field:
+                stamps = [(f.get("properties") or {}).get(timestamp_field) for f in features]
+                watermark = max([s for s in stamps if s] + ([watermark] if watermark else []), default=None)
+            logger.info(f"{layer}: page {pages}, {written} features")
+
+        deleted = 0
+        with conn:
+            if not incremental:
+                stale = [row[0] for row in conn.execute(f"SELECT fid FROM {table} WHERE sync_id != ?", (sync_id,))]
+                conn.execute(f"DELETE FROM {table} WHERE sync_id != ?", (sync_id,))
+                delete_rtree(conn, table, stale)
+                deleted = len(stale)
+            update_extent(conn, table)
+            count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            conn.execute(
+                """
+                INSERT INTO wfs_mirror_layers
+                    (layer, table_name, timestamp_field, watermark, feature_count, last_full_sync, last_sync)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(layer) DO UPDATE SET
+                    timestamp_field = excluded.timestamp_field, watermark = excluded.watermark,
+                    feature_count = excluded.feature_count,
+                    last_full_sync = COALESCE(excluded.last_full_sync, last_full_sync),
+                    last_sync = excluded.last_sync
+                """,
+                (layer, table, timestamp_field, watermark, count, None if incremental else time.time(), time.time()),
+            )
+
+        return {
+            "layer": layer,
+            "mode": "incremental" if incremental else "full",
+            "pages": pages,
+            "written": written,
+            "deleted": deleted,
+            "feature_count": count,
+            "watermark": watermark,
+            "seconds": round(time.time() - start, 2),
+        }
+
+    def sync(self, layers: Optional[List[str]] = None, bbox: BBox = tuple(OCCITANIE_BOUNDS), full: bool = False):
+        """Sync several layers (default: MIRROR_LAYERS); a failed layer is logged and skipped"""
+        results = []
+        for layer in layers or MIRROR_LAYERS:
+            try:
+                results.append(self.sync_layer(layer, bbox, full))
+            except (requests.RequestException, ValueError) as e:
+                logger.error(f"Mirror sync of {layer} failed: {e}")
+                results.append({"layer": layer, "mode": "failed", "error": str(e)})
+        return results
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def has_layer(self, layer: str) -> bool:
+        """Whether a complete copy of the layer is available"""
+        state = self._layer_state(layer)
+        return bool(state and state["last_full_sync"])
+
+    def query(self, layer: str, bbox: BBox, cql: str = "", limit: Optional[int] = None) -> Optional[Dict]:
+        """
+        Features of a mirrored layer intersecting bbox (R-tree lookup, then exact geometry test)
+
+        Args:
+            layer: WFS type name
+            bbox: (min_lon, min_lat, max_lon, max_lat) in EPSG:4326
+            cql: Filter as sent to the WFS (simple equality / IN filters only)
+            limit: Maximum number of features returned
+
+        Returns:
+            GeoJSON FeatureCollection, or None when the layer is not mirrored or the filter is unsupported
+        """
+        if not self.has_layer(layer):
+            return None
+        condition = cql_to_sql(cql)
+        if condition is None:
+            return None
+
+        rows = rtree_candidates(
+            self._conn(),
+            self._layer_state(layer)["table_name"],
+            bbox,
+            "f.feature_id, f.geom, f.properties",
+            *condition,
+        )
+        geometries = decode_geometries([row[1] for row in rows])
+        hits = shapely.intersects(geometries, box(*bbox)) if geometries else []
+
+        features = []
+        for row, geometry, hit in zip(rows, geometries, hits):
+            if not hit:
+                continue
+            features.append(
+                {"type": "Feature", "id": row[0], "geometry": mapping(geometry), "properties": json.loads(row[2])}
+            )
+            if limit is not None and len(features) >= limit:
+                break
+        return {"type": "FeatureCollection", "features": features}
+
+    def get_stats(self) -> Dict:
+        rows = self._conn().execute(
+            "SELECT layer, feature_count, timestamp_field, watermark, last_full_sync, last_sync FROM wfs_mirror_layers"
+        ).fetchall()
+        return {
+            "gpkg_path": str(self.gpkg_path),
+            "layers": {
+                row[0]: {
+                    "feature_count": row[1],
+                    "timestamp_field": row[2],
+                    "watermark": row[3],
+                    "last_full_sync": row[4],
+                    "last_sync": row[5],
+                }
+                for row in rows
+            },
+        }
+
+
+_mirrors: Dict[str, WFSMirror] = {}
+_mirrors_lock = threading.Lock()
+
+
+def get_wfs_mirror(gpkg_path: Optional[str] = None) -> Optional[WFSMirror]:
+    """Shared mirror for a GeoPackage path, or None when no mirror has been synced there"""
+    path = Path(gpkg_path or os.getenv("SPOTS_WFS_MIRROR") or DEFAULT_MIRROR_PATH).resolve()
+    if not path.exists() or not SHAPELY_AVAILABLE:
+        return None
+    with _mirrors_lock:
+        mirror = _mirrors.get(str(path))
+        if mirror is None:
+            mirror = WFSMirror(str(path))
+            _mirrors[str(path)] = mirror
+        return mirror
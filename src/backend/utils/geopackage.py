@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Minimal GeoPackage helpers (OGC GeoPackage 1.3) on top of sqlite3
+Creates the core tables, feature tables with an R-tree spatial index
+(gpkg_rtree_index extension) and encodes/decodes GeoPackage geometry blobs,
+so vector mirrors can be written and read without GDAL. The files open in QGIS/ogr
+"""
+
+import logging
+import re
+import sqlite3
+import struct
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    import shapely
+    from shapely.geometry.base import BaseGeometry
+
+    SHAPELY_AVAILABLE = True
+except ImportError:
+    SHAPELY_AVAILABLE = False
+
+PathLike = Union[str, Path]
+Bounds = Tuple[float, float, float, float]
+
+GPKG_APPLICATION_ID = 0x47504B47  # "GPKG"
+GPKG_USER_VERSION = 10300
+
+WGS84_WKT = (
+    'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,AUTHORITY["EPSG","7030"]],'
+    'AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],'
+    'UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4326"]]'
+)
+
+# Bytes of the envelope following the 8-byte header, per envelope indicator (flags bits 1-3)
+_ENVELOPE_SIZES = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}
+
+
+def init_geopackage(db_path: PathLike) -> sqlite3.Connection:
+    """
+    Create (or open) a GeoPackage with the mandatory core tables
+
+    Args:
+        db_path: Path of the .gpkg file
+
+    Returns:
+        Open SQLite connection
+    """
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.execute(f"PRAGMA application_id = {GPKG_APPLICATION_ID}")
+    conn.execute(f"PRAGMA user_version = {GPKG_USER_VERSION}")
+    conn.execute("PRAGMA journal_mode=WAL")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS gpkg_spatial_ref_sys (
+            srs_name TEXT NOT NULL,
+            srs_id INTEGER PRIMARY KEY,
+            organization TEXT NOT NULL,
+            organization_coordsys_id INTEGER NOT NULL,
+            definition TEXT NOT NULL,
+            description TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS gpkg_contents (
+            table_name TEXT NOT NULL PRIMARY KEY,
+            data_type TEXT NOT NULL,
+            identifier TEXT UNIQUE,
+            description TEXT DEFAULT '',
+            last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+            min_x DOUBLE,
+            min_y DOUBLE,
+            max_x DOUBLE,
+            max_y DOUBLE,
+            srs_id INTEGER REFERENCES gpkg_spatial_ref_sys(srs_id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS gpkg_geometry_columns (
+            table_name TEXT NOT NULL,
+            column_name TEXT NOT NULL,
+            geometry_type_name TEXT NOT NULL,
+            srs_id INTEGER NOT NULL,
+            z TINYINT NOT NULL,
+            m TINYINT NOT NULL,
+            PRIMARY KEY (table_name, column_name)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS gpkg_extensions (
+            table_name TEXT,
+            column_name TEXT,
+            extension_name TEXT NOT NULL,
+            definition TEXT NOT NULL,
+            scope TEXT NOT NULL,
+            UNIQUE (table_name, column_name, extension_name)
+        )
+    """)
+    conn.executemany(
+        "INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            ("Undefined cartesian SRS", -1, "NONE", -1, "undefined", "undefined cartesian coordinate reference system"),
+            ("Undefined geographic SRS", 0, "NONE", 0, "undefined", "undefined geographic coordinate reference system"),
+            ("WGS 84 geodetic", 4326, "EPSG", 4326, WGS84_WKT, "longitude/latitude coordinates in decimal degrees"),
+        ],
+    )
+    conn.commit()
+    return conn
+
+
+def ensure_srs(conn: sqlite3.Connection, epsg: int):
+    """Register an EPSG code in gpkg_spatial_ref_sys (WKT from pyproj when installed)"""
+    if conn.execute("SELECT 1 FROM gpkg_spatial_ref_sys WHERE srs_id = ?", (epsg,)).fetchone():
+        return
+    name, definition = f"EPSG:{epsg}", "undefined"
+    try:
+        from pyproj import CRS
+
+        crs = CRS.from_epsg(epsg)
+        name, definition = crs.name, crs.to_wkt("WKT1_GDAL")
+    except Exception as e:
+        logger.debug(f"No WKT for EPSG:{epsg}: {e}")
+    conn.execute("INSERT INTO gpkg_spatial_ref_sys VALUES (?, ?, 'EPSG', ?, ?, NULL)", (name, epsg, epsg, definition))
+
+
+def table_name_for(layer: str) -> str:
+    """SQL-safe table name for a layer id (e.g. BDTOPO_V3:batiment -> bdtopo_v3_batiment)"""
+    return re.sub(r"\W+", "_", layer).strip("_").lower()
+
+
+def create_feature_table(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: Sequence[Tuple[str, str]] = (),
+    srs_id: int = 4326,
+    identifier: Optional[str] = None,
+    geometry_column: str = "geom",
+):
+    """
+    Create a feature table, register it and add its R-tree index (no-op if it exists)
+
+    The R-tree is maintained by the writer (see upsert_rtree / delete_rtree) rather than
+    by the spec triggers, which need ST_* functions plain SQLite does not provide.
+
+    Args:
+        conn: GeoPackage connection
+        table: Table name (see table_name_for)
+        columns: Extra (name, SQL type) columns
+        srs_id: Spatial reference of the geometries
+        identifier: Human readable name stored in gpkg_contents
+        geometry_column: Name of the geometry column
+    """
+    extra = "".join(f", {name} {sql_type}" for name, sql_type in columns)
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {table} (fid INTEGER PRIMARY KEY AUTOINCREMENT, {geometry_column} GEOMETRY{extra})"
+    )
+    conn.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS rtree_{table}_{geometry_column} USING rtree(id, minx, maxx, miny, maxy)"
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO gpkg_contents (table_name, data_type, identifier, srs_id) VALUES (?, 'features', ?, ?)",
+        (table, identifier or table, srs_id),
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO gpkg_geometry_columns VALUES (?, ?, 'GEOMETRY', ?, 0, 0)",
+        (table, geometry_column, srs_id),
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO gpkg_extensions VALUES (?, ?, 'gpkg_rtree_index', "
+        "'http://www.geopackage.org/spec120/#extension_rtree', 'write-only')",
+        (table, geometry_column),
+    )
+
+
+def encode_geometry(geometry: "BaseGeometry", srs_id: int = 4326) -> Tuple[bytes, Optional[Bounds]]:
+    """
+    GeoPackage binary for a shapely geometry (little endian, XY envelope)
+
+    Returns:
+        (blob, (min_x, min_y, max_x, max_y)); bounds are None for empty geometries
+    """
+    if geometry.is_empty:
+        header = struct.pack("<2sBBi", b"GP", 0, 0b00010001, srs_id)
+        return header + shapely.to_wkb(geometry, byte_order=1), None
+    min_x, min_y, max_x, max_y = geometry.bounds
+    header = struct.pack("<2sBBi4d", b"GP", 0, 0b00000011, srs_id, min_x, max_x, min_y, max_y)
+    return header + shapely.to_wkb(geometry, byte_order=1), (min_x, min_y, max_x, max_y)
+
+
+def _wkb_offset(blob: bytes) -> int:
+    flags = blob[3]
+    return 8 + _ENVELOPE_SIZES[(flags >> 1) & 0b111]
+
+
+def decode_geometries(blobs: Iterable[bytes]) -> List["BaseGeometry"]:
+    """Shapely geometries for GeoPackage blobs (WKB parsed in one vectorized call)"""
+    wkbs = [blob[_wkb_offset(blob):] for blob in blobs]
+    if not wkbs:
+        return []
+    return list(shapely.from_wkb(wkbs))
+
+
+def upsert_rtree(
+    conn: sqlite3.Connection, table: str, rows: Iterable[Tuple[int, Bounds]], geometry_column: str = "geom"
+):
+    """Insert or move R-tree entries: rows of (fid, (min_x, min_y, max_x, max_y))"""
+    conn.executemany(
+        f"INSERT OR REPLACE INTO rtree_{table}_{geometry_column} VALUES (?, ?, ?, ?, ?)",
+        [(fid, b[0], b[2], b[1], b[3]) for fid, b in rows],
+    )
+
+
+def delete_rtree(conn: sqlite3.Connection, table: str, fids: Iterable[int], geometry_column: str = "geom"):
+    conn.executemany(f"DELETE FROM rtree_{table}_{geometry_column} WHERE id = ?", [(fid,) for fid in fids])
+
+
+def rtree_candidates(
+    conn: sqlite3.Connection,
+    table: str,
+    bbox: Bounds,
+    columns: str = "*",
+    where: str = "",
+    params: Sequence = (),
+    geometry_column: str = "geom",
+) -> List[Tuple]:
+    """
+    Rows whose envelope intersects bbox, found through the R-tree
+
+    Args:
+        conn: GeoPackage connection
+        table: Feature table
+        bbox: (min_x, min_y, max_x, max_y) in the table's SRS
+        columns: Columns selected from the feature table (alias ``f``)
+        where: Extra SQL condition on ``f`` (without WHERE)
+        params: Parameters of the extra condition
+
+    Returns:
+        Matching rows, in fid order
+    """
+    sql = (
+        f"SELECT {columns} FROM {table} f JOIN rtree_{table}_{geometry_column} r ON f.fid = r.id "
+        "WHERE r.minx <= ? AND r.maxx >= ? AND r.miny <= ? AND r.maxy >= ?"
+    )
+    if where:
+        sql += f" AND ({where})"
+    sql += " ORDER BY f.fid"
+    return conn.execute(sql, (bbox[2], bbox[0], bbox[3], bbox[1], *params)).fetchall()
+
+
+def update_extent(conn: sqlite3.Connection, table: str, geometry_column: str = "geom"):
+    """Refresh the gpkg_contents extent and last_change of a table from its R-tree"""
+    extent = conn.execute(
+        f"SELECT MIN(minx), MIN(miny), MAX(maxx), MAX(maxy) FROM rtree_{table}_{geometry_column}"
+    ).fetchone()
+    conn.execute(
+        """
+        UPDATE gpkg_contents
+        SET min_x = ?, min_y = ?, max_x = ?, max_y = ?, last_change = strftime('%Y-%m-%dT%H:%M:%fZ','now')
+        WHERE table_name = ?
+        """,
+        (*extent, table),
+    )
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+MBTiles helpers shared by tile downloaders
+Schema creation and fast shard merging with ATTACH + INSERT ... SELECT
+"""
+
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+
+def init_mbtiles(
+    db_path: PathLike, metadata: Optional[Dict[str, str]] = None, fast_writes: bool = False
+) -> sqlite3.Connection:
+    """
+    Create (or open) an MBTiles database with the standard schema
+
+    Args:
+        db_path: Path of the .mbtiles file
+        metadata: Key/value pairs written to the metadata table
+        fast_writes: Disable fsync and the rollback journal, for scratch files
+                     that can be rebuilt (e.g. per-shard downloads)
+
+    Returns:
+        Open SQLite connection
+    """
+    conn = sqlite3.connect(str(db_path))
+    if fast_writes:
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA journal_mode=OFF")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tiles (
+            zoom_level INTEGER,
+            tile_column INTEGER,
+            tile_row INTEGER,
+            tile_data BLOB,
+            PRIMARY KEY (zoom_level, tile_column, tile_row)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS metadata (
+            name TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+
+    if metadata:
+        conn.executemany(
+            "INSERT OR REPLACE INTO metadata (name, value) VALUES (?, ?)",
+            [(key, str(value)) for key, value in metadata.items()],
+        )
+    conn.commit()
+    return conn
+
+
+def merge_mbtiles(target_path: PathLike, shard_paths: Iterable[PathLike], batch_size: int = 50000) -> Dict[str, int]:
+    """
+    Merge shard MBTiles files into a single target file
+
+    Each shard is ATTACHed and copied with INSERT ... SELECT in rowid-ordered
+    batches, so the copy runs inside SQLite without round-tripping tile blobs
+    through Python. Metadata from the first shard is used if the target has none.
+
+    Args:
+        target_path: Destination .mbtiles (created if missing)
+        shard_paths: Shard files to merge, in order (later shards win on conflicts)
+        batch_size: Rows copied per transaction
+
+    Returns:
+        Dict with merged shard and tile counts
+    """
+    conn = init_mbtiles(target_path)
+    conn.execute("PRAGMA synchronous=OFF")
+    stats = {"shards": 0, "tiles": 0}
+
+    try:
+        for shard_path in shard_paths:
+            shard_path = Path(shard_path)
+            if not shard_path.exists():
+                logger.warning(f"Shard not found, skipping: {shard_path}")
+                continue
+
+            conn.execute("ATTACH DATABASE ? AS shard", (str(shard_path),))
+            try:
+                has_metadata = conn.execute("SELECT COUNT(*) FROM main.metadata").fetchone()[0]
+                if not has_metadata:
+                    conn.execute("INSERT INTO main.metadata SELECT name, value FROM shard.metadata")
+
+                last_rowid = 0
+                while True:
+                    row = conn.execute(
+                        "SELECT MAX(rowid), COUNT(*) FROM "
+                        "(SELECT rowid FROM shard.tiles WHERE rowid > ? ORDER BY rowid LIMIT ?)",
+                        (last_rowid, batch_size),
+                    ).fetchone()
+                    if not row[1]:
+                        break
+                    conn.execute(
+                        "INSERT OR REPLACE INTO main.tiles (zoom_level, tile_column, tile_row, tile_data) "
+                        "SELECT zoom_level, tile_column, tile_row, tile_data FROM shard.tiles "
+                        "WHERE rowid > ? AND rowid <= ?",
+                        (last_rowid, row[0]),
+                    )
+                    conn.commit()
+                    stats["tiles"] += row[1]
+                    last_rowid = row[0]
+            finally:
+                conn.commit()
+                conn.execute("DETACH DATABASE shard")
+
+            stats["shards"] += 1
+            logger.info(f"Merged {shard_path.name} ({stats['tiles']} tiles so far)")
+    finally:
+        conn.close()
+
+    return stats
+
+
+def tile_count(db_path: PathLike) -> int:
+    """Number of tiles stored in an MBTiles file"""
+    with sqlite3.connect(str(db_path)) as conn:
+        return conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
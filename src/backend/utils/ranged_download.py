@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Chunked, resumable HTTP downloads with parallel Range requests
+Archives are written straight to a pre-sized .part file and never held in memory
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import requests
+
+from ..scrapers.adaptive_concurrency import AdaptiveConcurrencyController, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+try:
+    import py7zr
+
+    PY7ZR_AVAILABLE = True
+except ImportError:
+    PY7ZR_AVAILABLE = False
+
+SEVEN_ZIP_BINARY = shutil.which("7z") or shutil.which("7za")
+
+COPY_BUFFER = 1024 * 1024  # 1 MB
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of a ranged download"""
+
+    path: Path
+    size: int
+    resumed_bytes: int = 0
+    chunks: int = 0
+    checksum: Optional[str] = None
+    ranged: bool = True
+    seconds: float = 0.0
+    extracted: List[Path] = field(default_factory=list)
+
+
+class ChecksumMismatch(Exception):
+    """Downloaded file does not match the expected digest"""
+
+
+class RangedDownloader:
+    """
+    Download large files as parallel byte ranges with resume support
+
+    A HEAD request discovers the size and ``Accept-Ranges``; chunks are then
+    fetched concurrently and written in place with ``os.pwrite``. Completed
+    chunk indices are persisted next to the ``.part`` file so an interrupted
+    download resumes where it stopped (as long as the ETag/size are unchanged).
+    The checksum is computed incrementally over the contiguous prefix of
+    finished chunks, so verification does not need a second full pass.
+    """
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        concurrency: Optional[AdaptiveConcurrencyController] = None,
+        chunk_size: int = 16 * 1024 * 1024,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        timeout: float = 60,
+        hash_algorithm: str = "md5",
+    ):
+        """
+        Initialize the downloader
+
+        Args:
+            session: requests session to reuse (a new one is created otherwise)
+            concurrency: Optional shared controller gating every range request
+            chunk_size: Bytes per Range request
+            max_workers: Parallel range requests per file
+            max_retries: Attempts per chunk before giving up
+            timeout: Per-request timeout in seconds
+            hash_algorithm: hashlib algorithm for the incremental checksum
+        """
+        self.session = session or requests.Session()
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.hash_algorithm = hash_algorithm
+
+    # ------------------------------------------------------------------
+    # HTTP helpers
+    # ------------------------------------------------------------------
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        if self.concurrency is None:
+            return self.session.request(method, url, **kwargs)
+        return self.concurrency.execute(self.session.request, method, url, **kwargs)
+
+    def probe(self, url: str) -> Dict:
+        """HEAD the URL and report size, range support and validators"""
+        response = self._send("HEAD", url, allow_redirects=True)
+        response.raise_for_status()
+        size = response.headers.get("Content-Length")
+        return {
+            "size": int(size) if size else None,
+            "accept_ranges": response.headers.get("Accept-Ranges", "").lower() == "bytes",
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+
+    # ------------------------------------------------------------------
+    # Resume state
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _state_path(part_path: Path) -> Path:
+        return part_path.with_name(part_path.name + ".json")
+
+    def _load_state(self, part_path: Path, url: str, info: Dict) -> Set[int]:
+        state_path = self._state_path(part_path)
+        if not (state_path.exists() and part_path.exists()):
+            return set()
+        try:
+            state = json.loads(state_path.read_text())
+        except (OSError, ValueError):
+            return set()
+        unchanged = (
+            state.get("url") == url
+            and state.get("size") == info["size"]
+            and state.get("etag") == info["etag"]
+            and state.get("chunk_size") == self.chunk_size
+        )
+        if not unchanged:
+            logger.info(f"Remote file changed since last attempt, restarting {part_path.name}")
+            return set()
+        return set(state.get("done", []))
+
+    def _save_state(self, part_path: Path, url: str, info: Dict, done: Set[int]):
+        state_path = self._state_path(part_path)
+        tmp_path = state_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "url": url,
+                    "size": info["size"],
+                    "etag": info["etag"],
+                    "chunk_size": self.chunk_size,
+                    "done": sorted(done),
+                }
+            )
+        )
+        os.replace(tmp_path, state_path)
+
+    # ------------------------------------------------------------------
+    # Download
+    # ------------------------------------------------------------------
+
+    def download(self, url: str, dest: Path, expected_checksum: Optional[str] = None) -> DownloadResult:
+        """
+        Download ``url`` to ``dest`` using parallel ranges when the server allows it
+
+        Args:
+            url: File URL
+            dest: Final path (data is staged in ``dest.part``)
+            expected_checksum: Hex digest to verify against (hash_algorithm)
+
+        Returns:
+            DownloadResult describing the transfer
+
+        Raises:
+            ChecksumMismatch: If the digest does not match (the .part is removed)
+            requests.HTTPError: If the server refuses the file or a range
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        part_path = dest.with_name(dest.name + ".part")
+        start = time.monotonic()
+
+        info = self.probe(url)
+        if not info["accept_ranges"] or not info["size"]:
+            result = self._download_stream(url, dest, part_path)
+        else:
+            result = self._download_ranges(url, dest, part_path, info)
+
+        if expected_checksum and result.checksum != expected_checksum.lower():
+            part_path.unlink(missing_ok=True)
+            self._state_path(part_path).unlink(missing_ok=True)
+            raise ChecksumMismatch(f"{dest.name}: expected {expected_checksum}, got {result.checksum}")
+
+        os.replace(part_path, dest)
+        self._state_path(part_path).unlink(missing_ok=True)
+        result.seconds = round(time.monotonic() - start, 2)
+        return result
+
+    def _download_stream(self, url: str, dest: Path, part_path: Path) -> DownloadResult:
+        """Single streaming GET for servers without range support"""
+        hasher = hashlib.new(self.hash_algorithm)
+        size = 0
+        with self._send("GET", url, stream=True) as response:
+            response.raise_for_status()
+            with open(part_path, "wb") as f:
+                for block in response.iter_content(chunk_size=COPY_BUFFER):
+                    f.write(block)
+                    hasher.update(block)
+                    size += len(block)
+        return DownloadResult(path=dest, size=size, chunks=1, checksum=hasher.hexdigest(), ranged=False)
+
+    def _download_ranges(self, url: str, dest: Path, part_path: Path, info: Dict) -> DownloadResult:
+        size = info["size"]
+        chunk_count = -(-size // self.chunk_size)
+        done = self._load_state(part_path, url, info)
+
+        if not done or not part_path.exists():
+            with open(part_path, "wb") as f:
+                f.truncate(size)
+            done = set()
+        resumed_bytes = sum(self._chunk_bounds(i, size)[1] - self._chunk_bounds(i, size)[0] + 1 for i in done)
+        if resumed_bytes:
+            logger.info(f"Resuming {dest.name}: {resumed_bytes / (1024 * 1024):.1f} MB already on disk")
+
+        hasher = hashlib.new(self.hash_algorithm)
+        next_to_hash = 0
+
+        fd = os.open(part_path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+        try:
+            next_to_hash = self._advance_hash(fd, hasher, next_to_hash, done, size)
+            pending = [i for i in range(chunk_count) if i not in done]
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self._fetch_chunk, url, fd, i, size, info["etag"]): i for i in pending}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    future.result()
+                    done.add(index)
+                    self._save_state(part_path, url, info, done)
+                    next_to_hash = self._advance_hash(fd, hasher, next_to_hash, done, size)
+                    if len(done) % 10 == 0 or len(done) == chunk_count:
+                        logger.info(f"Downloading {dest.name}: {len(done) * 100 / chunk_count:.1f}%")
+        finally:
+            os.close(fd)
+
+        return DownloadResult(
+            path=dest,
+            size=size,
+            resumed_bytes=resumed_bytes,
+            chunks=chunk_count,
+            checksum=hasher.hexdigest(),
+        )
+
+    def _chunk_bounds(self, index: int, size: int):
+        first = index * self.chunk_size
+        return first, min(size, first + self.chunk_size) - 1
+
+    def _fetch_chunk(self, url: str, fd: int, index: int, size: int, etag: Optional[str]):
+        """GET one byte range and write it at its offset"""
+        first, last = self._chunk_bounds(index, size)
+        headers = {"Range": f"bytes={first}-{last}"}
+        if etag:
+            headers["If-Range"] = etag
+
+        for attempt in range(self.max_retries):
+            try:
+                self._write_range(url, fd, first, last, headers)
+                return
+            except (requests.RequestException, IOError) as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                logger.warning(f"Chunk {index} failed ({e}), retry {attempt + 1}/{self.max_retries}")
+                time.sleep(2**attempt)
+
+    def _write_range(self, url: str, fd: int, first: int, last: int, headers: Dict):
+        slot = self.concurrency.slot() if self.concurrency else _NullSlot()
+        with slot:
+            started = time.monotonic()
+            response = self.session.get(url, headers=headers, stream=True, timeout=self.timeout)
+            with response:
+                if self.concurrency and response.status_code >= 400:
+                    self.concurrency.record_failure(
+                        status_code=response.status_code,
+                        retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                        latency=time.monotonic() - started,
+                    )
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise IOError(f"Server ignored Range request (status {response.status_code})")
+
+                offset = first
+                for block in response.iter_content(chunk_size=COPY_BUFFER):
+                    _pwrite(fd, block, offset)
+                    offset += len(block)
+                if offset != last + 1:
+                    raise IOError(f"Short range: got {offset - first} of {last - first + 1} bytes")
+
+            if self.concurrency:
+                self.concurrency.record_success(response.elapsed.total_seconds())
+
+    def _advance_hash(self, fd: int, hasher, next_index: int, done: Set[int], size: int) -> int:
+        """Feed the hasher every completed chunk that extends the contiguous prefix"""
+        while next_index in done:
+            first, last = self._chunk_bounds(next_index, size)
+            offset = first
+            while offset <= last:
+                block = _pread(fd, min(COPY_BUFFER, last + 1 - offset), offset)
+                hasher.update(block)
+                offset += len(block)
+            next_index += 1
+        return next_index
+
+
+class _NullSlot:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_fd_lock = threading.Lock()
+
+
+def _pwrite(fd: int, data: bytes, offset: int):
+    if hasattr(os, "pwrite"):
+        os.pwrite(fd, data, offset)
+        return
+    with _fd_lock:  # Windows: no positional writes, serialize seek + write
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
+
+
+def _pread(fd: int, length: int, offset: int) -> bytes:
+    if hasattr(os, "pread"):
+        return os.pread(fd, length, offset)
+    with _fd_lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.read(fd, length)
+
+
+def _safe_target(dest_dir: Path, member: str) -> Path:
+    root = dest_dir.resolve()
+    target = (root / member).resolve()
+    if os.path.commonpath([root, target]) != str(root):
+        raise ValueError(f"Archive member escapes destination: {member}")
+    return target
+
+
+def extract_archive(archive_path: Path, dest_dir: Path) -> List[Path]:
+    """
+    Extract a zip or 7z archive member by member, streaming each to disk
+
+    Zip members are copied through ``zipfile.open`` in 1 MB blocks. 7z archives
+    use py7zr when installed, otherwise the ``7z`` command line tool (required
+    for multi-volume ``.7z.001`` packs as published by IGN).
+
+    Args:
+        archive_path: Archive file
+        dest_dir: Directory to extract into
+
+    Returns:
+        Paths of extracted files
+    """
+    archive_path = Path(archive_path)
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    name = archive_path.name.lower()
+
+    if zipfile.is_zipfile(archive_path):
+        extracted = []
+        with zipfile.ZipFile(archive_path) as archive:
+            for member in archive.infolist():
+                target = _safe_target(dest_dir, member.filename)
+                if member.is_dir():
+                    target.mkdir(parents=True, exist_ok=True)
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                with archive.open(member) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst, COPY_BUFFER)
+                extracted.append(target)
+        return extracted
+
+    if ".7z" in name:
+        multi_volume = name.endswith(".001")
+        if PY7ZR_AVAILABLE and not multi_volume:
+            with py7zr.SevenZipFile(archive_path, mode="r") as archive:
+                members = archive.getnames()
+                for member in members:
+                    _safe_target(dest_dir, member)
+                archive.extractall(path=dest_dir)
+            return [dest_dir / m for m in members if (dest_dir / m).is_file()]
+
+        if SEVEN_ZIP_BINARY:
+            before = {p for p in dest_dir.rglob("*") if p.is_file()}
+            subprocess.run(
+                [SEVEN_ZIP_BINARY, "x", "-y", f"-o{dest_dir}", str(archive_path)],
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+            return sorted(p for p in dest_dir.rglob("*") if p.is_file() and p not in before)
+
+        raise RuntimeError("7z extraction requires py7zr or the 7z command line tool")
+
+    raise ValueError(f"Unsupported archive format: {archive_path.name}")
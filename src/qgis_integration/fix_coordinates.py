@@ -2,45 +2,23 @@
 """Fix coordinate system issues in SPOTS database."""
 
 import sqlite3
+import sys
 from pathlib import Path
-import math
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.backend.scrapers.ign_projection import lambert93_to_wgs84
 
 def transform_lambert93_to_wgs84(x, y):
     """
     Transform Lambert93 (EPSG:2154) coordinates to WGS84 (EPSG:4326).
-    Using simplified transformation for French territory.
+    Returns (lat, lon), or (None, None) when the values are not Lambert93.
     """
-    # Lambert93 parameters
-    a = 6378137.0  # Semi-major axis
-    f = 1 / 298.257223563  # Flattening
-    
-    # Lambert93 projection center (France)
-    lambda0 = 3.0 * math.pi / 180  # Central meridian (3°E)
-    phi0 = 46.5 * math.pi / 180    # Central parallel (46.5°N)
-    
-    # False easting and northing
-    x0 = 700000
-    y0 = 6600000
-    
-    # Adjust coordinates
-    x_adj = x - x0
-    y_adj = y - y0
-    
-    # Simplified inverse projection (approximate)
-    # This is a rough approximation for demonstration
-    # In production, use pyproj or GDAL for accurate transformation
-    
-    # Rough estimate for Toulouse/Occitanie region
-    if 100000 < x < 800000 and 5000000 < y < 7000000:
-        # These appear to be Lambert93 coordinates
-        # Approximate transformation for Occitanie region
-        lon = 1.4 + (x - 570000) / 85000  # Rough scaling
-        lat = 43.6 + (y - 6280000) / 110000  # Rough scaling
-    else:
+    if not (100000 < x < 1300000 and 6000000 < y < 7200000):
         # Already in WGS84 or unknown system
         return None, None
-    
-    return lat, lon
+
+    lons, lats = lambert93_to_wgs84([x], [y])
+    return float(lats[0]), float(lons[0])
 
 def fix_coordinates():
     """Fix coordinate system issues in the database."""
@@ -91,7 +69,7 @@ def fix_coordinates():
             print(f"  Swapped coordinates detected")
         
         # Check if in Lambert93 range
-        elif 100000 < lon < 800000 and 5000000 < lat < 7000000:
+        elif 100000 < lon < 1300000 and 6000000 < lat < 7200000:
             # Likely Lambert93
             new_lat, new_lon = transform_lambert93_to_wgs84(lon, lat)
             print(f"  Lambert93 coordinates detected")
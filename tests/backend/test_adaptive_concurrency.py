@@ -0,0 +1,124 @@
+"""Test adaptive (AIMD) concurrency controller"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.backend.scrapers.adaptive_concurrency import (
+    AdaptiveConcurrencyController,
+    get_controller,
+    parse_retry_after,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class TestAdaptiveConcurrencyController:
+    """Test limit adjustments and slot handling"""
+
+    @pytest.fixture
+    def controller(self):
+        return AdaptiveConcurrencyController("test", initial_limit=2, max_limit=8, latency_target=1.0)
+
+    def test_additive_increase_after_healthy_window(self, controller):
+        for _ in range(2):
+            controller.record_success(0.05)
+        assert controller.current_limit == 3
+
+    def test_limit_capped_at_max(self, controller):
+        for _ in range(200):
+            controller.record_success(0.01)
+        assert controller.current_limit == 8
+
+    def test_multiplicative_decrease_on_congestion(self, controller):
+        controller.limit = 8
+        controller.record_failure(status_code=503, latency=0.1)
+        assert controller.current_limit == 4
+
+    def test_client_errors_do_not_shrink_limit(self, controller):
+        controller.record_failure(status_code=404, latency=0.1)
+        assert controller.current_limit == 2
+
+    def test_high_latency_triggers_backoff(self, controller):
+        controller.limit = 8
+        controller.record_success(5.0)
+        assert controller.current_limit == 4
+
+    def test_429_pauses_acquisition(self, controller):
+        controller.record_response(429, 0.1, retry_after="0.2")
+        assert controller.get_stats()["cooling_down"]
+        assert not controller.try_acquire()
+        start = time.monotonic()
+        assert controller.acquire(timeout=2)
+        assert time.monotonic() - start >= 0.15
+        controller.release()
+
+    def test_slots_bounded_by_limit(self, controller):
+        assert controller.try_acquire()
+        assert controller.try_acquire()
+        assert not controller.try_acquire()
+        controller.release()
+        assert controller.try_acquire()
+
+    def test_execute_records_outcome(self, controller):
+        response = controller.execute(lambda: FakeResponse(200))
+        assert response.status_code == 200
+        assert controller.get_stats()["successful_requests"] == 1
+        assert controller.in_flight == 0
+
+    def test_execute_records_timeout(self, controller):
+        def boom():
+            raise TimeoutError("read timed out")
+
+        with pytest.raises(TimeoutError):
+            controller.execute(boom)
+        assert controller.get_stats()["timeouts"] == 1
+        assert controller.in_flight == 0
+
+    async def test_async_slot_woken_by_release_from_thread(self, controller):
+        assert controller.try_acquire() and controller.try_acquire()
+        slot = controller.async_slot()
+        waiter = asyncio.create_task(slot.__aenter__())
+        await asyncio.sleep(0.05)
+        assert not waiter.done() and len(controller._async_waiters) == 1
+
+        threading.Timer(0.05, controller.release).start()
+        await asyncio.wait_for(waiter, 1)
+        assert controller.in_flight == 2 and not controller._async_waiters
+        await slot.__aexit__(None, None, None)
+        assert controller.in_flight == 1
+
+    async def test_async_slot_waits_out_cooldown(self, controller):
+        controller.record_response(429, 0.1, retry_after="0.2")
+        start = time.monotonic()
+        async with controller.async_slot():
+            assert time.monotonic() - start >= 0.15
+            assert controller.in_flight == 1
+        assert controller.in_flight == 0
+
+    async def test_cancelled_async_waiter_is_dropped(self, controller):
+        assert controller.try_acquire() and controller.try_acquire()
+        waiter = asyncio.create_task(controller.async_slot().__aenter__())
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert not controller._async_waiters
+        controller.release()
+        assert controller.in_flight == 1
+
+
+def test_shared_controller_per_host():
+    assert get_controller("example.test") is get_controller("example.test")
+    assert get_controller("tile.openstreetmap.org").max_limit == 2
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
@@ -0,0 +1,113 @@
+"""Test the multi-temporal change-detection pipeline"""
+import json
+import sqlite3
+
+import numpy as np
+import pytest
+
+rasterio = pytest.importorskip("rasterio")
+ndimage = pytest.importorskip("scipy.ndimage")
+pytest.importorskip("shapely")
+from rasterio.transform import from_origin  # noqa: E402
+
+from src.backend.raster.change_detection import ChangeDetector, load_districts, phase_correlation  # noqa: E402
+
+X0, Y0, CELL, SIZE = 570000.0, 6280000.0, 6.0, 600
+SHIFT = (2, -3)  # rows, columns the new scene is misregistered by
+
+
+def texture(seed):
+    return ndimage.gaussian_filter(np.random.default_rng(seed).normal(size=(SIZE, SIZE)), 3)
+
+
+def write_scene(path, bands):
+    with rasterio.open(
+        path, "w", driver="GTiff", width=SIZE, height=SIZE, count=4, dtype="uint16",
+        crs="EPSG:2154", transform=from_origin(X0, Y0, CELL, CELL), nodata=0,
+    ) as dst:
+        dst.write(np.clip(bands, 1, 10000).astype(np.uint16))
+
+
+@pytest.fixture
+def scenes(tmp_path):
+    """Old scene, and a new one with vegetation loss (one block) and gain (across a block edge), shifted"""
+    vegetated = np.stack([800 + 2000 * texture(s) for s in range(4)])
+    vegetated[3] += 1500  # NIR well above red
+    old, new = vegetated.copy(), vegetated.copy()
+    old[3, 300:340, 236:276] = old[2, 300:340, 236:276]  # bare (NDVI ~0), vegetated later
+    new[3, 100:140, 60:100] = new[2, 100:140, 60:100]  # vegetated, bare later
+    write_scene(tmp_path / "old.tif", old)
+
+    shifted = np.zeros_like(new)
+    dy, dx = SHIFT
+    shifted[:, dy:, : SIZE + dx] = new[:, : SIZE - dy, -dx:]
+    write_scene(tmp_path / "new.tif", shifted)
+    return tmp_path / "old.tif", tmp_path / "new.tif"
+
+
+@pytest.fixture
+def districts(tmp_path):
+    """West and east halves of the scene, in Lambert-93"""
+    middle, bottom = X0 + SIZE * CELL / 2, Y0 - SIZE * CELL
+    features = [
+        {
+            "type": "Feature",
+            "properties": {"nom_quartier": name},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[[x0, bottom], [x1, bottom], [x1, Y0], [x0, Y0], [x0, bottom]]],
+            },
+        }
+        for name, x0, x1 in (("Ouest", X0, middle), ("Est", middle, X0 + SIZE * CELL))
+    ]
+    path = tmp_path / "quartiers.geojson"
+    path.write_text(json.dumps({
+        "type": "FeatureCollection",
+        "crs": {"type": "name", "properties": {"name": "urn:ogc:def:crs:EPSG::2154"}},
+        "features": features,
+    }))
+    return path
+
+
+class TestCoregistration:
+    def test_phase_correlation_recovers_shift(self):
+        image = texture(7)[:256, :256]
+        moving = np.roll(image, (5, -4), axis=(0, 1))
+        dy, dx, peak = phase_correlation(image, moving)
+        assert (dy, dx) == pytest.approx((5, -4), abs=0.1) and peak > 0.1
+
+    def test_scene_shift(self, scenes):
+        detector = ChangeDetector(*map(str, scenes), workers=1)
+        assert detector.estimate_shift(window_size=256) == pytest.approx(SHIFT, abs=0.1)
+
+
+class TestChangeDetection:
+    def test_pipeline(self, scenes, districts, tmp_path):
+        detector = ChangeDetector(*map(str, scenes), threshold=0.25, block_size=256, tile_size=128, workers=2)
+        summary = detector.run(str(tmp_path / "out"), prefix="toulouse", districts=load_districts(str(districts)))
+
+        assert summary["shift_pixels"] == pytest.approx(SHIFT, abs=0.1)
+        assert summary["decrease_ha"] == pytest.approx(40 * 40 * CELL**2 / 1e4, rel=0.1)
+        assert summary["increase_ha"] == pytest.approx(40 * 40 * CELL**2 / 1e4, rel=0.1)
+
+        with sqlite3.connect(summary["outputs"]["polygons"]) as conn:
+            rows = conn.execute("SELECT change, area_m2, district FROM changes ORDER BY change").fetchall()
+        # The gain square straddles a block edge and comes out as one polygon
+        assert [(change, district) for change, _, district in rows] == [("decrease", "Ouest"), ("increase", "Ouest")]
+        assert all(area == pytest.approx(40 * 40 * CELL**2, rel=0.1) for _, area, _ in rows)
+
+        by_name = {row["district"]: row for row in summary["districts"]}
+        assert by_name["Est"]["decrease_ha"] == by_name["Est"]["increase_ha"] == 0
+        assert by_name["Ouest"]["polygons"] == 2 and by_name["Ouest"]["mean_difference"] < 0.05
+        assert by_name["Ouest"]["area_ha"] == pytest.approx(SIZE * SIZE / 2 * CELL**2 / 1e4)
+        assert json.loads((tmp_path / "out" / "toulouse_districts.json").read_text())["districts"]
+
+        with rasterio.open(summary["outputs"]["classes"]) as src:
+            classes = src.read(1)
+            assert src.overviews(1)
+        assert (classes[110:130, 70:90] == 1).all() and (classes[310:330, 246:266] == 2).all()
+        assert (classes[400:500, 400:500] == 0).all()
+
+    def test_index_needs_bands(self, scenes):
+        with pytest.raises(ValueError, match="swir"):
+            ChangeDetector(*map(str, scenes), index="bu")
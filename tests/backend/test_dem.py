@@ -0,0 +1,105 @@
+"""Test the local DEM elevation service"""
+import numpy as np
+import pytest
+
+from src.backend.raster.dem import DEMElevationService
+
+SIZE = 121  # 30 arc-second SRTM-like tile, corner-registered
+
+
+@pytest.fixture
+def dem_dir(tmp_path):
+    """N43E001 tile whose elevation is row + 2 * col, with one nodata sample"""
+    rows, cols = np.mgrid[0:SIZE, 0:SIZE]
+    grid = (rows + 2 * cols).astype(">i2")
+    grid[60, 60] = -32768
+    grid.tofile(tmp_path / "N43E001.hgt")
+    return tmp_path
+
+
+def point(row, col):
+    """(lat, lon) of fractional sample position (row, col) in the N43E001 tile"""
+    return 44 - row / (SIZE - 1), 1 + col / (SIZE - 1)
+
+
+class TestDEMElevationService:
+    """Test tile discovery, bilinear sampling and batch lookups"""
+
+    def test_bilinear_interpolation(self, dem_dir):
+        service = DEMElevationService([str(dem_dir)])
+        assert service.elevation(*point(10.5, 20.25)) == pytest.approx(10.5 + 40.5)
+
+    def test_nodata_neighbour_is_ignored(self, dem_dir):
+        service = DEMElevationService([str(dem_dir)])
+        # Between samples (60, 59) = 178 and (60, 60) = nodata: only the valid one counts
+        assert service.elevation(*point(60, 59.5)) == pytest.approx(178)
+
+    def test_batch_matches_single_lookups_and_marks_gaps(self, dem_dir):
+        service = DEMElevationService([str(dem_dir)])
+        lats, lons = zip(point(0, 0), point(120, 120), point(33.3, 71.7), (45.5, 1.5))
+        values = service.elevations(lats, lons)
+
+        assert values[:3] == pytest.approx([0, 360, 33.3 + 143.4])
+        assert np.isnan(values[3])
+        assert service.elevation(45.5, 1.5) is None
+
+    def test_finer_asc_tile_wins_over_srtm(self, dem_dir):
+        pyproj = pytest.importorskip("pyproj")
+        x, y = pyproj.Transformer.from_crs("EPSG:4326", "EPSG:2154", always_xy=True).transform(1.5, 43.5)
+        x0, y0 = round(x) - 10, round(y) - 10
+        (dem_dir / "RGEALTI_tile.asc").write_text(
+            f"ncols 4\nnrows 4\nxllcorner {x0}\nyllcorner {y0}\ncellsize 5\nNODATA_value -99999\n"
+            + "\n".join(" ".join(["1234.5"] * 4) for _ in range(4))
+            + "\n"
+        )
+        service = DEMElevationService([str(dem_dir)], cache_dir=str(dem_dir / "cache"))
+
+        assert service.elevation(43.5, 1.5) == pytest.approx(1234.5)
+        assert service.get_stats()["groups"][0]["sources"] == ["RGE ALTI"]
+        assert list((dem_dir / "cache").glob("*.npy"))
+
+    def test_geotiff_converted_in_row_windows(self, tmp_path, monkeypatch):
+        rasterio = pytest.importorskip("rasterio")
+        from rasterio.transform import from_origin
+
+        from src.backend.raster import dem
+
+        values = np.arange(300 * 40, dtype=np.float32).reshape(300, 40)
+        profile = {"driver": "GTiff", "width": 40, "height": 300, "count": 1, "dtype": "float32", "crs": "EPSG:4326",
+                   "transform": from_origin(1.0, 44.0, 0.001, 0.001), "tiled": True, "blockxsize": 16,
+                   "blockysize": 16}
+        with rasterio.open(tmp_path / "dem.tif", "w", **profile) as dst:
+            dst.write(values, 1)
+
+        reads = []
+        real_open = rasterio.open
+
+        def tracking_open(*args, **kwargs):
+            src = real_open(*args, **kwargs)
+            read = src.read
+            src.read = lambda *a, **kw: reads.append(kw.get("window")) or read(*a, **kw)
+            return src
+
+        monkeypatch.setattr(dem, "CONVERT_WINDOW_ROWS", 100)
+        monkeypatch.setattr(dem.rasterio, "open", tracking_open)
+        service = DEMElevationService([str(tmp_path)], cache_dir=str(tmp_path / "cache"))
+
+        assert service.elevation(44.0 - 0.0105, 1.0 + 0.0205) == pytest.approx(values[10, 20])
+        assert [window.height for window in reads] == [96, 96, 96, 12]
+        np.testing.assert_array_equal(np.load(next((tmp_path / "cache").glob("*.npy"))), values)
+
+    def test_missing_directory_is_unavailable(self, tmp_path):
+        service = DEMElevationService([str(tmp_path / "missing")])
+        assert not service.available
+        assert service.elevation(43.6, 1.44) is None
+
+    def test_french_geocoder_uses_dem_first(self, dem_dir, tmp_path, monkeypatch):
+        monkeypatch.setenv("SPOTS_GEOCODE_CACHE", str(tmp_path / "geo.db"))
+        from src.backend.scrapers.geocoding_france import OccitanieGeocoder
+
+        geocoder = OccitanieGeocoder()
+        geocoder.dem = DEMElevationService([str(dem_dir)])
+        monkeypatch.setattr("src.backend.scrapers.geocoding_france.requests.get", pytest.fail)
+
+        assert geocoder.get_elevation(*point(1, 1)) == pytest.approx(3)
+        assert geocoder.get_elevations([point(2, 2), point(4, 0)]) == pytest.approx([6, 4])
@@ -0,0 +1,96 @@
+"""Test the offline place-name gazetteer"""
+import gzip
+import json
+
+import pytest
+
+from src.backend.scrapers.gazetteer import Gazetteer, build_gazetteer, fold, toponyms_from_file
+from src.backend.scrapers.offline_geocoder import build_store
+
+PLACES = [
+    {"name": "Saint-Béat-Lez", "latitude": 42.9150, "longitude": 0.6920, "kind": "commune", "department": "31"},
+    {"name": "Montréjeau", "latitude": 43.0860, "longitude": 0.5680, "kind": "commune", "department": "31"},
+    {"name": "Lac d'Oô", "latitude": 42.7430, "longitude": 0.4940, "kind": "toponyme"},
+    {"name": "Castelnau", "latitude": 43.6000, "longitude": 1.1000, "kind": "commune", "weight": 0.9},
+    {"name": "Castelnau", "latitude": 44.4000, "longitude": 2.6000, "kind": "commune", "weight": 0.3},
+    {"name": "Mas", "latitude": 43.2000, "longitude": 2.0000, "kind": "commune"},
+]
+
+
+@pytest.fixture
+def gazetteer():
+    return Gazetteer(PLACES)
+
+
+class TestGazetteer:
+    """Test accent folding, trie matching and ambiguity scoring"""
+
+    def test_fold(self):
+        assert fold("Lac d'Oô, Œillet") == "lac d'oo, oeillet"
+
+    def test_scan_finds_accented_and_abbreviated_names(self, gazetteer):
+        text = "Randonnée vers le lac d'oo depuis St-Béat-Lez, puis retour à MONTREJEAU."
+        matches = gazetteer.scan(text)
+
+        assert [m["name"] for m in matches] == ["Lac d'Oô", "Saint-Béat-Lez", "Montréjeau"]
+        assert text[matches[1]["start"] : matches[1]["end"]] == "St-Béat-Lez"
+        assert matches[2]["score"] > matches[0]["score"]  # lowercase matches score lower
+
+    def test_homonyms_are_ambiguous(self, gazetteer):
+        match = gazetteer.scan("Château de Castelnau")[0]
+        assert match["ambiguity"] == 2
+        assert match["latitude"] == 43.6  # heavier candidate wins
+        assert match["score"] < gazetteer.scan("Montréjeau")[0]["score"]
+
+        near = gazetteer.scan("Château de Castelnau", near=(44.3, 2.5))[0]
+        assert near["latitude"] == 44.4
+
+    def test_common_words_need_capitals(self, gazetteer):
+        assert gazetteer.scan("un vieux mas en pierre") == []
+        assert gazetteer.scan("près de Mas")[0]["name"] == "Mas"
+
+    def test_best_match_threshold(self, gazetteer):
+        assert gazetteer.best_match("rien à signaler ici") is None
+        assert gazetteer.best_match("Cascade près de Montréjeau")["department"] == "31"
+
+
+class TestSources:
+    def test_build_from_ban_store_and_toponyms(self, tmp_path):
+        csv_path = tmp_path / "adresses-31.csv"
+        csv_path.write_text(
+            "numero;rep;nom_voie;code_postal;code_insee;nom_commune;lon;lat\n"
+            "1;;Rue A;31160;31033;Aspet;0.7900;43.0100\n"
+            "2;;Rue B;31160;31033;Aspet;0.8000;43.0200\n"
+            "3;;Rue C;31000;31555;Toulouse;1.4440;43.6040\n"
+        )
+        build_store([csv_path], tmp_path / "ban.npz")
+        geojson = tmp_path / "toponymes.geojson.gz"
+        with gzip.open(geojson, "wt", encoding="utf-8") as handle:
+            features = [
+                {
+                    "properties": {"graphie_du_toponyme": "Pic du Cagire", "nature_de_l_objet": "Sommet"},
+                    "geometry": {"type": "Point", "coordinates": [0.8, 42.95]},
+                },
+                {"properties": {"graphie_du_toponyme": "Paris"}, "geometry": {"type": "Point", "coordinates": [2.35, 48.85]}},
+            ]
+            json.dump({"features": features}, handle)
+
+        output = tmp_path / "gazetteer.json.gz"
+        gazetteer = build_gazetteer(tmp_path / "ban.npz", [geojson], output)
+
+        assert len(gazetteer) == 3  # Paris is outside Occitanie
+        aspet = gazetteer.best_match("Balade autour d'Aspet")
+        assert (aspet["latitude"], aspet["longitude"]) == pytest.approx((43.015, 0.795))
+        assert aspet["department"] == "31"
+        assert Gazetteer.load(output).best_match("Montée au Pic du Cagire")["kind"] == "toponyme"
+        assert len(toponyms_from_file(geojson)) == 1
+
+    def test_extractor_resolves_offline(self, gazetteer, monkeypatch):
+        pytest.importorskip("geopy")
+        from src.backend.scrapers.enhanced_coordinate_extractor import EnhancedCoordinateExtractor
+
+        extractor = EnhancedCoordinateExtractor()
+        extractor.gazetteer = gazetteer
+        monkeypatch.setattr(extractor.geocoder, "geocode", pytest.fail)
+
+        assert extractor.extract_from_text("Château abandonné près de Montréjeau") == (43.086, 0.568)
@@ -0,0 +1,152 @@
+"""Test the async geocoding client (coalescing, provider fallback and hedging)"""
+import asyncio
+import threading
+import time
+from collections import Counter
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.backend.scrapers.geocoding_async import AsyncGeocoder
+from src.backend.scrapers.geocoding_cache import GeocodingCache
+from src.backend.scrapers.geocoding_france import OccitanieGeocoder
+
+
+def feature(label, lon=1.444, lat=43.6045):
+    return {
+        "geometry": {"coordinates": [lon, lat]},
+        "properties": {"label": label, "score": 0.9, "city": "Toulouse", "context": "31, Haute-Garonne, Occitanie"},
+    }
+
+
+class FakeBAN:
+    """BAN (/geocodage/...) and legacy (/...) endpoints with per-provider delay and status"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.delay = {"ban": 0.0, "legacy": 0.0}
+        self.status = {"ban": 200, "legacy": 200}
+        self.found = True
+
+    def handler(self, provider, kind):
+        async def handle(request):
+            self.calls[(provider, kind)] += 1
+            await asyncio.sleep(self.delay[provider])
+            if self.status[provider] != 200:
+                return web.json_response({}, status=self.status[provider])
+            label = request.query.get("q", "12 Rue de Metz 31000 Toulouse")
+            features = [feature(f"{label} ({provider})")] if self.found else []
+            return web.json_response({"features": features})
+
+        return handle
+
+    def app(self):
+        app = web.Application()
+        for provider, prefix in (("ban", "/geocodage"), ("legacy", "")):
+            for kind in ("search", "reverse"):
+                app.router.add_get(f"{prefix}/{kind}", self.handler(provider, kind))
+        return app
+
+
+@pytest.fixture
+async def ban():
+    fake = FakeBAN()
+    server = TestServer(fake.app())
+    await server.start_server()
+    fake.url = str(server.make_url("")).rstrip("/")
+    yield fake
+    await server.close()
+
+
+@pytest.fixture
+async def client(ban, tmp_path):
+    geocoder = OccitanieGeocoder()
+    geocoder.geocode_cache = GeocodingCache(str(tmp_path / "geo.db"))
+    geocoder.offline_geocoder.store_path = tmp_path / "missing.npz"
+    geocoder.premium_service.enabled = False
+    geocoder.ban_base_url = f"{ban.url}/geocodage"
+    geocoder.ban_legacy_url = ban.url
+    async with AsyncGeocoder(geocoder, hedge_delay=0.1, budgets={"ban": 1.0, "legacy": 1.0}) as client:
+        yield client
+
+
+class TestAsyncGeocoder:
+    """Test request coalescing, caching, fallback and hedging"""
+
+    async def test_concurrent_identical_lookups_share_one_call(self, client, ban):
+        ban.delay["ban"] = 0.05
+        results = await asyncio.gather(*[client.geocode_address("Capitole Toulouse") for _ in range(20)])
+
+        assert ban.calls[("ban", "search")] == 1
+        assert client.coalesced_requests == 19
+        assert all(r == results[0] for r in results)
+        assert results[0]["precision"] == "ban"
+
+        # Answered from the persistent cache afterwards
+        await client.geocode_address("capitole  toulouse")
+        assert ban.calls[("ban", "search")] == 1
+
+    async def test_error_falls_back_to_legacy(self, client, ban):
+        ban.status["ban"] = 503
+        address = await client.reverse_geocode(43.6, 1.44)
+
+        assert address.endswith("(legacy)")
+        assert client.geocoder.geocode_cache.get_reverse(43.6, 1.44) == address
+
+    async def test_slow_primary_is_hedged(self, client, ban):
+        ban.delay["ban"] = 0.5
+        result = await client.geocode_address("Jacobins")
+
+        assert result["precision"] == "legacy"
+        assert client.hedged_requests == 1
+        assert ban.calls[("legacy", "search")] == 1
+
+    async def test_not_found_is_definitive(self, client, ban):
+        ban.found = False
+        assert await client.geocode_address("Nowhere at all") is None
+        assert ban.calls[("legacy", "search")] == 0
+        assert client.geocoder.geocode_cache.get_geocode("Nowhere at all") is None
+
+    async def test_budget_exhausted_everywhere(self, client, ban):
+        ban.delay = {"ban": 2.0, "legacy": 2.0}
+        assert await client.reverse_geocode(43.7, 1.5) is None
+        assert client.provider_failures == {"premium": 0, "ban": 1, "legacy": 1}
+
+    async def test_cache_and_offline_store_stay_off_the_loop(self, client, ban):
+        def slow(original):
+            def wrapper(*args):
+                time.sleep(0.3)  # a cold sqlite page or a KD-tree build
+                return original(*args)
+
+            return wrapper
+
+        client.geocoder.geocode_cache.get_reverse = slow(client.geocoder.geocode_cache.get_reverse)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        try:
+            assert await client.reverse_geocode(43.6045, 1.444)
+        finally:
+            task.cancel()
+        assert ticks >= 10  # the loop kept running while the cache was read
+
+    async def test_premium_quota_check_stays_off_the_loop(self, client, ban):
+        premium = client.geocoder.premium_service
+        premium.enabled = True
+        ban.found = False
+        checked_on = []
+
+        def should_upgrade(ban_result):
+            checked_on.append(threading.get_ident())
+            return False  # quota spent
+
+        premium.should_upgrade = should_upgrade
+        assert await client.reverse_geocode(43.61, 1.45) is None
+        assert checked_on and threading.get_ident() not in checked_on  # a worker thread, not the loop's
@@ -0,0 +1,95 @@
+"""Test BAN CSV batch geocoding"""
+import csv
+import io
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.backend.scrapers.geocoding_cache import GeocodingCache
+from src.backend.scrapers.geocoding_france import OccitanieGeocoder
+
+
+def csv_response(rows, status=200):
+    """Fake streamed response; the body arrives in small chunks to exercise line reassembly"""
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(rows[0].keys()))
+    writer.writeheader()
+    writer.writerows(rows)
+    body = out.getvalue().encode("utf-8")
+    response = MagicMock(status_code=status)
+    response.iter_content.side_effect = lambda chunk_size: (body[i : i + 7] for i in range(0, len(body), 7))
+    response.__enter__.return_value = response
+    return response
+
+
+def uploaded_rows(post_call):
+    payload = post_call.kwargs["files"]["data"][1].decode("utf-8")
+    return list(csv.DictReader(io.StringIO(payload)))
+
+
+@pytest.fixture
+def geocoder(tmp_path):
+    geocoder = OccitanieGeocoder()
+    geocoder.geocode_cache = GeocodingCache(str(tmp_path / "geo.db"))
+    geocoder.min_request_interval = 0
+    return geocoder
+
+
+class TestGeocodeMany:
+    """Test chunked uploads, result mapping and per-item fallback"""
+
+    def test_results_follow_input_order_and_dedupe(self, geocoder):
+        def answer(url, files, data, stream, timeout):
+            rows = list(csv.DictReader(io.StringIO(files["data"][1].decode())))
+            return csv_response([
+                {**row, "latitude": "43.6", "longitude": "1.44", "result_label": f"{row['q']}, Toulouse",
+                 "result_score": "0.8", "result_context": "31, Haute-Garonne, Occitanie", "result_status": "ok"}
+                for row in rows
+            ])
+
+        with patch("src.backend.scrapers.geocoding_france.requests.post", side_effect=answer) as post:
+            results = geocoder.geocode_many(["Capitole", "Jacobins", "Capitole", ""])
+
+        assert post.call_count == 1
+        assert [row["q"] for row in uploaded_rows(post.call_args)] == ["Capitole", "Jacobins"]
+        assert results[0]["formatted_address"] == "Capitole, Toulouse"
+        assert results[0]["department"] == "31"
+        assert results[0] == results[2]
+        assert results[3] is None
+
+    def test_not_found_is_cached_and_errors_fall_back(self, geocoder):
+        empty = {"latitude": "", "longitude": "", "result_label": ""}
+        rows = [
+            {"id": "0", "q": "Nowhere", **empty, "result_status": "not-found"},
+            {"id": "1", "q": "Albi", **empty, "result_status": "error"},
+        ]
+        post = patch("src.backend.scrapers.geocoding_france.requests.post", return_value=csv_response(rows))
+        with post, patch.object(geocoder, "geocode_address", return_value={"formatted_address": "Albi"}) as single:
+            results = geocoder.geocode_many(["Nowhere", "Albi"])
+
+        assert results == [None, {"formatted_address": "Albi"}]
+        single.assert_called_once_with("Albi")
+        assert geocoder.geocode_cache.get_geocode("Nowhere") is None
+
+    def test_rejected_chunk_falls_back_per_item(self, geocoder):
+        geocoder.batch_chunk_size = 2
+        with patch(
+            "src.backend.scrapers.geocoding_france.requests.post", return_value=csv_response([{"id": ""}], 503)
+        ) as post, patch.object(geocoder, "geocode_address", return_value=None) as single:
+            geocoder.geocode_many(["a", "b", "c"])
+
+        assert post.call_count == 4  # two chunks x (IGN endpoint, legacy endpoint)
+        assert single.call_count == 3
+
+
+class TestReverseMany:
+    def test_cached_points_are_not_uploaded(self, geocoder):
+        geocoder.geocode_cache.put_reverse(43.6, 1.44, "Place du Capitole", "ban")
+        rows = [{"id": "0", "lat": "42.7", "lon": "2.89", "result_label": "Perpignan", "result_status": "ok"}]
+
+        with patch("src.backend.scrapers.geocoding_france.requests.post", return_value=csv_response(rows)) as post:
+            results = geocoder.reverse_many([(43.6, 1.44), (42.7, 2.89)])
+
+        assert results == ["Place du Capitole", "Perpignan"]
+        assert len(uploaded_rows(post.call_args)) == 1
+        assert geocoder.geocode_cache.get_reverse(42.7, 2.89) == "Perpignan"
@@ -0,0 +1,104 @@
+"""Test the persistent geocoding cache"""
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.backend.scrapers.geocoding_cache import (
+    MISS,
+    GeocodingCache,
+    coordinate_key,
+    get_geocoding_cache,
+    normalize_address,
+)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return GeocodingCache(str(tmp_path / "geocode.db"), precision=4, negative_ttl=0.2)
+
+
+class TestKeys:
+    """Test address normalization and coordinate rounding"""
+
+    def test_normalize_folds_accents_and_abbreviations(self):
+        assert normalize_address("12 av. Jean-Jaurès, TOULOUSE") == "12 avenue jean jaures toulouse"
+        assert normalize_address("12 Avenue Jean Jaures Toulouse") == "12 avenue jean jaures toulouse"
+
+    def test_coordinate_key_rounds_to_precision(self):
+        assert coordinate_key(43.604652, 1.444209, 4) == "43.6047,1.4442"
+        assert coordinate_key(43.60471, 1.44421, 4) == coordinate_key(43.60474, 1.44419, 4)
+
+
+class TestGeocodingCache:
+    """Test hits, negative entries, expiry and provenance"""
+
+    def test_miss_then_hit(self, cache):
+        assert cache.get_geocode("1 rue de Metz, Toulouse") is MISS
+        cache.put_geocode("1 rue de Metz, Toulouse", {"latitude": 43.6, "longitude": 1.44}, "ban")
+
+        assert cache.get_geocode("1 r. de Metz Toulouse") == {"latitude": 43.6, "longitude": 1.44}
+        assert cache.get_stats()["hits"] == 1
+
+    def test_negative_entry_is_none_not_miss(self, cache):
+        cache.put_reverse(42.0, 2.0, None, "ban")
+
+        assert cache.get_reverse(42.0, 2.0) is None
+        assert cache.get_stats()["negative_hits"] == 1
+
+    def test_negative_entry_expires_sooner(self, cache):
+        cache.put_reverse(42.0, 2.0, None, "ban")
+        cache.put_reverse(43.0, 2.0, "Place du Capitole", "ban")
+        time.sleep(0.3)
+
+        assert cache.get_reverse(42.0, 2.0) is MISS
+        assert cache.get_reverse(43.0, 2.0) == "Place du Capitole"
+        assert cache.purge_expired() == 1
+
+    def test_provider_provenance(self, cache):
+        cache.put_elevation(43.6, 1.44, 146.2, "ign")
+        entry = cache.get_entry("elevation", coordinate_key(43.6, 1.44, cache.precision))
+
+        assert entry["provider"] == "ign"
+        assert entry["result"] == 146.2
+        assert cache.get_stats()["entries"] == {"elevation:ign": {"total": 1, "negative": 0}}
+
+    def test_provider_kinds_are_isolated(self, cache):
+        cache.put_reverse(43.6, 1.44, None, "ban")
+
+        assert cache.get_reverse(43.6, 1.44, kind="reverse_osm") is MISS
+
+    def test_shared_instance_per_path(self, tmp_path):
+        path = str(tmp_path / "shared.db")
+        assert get_geocoding_cache(path) is get_geocoding_cache(path)
+
+
+class TestFrenchGeocoderIntegration:
+    """The BAN geocoder reads and fills the shared cache"""
+
+    def test_second_lookup_skips_network(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("SPOTS_GEOCODE_CACHE", str(tmp_path / "geo.db"))
+        from src.backend.scrapers.geocoding_france import FrenchGeocodingMixin
+
+        response = MagicMock(status_code=200, url="https://data.geopf.fr/geocodage/search")
+        response.json.return_value = {
+            "features": [{"properties": {"label": "Toulouse", "score": 0.9}, "geometry": {"coordinates": [1.44, 43.6]}}]
+        }
+        with patch("src.backend.scrapers.geocoding_france.requests.get", return_value=response) as get:
+            geocoder = FrenchGeocodingMixin()
+            first = geocoder.geocode_address("Toulouse")
+            second = FrenchGeocodingMixin().geocode_address("toulouse")
+
+        assert first == second
+        assert first["precision"] == "ban"
+        assert get.call_count == 1
+
+    def test_transport_errors_are_not_cached(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("SPOTS_GEOCODE_CACHE", str(tmp_path / "geo.db"))
+        from src.backend.scrapers.geocoding_france import FrenchGeocodingMixin
+
+        with patch("src.backend.scrapers.geocoding_france.requests.get", side_effect=ConnectionError("down")):
+            geocoder = FrenchGeocodingMixin()
+            assert geocoder.reverse_geocode(43.6, 1.44) is None
+
+        assert geocoder.geocode_cache.get_reverse(43.6, 1.44) is MISS
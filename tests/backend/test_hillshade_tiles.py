@@ -0,0 +1,116 @@
+"""Test hillshade / slope-class MBTiles rendering"""
+import io
+import sqlite3
+
+import numpy as np
+import pytest
+
+rasterio = pytest.importorskip("rasterio")
+Image = pytest.importorskip("PIL.Image")
+from rasterio.transform import from_origin  # noqa: E402
+
+from src.backend.raster import hillshade_tiles  # noqa: E402
+from src.backend.raster.hillshade_tiles import (  # noqa: E402
+    TerrainTileGenerator,
+    encode_slope_classes,
+    hillshade,
+    render_metatile,
+)
+from src.backend.raster.tiler import tiles_for_bounds  # noqa: E402
+
+X0, Y0, CELL, SIZE = 570000.0, 6280000.0, 5.0, 800
+
+
+@pytest.fixture
+def dem(tmp_path):
+    """A 4 km wide, 600 m high Gaussian hill in Lambert-93"""
+    rows, cols = np.mgrid[0:SIZE, 0:SIZE]
+    r2 = (rows - SIZE / 2) ** 2 + (cols - SIZE / 2) ** 2
+    z = 300.0 + 600.0 * np.exp(-r2 / (2 * (SIZE / 6) ** 2))
+    path = tmp_path / "31.tif"
+    with rasterio.open(
+        path, "w", driver="GTiff", width=SIZE, height=SIZE, count=1, dtype="float32",
+        crs="EPSG:2154", transform=from_origin(X0, Y0, CELL, CELL), nodata=-99999,
+    ) as dst:
+        dst.write(z.astype("float32"), 1)
+    return path
+
+
+def decode(png):
+    return np.asarray(Image.open(io.BytesIO(png)).convert("RGBA"))
+
+
+def render_with(generator, z, tile, metatile):
+    """Render the metatile containing ``tile`` in-process and return that tile's pixels"""
+    options = dict(generator.options, metatile=metatile)
+    hillshade_tiles._init_worker(generator.dem_paths, generator.source_bounds, options)
+    _, x, y = tile
+    rows = render_metatile(z, x // metatile, y // metatile)["hillshade"]
+    tms_y = 2**z - 1 - y
+    return decode(next(png for _, tx, ty, png in rows if (tx, ty) == (x, tms_y)))
+
+
+class TestShading:
+    def test_sun_facing_slopes_are_brighter(self):
+        slope = np.full(2, 30.0)
+        shade = hillshade(slope, np.array([315.0, 135.0]), azimuth=315, altitude=45)
+        assert shade[0] > hillshade(np.zeros(1), np.full(1, np.nan))[0] > shade[1]
+
+    def test_slope_classes(self):
+        rgba = encode_slope_classes(np.array([5.0, 20.0, 32.0, 50.0, np.nan]))
+        assert rgba[0, 3] == 0 and rgba[4, 3] == 0
+        assert len({tuple(c) for c in rgba[1:4]}) == 3
+
+
+class TestMetatiles:
+    """Test that metatile rendering is seamless"""
+
+    def test_tile_identical_whatever_the_metatile(self, dem):
+        generator = TerrainTileGenerator([str(dem)], min_zoom=14, max_zoom=14, workers=1)
+        tiles = sorted(tiles_for_bounds(generator.source_bounds[0], 14))
+        tile = tiles[len(tiles) // 2]
+
+        alone = render_with(generator, 14, tile, metatile=1)
+        grouped = render_with(generator, 14, tile, metatile=4)
+        assert np.abs(alone.astype(int) - grouped.astype(int)).max() <= 1
+
+    def test_no_seam_between_neighbours(self, dem):
+        generator = TerrainTileGenerator([str(dem)], min_zoom=15, max_zoom=15, workers=1)
+        tiles = sorted(tiles_for_bounds(generator.source_bounds[0], 15))
+        _, x, y = tiles[len(tiles) // 2]
+        left = render_with(generator, 15, (15, x, y), metatile=1)
+        right = render_with(generator, 15, (15, x + 1, y), metatile=1)
+
+        # Shading is continuous across the edge: the step there is no larger than the steps inside a tile
+        edge = np.abs(left[:, -1, 3].astype(int) - right[:, 0, 3].astype(int)).max()
+        inside = np.abs(np.diff(left[:, -8:, 3].astype(int), axis=1)).max()
+        assert edge <= inside + 1
+
+
+class TestGenerate:
+    def test_generate_both_layers(self, dem, tmp_path):
+        generator = TerrainTileGenerator([str(dem)], min_zoom=11, max_zoom=14, metatile=2, workers=2)
+        stats = generator.generate(str(tmp_path / "derived"), prefix="test")
+
+        for layer in ("hillshade", "slope"):
+            with sqlite3.connect(stats["outputs"][layer]) as conn:
+                count = conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+                zooms = [z for (z,) in conn.execute("SELECT DISTINCT zoom_level FROM tiles ORDER BY 1")]
+                metadata = dict(conn.execute("SELECT name, value FROM metadata").fetchall())
+            assert count == stats["tiles"][layer] > 0
+            assert zooms == [11, 12, 13, 14]
+            assert metadata["category"] == "overlay" and metadata["format"] == "png"
+
+    def test_registered_as_offline_overlay(self, dem, tmp_path, monkeypatch):
+        from src.backend.api import ign_offline
+
+        monkeypatch.setattr(ign_offline, "DERIVED_DIR", tmp_path / "derived")
+        monkeypatch.setattr(ign_offline, "MBTILES_SOURCES", dict(ign_offline.MBTILES_SOURCES))
+        TerrainTileGenerator([str(dem)], min_zoom=12, max_zoom=12, layers=["slope"], workers=1).generate(
+            str(tmp_path / "derived")
+        )
+        assert not list((tmp_path / "derived").glob("*.part"))
+        # A layer still being rendered is not registered
+        (tmp_path / "derived" / "rgealti_hillshade.mbtiles.part").touch()
+        assert ign_offline.register_derived_sources() == ["rgealti_slope"]
+        assert ign_offline.register_derived_sources() == []
@@ -0,0 +1,137 @@
+"""Test the pre-tiled department data (COG windows and GeoPackage coverage)"""
+import math
+import time
+
+import numpy as np
+import pytest
+
+rasterio = pytest.importorskip("rasterio")
+
+from src.backend.scrapers.ign_feature_writers import GeoPackageWriter  # noqa: E402
+from src.backend.scrapers.ign_pretiled import PretiledStore, build_dem_cog  # noqa: E402
+
+# Lambert-93 origin of the synthetic DEM (near Toulouse), 5 m cells, 2 x 2 tiles of 200 x 200
+X0, Y0, CELL, SIZE = 570000.0, 6280000.0, 5.0, 200
+
+
+def write_asc(path, xll, yll, values):
+    header = (
+        f"ncols {values.shape[1]}\nnrows {values.shape[0]}\nxllcorner {xll}\nyllcorner {yll}\n"
+        f"cellsize {CELL}\nNODATA_value -99999\n"
+    )
+    path.write_text(header + "\n".join(" ".join(f"{v:.2f}" for v in row) for row in values))
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A plane rising 10 m per 100 m eastwards (slope ≈ 5.71°), split into four ASC tiles"""
+    tiles = []
+    for i in range(2):
+        for j in range(2):
+            xll, yll = X0 + i * SIZE * CELL, Y0 + j * SIZE * CELL
+            xs = xll + (np.arange(SIZE) + 0.5) * CELL
+            values = np.tile(100.0 + (xs - X0) * 0.1, (SIZE, 1))
+            path = tmp_path / f"tile_{i}_{j}.asc"
+            write_asc(path, xll, yll, values)
+            tiles.append(path)
+
+    root = tmp_path / "processed"
+    build_dem_cog(tiles, root / "rgealti" / "31.tif", blocksize=128)
+    (root / "bd_foret").mkdir()
+
+    with GeoPackageWriter(root / "bd_foret" / "31.gpkg", epsg=2154, layer_name="bd_foret") as writer:
+        writer.write(
+            [
+                {  # Western half of a 1 km square around the centre
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Polygon",
+                        "coordinates": [[[571000, 6281000], [572000, 6281000], [572000, 6283000], [571000, 6283000],
+                                         [571000, 6281000]]],
+                    },
+                    "properties": {"TFV": "Forêt fermée de feuillus"},
+                },
+                {  # Far away, must not be read
+                    "type": "Feature",
+                    "geometry": {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]]},
+                    "properties": {"TFV": "Lande"},
+                },
+            ]
+        )
+    return PretiledStore(root)
+
+
+class TestBuildCOG:
+    def test_cog_layout(self, store):
+        with rasterio.open(store.path_for("rgealti", "31")) as src:
+            assert src.width == src.height == 2 * SIZE
+            assert src.block_shapes[0] == (128, 128)
+            assert src.overviews(1)
+            assert src.crs.to_epsg() == 2154
+            assert src.bounds.left == X0 and src.bounds.top == Y0 + 2 * SIZE * CELL
+
+
+class TestWindowedReads:
+    """Test statistics computed from the window around a spot"""
+
+    def test_elevation_stats_on_plane(self, store):
+        x, y = X0 + 1000.0, Y0 + 1000.0
+        stats = store.elevation_stats(x, y, 300)
+
+        assert stats["spot_elevation"] == pytest.approx(200.0, abs=0.5)
+        assert stats["elevation_range"] == pytest.approx(60.0, abs=1.5)
+        assert stats["slope_average"] == pytest.approx(math.degrees(math.atan(0.1)), abs=0.2)
+        assert stats["ruggedness_index"] < 0.05
+
+    def test_outside_coverage(self, store):
+        assert store.elevation_stats(X0 - 5000, Y0, 300) is None
+        assert store.coverage("bd_foret", 900000.0, 6800000.0, 500) is None
+
+    def test_forest_coverage_clips_to_circle(self, store):
+        coverage = store.coverage("bd_foret", 572000.0, 6282000.0, 500)
+        assert coverage["coverage_percent"] == pytest.approx(50.0, abs=0.5)
+        assert coverage["dominant_type"] == "Forêt fermée de feuillus"
+        assert [c["type"] for c in coverage["classes"]] == ["Forêt fermée de feuillus"]
+
+    def test_overlapping_departments(self, store, tmp_path):
+        """A neighbouring department whose extent covers the spot but has no data there"""
+        nodata = np.full((SIZE, SIZE), -99999.0)
+        write_asc(tmp_path / "ariege.asc", X0 + 100 * CELL, Y0 + 100 * CELL, nodata)
+        build_dem_cog([tmp_path / "ariege.asc"], store.root / "rgealti" / "09.tif", blocksize=128)
+        with GeoPackageWriter(store.root / "bd_foret" / "09.gpkg", epsg=2154, layer_name="bd_foret") as writer:
+            writer.write(
+                [
+                    {  # Extent over the spot, with a hole around it
+                        "type": "Feature",
+                        "geometry": {
+                            "type": "Polygon",
+                            "coordinates": [
+                                [[570000, 6280000], [574000, 6280000], [574000, 6284000], [570000, 6284000],
+                                 [570000, 6280000]],
+                                [[571000, 6281000], [572200, 6281000], [572200, 6283000], [571000, 6283000],
+                                 [571000, 6281000]],
+                            ],
+                        },
+                        "properties": {"TFV": "Lande"},
+                    }
+                ]
+            )
+        store.refresh()
+
+        assert [p.name for p in store.find("rgealti", X0 + 1000.0, Y0 + 1000.0)] == ["09.tif", "31.tif"]
+        stats = store.elevation_stats(X0 + 1000.0, Y0 + 1000.0, 300)
+        assert stats["source"] == "31.tif" and stats["spot_elevation"] == pytest.approx(200.0, abs=0.5)
+
+        coverage = store.coverage("bd_foret", 571500.0, 6282000.0, 400)
+        assert coverage["coverage_percent"] == pytest.approx(100.0, abs=0.5)
+        assert coverage["dominant_type"] == "Forêt fermée de feuillus"
+        assert [c["type"] for c in coverage["classes"]] == ["Forêt fermée de feuillus"]
+        assert coverage["source"] == "31.gpkg"
+
+    def test_reads_are_fast(self, store):
+        store.elevation_stats(X0 + 1000.0, Y0 + 1000.0, 500)
+        start = time.perf_counter()
+        for _ in range(10):
+            store.elevation_stats(X0 + 1000.0, Y0 + 1000.0, 500)
+            store.coverage("bd_foret", 572000.0, 6282000.0, 500)
+        assert (time.perf_counter() - start) / 10 < 0.05
@@ -0,0 +1,74 @@
+"""Test vectorized Lambert-93 / WGS84 / Web Mercator transformations"""
+import numpy as np
+import pytest
+
+from src.backend.scrapers.ign_projection import (
+    LAMBERT93,
+    WEB_MERCATOR,
+    WGS84,
+    epsg_code,
+    get_transformer,
+    lambert93_to_wgs84,
+    transform,
+    transform_bbox,
+    wgs84_to_lambert93,
+)
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(1)
+    return rng.uniform(-0.4, 4.9, 5000), rng.uniform(42.3, 45.1, 5000)
+
+
+class TestNumpyBackend:
+    """Test the pure-NumPy fallback used when pyproj and GDAL are missing"""
+
+    def test_projection_origin(self):
+        xs, ys = transform([3.0], [46.5], WGS84, LAMBERT93, backend="numpy")
+        assert (xs[0], ys[0]) == pytest.approx((700000.0, 6600000.0), abs=1e-6)
+
+    @pytest.mark.parametrize("crs", [LAMBERT93, WEB_MERCATOR])
+    def test_round_trip(self, points, crs):
+        lons, lats = points
+        xs, ys = transform(lons, lats, WGS84, crs, backend="numpy")
+        back_lons, back_lats = transform(xs, ys, crs, WGS84, backend="numpy")
+
+        np.testing.assert_allclose(back_lons, lons, atol=1e-10)
+        np.testing.assert_allclose(back_lats, lats, atol=1e-10)
+
+    @pytest.mark.parametrize("crs", [LAMBERT93, WEB_MERCATOR])
+    def test_matches_pyproj(self, points, crs):
+        pytest.importorskip("pyproj")
+        lons, lats = points
+        ref = transform(lons, lats, WGS84, crs, backend="pyproj")
+        fallback = transform(lons, lats, WGS84, crs, backend="numpy")
+
+        assert np.hypot(ref[0] - fallback[0], ref[1] - fallback[1]).max() < 1e-3
+
+    def test_other_crs_needs_a_library(self):
+        with pytest.raises(ValueError):
+            get_transformer(WGS84, 32631, backend="numpy")
+
+
+class TestHelpers:
+    def test_transformers_are_cached(self):
+        assert get_transformer("EPSG:4326", 2154) is get_transformer(4326, "2154")
+
+    def test_epsg_code(self):
+        assert epsg_code("epsg:2154") == 2154
+        with pytest.raises(ValueError):
+            epsg_code("+proj=lcc")
+
+    def test_lambert93_helpers(self):
+        xs, ys = wgs84_to_lambert93([1.4442, 2.3522], [43.6045, 48.8566])
+        lons, lats = lambert93_to_wgs84(xs, ys)
+        np.testing.assert_allclose(lons, [1.4442, 2.3522], atol=1e-9)
+        np.testing.assert_allclose(lats, [43.6045, 48.8566], atol=1e-9)
+        assert 570000 < xs[0] < 580000 and 6270000 < ys[0] < 6290000  # Toulouse
+
+    def test_bbox_covers_curved_edges(self):
+        bbox = transform_bbox((-0.4, 42.3, 4.9, 45.1), WGS84, LAMBERT93)
+        corners = transform([-0.4, 4.9, -0.4, 4.9], [42.3, 42.3, 45.1, 45.1], WGS84, LAMBERT93)
+        assert bbox[1] < corners[1].min()  # the southern edge bows below its corners
+        assert bbox[0] <= corners[0].min() and bbox[2] >= corners[0].max()
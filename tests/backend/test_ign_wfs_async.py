@@ -0,0 +1,127 @@
+"""Test concurrent and batched WFS spot analysis"""
+import asyncio
+import threading
+import time
+from collections import Counter
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from src.backend.services.ign_wfs_service import IGNWFSService
+from src.backend.services.wfs_grid_cache import WFSGridCache
+
+
+class FakeWFS:
+    """GetFeature stand-in with a per-layer delay that honours the timeout; one point feature per requested cell"""
+
+    def __init__(self):
+        self.delay = {}
+        self.calls = Counter()
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, params, timeout=None):
+        typename = params["TYPENAME"]
+        delay = self.delay.get(typename, 0.0)
+        with self.lock:
+            self.calls[typename] += 1
+            self.in_flight += 1
+        try:
+            time.sleep(min(delay, timeout or delay))
+            if timeout is not None and delay > timeout:
+                raise requests.exceptions.Timeout(typename)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+        min_x, min_y, max_x, max_y = (float(v) for v in params["BBOX"].split(",")[:4])
+        feature = {
+            "type": "Feature",
+            "id": f"{typename}.{params['BBOX']}",
+            "geometry": {"type": "Point", "coordinates": [(min_x + max_x) / 2, (min_y + max_y) / 2]},
+            "properties": {},
+        }
+        return MagicMock(status_code=200, json=MagicMock(return_value={"features": [feature]}))
+
+
+@pytest.fixture
+def fake():
+    return FakeWFS()
+
+
+@pytest.fixture
+def wfs(fake, tmp_path):
+    with patch.object(IGNWFSService, "_test_connectivity"):
+        service = IGNWFSService(base_url="http://wfs.test/ows", grid_cache=WFSGridCache(str(tmp_path / "wfs.db")))
+    service._get = fake
+    return service
+
+
+class TestAsyncAnalysis:
+    """Test that layers run concurrently and late layers fall back"""
+
+    async def test_layers_run_concurrently(self, wfs, fake):
+        fake.delay = {name: 0.3 for name in ("TRANSPORTNETWORKS.ROADS", "HYDROGRAPHY.HYDROGRAPHY")}
+        start = time.monotonic()
+        analysis = await wfs.analyze_spot_surroundings_async(1, (43.605, 1.445), 500, deadline=5)
+
+        assert time.monotonic() - start < 0.55  # sequential would take at least 0.6 s
+        assert {layer["status"] for layer in analysis["data"].values()} == {"success"}
+        assert analysis["accessibility_score"]["overall"] > 0
+
+    async def test_deadline_keeps_fallback_semantics(self, wfs, fake):
+        fake.delay = {"TRANSPORTNETWORKS.ROADS": 1.0}
+        start = time.monotonic()
+        analysis = await wfs.analyze_spot_surroundings_async(1, (43.605, 1.445), 500, deadline=0.2)
+
+        assert time.monotonic() - start < 0.6
+        assert analysis["data"]["transport"]["status"] == "fallback"
+        assert analysis["data"]["hydrography"]["status"] == "success"
+        assert analysis["accessibility_score"] == wfs._build_analysis(
+            1, (43.605, 1.445), 500, *(analysis["data"][k] for k in ("administrative", "transport", "hydrography"))
+        )["accessibility_score"]
+
+    async def test_late_layer_thread_stops_at_deadline(self, wfs, fake):
+        fake.delay = {"TRANSPORTNETWORKS.ROADS": 5.0}
+        analysis = await wfs.analyze_spot_surroundings_async(1, (43.605, 1.445), 500, deadline=0.2)
+
+        assert analysis["data"]["transport"]["status"] == "fallback"
+        await asyncio.sleep(0.1)
+        assert fake.in_flight == 0  # the request got the remaining time as its timeout, not 5 s
+
+    def test_sync_analysis_is_unchanged(self, wfs):
+        analysis = wfs.analyze_spot_surroundings(7, (43.605, 1.445), 500)
+        assert analysis["spot_id"] == 7
+        assert set(analysis["data"]) == {"administrative", "transport", "hydrography"}
+
+
+class TestBatchAnalysis:
+    async def test_shared_cells_are_fetched_once(self, wfs, fake):
+        spots = [(i, (43.601 + (i % 5) * 0.002, 1.441 + (i // 5) * 0.002)) for i in range(20)]
+        analyses = await wfs.analyze_spots_async(spots, analysis_radius=500, max_concurrency=4)
+
+        assert [a["spot_id"] for a in analyses] == list(range(20))
+        assert sum(fake.calls.values()) == wfs.grid_cache.get_stats()["cached_cells"]
+        assert sum(fake.calls.values()) < 3 * len(spots)
+        assert all(a["data"]["transport"]["cache_status"] == "cached" for a in analyses)
+
+    async def test_each_spot_has_its_own_deadline(self, wfs, fake):
+        fake.delay = {"TRANSPORTNETWORKS.ROADS": 5.0}
+        spots = [(i, (43.601 + i * 0.01, 1.441)) for i in range(12)]
+        start = time.monotonic()
+        analyses = await wfs.analyze_spots_async(spots, analysis_radius=500, max_concurrency=2, deadline=0.3)
+
+        assert time.monotonic() - start < 6 * 0.3 + 0.5  # six rounds of two spots, each bounded by its deadline
+        assert [a["spot_id"] for a in analyses] == list(range(12))
+        assert all("transport" in wfs.fallback_layers(a) for a in analyses)
+        await asyncio.sleep(0.1)
+        assert fake.in_flight == 0
+
+    async def test_slow_upstream_degrades_late_spots_not_the_batch(self, wfs, fake):
+        """About 240 cells at 50 ms, 4 at a time, take ~3 s: more than the deadline, which is per spot"""
+        fake.delay = {name: 0.05 for name in ("LIMITES_ADMINISTRATIVES_EXPRESS.LATEST", "TRANSPORTNETWORKS.ROADS",
+                                              "HYDROGRAPHY.HYDROGRAPHY")}
+        spots = [(i, (43.1 + i * 0.05, 1.2 + (i % 4) * 0.1)) for i in range(24)]
+        analyses = await wfs.analyze_spots_async(spots, analysis_radius=500, max_concurrency=4, deadline=1.5)
+
+        assert not [a["spot_id"] for a in analyses if wfs.fallback_layers(a)]
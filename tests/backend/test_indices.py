@@ -0,0 +1,80 @@
+"""Test the block-wise spectral index engine"""
+import numpy as np
+import pytest
+
+rasterio = pytest.importorskip("rasterio")
+from rasterio.transform import from_origin  # noqa: E402
+
+from src.backend.raster.indices import (  # noqa: E402
+    NODATA,
+    IndexCalculator,
+    compute_indices,
+    required_bands,
+)
+
+WIDTH, HEIGHT = 700, 500
+
+
+@pytest.fixture
+def scene(tmp_path):
+    """4-band SPOT 6/7-like scene (blue, green, red, NIR) with a nodata corner"""
+    rng = np.random.default_rng(0)
+    data = rng.integers(1, 4000, size=(4, HEIGHT, WIDTH)).astype(np.uint16)
+    data[:, :20, :30] = 0
+    path = tmp_path / "spot6.tif"
+    with rasterio.open(
+        path, "w", driver="GTiff", width=WIDTH, height=HEIGHT, count=4, dtype="uint16",
+        crs="EPSG:2154", transform=from_origin(570000, 6280000, 6, 6), nodata=0,
+    ) as dst:
+        dst.write(data)
+    return path, data.astype(np.float64)
+
+
+class TestComputeIndices:
+    def test_formulas(self):
+        bands = {name: np.array([v]) for name, v in {"green": 0.1, "red": 0.2, "nir": 0.6, "swir": 0.4}.items()}
+        values = compute_indices(bands, ["ndvi", "ndwi", "ndbi", "bu"])
+
+        assert values["ndvi"][0] == pytest.approx(0.5)
+        assert values["ndwi"][0] == pytest.approx(-5 / 7)
+        assert values["ndbi"][0] == pytest.approx(-0.2)
+        assert values["bu"][0] == pytest.approx(-0.7)
+        assert all(v.dtype == np.float32 for v in values.values())
+
+    def test_zero_denominator_is_undefined(self):
+        values = compute_indices({"red": np.zeros(2), "nir": np.array([0.0, 1.0])}, ["ndvi"])
+        assert np.isnan(values["ndvi"][0]) and values["ndvi"][1] == 1
+
+    def test_required_bands(self):
+        assert required_bands(["bu"]) == ("nir", "red", "swir")
+        with pytest.raises(ValueError):
+            required_bands(["evi"])
+
+
+class TestIndexCalculator:
+    def test_matches_full_scene_computation(self, scene, tmp_path):
+        path, data = scene
+        stats = IndexCalculator(str(path), block_size=256, tile_size=128, workers=2).run(str(tmp_path / "out"))
+
+        assert stats["blocks"] == 6 and stats["pixels"] == WIDTH * HEIGHT and stats["mpx_per_second"] > 0
+        blue, green, red, nir = data
+        with np.errstate(invalid="ignore"):
+            expected = {"ndvi": (nir - red) / (nir + red), "ndwi": (green - nir) / (green + nir)}
+        for index, reference in expected.items():
+            reference[:20, :30] = NODATA
+            with rasterio.open(stats["outputs"][index]) as src:
+                assert src.nodata == NODATA
+                assert src.read(1) == pytest.approx(reference.astype(np.float32), abs=1e-6)
+
+    def test_output_is_tiled_compressed_with_overviews(self, scene, tmp_path):
+        stats = IndexCalculator(str(scene[0]), indices=["ndvi"], tile_size=128, workers=1).run(str(tmp_path))
+
+        with rasterio.open(stats["outputs"]["ndvi"]) as src:
+            assert src.profile["tiled"] and src.block_shapes[0] == (128, 128)
+            assert src.compression.value == "DEFLATE"
+            assert src.overviews(1)
+
+    def test_missing_band_is_rejected(self, scene):
+        with pytest.raises(ValueError, match="swir"):
+            IndexCalculator(str(scene[0]), indices=["ndbi"])
+        IndexCalculator(str(scene[0]), bands={"swir": 1, "nir": 4}, indices=["ndbi"])
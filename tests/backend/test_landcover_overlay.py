@@ -0,0 +1,115 @@
+"""Test the batch forest / land-use overlay"""
+import json
+import sqlite3
+
+import numpy as np
+import pytest
+
+pytest.importorskip("shapely")
+import shapely  # noqa: E402
+from shapely.geometry import Point, box  # noqa: E402
+
+from src.backend.scrapers.ign_feature_writers import GeoPackageWriter  # noqa: E402
+from src.backend.scrapers.ign_pretiled import PretiledStore  # noqa: E402
+from src.backend.scrapers.ign_projection import lambert93_to_wgs84  # noqa: E402
+from src.backend.services.landcover_overlay import LandcoverOverlay, stored_landcover  # noqa: E402
+
+X0, Y0 = 570000.0, 6280000.0
+FOREST_TYPES = ["Forêt fermée de feuillus", "Forêt fermée de conifères", "Lande"]
+
+
+def polygon_feature(geometry, **properties):
+    return {"type": "Feature", "geometry": shapely.geometry.mapping(geometry), "properties": properties}
+
+
+def forest_polygons():
+    # 10 x 10 grid of 400 m squares with gaps, classes cycling through FOREST_TYPES
+    return [
+        (box(X0 + i * 500, Y0 + j * 500, X0 + i * 500 + 400, Y0 + j * 500 + 400), FOREST_TYPES[(i + j) % 3])
+        for i in range(10)
+        for j in range(10)
+    ]
+
+
+def rpg_polygons():
+    return [(box(X0 + 2000, Y0, X0 + 5000, Y0 + 5000), "18"), (box(X0 + 5000, Y0, X0 + 6000, Y0 + 5000), "21")]
+
+
+@pytest.fixture
+def store(tmp_path):
+    root = tmp_path / "processed"
+    for dataset, field, polygons in (("bd_foret", "TFV", forest_polygons()), ("rpg", "CODE_GROUP", rpg_polygons())):
+        (root / dataset).mkdir(parents=True)
+        with GeoPackageWriter(root / dataset / "31.gpkg", epsg=2154, layer_name=dataset) as writer:
+            writer.write([polygon_feature(geometry, **{field: label}) for geometry, label in polygons])
+    return PretiledStore(root)
+
+
+def spots_at(xs, ys):
+    lons, lats = lambert93_to_wgs84(np.asarray(xs), np.asarray(ys))
+    return [{"id": i + 1, "latitude": lat, "longitude": lon} for i, (lon, lat) in enumerate(zip(lons, lats))]
+
+
+def brute_force(x, y, radius, polygons):
+    circle = Point(x, y).buffer(radius, quad_segs=16)
+    by_class = {}
+    for geometry, label in polygons:
+        by_class[label] = by_class.get(label, 0.0) + geometry.intersection(circle).area
+    return {label: 100.0 * area / circle.area for label, area in by_class.items() if area > 0}
+
+
+class TestOverlay:
+    """Test vectorized results against a per-spot polygon scan"""
+
+    def test_matches_brute_force(self, store):
+        rng = np.random.default_rng(3)
+        xs, ys = X0 + rng.uniform(-200, 5100, 60), Y0 + rng.uniform(-200, 5100, 60)
+        results = LandcoverOverlay(store).overlay("bd_foret", xs, ys, 300)
+
+        for x, y, result in zip(xs, ys, results):
+            expected = brute_force(x, y, 300, forest_polygons())
+            assert result["coverage_percent"] == pytest.approx(sum(expected.values()), abs=0.1)
+            assert {c["type"]: c["percent"] for c in result["classes"]} == pytest.approx(expected, abs=0.1)
+            if expected:
+                assert result["dominant_type"] == max(expected, key=expected.get)
+
+    def test_spot_inside_polygon_and_outside_extent(self, store):
+        results = LandcoverOverlay(store).overlay("rpg", [X0 + 3500, X0 + 90000], [Y0 + 2500, Y0], 200)
+        assert results[0]["coverage_percent"] == 100.0 and results[0]["dominant_type"] == "18"
+        assert results[1] is None
+
+    def test_enrich_formats(self, store):
+        (result,) = LandcoverOverlay(store).enrich(spots_at([X0 + 5000], [Y0 + 2500]), radius=500)
+        assert result["spot_id"] == 1
+        assert result["land_use"]["agricultural_percent"] == pytest.approx(100.0, abs=0.2)
+        assert [c["type"] for c in result["land_use"]["land_use_mix"]] == ["18", "21"]
+        assert result["forest"]["source"] == "IGN BD Forêt"
+        assert result["forest"]["forest_types"]
+
+
+class TestEnrichDatabase:
+    def test_results_written_in_bulk(self, store, tmp_path):
+        db_path = str(tmp_path / "spots.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE spots (id INTEGER PRIMARY KEY, name TEXT, latitude REAL, longitude REAL)")
+        spots = spots_at([X0 + 200, X0 + 3500, X0 + 90000], [Y0 + 200, Y0 + 2500, Y0])
+        conn.executemany(
+            "INSERT INTO spots VALUES (?, ?, ?, ?)", [(s["id"], "spot", s["latitude"], s["longitude"]) for s in spots]
+        )
+        conn.commit()
+
+        result = LandcoverOverlay(store).enrich_database(db_path, radius=100)
+        assert result == {"spots": 3, "enriched": 2, "radius_meters": 100}
+
+        conn.row_factory = sqlite3.Row
+        rows = {row["spot_id"]: dict(row) for row in conn.execute("SELECT * FROM spot_environment")}
+        assert set(rows) == {1, 2}
+        assert rows[1]["forest_coverage"] == 100.0 and rows[1]["forest_type"] == FOREST_TYPES[0]
+        assert rows[2]["land_use_type"] == "18"
+        assert json.loads(rows[2]["land_use"])["dominant_use"] == "18"
+
+    def test_stored_landcover(self):
+        row = {"id": 1, "env_forest": json.dumps({"coverage_percent": 12.0}), "env_land_use": None}
+        assert stored_landcover(row) == {"forest": {"coverage_percent": 12.0}, "land_use": None}
+        assert "env_forest" not in row
+        assert stored_landcover({"id": 2, "env_forest": None, "env_land_use": None}) is None
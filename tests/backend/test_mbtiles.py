@@ -0,0 +1,51 @@
+"""Test MBTiles helpers"""
+import sqlite3
+
+import pytest
+
+from src.backend.utils.mbtiles import init_mbtiles, merge_mbtiles, tile_count
+
+
+def _write_shard(path, tiles, metadata=None):
+    conn = init_mbtiles(path, metadata, fast_writes=True)
+    conn.executemany(
+        "INSERT INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)", tiles
+    )
+    conn.commit()
+    conn.close()
+
+
+class TestMergeMBTiles:
+    """Test shard merging"""
+
+    @pytest.fixture
+    def shards(self, tmp_path):
+        first = tmp_path / "shard_000.mbtiles"
+        second = tmp_path / "shard_001.mbtiles"
+        _write_shard(first, [(12, x, 1, b"a") for x in range(10)], {"name": "IGN PLAN", "format": "png"})
+        _write_shard(second, [(13, x, 2, b"b") for x in range(7)] + [(12, 0, 1, b"new")])
+        return [first, second]
+
+    def test_merge_copies_all_tiles(self, tmp_path, shards):
+        target = tmp_path / "merged.mbtiles"
+        stats = merge_mbtiles(target, shards, batch_size=3)
+
+        assert stats == {"shards": 2, "tiles": 18}
+        assert tile_count(target) == 17
+
+    def test_later_shard_wins_and_metadata_copied(self, tmp_path, shards):
+        target = tmp_path / "merged.mbtiles"
+        merge_mbtiles(target, shards)
+
+        with sqlite3.connect(str(target)) as conn:
+            data = conn.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level=12 AND tile_column=0 AND tile_row=1"
+            ).fetchone()[0]
+            name = conn.execute("SELECT value FROM metadata WHERE name='name'").fetchone()[0]
+        assert data == b"new"
+        assert name == "IGN PLAN"
+
+    def test_missing_shard_is_skipped(self, tmp_path, shards):
+        target = tmp_path / "merged.mbtiles"
+        stats = merge_mbtiles(target, shards + [tmp_path / "missing.mbtiles"])
+        assert stats["shards"] == 2
@@ -0,0 +1,74 @@
+"""Test the offline BAN reverse geocoder"""
+import gzip
+
+import pytest
+
+from src.backend.scrapers import offline_geocoder
+from src.backend.scrapers.offline_geocoder import OfflineReverseGeocoder, build_store
+
+HEADER = "id;numero;rep;nom_voie;code_postal;code_insee;nom_commune;lon;lat;nom_ld"
+ROWS = [
+    "31555_1;12;;Rue de Metz;31000;31555;Toulouse;1.44520;43.60040;",
+    "31555_2;3;bis;Rue de Metz;31000;31555;Toulouse;1.44610;43.60050;",
+    "31555_3;1;;Place du Capitole;31000;31555;Toulouse;1.44330;43.60440;",
+    "81004_1;99999;;;81000;81004;Albi;2.14640;43.92890;Le Castelviel",
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    csv_path = tmp_path / "adresses-31.csv.gz"
+    with gzip.open(csv_path, "wt", encoding="utf-8") as handle:
+        handle.write("\n".join([HEADER] + ROWS) + "\n")
+    path = tmp_path / "ban.npz"
+    build_store([csv_path], path)
+    return path
+
+
+class TestOfflineReverseGeocoder:
+    """Test ingestion, nearest-address lookup and distance cut-off"""
+
+    def test_build_dictionary_encodes_streets_and_communes(self, store, tmp_path):
+        stats = build_store([tmp_path / "adresses-31.csv.gz"], tmp_path / "again.npz")
+        assert stats == {**stats, "addresses": 4, "streets": 3, "communes": 2}
+
+    def test_nearest_address_label(self, store):
+        geocoder = OfflineReverseGeocoder(str(store))
+        record = geocoder.nearest(43.60051, 1.44605)
+
+        assert record["label"] == "3bis Rue de Metz 31000 Toulouse"
+        assert record["citycode"] == "31555"
+        assert record["distance"] < 10
+
+    def test_named_place_without_number(self, store):
+        geocoder = OfflineReverseGeocoder(str(store))
+        assert geocoder.reverse_geocode(43.9290, 2.1465) == "Le Castelviel 81000 Albi"
+
+    def test_far_points_are_not_answered(self, store):
+        geocoder = OfflineReverseGeocoder(str(store), max_distance=500)
+        results = geocoder.nearest_many([(43.6004, 1.4452), (42.70, 2.90)])
+
+        assert results[0]["street"] == "Rue de Metz"
+        assert results[1] is None
+
+    def test_brute_force_fallback_matches_kdtree(self, store, monkeypatch):
+        expected = OfflineReverseGeocoder(str(store)).nearest(43.6044, 1.4434)
+        monkeypatch.setattr(offline_geocoder, "SCIPY_AVAILABLE", False)
+
+        assert OfflineReverseGeocoder(str(store)).nearest(43.6044, 1.4434) == expected
+
+    def test_missing_store_is_unavailable(self, tmp_path):
+        geocoder = OfflineReverseGeocoder(str(tmp_path / "missing.npz"))
+        assert not geocoder.available
+        assert geocoder.reverse_geocode(43.6, 1.44) is None
+
+    def test_french_geocoder_uses_store_first(self, store, tmp_path, monkeypatch):
+        monkeypatch.setenv("SPOTS_GEOCODE_CACHE", str(tmp_path / "geo.db"))
+        from src.backend.scrapers.geocoding_france import OccitanieGeocoder
+
+        geocoder = OccitanieGeocoder()
+        geocoder.offline_geocoder = OfflineReverseGeocoder(str(store))
+        monkeypatch.setattr("src.backend.scrapers.geocoding_france.requests.get", pytest.fail)
+
+        assert geocoder.reverse_geocode(43.6004, 1.4452) == "12 Rue de Metz 31000 Toulouse"
+        assert geocoder.get_department_code(43.6004, 1.4452) == "31"
@@ -0,0 +1,131 @@
+"""Test premium quota accounting, confidence routing and batch submission"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.backend.scrapers.geocoding_cache import GeocodingCache
+from src.backend.scrapers.geocoding_france import OccitanieGeocoder
+from src.backend.scrapers.geocoding_premium import PremiumGeocodingService
+from src.backend.scrapers.quota_ledger import QuotaLedger
+
+
+def premium_feature(label, score=0.98):
+    return {"geometry": {"coordinates": [1.444, 43.6045]}, "properties": {"label": label, "score": score}}
+
+
+def json_response(payload, status=200, url="https://data.geopf.fr/geocodage/search"):
+    return MagicMock(status_code=status, url=url, json=MagicMock(return_value=payload))
+
+
+@pytest.fixture
+def premium(tmp_path):
+    service = PremiumGeocodingService()
+    service.enabled = True
+    service.cache = GeocodingCache(str(tmp_path / "geo.db"))
+    service.ledger = QuotaLedger("adresse-premium", daily_limit=3, cost_per_request=0.01, db_path=str(tmp_path / "geo.db"))
+    service.min_request_interval = 0
+    service._get_auth_token = lambda: "token"
+    return service
+
+
+@pytest.fixture
+def geocoder(premium, tmp_path):
+    geocoder = OccitanieGeocoder()
+    geocoder.geocode_cache = GeocodingCache(str(tmp_path / "geo.db"))
+    geocoder.premium_service = premium
+    geocoder.min_request_interval = 0
+    return geocoder
+
+
+class TestQuotaLedger:
+    """Test daily allowance, partial grants and cost booking"""
+
+    def test_reserve_grants_up_to_limit(self, tmp_path):
+        ledger = QuotaLedger("svc", daily_limit=5, cost_per_request=0.5, db_path=str(tmp_path / "q.db"))
+
+        assert ledger.reserve(2) == 2
+        assert ledger.reserve(4, "batch") == 3
+        assert ledger.reserve(1) == 0
+        usage = ledger.get_usage()
+        assert usage["used"] == 5 and usage["remaining"] == 0
+        assert usage["cost"] == 2.5
+        assert usage["operations"]["batch"]["requests"] == 3
+        assert usage["denied_this_process"] == 2
+
+    def test_usage_is_shared_between_instances(self, tmp_path):
+        path = str(tmp_path / "q.db")
+        QuotaLedger("svc", daily_limit=2, db_path=path).reserve(2)
+
+        assert QuotaLedger("svc", daily_limit=2, db_path=path).remaining() == 0
+        assert QuotaLedger("other", daily_limit=2, db_path=path).remaining() == 2
+
+
+def routed(ban, premium=None):
+    """requests.get stand-in answering BAN and premium URLs separately (both modules share requests)"""
+    calls = []
+
+    def get(url, **kwargs):
+        calls.append(url)
+        return premium if "geocodage-premium" in url else ban
+
+    return get, calls
+
+
+class TestRouting:
+    """Test that only weak BAN answers reach the billed service"""
+
+    def test_confident_ban_answer_skips_premium(self, geocoder):
+        get, calls = routed(json_response({"features": [premium_feature("Capitole", score=0.9)]}))
+        with patch("src.backend.scrapers.geocoding_france.requests.get", side_effect=get):
+            result = geocoder.geocode_address("Capitole Toulouse")
+
+        assert result["precision"] == "ban"
+        assert not any("premium" in url for url in calls)
+        assert geocoder.premium_service.ledger.get_usage()["used"] == 0
+
+    def test_low_confidence_answer_is_upgraded(self, geocoder):
+        get, _ = routed(
+            json_response({"features": [premium_feature("Lieu-dit", score=0.3)]}),
+            json_response({"features": [premium_feature("Lieu-dit Les Bordes, Aspet")]}),
+        )
+        with patch("src.backend.scrapers.geocoding_france.requests.get", side_effect=get):
+            result = geocoder.geocode_address("les bordes aspet")
+
+        assert result["precision"] == "premium"
+        assert geocoder.geocode_cache.get_geocode("les bordes aspet") == result
+        assert geocoder.premium_service.ledger.get_usage()["operations"]["geocode"]["requests"] == 1
+
+    def test_spent_quota_keeps_ban_answer(self, geocoder):
+        geocoder.premium_service.ledger.reserve(3)
+        get, calls = routed(json_response({"features": [premium_feature("Lieu-dit", score=0.3)]}))
+        with patch("src.backend.scrapers.geocoding_france.requests.get", side_effect=get):
+            result = geocoder.geocode_address("les bordes aspet")
+
+        assert result["precision"] == "ban"
+        assert not any("premium" in url for url in calls)
+
+
+class TestBatch:
+    """Test cached, deduplicated and quota-capped batch submission"""
+
+    def test_batch_respects_cache_and_quota(self, premium):
+        premium.cache.put("geocode_premium", premium._cache_key("Capitole", None), {"confidence": 1.0}, "premium")
+
+        def answer(url, headers, json, timeout):
+            return json_response({"results": [{"features": [premium_feature(q["q"])]} for q in json["queries"]]})
+
+        addresses = ["Capitole", "A", "B", "A", "C", "D", "E"]
+        with patch("src.backend.scrapers.geocoding_premium.requests.post", side_effect=answer) as post:
+            results = premium.batch_geocode_premium(addresses)
+
+        assert post.call_count == 1
+        assert [q["q"] for q in post.call_args.kwargs["json"]["queries"]] == ["A", "B", "C"]
+        assert results[0] == {"confidence": 1.0}
+        assert results[1]["formatted_address"] == "A" and results[3] == results[1]
+        assert results[5] is None and results[6] is None  # over today's quota
+        assert premium.ledger.get_usage()["cost"] == 0.03
+
+        # Submitted addresses are now cached
+        with patch("src.backend.scrapers.geocoding_premium.requests.post") as post:
+            assert premium.batch_geocode_premium(["B"])[0]["formatted_address"] == "B"
+        post.assert_not_called()
@@ -0,0 +1,68 @@
+"""Test DEM elevation profiles and local terrain statistics"""
+import numpy as np
+import pytest
+
+from src.backend.raster.dem import DEMElevationService
+from src.backend.raster.profile import densify, elevation_profile, local_terrain
+
+SIZE = 121
+ROW_METRES = 111_195 / (SIZE - 1)  # north-south sample spacing in the N43 tile
+
+
+@pytest.fixture
+def dem(tmp_path):
+    """N43E001 tile rising 10 m per row southwards, plus a 400 m spike at row 60, col 100"""
+    rows, _ = np.mgrid[0:SIZE, 0:SIZE]
+    grid = (10 * rows).astype(">i2")
+    grid[60, 100] = 1000
+    grid.tofile(tmp_path / "N43E001.hgt")
+    return DEMElevationService([str(tmp_path)])
+
+
+class TestElevationProfile:
+    """Test densification, gain and slope along a path"""
+
+    def test_densify_keeps_vertices_and_spacing(self):
+        lats, lons, distances = densify([(43.6, 1.40), (43.6, 1.41), (43.61, 1.41)], spacing=100)
+
+        assert (lats[0], lons[0]) == (43.6, 1.40)
+        assert (lats[-1], lons[-1]) == (43.61, 1.41)
+        assert np.all(np.diff(distances) <= 100)
+        assert distances[-1] == pytest.approx(805 + 1112, rel=0.01)
+
+    def test_ascent_descent_and_slope(self, dem):
+        # South (uphill) for 30 rows then back north (downhill) for 10
+        profile = elevation_profile([(43.75, 1.5), (43.5, 1.5), (43.5833, 1.5)], spacing=50, dem=dem)
+
+        assert profile["ascent_m"] == pytest.approx(300, abs=1)
+        assert profile["descent_m"] == pytest.approx(100, abs=1)
+        assert profile["max_slope_percent"] == pytest.approx(1000 / ROW_METRES, rel=0.02)
+        assert profile["coverage"] == 1.0
+        assert profile["profile"][0]["elevation"] == pytest.approx(300, abs=1)
+
+    def test_outside_coverage(self, dem):
+        assert elevation_profile([(46.0, 1.5), (46.1, 1.5)], dem=dem) is None
+        with pytest.raises(ValueError):
+            elevation_profile([(43.5, 1.5)], dem=dem)
+
+
+class TestLocalTerrain:
+    def test_relief_and_slope_around_point(self, dem):
+        terrain = local_terrain(43.5, 1.5, radius=1000, step=250, dem=dem)
+
+        assert terrain["elevation"] == pytest.approx(600, abs=1)
+        assert terrain["relief_m"] == pytest.approx(2000 / ROW_METRES * 10, rel=0.05)
+        assert terrain["max_slope_degrees"] == pytest.approx(np.degrees(np.arctan(10 / ROW_METRES)), abs=0.1)
+
+    def test_difficulty_uses_terrain(self, dem):
+        from src.backend.services.basic_geoai import BasicGeoAI
+
+        geoai = BasicGeoAI()
+        geoai.dem = dem
+        # The spike at col 100 makes the neighbourhood steep; elevation thresholds alone would say "easy"
+        steep = geoai.calculate_difficulty_score({"latitude": 43.5, "longitude": 1 + 100 / 120, "elevation": 600})
+        flat = geoai.calculate_difficulty_score({"latitude": 43.5, "longitude": 1.2, "elevation": 600})
+
+        assert steep["factors"]["slope"] == "difficult"
+        assert flat["factors"]["slope"] == "easy"
+        assert "elevation" not in flat["factors"]
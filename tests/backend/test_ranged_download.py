@@ -0,0 +1,130 @@
+"""Test ranged, resumable downloads and streaming extraction"""
+import hashlib
+import io
+import re
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.backend.utils.ranged_download import ChecksumMismatch, RangedDownloader, extract_archive
+
+PAYLOAD = bytes(range(256)) * 4096  # 1 MB
+
+
+class RangeServer:
+    def __init__(self, payload: bytes, ranges: bool = True):
+        self.payload = payload
+        self.ranges = ranges
+        self.range_requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _headers(self, status, length):
+                self.send_response(status)
+                self.send_header("Content-Length", str(length))
+                if server.ranges:
+                    self.send_header("Accept-Ranges", "bytes")
+                    self.send_header("ETag", '"v1"')
+                self.end_headers()
+
+            def do_HEAD(self):
+                self._headers(200, len(server.payload))
+
+            def do_GET(self):
+                match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+                if server.ranges and match:
+                    first, last = int(match.group(1)), int(match.group(2))
+                    server.range_requests.append(first)
+                    body = server.payload[first : last + 1]
+                    self._headers(206, len(body))
+                else:
+                    body = server.payload
+                    self._headers(200, len(body))
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/archive.zip"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    srv = RangeServer(PAYLOAD)
+    yield srv
+    srv.close()
+
+
+class TestRangedDownloader:
+    """Test parallel ranges, resume and checksum verification"""
+
+    def test_parallel_ranges_reassemble_file(self, server, tmp_path):
+        downloader = RangedDownloader(chunk_size=100_000, max_workers=4)
+        result = downloader.download(server.url, tmp_path / "archive.zip")
+
+        assert (tmp_path / "archive.zip").read_bytes() == PAYLOAD
+        assert result.chunks == 11
+        assert result.checksum == hashlib.md5(PAYLOAD).hexdigest()
+        assert not (tmp_path / "archive.zip.part").exists()
+        assert not (tmp_path / "archive.zip.part.json").exists()
+
+    def test_resume_skips_completed_chunks(self, server, tmp_path):
+        dest = tmp_path / "archive.zip"
+        downloader = RangedDownloader(chunk_size=100_000)
+        part = tmp_path / "archive.zip.part"
+        part.write_bytes(PAYLOAD[:300_000] + b"\0" * (len(PAYLOAD) - 300_000))
+        info = downloader.probe(server.url)
+        downloader._save_state(part, server.url, info, {0, 1, 2})
+
+        result = downloader.download(server.url, dest, expected_checksum=hashlib.md5(PAYLOAD).hexdigest())
+
+        assert dest.read_bytes() == PAYLOAD
+        assert result.resumed_bytes == 300_000
+        assert min(server.range_requests) == 300_000
+
+    def test_checksum_mismatch_discards_part(self, server, tmp_path):
+        downloader = RangedDownloader(chunk_size=250_000)
+        with pytest.raises(ChecksumMismatch):
+            downloader.download(server.url, tmp_path / "archive.zip", expected_checksum="0" * 32)
+        assert not (tmp_path / "archive.zip.part").exists()
+        assert not (tmp_path / "archive.zip").exists()
+
+    def test_falls_back_to_single_stream(self, tmp_path):
+        srv = RangeServer(PAYLOAD, ranges=False)
+        try:
+            result = RangedDownloader().download(srv.url, tmp_path / "archive.zip")
+        finally:
+            srv.close()
+        assert not result.ranged
+        assert (tmp_path / "archive.zip").read_bytes() == PAYLOAD
+
+
+def test_extract_zip_streams_members(tmp_path):
+    archive = tmp_path / "pack.zip"
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("BDTOPO/route.shp", PAYLOAD)
+        zf.writestr("BDTOPO/README.txt", "hello")
+
+    files = extract_archive(archive, tmp_path / "out")
+
+    assert len(files) == 2
+    assert (tmp_path / "out" / "BDTOPO" / "route.shp").read_bytes() == PAYLOAD
+
+
+def test_extract_rejects_path_traversal(tmp_path):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("../evil.txt", "x")
+    archive = tmp_path / "evil.zip"
+    archive.write_bytes(buffer.getvalue())
+
+    with pytest.raises(ValueError):
+        extract_archive(archive, tmp_path / "out")
@@ -0,0 +1,60 @@
+"""Test raster tiling into MBTiles"""
+import sqlite3
+
+import numpy as np
+import pytest
+
+from src.backend.raster.tiler import render_tile, tile_bounds, tiles_for_bounds, zoom_for_resolution
+
+
+class TestTileMath:
+    """Test Web Mercator tile helpers"""
+
+    def test_world_tile_bounds(self):
+        minx, miny, maxx, maxy = tile_bounds(0, 0, 0)
+        assert minx == pytest.approx(-20037508.34, abs=0.01)
+        assert maxy == pytest.approx(20037508.34, abs=0.01)
+
+    def test_tiles_for_bounds_covers_area(self):
+        bounds = tile_bounds(10, 515, 373)
+        assert list(tiles_for_bounds(bounds, 10)) == [(10, 515, 373)]
+        assert len(list(tiles_for_bounds(bounds, 12))) == 16
+
+    def test_zoom_for_resolution(self):
+        assert zoom_for_resolution(156543.03) == 0
+        assert zoom_for_resolution(20) == 13
+
+
+def test_render_tile_skips_empty_and_masks_alpha():
+    data = np.linspace(0, 1, 256 * 256).reshape(1, 256, 256)
+    mask = np.zeros((256, 256), dtype=bool)
+    assert render_tile(data, mask) is None
+
+    mask[:128] = True
+    png = render_tile(data, mask, rescale=(0, 1))
+    assert png.startswith(b"\x89PNG")
+
+
+def test_generate_mbtiles(tmp_path):
+    rasterio = pytest.importorskip("rasterio")
+    from rasterio.transform import from_origin
+
+    from src.backend.raster.tiler import RasterTiler
+
+    src = tmp_path / "ndvi.tif"
+    data = np.random.default_rng(0).uniform(-1, 1, (200, 300)).astype("float32")
+    with rasterio.open(
+        src, "w", driver="GTiff", width=300, height=200, count=1, dtype="float32",
+        crs="EPSG:2154", transform=from_origin(570000, 6280000, 20, 20),
+    ) as dst:
+        dst.write(data, 1)
+
+    output = tmp_path / "ndvi.mbtiles"
+    stats = RasterTiler(str(src), colormap="ndvi", workers=1).generate(str(output))
+
+    with sqlite3.connect(str(output)) as conn:
+        count = conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+        metadata = dict(conn.execute("SELECT name, value FROM metadata").fetchall())
+    assert count == stats["written"] > 0
+    assert metadata["type"] == "overlay"
+    assert int(metadata["maxzoom"]) == stats["max_zoom"]
@@ -0,0 +1,107 @@
+"""Test lazy service initialization and readiness reporting"""
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from src.backend.api import services as api_services
+from src.backend.services.registry import FAILED, PENDING, READY, ServiceRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = ServiceRegistry()
+    monkeypatch.setattr(api_services, "registry", registry)
+    return registry
+
+
+class TestServiceRegistry:
+    """Test lazy builds, failures and warm-up"""
+
+    def test_nothing_is_built_at_registration(self, registry):
+        factory = MagicMock(return_value="service")
+        registry.register("svc", factory)
+
+        assert factory.call_count == 0
+        assert registry.status()["services"]["svc"]["state"] == PENDING
+        assert registry.get("svc") == registry.get("svc") == "service"
+        assert factory.call_count == 1
+
+    def test_concurrent_first_use_builds_once(self, registry):
+        def slow():
+            time.sleep(0.1)
+            return object()
+
+        factory = MagicMock(side_effect=slow)
+        registry.register("svc", factory)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get("svc"))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert factory.call_count == 1
+        assert len({id(r) for r in results}) == 1
+
+    def test_failure_is_reported_and_retried(self, registry):
+        factory = MagicMock(side_effect=[ConnectionError("WFS unreachable"), "service"])
+        registry.register("wfs", factory)
+
+        with pytest.raises(RuntimeError, match="WFS unreachable"):
+            registry.get("wfs")
+        assert registry.status()["services"]["wfs"] == {
+            "state": FAILED,
+            "warm": True,
+            "init_seconds": None,
+            "error": "WFS unreachable",
+        }
+        assert registry.get("wfs") == "service"
+        assert registry.is_ready("wfs")
+
+    async def test_warm_up_skips_cold_services(self, registry):
+        registry.register("geocoder", lambda: "geocoder")
+        registry.register("broken", MagicMock(side_effect=OSError("no tiles")))
+        registry.register("vision", MagicMock(), warm=False)
+
+        assert registry.status()["ready"] is False
+        await registry.warm_up()
+
+        status = registry.status()
+        assert status["services"]["geocoder"]["state"] == READY
+        assert status["services"]["broken"]["state"] == FAILED
+        assert status["services"]["vision"]["state"] == PENDING
+        assert status["ready"] is False
+        assert status["warm_up_seconds"] is not None
+
+        registry._entries.pop("broken")
+        assert registry.status()["ready"] is True
+
+    async def test_aclose_runs_sync_and_async_hooks(self, registry):
+        closed = []
+
+        async def close_async(instance):
+            closed.append(instance)
+
+        registry.register("session", lambda: "session", close=close_async)
+        registry.register("tiles", lambda: "tiles", close=closed.append)
+        registry.register("unused", lambda: "unused", close=closed.append)
+        registry.get("session")
+        registry.get("tiles")
+
+        await registry.aclose()
+        assert sorted(closed) == ["session", "tiles"]
+
+
+class TestRequireService:
+    async def test_unavailable_service_is_503(self, registry):
+        registry.register("wfs", MagicMock(side_effect=ConnectionError("offline")))
+        with pytest.raises(HTTPException) as exc:
+            await api_services.require_service("wfs")
+        assert exc.value.status_code == 503
+
+    async def test_returns_instance(self, registry):
+        registry.register("geocoder", lambda: "geocoder")
+        assert await api_services.require_service("geocoder") == "geocoder"
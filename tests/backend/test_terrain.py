@@ -0,0 +1,119 @@
+"""Test the precomputed terrain derivatives"""
+import json
+import math
+
+import numpy as np
+import pytest
+
+rasterio = pytest.importorskip("rasterio")
+from rasterio.transform import from_origin  # noqa: E402
+
+from src.backend.raster.terrain import (  # noqa: E402
+    TerrainGrid,
+    TerrainStore,
+    build_terrain_grid,
+    horn_derivatives,
+)
+from src.backend.scrapers.ign_projection import lambert93_to_wgs84  # noqa: E402
+from src.backend.services.basic_geoai import BasicGeoAI  # noqa: E402
+
+X0, Y0, CELL, SIZE = 570000.0, 6290000.0, 5.0, 300
+
+
+def write_dem(path, z):
+    with rasterio.open(
+        path, "w", driver="GTiff", width=z.shape[1], height=z.shape[0], count=1, dtype="float32",
+        crs="EPSG:2154", transform=from_origin(X0, Y0, CELL, CELL), nodata=-99999,
+    ) as dst:
+        dst.write(z.astype(np.float32), 1)
+
+
+@pytest.fixture
+def plane_grid(tmp_path):
+    """Plane dipping south-west: rises 0.3 m/m eastwards and 0.4 m/m northwards, one nodata cell"""
+    rows, cols = np.mgrid[0:SIZE, 0:SIZE]
+    z = 500.0 + 0.3 * cols * CELL + 0.4 * (SIZE - rows) * CELL
+    z[150, 150] = -99999
+    write_dem(tmp_path / "dem.tif", z)
+    return build_terrain_grid(tmp_path / "dem.tif", tmp_path / "terrain" / "31", tile_size=64)
+
+
+def xy(row, col):
+    return X0 + (col + 0.5) * CELL, Y0 - (row + 0.5) * CELL
+
+
+class TestDerivatives:
+    """Test the Horn kernels"""
+
+    def test_plane(self):
+        rows, cols = np.mgrid[0:5, 0:5]
+        z = 0.3 * cols * CELL + 0.4 * (5 - rows) * CELL
+        layers = horn_derivatives(z, CELL, CELL)
+
+        assert layers["slope"] == pytest.approx(np.full((3, 3), math.degrees(math.atan(0.5))))
+        # Downhill is south-west: azimuth of (-0.3, -0.4)
+        assert layers["aspect"] == pytest.approx(np.full((3, 3), math.degrees(math.atan2(-0.3, -0.4)) % 360))
+        riley = math.sqrt(sum(((0.3 * dc - 0.4 * dr) * CELL) ** 2 for dr in (-1, 0, 1) for dc in (-1, 0, 1)))
+        assert layers["ruggedness"] == pytest.approx(np.full((3, 3), riley))
+
+    def test_flat_has_no_aspect(self):
+        layers = horn_derivatives(np.full((4, 4), 100.0), CELL, CELL)
+        assert (layers["slope"] == 0).all() and np.isnan(layers["aspect"]).all()
+
+
+class TestTerrainGrid:
+    """Test the tiled grid and its lookups"""
+
+    def test_tiles_and_metadata(self, plane_grid):
+        meta = json.loads((plane_grid / "terrain.json").read_text())
+        assert meta["crs"] == "EPSG:2154" and meta["tile_size"] == 64
+        assert len(list((plane_grid / "tiles").glob("*.npz"))) == 25
+
+    def test_sample_across_tiles_and_borders(self, plane_grid):
+        grid = TerrainGrid(plane_grid)
+        points = [xy(0, 0), xy(63, 64), xy(200, 10), xy(299, 299), xy(150, 150), xy(149, 150), (X0 - 10, Y0)]
+        values = grid.sample(*map(np.array, zip(*points)))
+
+        expected = math.degrees(math.atan(0.5))
+        assert values["slope"][:4] == pytest.approx([expected] * 4, abs=0.01)
+        assert np.isnan(values["slope"][4:]).all()  # nodata, its neighbours, and outside the grid
+
+    def test_store_wgs84_lookup(self, plane_grid):
+        store = TerrainStore(str(plane_grid.parent))
+        lon, lat = lambert93_to_wgs84(*map(np.array, zip(xy(40, 220))))
+        record = store.lookup(lat[0], lon[0])
+
+        assert record["slope_degrees"] == pytest.approx(26.57, abs=0.01)
+        assert record["aspect_degrees"] == pytest.approx(216.87, abs=0.01)
+        assert store.lookup(45.5, 3.9) is None
+
+    def test_neighbourhood_layers(self, plane_grid):
+        store = TerrainStore(str(plane_grid.parent))
+        lon, lat = lambert93_to_wgs84(*map(np.array, zip(xy(100, 100))))
+        record = store.lookup(lat[0], lon[0])
+
+        # 200 m each way is 40 cells: the window spans 80 cells of a 0.3 / 0.4 m/m plane
+        assert record["max_slope_degrees"] == pytest.approx(26.57, abs=0.01)
+        assert record["relief_m"] == pytest.approx((0.3 + 0.4) * 80 * CELL, abs=0.01)
+        assert record["resolution_m"] == CELL and 0 < record["ruggedness_index"] < 1
+
+
+class TestBatchDifficulty:
+    def test_batch_matches_single_scoring(self, plane_grid):
+        geoai = BasicGeoAI()
+        geoai.terrain_grids = TerrainStore(str(plane_grid.parent))
+        lons, lats = lambert93_to_wgs84(*map(np.array, zip(xy(10, 10), xy(250, 100))))
+        spots = [
+            {"id": 1, "latitude": lats[0], "longitude": lons[0], "type": "cave", "description": ""},
+            {"id": 2, "latitude": lats[1], "longitude": lons[1], "type": "spring", "description": "parking"},
+            {"id": 3, "latitude": 45.5, "longitude": 3.9, "type": "ruins", "elevation": 1800, "description": ""},
+        ]
+        scores = geoai.calculate_difficulty_scores(spots)
+
+        assert scores[0]["factors"]["slope"] == "difficult"
+        assert scores[0]["factors"]["terrain"]["slope_degrees"] == pytest.approx(26.57, abs=0.01)
+        assert scores[2]["factors"]["elevation"] == "moderate"
+        record = geoai.terrain_grids.lookup(lats[1], lons[1])
+        assert scores[1] == geoai.calculate_difficulty_score(spots[1], terrain=record)
+        # The single-spot API reads the same grid record
+        assert scores == [geoai.calculate_difficulty_score(spot) for spot in spots]
@@ -0,0 +1,173 @@
+"""Test the paged, streaming WFS download"""
+import json
+import sqlite3
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+import requests
+
+from src.backend.scrapers import ign_downloaders, ign_feature_writers
+from src.backend.scrapers.ign_downloaders import download_wfs, iter_wfs_pages
+from src.backend.scrapers.ign_geo_utils import reproject_features
+from src.backend.scrapers.ign_projection import transform
+
+DATASET = "ADMINEXPRESS-COG-CARTO.LATEST:commune"
+
+
+def commune(i):
+    lon, lat = 1.0 + (i % 50) * 0.01, 43.0 + (i // 50) * 0.01
+    return {
+        "type": "Feature",
+        "id": f"commune.{i}",
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[lon, lat], [lon + 0.01, lat], [lon + 0.01, lat + 0.01], [lon, lat]]],
+        },
+        "properties": {"cleabs": f"COMMUNE{i:08d}", "nom": f"Commune {i}", "population": i * 10, "surface": i / 2},
+    }
+
+
+class FakeWFSServer:
+    """GetFeature stand-in: paged JSON capped at ``max_count``, RESULTTYPE=hits, and in-flight request tracking"""
+
+    def __init__(self, total, report_hits=True, delay=0.02, max_count=None, fail_at=None):
+        self.features = [commune(i) for i in range(total)]
+        self.report_hits = report_hits
+        self.delay = delay
+        self.max_count = max_count
+        self.fail_at = fail_at
+        self.sort_by = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.pages = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, **kwargs):
+        if params.get("RESULTTYPE") == "hits":
+            matched = str(len(self.features)) if self.report_hits else "unknown"
+            return MagicMock(text=f'<wfs:FeatureCollection numberMatched="{matched}" numberReturned="0"/>')
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.pages.append(int(params["STARTINDEX"]))
+            self.sort_by.append(params.get("SORTBY"))
+        time.sleep(self.delay)
+        start, count = int(params["STARTINDEX"]), int(params["COUNT"])
+        if start == self.fail_at:
+            with self._lock:
+                self.in_flight -= 1
+            raise requests.exceptions.ConnectionError("connection reset")
+        page = self.features[start : start + min(count, self.max_count or count)]
+        with self._lock:
+            self.in_flight -= 1
+        return MagicMock(json=MagicMock(return_value={"type": "FeatureCollection", "features": page}))
+
+
+@pytest.fixture
+def server():
+    return FakeWFSServer(total=1050)
+
+
+def download(server, tmp_path, format, **kwargs):
+    with patch.object(ign_downloaders.requests, "Session", return_value=server), patch.object(
+        ign_downloaders, "IJSON_AVAILABLE", False
+    ):
+        return download_wfs(DATASET, (1.0, 43.0, 2.0, 44.0), format, None, tmp_path, page_size=100, **kwargs)
+
+
+class TestPaging:
+    """Test page planning, ordering and bounded concurrency"""
+
+    def test_pages_are_fetched_concurrently_and_yielded_in_order(self, server):
+        pages = list(iter_wfs_pages("http://wfs.test", {}, page_size=100, concurrency=4, session=server))
+
+        assert [len(p) for p in pages] == [100] * 10 + [50]
+        assert [f["id"] for p in pages for f in p] == [f"commune.{i}" for i in range(1050)]
+        assert 1 < server.max_in_flight <= 4
+
+    def test_sequential_paging_without_hits(self):
+        server = FakeWFSServer(total=250, report_hits=False, delay=0)
+        pages = list(iter_wfs_pages("http://wfs.test", {}, page_size=100, concurrency=4, session=server))
+
+        assert [len(p) for p in pages] == [100, 100, 50]
+        assert server.pages[1:] == [0, 100, 200]  # after the one-feature identifier probe
+
+    def test_pages_sorted_on_identifier(self, server):
+        list(iter_wfs_pages("http://wfs.test", {}, page_size=100, concurrency=4, session=server))
+        assert server.sort_by[0] is None
+        assert set(server.sort_by[1:]) == {"cleabs ASC"}
+
+    @pytest.mark.parametrize("report_hits", [True, False])
+    def test_server_count_cap_does_not_drop_features(self, report_hits):
+        server = FakeWFSServer(total=1200, report_hits=report_hits, delay=0, max_count=100)
+        pages = list(iter_wfs_pages("http://wfs.test", {}, page_size=500, concurrency=4, session=server))
+
+        assert [len(p) for p in pages] == [100] * 12
+        assert [f["id"] for p in pages for f in p] == [f"commune.{i}" for i in range(1200)]
+
+    def test_short_page_falls_back_to_sequential(self):
+        server = FakeWFSServer(total=1000, delay=0)
+        # numberMatched was read before the layer lost 50 features
+        with patch.object(ign_downloaders, "_wfs_number_matched", return_value=1050):
+            pages = list(iter_wfs_pages("http://wfs.test", {}, page_size=100, concurrency=4, session=server))
+
+        assert sum(len(p) for p in pages) == 1000
+        assert server.pages[-1] == 1000
+
+
+class TestStreamingWriters:
+    """Test the output formats"""
+
+    def test_geojson_is_complete_and_reprojected(self, server, tmp_path):
+        path = download(server, tmp_path, "geojson", target_epsg=2154)
+        data = json.loads(path.read_text())
+
+        assert path.suffix == ".json"
+        assert len(data["features"]) == 1050
+        assert data["crs"]["properties"]["name"] == "urn:ogc:def:crs:EPSG::2154"
+        x, y = transform([1.0], [43.0], 4326, 2154)
+        assert data["features"][0]["geometry"]["coordinates"][0][0] == pytest.approx([x[0], y[0]])
+
+    def test_geojsonseq_one_feature_per_line(self, server, tmp_path):
+        path = download(server, tmp_path, "geojsonseq", target_epsg=4326)
+        lines = path.read_text().splitlines()
+        assert len(lines) == 1050
+        assert json.loads(lines[-1])["id"] == "commune.1049"
+
+    def test_geopackage_has_columns_and_index(self, server, tmp_path):
+        pytest.importorskip("shapely")
+        path = download(server, tmp_path, "gpkg", target_epsg=3857)
+
+        conn = sqlite3.connect(str(path))
+        assert conn.execute("SELECT COUNT(*) FROM commune").fetchone()[0] == 1050
+        assert conn.execute("SELECT nom, population FROM commune WHERE feature_id = 'commune.7'").fetchone() == (
+            "Commune 7",
+            70,
+        )
+        assert conn.execute("SELECT COUNT(*) FROM rtree_commune_geom").fetchone()[0] == 1050
+        assert conn.execute("SELECT srs_id FROM gpkg_contents WHERE table_name = 'commune'").fetchone()[0] == 3857
+
+    def test_failed_download_leaves_no_file(self, tmp_path):
+        server = FakeWFSServer(total=1050, delay=0, fail_at=500)
+        with pytest.raises(requests.exceptions.ConnectionError):
+            download(server, tmp_path, "geojson", target_epsg=4326)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_fgb_requires_gdal(self, server, tmp_path):
+        if ign_feature_writers.GDAL_AVAILABLE:
+            pytest.skip("GDAL installed")
+        with pytest.raises(ImportError):
+            download(server, tmp_path, "fgb")
+
+
+class TestReprojectFeatures:
+    def test_matches_point_transform(self):
+        features = [commune(i) for i in range(3)] + [{"type": "Feature", "geometry": None, "properties": {}}]
+        reproject_features(features, 4326, 3857)
+
+        x, y = transform(np.array([1.02]), np.array([43.0]), 4326, 3857)
+        assert features[2]["geometry"]["coordinates"][0][0] == pytest.approx([x[0], y[0]])
+        assert features[3]["geometry"] is None
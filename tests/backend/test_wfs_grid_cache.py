@@ -0,0 +1,153 @@
+"""Test the per-cell WFS feature cache"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.backend.services.ign_wfs_service import IGNWFSService
+from src.backend.services.wfs_grid_cache import PartialFeatures, WFSGridCache, feature_bounds
+
+
+def road(fid, coords):
+    return {"type": "Feature", "id": fid, "geometry": {"type": "LineString", "coordinates": coords}, "properties": {}}
+
+
+# Roads near Toulouse; "long" crosses several 0.02° cells, "far" lies outside the test bboxes
+ROADS = [
+    road("short", [[1.441, 43.601], [1.442, 43.602]]),
+    road("long", [[1.401, 43.601], [1.479, 43.605]]),
+    road("far", [[1.700, 43.900], [1.701, 43.901]]),
+    road("diagonal", [[1.4195, 43.6205], [1.4205, 43.6195]]),
+]
+
+
+def wfs_answer(params, timeout=None):
+    """GetFeature stand-in: returns the roads whose envelope touches the requested BBOX"""
+    bbox = [float(v) for v in params["BBOX"].split(",")[:4]]
+    features = [f for f in ROADS if WFSGridCache.clip([f], tuple(bbox))]
+    return MagicMock(status_code=200, json=MagicMock(return_value={"features": features}))
+
+
+@pytest.fixture
+def grid(tmp_path):
+    return WFSGridCache(str(tmp_path / "wfs.db"), cell_size=0.02)
+
+
+@pytest.fixture
+def wfs(grid):
+    with patch.object(IGNWFSService, "_test_connectivity"):
+        service = IGNWFSService(base_url="http://wfs.test/ows", grid_cache=grid)
+    service._get = MagicMock(side_effect=wfs_answer)
+    return service
+
+
+class TestWFSGridCache:
+    """Test cell coverage, deduplication, clipping and expiry"""
+
+    def test_cells_for_bbox(self, grid):
+        assert grid.cells_for_bbox((1.41, 43.61, 1.43, 43.63)) == [(70, 2180), (71, 2180), (70, 2181), (71, 2181)]
+        assert grid.cell_bbox((70, 2180)) == (1.4, 43.6, 1.42, 43.62)
+
+    def test_query_dedupes_and_clips(self, grid):
+        calls = []
+
+        def fetch(bbox):
+            calls.append(bbox)
+            return [f for f in ROADS if WFSGridCache.clip([f], bbox)]
+
+        data = grid.query("ROADS", (1.432, 43.6005, 1.45, 43.61), fetch)
+        assert sorted(f["id"] for f in data["features"]) == ["long", "short"]
+        assert data["cache"] == {"cells": 2, "fetched": 2, "hits": 0}
+
+        # A neighbouring query reuses the cells already on disk
+        data = grid.query("ROADS", (1.44, 43.601, 1.45, 43.605), fetch)
+        assert data["cache"]["fetched"] == 0
+        assert len(calls) == 2
+
+    def test_geometry_check_drops_envelope_only_matches(self):
+        pytest.importorskip("shapely")
+        # The bbox touches the diagonal's envelope corner but not the line itself
+        assert WFSGridCache.clip([ROADS[3]], (1.4201, 43.6201, 1.43, 43.63)) == []
+        assert feature_bounds(ROADS[3]) == (1.4195, 43.6195, 1.4205, 43.6205)
+
+    def test_failed_cell_is_not_cached(self, grid):
+        assert grid.query("ROADS", (1.41, 43.61, 1.412, 43.612), lambda bbox: None) is None
+        assert grid.get_stats()["cached_cells"] == 0
+
+    def test_partial_cell_is_not_cached(self, grid):
+        data = grid.query("ROADS", (1.44, 43.601, 1.45, 43.605), lambda bbox: PartialFeatures(ROADS[:1]))
+        assert [f["id"] for f in data["features"]] == ["short"]
+        assert grid.get_stats()["cached_cells"] == 0
+
+    def test_expired_cells_are_refetched(self, tmp_path):
+        grid = WFSGridCache(str(tmp_path / "wfs.db"), ttl=-1)
+        grid.put_cell("ROADS", (70, 2180), ROADS[:1])
+        assert grid.get_cell("ROADS", (70, 2180)) is None
+
+
+class TestIGNWFSServiceGrid:
+    """Test that spot queries are answered from shared cells"""
+
+    def test_neighbouring_spots_share_cells(self, wfs):
+        first = wfs.query_transport_network((43.602, 1.441), radius=500, transport_type="hiking")
+        upstream = wfs._get.call_count
+        second = wfs.query_transport_network((43.603, 1.442), radius=500, transport_type="hiking")
+
+        assert first["status"] == second["status"] == "success"
+        assert first["cache_status"] == "fresh" and second["cache_status"] == "cached"
+        assert wfs._get.call_count == upstream
+        assert {f["id"] for f in second["data"]["features"]} == {"short", "long"}
+        assert wfs._get.call_args.args[0]["CQL_FILTER"] == "nature = 'Sentier'"
+
+    def test_filters_are_cached_separately(self, wfs):
+        wfs.query_transport_network((43.602, 1.441), radius=500, transport_type="hiking")
+        upstream = wfs._get.call_count
+        wfs.query_transport_network((43.602, 1.441), radius=500, transport_type="roads")
+        assert wfs._get.call_count == 2 * upstream
+
+    def test_upstream_error_uses_fallback(self, wfs):
+        wfs._get.side_effect = lambda params, timeout=None: MagicMock(status_code=503)
+        result = wfs.query_hydrography((43.602, 1.441), radius=500)
+        assert result["status"] == "fallback"
+
+
+class TestDenseCells:
+    """Test that cells hitting the feature cap are split rather than cached truncated"""
+
+    @pytest.fixture
+    def dense(self, wfs):
+        # 4 x 4 trailheads spread over the cell (1.44, 43.60) - (1.46, 43.62)
+        points = [
+            {
+                "type": "Feature",
+                "id": f"p{i}",
+                "geometry": {"type": "Point", "coordinates": [1.4425 + (i % 4) * 0.005, 43.6025 + (i // 4) * 0.005]},
+                "properties": {},
+            }
+            for i in range(16)
+        ]
+
+        def answer(params, timeout=None):
+            bbox = tuple(float(v) for v in params["BBOX"].split(",")[:4])
+            features = WFSGridCache.clip(points, bbox)[: int(params["MAXFEATURES"])]
+            return MagicMock(status_code=200, json=MagicMock(return_value={"features": features}))
+
+        wfs._get.side_effect = answer
+        wfs.cell_max_features = 5
+        return wfs
+
+    def test_dense_cell_is_split_and_cached(self, dense):
+        result = dense.query_hydrography((43.61, 1.45), radius=100)
+
+        assert result["status"] == "success"
+        assert dense._get.call_count == 5  # the cell, then its four quadrants
+        assert dense.grid_cache.get_cell("HYDROGRAPHY.HYDROGRAPHY", (72, 2180)) is not None
+        assert len(dense.grid_cache.get_cell("HYDROGRAPHY.HYDROGRAPHY", (72, 2180))) == 16
+
+    def test_truncated_cell_is_not_cached(self, dense):
+        dense.cell_max_splits = 0
+        result = dense.query_hydrography((43.61, 1.45), radius=100)
+
+        assert result["status"] == "success"
+        assert dense.grid_cache.get_stats()["cached_cells"] == 0
+        dense.query_hydrography((43.61, 1.45), radius=100)
+        assert dense._get.call_count == 2
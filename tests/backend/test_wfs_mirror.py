@@ -0,0 +1,157 @@
+"""Test the GeoPackage mirror of WFS layers"""
+import sqlite3
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+pytest.importorskip("shapely")
+from shapely.geometry import box, shape  # noqa: E402
+
+from src.backend.services.ign_wfs_service import IGNWFSService  # noqa: E402
+from src.backend.services.wfs_mirror import WFSMirror, cql_to_sql, watermark_filter  # noqa: E402
+from src.backend.utils.geopackage import GPKG_APPLICATION_ID  # noqa: E402
+
+
+def road(i, lon, lat, nature="Sentier", modified="2024-01-01"):
+    return {
+        "type": "Feature",
+        "id": f"ROADS.{i}",
+        "geometry": {"type": "LineString", "coordinates": [[lon, lat], [lon + 0.001, lat + 0.001]]},
+        "properties": {"cleabs": f"TRONROUT{i:010d}", "nature": nature, "date_modification": modified},
+    }
+
+
+class FakePagedWFS:
+    """GetFeature stand-in honouring STARTINDEX/COUNT, SORTBY and a ``date_modification >=`` filter"""
+
+    def __init__(self, features):
+        self.features = features
+        self.requests = []
+
+    def __call__(self, params):
+        self.requests.append(params)
+        features = self.features
+        if "CQL_FILTER" in params:
+            since = params["CQL_FILTER"].split("'")[1]
+            features = [f for f in features if f["properties"]["date_modification"] >= since]
+        if "SORTBY" in params:
+            features = sorted(features, key=lambda f: f["properties"][params["SORTBY"].split()[0]])
+        start, count = int(params.get("STARTINDEX", 0)), int(params["COUNT"])
+        page = features[start : start + count]
+        return MagicMock(status_code=200, json=MagicMock(return_value={"features": page}))
+
+
+@pytest.fixture
+def upstream():
+    # A 20 x 20 grid of short trails around Toulouse, every other one a road
+    return FakePagedWFS(
+        [
+            road(i, 1.40 + (i % 20) * 0.005, 43.58 + (i // 20) * 0.005, "Sentier" if i % 2 else "Route")
+            for i in range(400)
+        ]
+    )
+
+
+@pytest.fixture
+def mirror(tmp_path, upstream):
+    mirror = WFSMirror(str(tmp_path / "mirror.gpkg"), page_size=150)
+    mirror._get = upstream
+    return mirror
+
+
+class TestSync:
+    """Test paging, incremental refresh and deletions"""
+
+    def test_full_sync_pages_through_layer(self, mirror, upstream):
+        result = mirror.sync_layer("TRANSPORTNETWORKS.ROADS", (1.3, 43.5, 1.6, 43.7))
+
+        assert result["mode"] == "full"
+        assert result["pages"] == 3 and result["feature_count"] == 400
+        pages = [p for p in upstream.requests if "STARTINDEX" in p]
+        assert [p["STARTINDEX"] for p in pages] == ["0", "150", "300"]
+        assert {p["SORTBY"] for p in pages} == {"cleabs ASC"}
+        assert mirror.get_stats()["layers"]["TRANSPORTNETWORKS.ROADS"]["timestamp_field"] == "date_modification"
+
+    def test_incremental_sync_fetches_modified_features_only(self, mirror, upstream):
+        mirror.sync_layer("TRANSPORTNETWORKS.ROADS")
+        upstream.features[5] = road(5, 1.425, 43.58, "Route", modified="2024-06-01")
+        mirror.sync_layer("TRANSPORTNETWORKS.ROADS")
+        # Modified at the watermark timestamp, but after the previous incremental sync
+        upstream.features[6] = road(6, 1.43, 43.58, "Route", modified="2024-06-01")
+        upstream.requests.clear()
+
+        result = mirror.sync_layer("TRANSPORTNETWORKS.ROADS")
+        assert result["mode"] == "incremental" and result["written"] == 2
+        assert upstream.requests[0]["CQL_FILTER"] == "date_modification >= '2024-06-01'"
+        assert result["watermark"] == "2024-06-01" and result["feature_count"] == 400
+
+        bbox = (1.4249, 43.5799, 1.4311, 43.5811)
+        features = mirror.query("TRANSPORTNETWORKS.ROADS", bbox)["features"]
+        assert [f["properties"]["nature"] for f in features] == ["Route", "Route"]
+
+    def test_invalid_watermark_is_rejected(self):
+        assert watermark_filter("date_maj", "2024-06-01T10:00:00Z") == "date_maj >= '2024-06-01T10:00:00Z'"
+        with pytest.raises(ValueError):
+            watermark_filter("date_maj", "2024-06-01' OR '1'='1")
+
+    def test_full_sync_removes_deleted_features(self, mirror, upstream):
+        mirror.sync_layer("TRANSPORTNETWORKS.ROADS")
+        del upstream.features[:100]
+
+        result = mirror.sync_layer("TRANSPORTNETWORKS.ROADS", full=True)
+        assert result["deleted"] == 100 and result["feature_count"] == 300
+        assert mirror.query("TRANSPORTNETWORKS.ROADS", (1.39, 43.579, 1.50, 43.6))["features"] == []
+
+
+class TestQuery:
+    """Test R-tree lookups and filters"""
+
+    def test_query_matches_brute_force(self, mirror, upstream):
+        mirror.sync_layer("TRANSPORTNETWORKS.ROADS")
+        bbox = (1.4225, 43.5925, 1.4425, 43.6125)
+        expected = sorted(f["id"] for f in upstream.features if shape(f["geometry"]).intersects(box(*bbox)))
+        assert sorted(f["id"] for f in mirror.query("TRANSPORTNETWORKS.ROADS", bbox)["features"]) == expected
+
+        trails = mirror.query("TRANSPORTNETWORKS.ROADS", bbox, "nature = 'Sentier'")["features"]
+        assert trails and all(f["properties"]["nature"] == "Sentier" for f in trails)
+        both = mirror.query("TRANSPORTNETWORKS.ROADS", bbox, "nature IN ('Sentier', 'Route')")["features"]
+        assert len(both) == len(expected)
+
+    def test_unmirrored_layer_or_unsupported_filter(self, mirror):
+        mirror.sync_layer("TRANSPORTNETWORKS.ROADS")
+        assert mirror.query("HYDROGRAPHY.HYDROGRAPHY", (1.4, 43.5, 1.5, 43.6)) is None
+        assert mirror.query("TRANSPORTNETWORKS.ROADS", (1.4, 43.5, 1.5, 43.6), "length > 100") is None
+        assert cql_to_sql("nature = 'Sentier'") == ("json_extract(f.properties, '$.nature') = ?", ["Sentier"])
+
+    def test_query_is_fast(self, mirror):
+        mirror.sync_layer("TRANSPORTNETWORKS.ROADS")
+        start = time.perf_counter()
+        for _ in range(20):
+            mirror.query("TRANSPORTNETWORKS.ROADS", (1.42, 43.59, 1.44, 43.61), limit=50)
+        assert (time.perf_counter() - start) / 20 < 0.01
+
+    def test_file_is_a_geopackage(self, mirror):
+        mirror.sync_layer("TRANSPORTNETWORKS.ROADS")
+        conn = sqlite3.connect(str(mirror.gpkg_path))
+        assert conn.execute("PRAGMA application_id").fetchone()[0] == GPKG_APPLICATION_ID
+        row = conn.execute(
+            "SELECT data_type, identifier, min_x, max_y FROM gpkg_contents WHERE table_name = 'transportnetworks_roads'"
+        ).fetchone()
+        assert row == ("features", "TRANSPORTNETWORKS.ROADS", pytest.approx(1.40), pytest.approx(43.676))
+        assert conn.execute("SELECT COUNT(*) FROM rtree_transportnetworks_roads_geom").fetchone()[0] == 400
+
+
+class TestIGNWFSServiceMirror:
+    def test_offline_service_answers_from_mirror(self, mirror, tmp_path):
+        mirror.sync_layer("TRANSPORTNETWORKS.ROADS")
+        with patch.object(IGNWFSService, "_test_connectivity"):
+            service = IGNWFSService(base_url="http://wfs.test/ows", mirror=mirror)
+        service.is_online = False
+        service._get = MagicMock()
+
+        result = service.query_transport_network((43.60, 1.43), radius=1000, transport_type="hiking")
+        assert result["status"] == "success" and result["cache_status"] == "mirror"
+        assert result["feature_count"] > 0
+        assert service.query_hydrography((43.60, 1.43))["status"] == "fallback"
+        service._get.assert_not_called()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: change detection between two synthetic 20k x 20k SPOT-like scenes
+Writes two 4-band uint16 scenes block by block (textured vegetation, the second one
+shifted by a sub-pixel amount, with random patches of vegetation loss and gain), then times
+ChangeDetector end to end and reports throughput and peak memory
+
+Usage:
+    python tools/benchmarks/bench_change_detection.py --size 20000 --workers 8
+"""
+
+import argparse
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+
+import rasterio  # noqa: E402
+from rasterio.transform import from_origin  # noqa: E402
+from rasterio.windows import Window  # noqa: E402
+from scipy import ndimage  # noqa: E402
+
+from src.backend.raster.change_detection import ChangeDetector  # noqa: E402
+
+X0, Y0, CELL, BLOCK = 540000.0, 6300000.0, 6.0, 1024
+SHIFT = (1.5, -2.0)
+LATTICE = 8  # pixels between random texture nodes
+
+
+def texture_lattice(size: int, seed: int = 0) -> np.ndarray:
+    """Random node values for each band; interpolated they give aperiodic texture"""
+    return np.random.default_rng(seed).normal(size=(4, size // LATTICE + 3, size // LATTICE + 3)).astype(np.float32)
+
+
+def scene_block(lattice: np.ndarray, row: int, col: int, height: int, width: int, shift=(0.0, 0.0)) -> np.ndarray:
+    """Four bands of pseudo-vegetation, a function of the global pixel position (moved by ``shift``)"""
+    rows, cols = np.mgrid[row:row + height, col:col + width].astype(np.float32)
+    coords = np.stack([(rows - shift[0]) / LATTICE, (cols - shift[1]) / LATTICE])
+    bands = [900 + 400 * ndimage.map_coordinates(lattice[b], coords, order=1, mode="nearest") for b in range(4)]
+    bands[3] += 1800  # NIR well above red
+    return np.stack(bands)
+
+
+def write_scene(path: Path, lattice: np.ndarray, size: int, shift=(0.0, 0.0), bare=()):
+    """Write a scene block by block; ``bare`` squares (row, col, side) have NIR = red (no vegetation)"""
+    profile = {
+        "driver": "GTiff", "width": size, "height": size, "count": 4, "dtype": "uint16", "crs": "EPSG:2154",
+        "transform": from_origin(X0, Y0, CELL, CELL), "nodata": 0, "tiled": True, "blockxsize": 512,
+        "blockysize": 512, "compress": "deflate", "BIGTIFF": "IF_SAFER",
+    }
+    with rasterio.open(path, "w", **profile) as dst:
+        for row in range(0, size, BLOCK):
+            for col in range(0, size, BLOCK):
+                height, width = min(BLOCK, size - row), min(BLOCK, size - col)
+                data = scene_block(lattice, row, col, height, width, shift)
+                for r0, c0, side in bare:
+                    r0, c0 = int(round(r0 + shift[0])), int(round(c0 + shift[1]))
+                    rs = slice(min(max(r0 - row, 0), height), min(max(r0 + side - row, 0), height))
+                    cs = slice(min(max(c0 - col, 0), width), min(max(c0 + side - col, 0), width))
+                    data[3, rs, cs] = data[2, rs, cs]
+                dst.write(np.clip(data, 1, 10000).astype(np.uint16), window=Window(col, row, width, height))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=20000, help="Scene side in pixels")
+    parser.add_argument("--patches", type=int, default=2000, help="Changed patches in the second scene")
+    parser.add_argument("--block-size", type=int, default=1024)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--workdir", help="Directory for the scenes and outputs (default: temporary)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as tmp:
+        tmp = Path(tmp)
+        rng = np.random.default_rng(0)
+        patches = [
+            (int(rng.integers(0, args.size - 80)), int(rng.integers(0, args.size - 80)), int(rng.integers(10, 80)))
+            for _ in range(args.patches)
+        ]
+        # A third of the patches are vegetation gains (bare before), the rest losses (bare after)
+        gains, losses = patches[: args.patches // 3], patches[args.patches // 3:]
+        lattice = texture_lattice(args.size)
+        start = time.perf_counter()
+        write_scene(tmp / "old.tif", lattice, args.size, bare=gains)
+        write_scene(tmp / "new.tif", lattice, args.size, shift=SHIFT, bare=losses)
+        generate_seconds = time.perf_counter() - start
+        scene_bytes = (tmp / "old.tif").stat().st_size + (tmp / "new.tif").stat().st_size
+
+        detector = ChangeDetector(
+            str(tmp / "old.tif"), str(tmp / "new.tif"), block_size=args.block_size, workers=args.workers
+        )
+        summary = detector.run(str(tmp / "out"))
+        output_bytes = sum(p.stat().st_size for p in (tmp / "out").iterdir())
+
+    peak_mb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    ) / 1024
+    print("\n" + "=" * 60)
+    print(f"Scenes {args.size}x{args.size} x 4 bands ({scene_bytes / 1e9:.2f} GB on disk), "
+          f"generated in {generate_seconds:.0f}s")
+    print(f"Workers {detector.workers}, blocks {summary['blocks']} of {detector.block_size} px")
+    print(f"Shift estimated {summary['shift_pixels']} px (true {list(SHIFT)})")
+    print(f"{'step':<36} {'seconds':>10} {'Mpx/s':>8}")
+    print("-" * 60)
+    mpx = summary["pixels"] / 1e6
+    print(f"{'difference + classes + polygons':<36} {summary['compute_seconds']:>10.1f} "
+          f"{mpx / summary['compute_seconds']:>8.1f}")
+    print(f"{'end to end (with COG + overviews)':<36} {summary['seconds']:>10.1f} {summary['mpx_per_second']:>8.1f}")
+    print("=" * 60)
+    print(f"Polygons {summary['polygons']} ({summary['polygons_below_min_area']} below min area), "
+          f"-{summary['decrease_ha']} / +{summary['increase_ha']} ha, outputs {output_bytes / 1e6:.0f} MB")
+    print(f"Peak RSS per process {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: WGS84 -> Lambert-93 on 1M points
+Compares the old per-call pattern (new transformer for every point) with the cached,
+vectorized projection module on each available backend, and reports how far the
+pure-NumPy fallback drifts from pyproj
+
+Usage:
+    python tools/benchmarks/bench_projection.py --points 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+
+from src.backend.scrapers import ign_projection  # noqa: E402
+from src.backend.scrapers.ign_projection import LAMBERT93, WGS84, transform  # noqa: E402
+
+
+def occitanie_points(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-0.4, 4.9, count), rng.uniform(42.3, 45.1, count)
+
+
+def run_per_point(lons: np.ndarray, lats: np.ndarray) -> float:
+    """Old pattern: a transformer built inside every call, one point at a time"""
+    from pyproj import Transformer
+
+    start = time.perf_counter()
+    for lon, lat in zip(lons, lats):
+        Transformer.from_crs("EPSG:4326", "EPSG:2154", always_xy=True).transform(lon, lat)
+    return time.perf_counter() - start
+
+
+def run_vectorized(lons: np.ndarray, lats: np.ndarray, backend: str) -> float:
+    transform(lons[:10], lats[:10], WGS84, LAMBERT93, backend)  # build and cache the transformer
+    start = time.perf_counter()
+    transform(lons, lats, WGS84, LAMBERT93, backend)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=1_000_000, help="Points to project")
+    parser.add_argument("--per-point-sample", type=int, default=2000, help="Points timed for the per-call baseline")
+    args = parser.parse_args()
+
+    lons, lats = occitanie_points(args.points)
+    backends = ["numpy"]
+    if ign_projection.GDAL_AVAILABLE:
+        backends.insert(0, "gdal")
+    if ign_projection.PYPROJ_AVAILABLE:
+        backends.insert(0, "pyproj")
+
+    results = {}
+    if ign_projection.PYPROJ_AVAILABLE:
+        sample = min(args.per_point_sample, args.points)
+        results["per-point"] = run_per_point(lons[:sample], lats[:sample]) * args.points / sample
+    for backend in backends:
+        results[backend] = run_vectorized(lons, lats, backend)
+
+    print("\n" + "=" * 60)
+    print(f"{'engine':<12} {'points':>10} {'seconds':>10} {'Mpts/s':>10}")
+    print("-" * 60)
+    for name, seconds in results.items():
+        suffix = "  (extrapolated)" if name == "per-point" else ""
+        print(f"{name:<12} {args.points:>10} {seconds:>10.3f} {args.points / seconds / 1e6:>10.2f}{suffix}")
+    print("=" * 60)
+
+    if ign_projection.PYPROJ_AVAILABLE:
+        ref_x, ref_y = transform(lons, lats, WGS84, LAMBERT93, "pyproj")
+        np_x, np_y = transform(lons, lats, WGS84, LAMBERT93, "numpy")
+        drift = np.hypot(ref_x - np_x, ref_y - np_y).max()
+        print(f"NumPy fallback max deviation from pyproj: {drift * 1000:.6f} mm")
+        if "per-point" in results:
+            print(f"Speed-up (pyproj vectorized vs per-point): {results['per-point'] / results['pyproj']:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-process WMTS download vs sharded multi-process download
+Both engines run against the local fake geoservices so results are repeatable
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "scripts"))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from download_ign_wmts import IGNWMTSDownloader  # noqa: E402
+from download_tiles_sharded import ShardedTileDownloader  # noqa: E402
+from fake_geoservices import FakeGeoServices  # noqa: E402
+from src.backend.utils.mbtiles import tile_count  # noqa: E402
+
+
+def run_single(wmts_base: str, out_dir: Path, bbox, zooms, max_tiles: int) -> float:
+    downloader_cls = type("LocalWMTSDownloader", (IGNWMTSDownloader,), {"WMTS_BASE": wmts_base})
+    downloader = downloader_cls(str(out_dir))
+    start = time.perf_counter()
+    downloader.download_area("plan", bbox, zooms, max_tiles=max_tiles)
+    elapsed = time.perf_counter() - start
+    for conn in downloader.dbs.values():
+        conn.close()
+    return elapsed
+
+
+def run_sharded(wmts_base: str, out_dir: Path, bbox, zooms, max_tiles: int, shards: int, strategy: str) -> float:
+    downloader = ShardedTileDownloader(str(out_dir), num_shards=shards, strategy=strategy, wmts_base=wmts_base)
+    start = time.perf_counter()
+    downloader.download_area("plan", bbox, zooms, max_tiles=max_tiles)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tiles", type=int, default=2000, help="Number of tiles to download")
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake server latency per tile (s)")
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--strategy", default="quadkey", choices=["quadkey", "range"])
+    args = parser.parse_args()
+
+    bbox = (1.0, 43.3, 1.9, 43.9)  # Toulouse area
+    zooms = [12, 13, 14, 15]
+    service = FakeGeoServices(latency=args.latency).start()
+    wmts_base = f"{service.url}/wmts"
+
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            single_dir = Path(tmp) / "single"
+            sharded_dir = Path(tmp) / "sharded"
+            results["single"] = run_single(wmts_base, single_dir, bbox, zooms, args.tiles)
+            results["sharded"] = run_sharded(wmts_base, sharded_dir, bbox, zooms, args.tiles, args.shards, args.strategy)
+            single_tiles = tile_count(single_dir / "ign_plan.mbtiles")
+            sharded_tiles = tile_count(sharded_dir / "ign_plan.mbtiles")
+    finally:
+        service.stop()
+
+    print("\n" + "=" * 60)
+    print(f"{'engine':<10} {'tiles':>8} {'seconds':>10} {'tiles/s':>10}")
+    print("-" * 60)
+    for name, tiles in (("single", single_tiles), ("sharded", sharded_tiles)):
+        print(f"{name:<10} {tiles:>8} {results[name]:>10.2f} {tiles / results[name]:>10.1f}")
+    print("=" * 60)
+    print(f"Speed-up: {results['single'] / results['sharded']:.2f}x with {args.shards} shards ({args.strategy})")
+
+
+if __name__ == "__main__":
+    main()
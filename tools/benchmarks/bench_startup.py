@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: API startup time
+Imports each router module (and the app) in a fresh interpreter, which is what startup pays
+now that services are registered instead of built, then builds every registered service the
+way the background warm-up does and reports per-service init times (the cost imports used to carry)
+
+Usage:
+    python tools/benchmarks/bench_startup.py --repeat 3
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+
+MODULES = [
+    "src.backend.api.mapping_france",
+    "src.backend.api.ign_offline",
+    "src.backend.api.ign_data",
+    "src.backend.api.vision_api",
+    "src.backend.main",
+]
+
+IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+try:
+    import {module}
+    error = None
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+print(json.dumps({{"seconds": time.perf_counter() - start, "error": error}}))
+"""
+
+WARM_UP_SNIPPET = """
+import asyncio, importlib, json
+from src.backend.services.registry import registry
+for module in {modules!r}:
+    try:
+        importlib.import_module(module)
+    except Exception:
+        pass
+names = list(registry.status()["services"])
+asyncio.run(registry.warm_up(names))
+print(json.dumps(registry.status()))
+"""
+
+
+def run_snippet(code: str, timeout: float) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=timeout
+    ).stdout.strip()
+    return json.loads(out.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API startup (imports and service warm-up)")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per module")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds per subprocess")
+    args = parser.parse_args()
+
+    print(f"{'module':<36} {'import (s)':>11}  note")
+    for module in MODULES:
+        runs = [run_snippet(IMPORT_SNIPPET.format(module=module), args.timeout) for _ in range(args.repeat)]
+        error = runs[-1]["error"]
+        median = statistics.median(r["seconds"] for r in runs)
+        print(f"{module:<36} {median:>11.3f}  {('import failed: ' + error[:60]) if error else ''}")
+
+    # Service construction, measured once in a single process (as the background warm-up runs it)
+    status = run_snippet(WARM_UP_SNIPPET.format(modules=MODULES[:-1]), args.timeout)
+    print(f"\n{'service':<22} {'warm':>5} {'state':>9} {'init (s)':>9}  error")
+    for name, service in status["services"].items():
+        init = f"{service['init_seconds']:.3f}" if service["init_seconds"] is not None else "-"
+        print(
+            f"{name:<22} {str(service['warm']):>5} {service['state']:>9} {init:>9}  {(service['error'] or '')[:50]}"
+        )
+    print(f"\nwarm-up wall time (concurrent): {status['warm_up_seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: difficulty scores for 100k spots from precomputed terrain grids
+Builds a terrain grid from a synthetic 5 m DEM (fractal-ish relief, Lambert-93), then
+times the batch grid lookup and BasicGeoAI.calculate_difficulty_scores() against the
+per-spot local DEM sampling of calculate_difficulty_score() on a sample
+
+Usage:
+    python tools/benchmarks/bench_terrain_scores.py --spots 100000 --size 4000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+
+import rasterio  # noqa: E402
+from rasterio.transform import from_origin  # noqa: E402
+
+from src.backend.raster.dem import DEMElevationService  # noqa: E402
+from src.backend.raster.terrain import TerrainStore, build_terrain_grid  # noqa: E402
+from src.backend.scrapers.ign_projection import lambert93_to_wgs84  # noqa: E402
+from src.backend.services.basic_geoai import BasicGeoAI  # noqa: E402
+
+X0, Y0, CELL = 570000.0, 6300000.0, 5.0
+
+
+def synthetic_dem(path: Path, size: int, seed: int = 0):
+    """Sum of random sinusoids at several wavelengths: hills with slopes from flat to steep"""
+    rng = np.random.default_rng(seed)
+    rows, cols = np.mgrid[0:size, 0:size].astype(np.float32)
+    z = np.full((size, size), 800.0, dtype=np.float32)
+    for wavelength in (2000, 600, 150):
+        for _ in range(3):
+            angle, phase = rng.uniform(0, np.pi), rng.uniform(0, 2 * np.pi)
+            u = (cols * np.cos(angle) + rows * np.sin(angle)) * CELL
+            z += wavelength * 0.15 * np.sin(2 * np.pi * u / wavelength + phase).astype(np.float32)
+    with rasterio.open(
+        path, "w", driver="GTiff", width=size, height=size, count=1, dtype="float32", crs="EPSG:2154",
+        transform=from_origin(X0, Y0, CELL, CELL), tiled=True, compress="deflate",
+    ) as dst:
+        dst.write(z, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--spots", type=int, default=100_000, help="Spots scored")
+    parser.add_argument("--size", type=int, default=4000, help="DEM side in cells (5 m)")
+    parser.add_argument("--per-spot-sample", type=int, default=200, help="Spots timed for the per-spot baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / "dem").mkdir()
+        synthetic_dem(tmp / "dem" / "31.tif", args.size)
+
+        start = time.perf_counter()
+        build_terrain_grid(tmp / "dem" / "31.tif", tmp / "terrain" / "31")
+        build_seconds = time.perf_counter() - start
+        grid_bytes = sum(p.stat().st_size for p in (tmp / "terrain").rglob("*.npz"))
+
+        rng = np.random.default_rng(1)
+        extent = args.size * CELL
+        xs, ys = X0 + rng.uniform(0, extent, args.spots), Y0 - rng.uniform(0, extent, args.spots)
+        lons, lats = lambert93_to_wgs84(xs, ys)
+        types = np.array(["waterfall", "cave", "spring", "ruins"])[rng.integers(0, 4, args.spots)]
+        spots = [
+            {"id": i, "latitude": lat, "longitude": lon, "type": t, "description": ""}
+            for i, (lat, lon, t) in enumerate(zip(lats, lons, types))
+        ]
+
+        geoai = BasicGeoAI()
+        geoai.dem = DEMElevationService([str(tmp / "dem")], cache_dir=str(tmp / "npy"))
+        geoai.terrain_grids = TerrainStore(str(tmp / "terrain"))
+
+        start = time.perf_counter()
+        geoai.terrain_grids.sample(lats, lons)
+        lookup_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scores = geoai.calculate_difficulty_scores(spots)
+        batch_seconds = time.perf_counter() - start
+
+        # Baseline without grids: each spot samples the local DEM around it
+        geoai.terrain_grids = TerrainStore(str(tmp / "no_grids"))
+        sample = spots[: args.per_spot_sample]
+        geoai.calculate_difficulty_score(sample[0])  # convert the DEM to .npy outside the timing
+        start = time.perf_counter()
+        for spot in sample:
+            geoai.calculate_difficulty_score(spot)
+        per_spot_seconds = (time.perf_counter() - start) * args.spots / len(sample)
+
+    levels = {level: sum(s["overall"] == level for s in scores) for level in ("easy", "moderate", "difficult")}
+    print("\n" + "=" * 60)
+    print(f"DEM {args.size}x{args.size} @ {CELL:.0f} m, grid built in {build_seconds:.1f}s "
+          f"({grid_bytes / 1e6:.1f} MB compressed)")
+    print(f"{'step':<32} {'spots':>8} {'seconds':>10}")
+    print("-" * 60)
+    print(f"{'grid lookup (batch)':<32} {args.spots:>8} {lookup_seconds:>10.3f}")
+    print(f"{'difficulty scores (batch)':<32} {args.spots:>8} {batch_seconds:>10.3f}")
+    print(f"{'difficulty per spot (local DEM)':<32} {args.spots:>8} {per_spot_seconds:>10.1f}  (extrapolated)")
+    print("=" * 60)
+    print(f"Levels: {levels}")
+
+
+if __name__ == "__main__":
+    main()
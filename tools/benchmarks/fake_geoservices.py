@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the French geoservices used by SPOTS
+Serves deterministic WMTS/OSM tiles, WFS GeoJSON, BAN geocoding and IGN altimetry
+responses, with configurable latency, error-rate and 429 injection
+
+Routes (mirroring the real hosts' paths):
+    /wmts                          data.geopf.fr WMTS (GetCapabilities, GetTile)
+    /tiles/{z}/{x}/{y}.png         tile.openstreetmap.org
+    /wfs/ows                       data.geopf.fr WFS (GetCapabilities, GetFeature)
+    /geocodage/search|reverse      data.geopf.fr BAN geocoding
+    /geocodage/search|reverse/csv  BAN bulk CSV geocoding (multipart POST)
+    /search, /reverse              api-adresse.data.gouv.fr (legacy BAN, also /csv)
+    /altimetrie/1.0/calcul/alti    data.geopf.fr altimetry
+
+Usage:
+    python tools/benchmarks/fake_geoservices.py --port 8765 --latency 0.05 --error-rate 0.01
+"""
+
+import argparse
+import csv
+import email.parser
+import email.policy
+import hashlib
+import io
+import json
+import math
+import random
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+COMMUNES = [
+    ("Toulouse", "31000", "31, Haute-Garonne, Occitanie", 43.6045, 1.4440),
+    ("Montpellier", "34000", "34, Hérault, Occitanie", 43.6108, 3.8767),
+    ("Carcassonne", "11000", "11, Aude, Occitanie", 43.2130, 2.3491),
+    ("Foix", "09000", "09, Ariège, Occitanie", 42.9653, 1.6070),
+    ("Albi", "81000", "81, Tarn, Occitanie", 43.9289, 2.1464),
+    ("Perpignan", "66000", "66, Pyrénées-Orientales, Occitanie", 42.6887, 2.8948),
+]
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+def make_tile(z: int, x: int, y: int, size: int = 256, payload: int = 4096) -> bytes:
+    """Deterministic PNG for a tile; the payload chunk makes it roughly real-tile sized"""
+    seed = hashlib.sha256(f"{z}/{x}/{y}".encode()).digest()
+    row = bytes(seed[i % len(seed)] for i in range(size * 3))
+    raw = b"".join(b"\x00" + row for _ in range(size))
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    text = b"tile\x00" + (seed * (payload // len(seed) + 1))[:payload]
+    return (
+        PNG_SIGNATURE
+        + _png_chunk(b"IHDR", header)
+        + _png_chunk(b"tEXt", text)
+        + _png_chunk(b"IDAT", zlib.compress(raw, 1))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+def fake_elevation(lat: float, lon: float) -> float:
+    """Smooth synthetic terrain: plains in the north, Pyrenees-like relief in the south"""
+    relief = max(0.0, 43.3 - lat) * 2500
+    ripple = 150 * math.sin(lat * 40) * math.cos(lon * 40)
+    return round(max(0.0, 150 + relief + ripple), 2)
+
+
+def nearest_commune(lat: float, lon: float):
+    return min(COMMUNES, key=lambda c: (c[3] - lat) ** 2 + (c[4] - lon) ** 2)
+
+
+class BacklogHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with a listen backlog sized for the harness concurrency
+
+    The default backlog of 5 overflows under dozens of concurrent clients; the
+    dropped SYNs are retransmitted after ~1 s and dominate the measured latency.
+    """
+
+    request_queue_size = 1024
+
+
+class FaultInjector:
+    """Decides per request whether to delay, fail or rate-limit (seeded, thread-safe)"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        max_rps: Optional[float] = None,
+        retry_after: float = 1.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = max_rps or 0.0
+        self._last_refill = time.monotonic()
+
+    def decide(self) -> Tuple[float, Optional[int]]:
+        """Return (delay seconds, forced status code or None)"""
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            roll = self._random.random()
+
+            if self.max_rps:
+                now = time.monotonic()
+                self._tokens = min(self.max_rps, self._tokens + (now - self._last_refill) * self.max_rps)
+                self._last_refill = now
+                if self._tokens < 1:
+                    return delay, 429
+                self._tokens -= 1
+
+        if roll < self.rate_limit_rate:
+            return delay, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, 503
+        return delay, None
+
+
+class FakeGeoServices:
+    """Threaded HTTP server emulating WMTS, WFS, BAN and altimetry endpoints"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, wfs_features: int = 20, **fault_options):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            wfs_features: Features returned per WFS GetFeature (before COUNT/MAXFEATURES)
+            **fault_options: FaultInjector options (latency, jitter, error_rate,
+                             rate_limit_rate, max_rps, retry_after, seed)
+        """
+        self.faults = FaultInjector(**fault_options)
+        self.wfs_features = wfs_features
+        self.stats: Counter = Counter()
+        self._stats_lock = threading.Lock()
+        self._tile_cache: Dict[Tuple[int, int, int], bytes] = {}
+        self._server = BacklogHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGeoServices":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    # ------------------------------------------------------------------
+    # Responses
+    # ------------------------------------------------------------------
+
+    def tile(self, z: int, x: int, y: int) -> bytes:
+        key = (z, x, y)
+        data = self._tile_cache.get(key)
+        if data is None:
+            data = make_tile(z, x, y)
+            if len(self._tile_cache) < 10000:
+                self._tile_cache[key] = data
+        return data
+
+    def wfs_features_for(self, typename: str, bbox: Optional[List[float]], count: int, start: int = 0) -> Dict:
+        """Deterministic point/line features spread over the requested bbox"""
+        minx, miny, maxx, maxy = bbox if bbox else (1.40, 43.55, 1.50, 43.65)
+        seed = int(hashlib.md5(f"{typename}{minx:.4f}{miny:.4f}".encode()).hexdigest()[:8], 16)
+        rng = random.Random(seed)
+        features = []
+        for i in range(self.wfs_features):
+            fx = minx + rng.random() * (maxx - minx)
+            fy = miny + rng.random() * (maxy - miny)
+            if i < start:
+                continue
+            if len(features) >= count:
+                break
+            if "ROADS" in typename or "HYDRO" in typename:
+                geometry = {"type": "LineString", "coordinates": [[fx, fy], [fx + 0.001, fy + 0.001]]}
+            else:
+                geometry = {"type": "Point", "coordinates": [fx, fy]}
+            features.append(
+                {
+                    "type": "Feature",
+                    "id": f"{typename}.{seed:08x}{i:04d}",  # unique across bboxes, like real WFS ids
+                    "geometry": geometry,
+                    "properties": {"nature": rng.choice(["Sentier", "Route", "Chemin", "Cours d'eau"]), "index": i},
+                }
+            )
+        return {
+            "type": "FeatureCollection",
+            "numberMatched": self.wfs_features,
+            "numberReturned": len(features),
+            "features": features,
+        }
+
+    def ban_feature(self, lat: float, lon: float, label: str, score: float) -> Dict:
+        city, postcode, context, _, _ = nearest_commune(lat, lon)
+        return {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "properties": {
+                "label": label or f"{city} {postcode}",
+                "score": score,
+                "city": city,
+                "postcode": postcode,
+                "citycode": postcode,
+                "context": context,
+                "type": "street",
+                "importance": 0.6,
+            },
+        }
+
+    def ban_search(self, query: str) -> Dict:
+        """Stable pseudo-geocode: hash the query to a point near a known commune"""
+        digest = hashlib.sha256(query.strip().lower().encode()).digest()
+        commune = next((c for c in COMMUNES if c[0].lower() in query.lower()), COMMUNES[digest[0] % len(COMMUNES)])
+        lat = commune[3] + (digest[1] - 128) / 12800
+        lon = commune[4] + (digest[2] - 128) / 12800
+        return {"type": "FeatureCollection", "features": [self.ban_feature(lat, lon, f"{query}", 0.9)]}
+
+    def ban_reverse(self, lat: float, lon: float) -> Dict:
+        city, postcode, _, _, _ = nearest_commune(lat, lon)
+        label = f"{int(abs(lat * 1000)) % 200 + 1} Rue de la Paix {postcode} {city}"
+        return {"type": "FeatureCollection", "features": [self.ban_feature(lat, lon, label, 0.95)]}
+
+    def ban_csv(self, kind: str, rows: List[Dict], columns: List[str]) -> bytes:
+        """Answer a BAN bulk upload: echo each row with latitude/longitude/result_* columns"""
+        out = io.StringIO()
+        fields = list(rows[0].keys()) if rows else []
+        extra = ["latitude", "longitude", "result_label", "result_score", "result_type", "result_city",
+                 "result_postcode", "result_context", "result_status"]
+        writer = csv.DictWriter(out, fieldnames=fields + extra)
+        writer.writeheader()
+        for row in rows:
+            if kind == "search":
+                query = " ".join(row.get(c, "") for c in columns).strip()
+                collection = self.ban_search(query) if query else {"features": []}
+            else:
+                collection = self.ban_reverse(float(row["lat"]), float(row["lon"]))
+            features = collection["features"]
+            if not features:
+                writer.writerow({**row, "result_status": "not-found"})
+                continue
+            props = features[0]["properties"]
+            lon, lat = features[0]["geometry"]["coordinates"]
+            writer.writerow({
+                **row,
+                "latitude": lat,
+                "longitude": lon,
+                "result_label": props["label"],
+                "result_score": props["score"],
+                "result_type": props["type"],
+                "result_city": props["city"],
+                "result_postcode": props["postcode"],
+                "result_context": props["context"],
+                "result_status": "ok",
+            })
+        return out.getvalue().encode("utf-8")
+
+    # ------------------------------------------------------------------
+    # HTTP handler
+    # ------------------------------------------------------------------
+
+    def _make_handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict] = None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self, payload: Dict, status: int = 200):
+                self._send(status, json.dumps(payload).encode(), "application/json")
+
+            def _inject_faults(self) -> bool:
+                """Apply latency/failure injection; True when a fault response was sent"""
+                delay, forced = service.faults.decide()
+                if delay:
+                    time.sleep(delay)
+                if forced == 429:
+                    service.count("429")
+                    self._send(429, b"Too Many Requests", "text/plain",
+                               {"Retry-After": f"{service.faults.retry_after:g}"})
+                    return True
+                if forced:
+                    service.count(str(forced))
+                    self._send(forced, b"Service Unavailable", "text/plain")
+                    return True
+                return False
+
+            def do_POST(self):
+                parsed = urlparse(self.path)
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                kind = "search" if parsed.path.endswith("/search/csv") else "reverse"
+                if not parsed.path.endswith("/csv"):
+                    self._send(404, b"Not Found", "text/plain")
+                    return
+                service.count(f"{kind}_csv")
+                if self._inject_faults():
+                    return
+
+                # Multipart form: a "data" CSV file plus optional repeated "columns" fields
+                message = email.parser.BytesParser(policy=email.policy.default).parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+                )
+                data, columns = b"", []
+                for part in message.iter_parts():
+                    name = part.get_param("name", header="content-disposition")
+                    if name == "data":
+                        data = part.get_payload(decode=True)
+                    elif name == "columns":
+                        columns.append(part.get_content().strip())
+                rows = list(csv.DictReader(io.StringIO(data.decode("utf-8-sig"))))
+                if not rows:
+                    self._send(400, b"empty CSV", "text/plain")
+                    return
+                columns = columns or [c for c in rows[0] if c not in ("id", "lat", "lon")]
+                self._send(200, service.ban_csv(kind, rows, columns), "text/csv; charset=utf-8")
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {k.upper(): v[-1] for k, v in parse_qs(parsed.query).items()}
+                route = self._route(parsed.path)
+                service.count(route)
+
+                if self._inject_faults():
+                    return
+
+                try:
+                    handler = getattr(self, f"_handle_{route}", None)
+                    if handler is None:
+                        self._send(404, b"Not Found", "text/plain")
+                    else:
+                        handler(parsed.path, params)
+                except (KeyError, ValueError) as e:
+                    self._json({"error": f"bad request: {e}"}, status=400)
+
+            @staticmethod
+            def _route(path: str) -> str:
+                if path.startswith("/wmts"):
+                    return "wmts"
+                if path.startswith("/tiles/"):
+                    return "osm"
+                if path.startswith("/wfs"):
+                    return "wfs"
+                if path.endswith("/search") or path == "/search":
+                    return "search"
+                if path.endswith("/reverse"):
+                    return "reverse"
+                if path.startswith("/altimetrie"):
+                    return "alti"
+                return "unknown"
+
+            def _handle_wmts(self, path: str, params: Dict):
+                if params.get("REQUEST", "").lower() == "getcapabilities":
+                    self._send(200, b"<Capabilities version=\"1.0.0\"/>", "application/xml")
+                    return
+                z, x, y = int(params["TILEMATRIX"]), int(params["TILECOL"]), int(params["TILEROW"])
+                self._send(200, service.tile(z, x, y), "image/png")
+
+            def _handle_osm(self, path: str, params: Dict):
+                z, x, y = path.rsplit(".", 1)[0].split("/")[-3:]
+                self._send(200, service.tile(int(z), int(x), int(y)), "image/png")
+
+            def _handle_wfs(self, path: str, params: Dict):
+                if params.get("REQUEST", "").lower() != "getfeature":
+                    self._send(200, b"<WFS_Capabilities version=\"2.0.0\"/>", "application/xml")
+                    return
+                bbox = None
+                if "BBOX" in params:
+                    bbox = [float(v) for v in params["BBOX"].split(",")[:4]]
+                count = int(params.get("COUNT") or params.get("MAXFEATURES") or service.wfs_features)
+                start = int(params.get("STARTINDEX", 0))
+                typename = params.get("TYPENAME") or params.get("TYPENAMES", "")
+                self._json(service.wfs_features_for(typename, bbox, count, start))
+
+            def _handle_search(self, path: str, params: Dict):
+                self._json(service.ban_search(params["Q"]))
+
+            def _handle_reverse(self, path: str, params: Dict):
+                self._json(service.ban_reverse(float(params["LAT"]), float(params["LON"])))
+
+            def _handle_alti(self, path: str, params: Dict):
+                lats = [float(v) for v in params["LAT"].split("|")]
+                lons = [float(v) for v in params["LON"].split("|")]
+                elevations = [fake_elevation(lat, lon) for lat, lon in zip(lats, lons)]
+                if params.get("ZONLY", "false").lower() == "true":
+                    self._json({"elevations": elevations})
+                else:
+                    self._json({"elevations": [
+                        {"lat": lat, "lon": lon, "z": z, "acc": 2.5} for lat, lon, z in zip(lats, lons, elevations)
+                    ]})
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake French geoservices for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Base latency per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction answered with 429")
+    parser.add_argument("--max-rps", type=float, default=None, help="Token bucket; excess requests get 429")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    service = FakeGeoServices(
+        args.host,
+        args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        max_rps=args.max_rps,
+        seed=args.seed,
+    )
+    print(f"Fake geoservices listening on {service.url}")
+    try:
+        service._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Requests served: {dict(service.stats)}")
+
+
+if __name__ == "__main__":
+    main()
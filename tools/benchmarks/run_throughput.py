@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Throughput harness: drive the real downloaders and services against the fake geoservices
+Records requests/sec, operations/sec and client-side latency percentiles (p50/p95/p99)
+
+Usage:
+    python tools/benchmarks/run_throughput.py --scenario all --latency 0.03 --error-rate 0.02
+    python tools/benchmarks/run_throughput.py --scenario wfs --rate-limit-rate 0.05 --json results.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import requests
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "scripts"))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from fake_geoservices import FakeGeoServices  # noqa: E402
+
+SCENARIOS = ["wmts", "wfs", "geocode", "reverse", "elevation", "geocode_csv", "reverse_csv"]
+
+
+class LatencyRecorder:
+    """Capture per-request latency and status for every requests call made in-process"""
+
+    def __init__(self):
+        self.samples: List[float] = []
+        self.statuses: Dict[int, int] = {}
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def recording(self):
+        original_send = requests.adapters.HTTPAdapter.send
+        recorder = self
+
+        def timed_send(adapter, request, **kwargs):
+            start = time.perf_counter()
+            try:
+                response = original_send(adapter, request, **kwargs)
+            except Exception:
+                with recorder._lock:
+                    recorder.errors += 1
+                raise
+            elapsed = time.perf_counter() - start
+            with recorder._lock:
+                recorder.samples.append(elapsed)
+                recorder.statuses[response.status_code] = recorder.statuses.get(response.status_code, 0) + 1
+            return response
+
+        requests.adapters.HTTPAdapter.send = timed_send
+        try:
+            yield self
+        finally:
+            requests.adapters.HTTPAdapter.send = original_send
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, recorder: LatencyRecorder, operations: int, elapsed: float) -> Dict:
+    samples = recorder.samples
+    requests_made = len(samples) + recorder.errors
+    return {
+        "scenario": name,
+        "operations": operations,
+        "requests": requests_made,
+        "seconds": round(elapsed, 3),
+        "ops_per_sec": round(operations / elapsed, 1) if elapsed else 0.0,
+        "requests_per_sec": round(requests_made / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 1),
+        "p95_ms": round(percentile(samples, 95) * 1000, 1),
+        "p99_ms": round(percentile(samples, 99) * 1000, 1),
+        "mean_ms": round(statistics.mean(samples) * 1000, 1) if samples else 0.0,
+        "statuses": {str(k): v for k, v in sorted(recorder.statuses.items())},
+        "transport_errors": recorder.errors,
+    }
+
+
+def run_scenario(name: str, setup: Callable[[], Callable[[], int]]) -> Dict:
+    """Setup builds the workload outside the timed section; the workload returns an operation count"""
+    workload = setup()
+    recorder = LatencyRecorder()
+    with recorder.recording():
+        start = time.perf_counter()
+        operations = workload()
+        elapsed = time.perf_counter() - start
+    return summarize(name, recorder, operations, elapsed)
+
+
+# ----------------------------------------------------------------------
+# Scenarios
+# ----------------------------------------------------------------------
+
+
+def wmts_scenario(service: FakeGeoServices, size: int, workers: int, tmp_dir: Path):
+    from download_ign_wmts import IGNWMTSDownloader
+
+    downloader_cls = type("FakeWMTSDownloader", (IGNWMTSDownloader,), {"WMTS_BASE": f"{service.url}/wmts"})
+
+    def setup():
+        downloader = downloader_cls(str(tmp_dir / "wmts"))
+
+        def workload():
+            stats = downloader.download_area("plan", (1.0, 43.3, 1.9, 43.9), [12, 13, 14, 15], max_tiles=size)
+            return stats["downloaded"] + stats["failed"]
+
+        return workload
+
+    return setup
+
+
+def wfs_scenario(service: FakeGeoServices, size: int, workers: int, tmp_dir: Path):
+    from src.backend.services.ign_wfs_service import IGNWFSService
+    from src.backend.services.wfs_grid_cache import WFSGridCache
+
+    def setup():
+        # Fresh grid cache per scenario; cell reuse between nearby spots is part of the measurement
+        grid_cache = WFSGridCache(str(tmp_dir / f"wfs_{time.monotonic_ns()}.db"))
+        wfs = IGNWFSService(base_url=f"{service.url}/wfs/ows", grid_cache=grid_cache)
+        spots = [(i, (43.0 + (i % 50) * 0.01, 1.0 + (i // 50) * 0.01)) for i in range(size)]
+
+        def workload():
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda s: wfs.analyze_spot_surroundings(s[0], s[1]), spots))
+            return len(spots)
+
+        return workload
+
+    return setup
+
+
+def _geocoder(service: FakeGeoServices, tmp_dir: Path):
+    from src.backend.scrapers.geocoding_cache import GeocodingCache
+    from src.backend.scrapers.geocoding_france import OccitanieGeocoder
+
+    geocoder = OccitanieGeocoder()
+    # Fresh cache per scenario so every operation reaches the fake server
+    geocoder.geocode_cache = GeocodingCache(str(tmp_dir / f"geocode_{time.monotonic_ns()}.db"))
+    geocoder.ban_base_url = f"{service.url}/geocodage"
+    geocoder.ban_legacy_url = service.url
+    geocoder.ign_elevation_url = f"{service.url}/altimetrie/1.0/calcul/alti"
+    return geocoder
+
+
+def geocode_scenario(service: FakeGeoServices, size: int, workers: int, tmp_dir: Path):
+    def setup():
+        geocoder = _geocoder(service, tmp_dir)
+        addresses = [f"{i} rue du Taur, Toulouse" for i in range(size)]
+
+        def workload():
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(geocoder.geocode_address, addresses))
+            return len(addresses)
+
+        return workload
+
+    return setup
+
+
+def reverse_scenario(service: FakeGeoServices, size: int, workers: int, tmp_dir: Path):
+    def setup():
+        geocoder = _geocoder(service, tmp_dir)
+        points = [(43.0 + i * 0.0007, 1.2 + i * 0.0011) for i in range(size)]
+
+        def workload():
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda p: geocoder.reverse_geocode(*p), points))
+            return len(points)
+
+        return workload
+
+    return setup
+
+
+def elevation_scenario(service: FakeGeoServices, size: int, workers: int, tmp_dir: Path):
+    def setup():
+        geocoder = _geocoder(service, tmp_dir)
+        points = [(42.6 + i * 0.0009, 0.5 + i * 0.0013) for i in range(size)]
+
+        def workload():
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda p: geocoder.get_elevation_ign(*p), points))
+            return len(points)
+
+        return workload
+
+    return setup
+
+
+def geocode_csv_scenario(service: FakeGeoServices, size: int, workers: int, tmp_dir: Path):
+    def setup():
+        geocoder = _geocoder(service, tmp_dir)
+        geocoder.batch_chunk_size = max(1, size // 4)
+        addresses = [f"{i} rue du Taur, Toulouse" for i in range(size)]
+
+        def workload():
+            geocoder.geocode_many(addresses)
+            return len(addresses)
+
+        return workload
+
+    return setup
+
+
+def reverse_csv_scenario(service: FakeGeoServices, size: int, workers: int, tmp_dir: Path):
+    def setup():
+        geocoder = _geocoder(service, tmp_dir)
+        geocoder.batch_chunk_size = max(1, size // 4)
+        points = [(43.0 + i * 0.0007, 1.2 + i * 0.0011) for i in range(size)]
+
+        def workload():
+            geocoder.reverse_many(points)
+            return len(points)
+
+        return workload
+
+    return setup
+
+
+SCENARIO_BUILDERS = {
+    "wmts": wmts_scenario,
+    "wfs": wfs_scenario,
+    "geocode": geocode_scenario,
+    "reverse": reverse_scenario,
+    "elevation": elevation_scenario,
+    "geocode_csv": geocode_csv_scenario,
+    "reverse_csv": reverse_csv_scenario,
+}
+
+
+def print_report(results: List[Dict]):
+    print("\n" + "=" * 96)
+    print(
+        f"{'scenario':<10} {'ops':>6} {'reqs':>6} {'secs':>8} {'ops/s':>8} {'req/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses"
+    )
+    print("-" * 96)
+    for r in results:
+        print(
+            f"{r['scenario']:<10} {r['operations']:>6} {r['requests']:>6} {r['seconds']:>8.2f} "
+            f"{r['ops_per_sec']:>8.1f} {r['requests_per_sec']:>8.1f} {r['p50_ms']:>8.1f} "
+            f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}  {r['statuses']}"
+        )
+    print("=" * 96)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline throughput benchmarks for SPOTS geoservice clients")
+    parser.add_argument("--scenario", default="all", choices=["all"] + SCENARIOS)
+    parser.add_argument("--size", type=int, default=300, help="Operations per scenario")
+    parser.add_argument("--workers", type=int, default=16, help="Client threads for service scenarios")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS if args.scenario == "all" else [args.scenario]
+    service = FakeGeoServices(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        max_rps=args.max_rps,
+        seed=args.seed,
+    )
+
+    results = []
+    with service, tempfile.TemporaryDirectory() as tmp:
+        for name in scenarios:
+            print(f"▶ {name}")
+            setup = SCENARIO_BUILDERS[name](service, args.size, args.workers, Path(tmp))
+            results.append(run_scenario(name, setup))
+
+    print_report(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -300,11 +300,15 @@ def classify_landcover(spot_layer):
 
 def analyze_urban_growth(spot_old, spot_new):
     """Compare two SPOT images for urban change"""
+    # Full scenes are processed outside QGIS (co-registration, block-wise NDVI difference,
+    # change polygons and per-quartier summary) so the GUI stays responsive
+    old_path = spot_old.source() if hasattr(spot_old, 'source') else spot_old
+    new_path = spot_new.source() if hasattr(spot_new, 'source') else spot_new
     print("\nUrban Growth Analysis")
-    print("1. Classify both images")
-    print("2. Reclassify to urban/non-urban")
-    print("3. Calculate difference")
-    print("4. Generate statistics")
+    print("Run the headless change-detection pipeline from the SPOTS repository:")
+    print(f"  python scripts/detect_spot_changes.py {old_path} {new_path} \\")
+    print(f"      --output {os.path.join(OUTPUT_DIR, 'changes')} --districts <quartiers.geojson>")
+    print("Then load changes/change_polygons.gpkg and change_classes.tif here")
 
 def extract_green_spaces():
     """Extract parks and green areas"""